@@ -5,7 +5,8 @@ Endpoints for testing experimental features like OpenCV video processing
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import Literal
 import logging
 
 logger = logging.getLogger(__name__)
@@ -33,6 +34,10 @@ class ConfigUpdateRequest(BaseModel):
     edgeThreshold2: int = 200
     blurKernel: int = 15
     thresholdValue: int = 127
+    pixel_format: Literal["bgr", "yuv"] = "bgr"
+    analysis_overlay: bool = False
+    analysis_scale: float = Field(0.5, gt=0, le=1)
+    analysis_rate_hz: int = Field(10, ge=0, le=60)
 
 
 @router.get("/config")
@@ -168,6 +168,13 @@ async def update_preferences(request: Request):
                 prefs.set_video_config(value)
             elif key == "streaming":
                 prefs.set_streaming_config(value)
+                if "warm_standby" in value:
+                    from app.services.gstreamer_service import get_gstreamer_service
+
+                    video_service = get_gstreamer_service()
+                    if video_service:
+                        # Pre-roll (or release) the pipeline now rather than at next boot
+                        video_service.configure(streaming_config={"warm_standby": value["warm_standby"]})
             elif key == "vpn":
                 prefs.set_vpn_config(value)
             elif key == "ui":
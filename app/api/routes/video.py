@@ -3,9 +3,11 @@ Video Streaming API Routes
 Endpoints for controlling GStreamer video streaming
 """
 
-from fastapi import APIRouter, HTTPException, Request
+import asyncio
+
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request
 from pydantic import BaseModel, Field, field_validator
-from typing import Optional, Literal
+from typing import Optional, Literal, List, Dict
 import ipaddress
 from app.i18n import get_language_from_request, translate
 from app.services.preferences import get_preferences
@@ -35,6 +37,8 @@ class VideoConfigRequest(BaseModel):
     quality: Optional[int] = Field(None, ge=1, le=100)
     h264_bitrate: Optional[int] = Field(None, ge=100, le=50000)
     gop_size: Optional[int] = Field(None, ge=1, le=300)
+    keyframe_min_interval_ms: Optional[int] = Field(None, ge=0, le=5000)
+    intra_refresh: Optional[bool] = None
 
     @field_validator("codec")
     @classmethod
@@ -70,11 +74,69 @@ class LivePropertyRequest(BaseModel):
     value: int = Field(ge=1, le=50000)
 
 
+class BenchmarkRequest(BaseModel):
+    """Encoder benchmark request (defaults cover all available encoders)"""
+
+    codecs: Optional[List[str]] = None
+    resolutions: Optional[List[str]] = None  # ["1280x720", ...]
+    framerates: Optional[List[int]] = None
+    duration_s: float = Field(2.0, ge=0.5, le=10.0)
+
+    @field_validator("resolutions")
+    @classmethod
+    def validate_resolutions(cls, v):
+        if v is not None:
+            for res in v:
+                parts = res.split("x")
+                if len(parts) != 2 or not all(p.isdigit() and int(p) > 0 for p in parts):
+                    raise ValueError(f"Invalid resolution: {res}. Expected WIDTHxHEIGHT")
+        return v
+
+
+class OutputAttachRequest(BaseModel):
+    """Destination override for an extra UDP/multicast/SRT output (defaults from streaming config)"""
+
+    host: Optional[str] = None
+    port: Optional[int] = Field(None, ge=1024, le=65535)
+    ttl: Optional[int] = Field(None, ge=1, le=255)
+
+    @field_validator("host")
+    @classmethod
+    def validate_host(cls, v):
+        if v is not None:
+            try:
+                ipaddress.IPv4Address(v)
+            except ValueError:
+                raise ValueError(f"Invalid IPv4 address: {v}")
+        return v
+
+
+class LatencyReceiverRequest(BaseModel):
+    """Start or stop the loopback latency receiver"""
+
+    enabled: bool
+    port: Optional[int] = Field(None, ge=1024, le=65535)
+
+
+class LatencyReportRequest(BaseModel):
+    """Stage percentiles from a remote receiver (python -m app.services.frame_timing --report)"""
+
+    receiver: Optional[str] = Field(None, max_length=512)
+    stages: Dict[str, Dict[str, float]]
+
+
+class RecordingRequest(BaseModel):
+    """Start or stop on-board recording (format/segments/quota come from the streaming config)"""
+
+    enabled: bool
+    prefix: Optional[str] = Field(None, pattern=r"^[\w.-]{1,64}$")
+
+
 class StreamingConfigRequest(BaseModel):
     """Streaming configuration request with validated ranges"""
 
     # Streaming mode
-    mode: Optional[Literal["udp", "multicast", "rtsp", "webrtc"]] = None
+    mode: Optional[Literal["udp", "multicast", "rtsp", "webrtc", "srt"]] = None
 
     # UDP unicast (mode='udp')
     udp_host: Optional[str] = None
@@ -85,14 +147,48 @@ class StreamingConfigRequest(BaseModel):
     multicast_port: Optional[int] = Field(None, ge=1024, le=65535)
     multicast_ttl: Optional[int] = Field(None, ge=1, le=255)
 
+    # ULPFEC for UDP/multicast
+    fec_enabled: Optional[bool] = None
+    fec_min_percentage: Optional[int] = Field(None, ge=0, le=100)
+    fec_max_percentage: Optional[int] = Field(None, ge=0, le=100)
+
+    # RTCP receiver reports for UDP/multicast
+    rtcp_feedback: Optional[bool] = None
+
+    # Sender-side RTP pacing for UDP/multicast
+    rtp_pacing: Optional[bool] = None
+    pacing_rate_multiplier: Optional[float] = Field(None, ge=1.0, le=10.0)
+    pacing_max_delay_ms: Optional[int] = Field(None, ge=1, le=500)
+
+    # RTP packet size from path MTU discovery
+    path_mtu_discovery: Optional[bool] = None
+
     # RTSP server (mode='rtsp')
     rtsp_enabled: Optional[bool] = None
     rtsp_url: Optional[str] = None
     rtsp_transport: Optional[Literal["tcp", "udp"]] = None
 
+    # SRT (mode='srt')
+    srt_mode: Optional[Literal["caller", "listener"]] = None
+    srt_host: Optional[str] = Field(None, max_length=253)
+    srt_port: Optional[int] = Field(None, ge=1024, le=65535)
+    srt_latency_ms: Optional[int] = Field(None, ge=0, le=10000)
+
+    # Glass-to-glass latency instrumentation
+    latency_probe: Optional[bool] = None
+
+    # On-board recording
+    recording_format: Optional[Literal["mp4", "mkv", "ts"]] = None
+    recording_segment_s: Optional[int] = Field(None, ge=5, le=3600)
+    recording_quota_mb: Optional[int] = Field(None, ge=100, le=1_000_000)
+    recording_directory: Optional[str] = Field(None, max_length=4096)
+    record_flight_sessions: Optional[bool] = None
+
     # General settings
     enabled: Optional[bool] = None
     auto_start: Optional[bool] = None
+    warm_standby: Optional[bool] = None
+    source_fallback: Optional[bool] = None
 
     @field_validator("udp_host")
     @classmethod
@@ -193,6 +289,10 @@ async def get_stats(request: Request):
             "frames_dropped_pre_encoder": encoder_copy.get("frames_dropped_pre_encoder", 0),
             "frames_dropped_post_encoder": encoder_copy.get("frames_dropped_post_encoder", 0),
         },
+        "srt": stats_copy.get("srt"),
+        "latency": _video_service.get_latency_stats(),
+        "keyframes": _video_service.get_keyframe_stats(),
+        "recording": _video_service.get_recording_stats(),
         "health": _video_service._calculate_health(stats_copy.get("errors", 0), fps, target_fps),
     }
 
@@ -241,8 +341,11 @@ async def get_codecs(request: Request):
     # Import here to avoid circular dependency
     from app.providers.registry import get_provider_registry
 
+    from app.services.encoder_benchmark import get_encoder_benchmark
+
     registry = get_provider_registry()
     available_encoders = registry.get_available_video_encoders()
+    benchmark = get_encoder_benchmark()
 
     # Format for frontend consumption
     codecs = []
@@ -262,13 +365,52 @@ async def get_codecs(request: Request):
                     "min_bitrate": caps.get("min_bitrate", 0),
                     "max_bitrate": caps.get("max_bitrate", 10000),
                     "quality_control": caps.get("quality_control", False),
+                    "intra_refresh": caps.get("intra_refresh", False),
                     "priority": caps.get("priority", 50),
+                    # Measured max fps per "WxH" on this board (empty until benchmarked)
+                    "measured_fps": benchmark.get_capacity(encoder["codec_id"]),
                 }
             )
 
     return {"codecs": codecs}
 
 
+@router.get("/benchmark")
+async def get_benchmark(request: Request):
+    """Get encoder benchmark status and the stored profile for this board"""
+    from app.services.encoder_benchmark import get_encoder_benchmark
+
+    return get_encoder_benchmark().get_status()
+
+
+@router.post("/benchmark")
+async def run_benchmark(req: BenchmarkRequest, request: Request, background_tasks: BackgroundTasks):
+    """Benchmark available encoders (videotestsrc → encoder → fakesink).
+
+    The matrix takes minutes, so it runs as a background task; poll
+    GET /benchmark for progress and the resulting profile. Refused while
+    streaming, since the live pipeline would skew the measurements.
+    """
+    lang = get_language_from_request(request)
+    if not _video_service:
+        raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
+    if _video_service.is_streaming:
+        raise HTTPException(status_code=409, detail="Stop streaming before running the encoder benchmark")
+
+    from app.services.encoder_benchmark import get_encoder_benchmark
+
+    benchmark = get_encoder_benchmark()
+    if not benchmark.get_status()["available"]:
+        raise HTTPException(status_code=400, detail="GStreamer not available")
+    if benchmark.is_running():
+        raise HTTPException(status_code=409, detail="Benchmark already running")
+
+    resolutions = [tuple(int(p) for p in r.split("x")) for r in req.resolutions] if req.resolutions else None
+    background_tasks.add_task(benchmark.run, req.codecs, resolutions, req.framerates, req.duration_s)
+
+    return {"success": True, "message": "Encoder benchmark started"}
+
+
 @router.post("/start")
 async def start_streaming(request: Request):
     """Start video streaming"""
@@ -291,7 +433,9 @@ async def stop_streaming(request: Request):
     if not _video_service:
         raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
 
-    result = _video_service.stop()
+    # Blocks while an active recording finishes its last segment: off the event loop
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(None, _video_service.stop)
 
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
@@ -306,7 +450,8 @@ async def restart_streaming(request: Request):
     if not _video_service:
         raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
 
-    result = _video_service.restart()
+    loop = asyncio.get_event_loop()
+    result = await loop.run_in_executor(None, _video_service.restart)
 
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["message"])
@@ -445,6 +590,99 @@ async def live_update(req: LivePropertyRequest, request: Request):
     return result
 
 
+@router.get("/outputs")
+async def get_outputs(request: Request):
+    """Outputs currently fed by the shared encoder"""
+    lang = get_language_from_request(request)
+    if not _video_service:
+        raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
+
+    return {"outputs": _video_service.get_outputs()}
+
+
+@router.post("/outputs/{kind}")
+async def attach_output(
+    kind: Literal["udp", "multicast", "rtsp", "webrtc", "srt", "record"],
+    request: Request,
+    req: OutputAttachRequest = None,
+):
+    """Attach an output to the running stream (no restart, no second encode)"""
+    lang = get_language_from_request(request)
+    if not _video_service:
+        raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
+
+    params = req.model_dump(exclude_none=True) if req else None
+    result = _video_service.attach_output(kind, params)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+@router.delete("/outputs/{kind}")
+async def detach_output(kind: Literal["udp", "multicast", "rtsp", "webrtc", "srt", "record"], request: Request):
+    """Detach an output; the remaining outputs keep streaming"""
+    lang = get_language_from_request(request)
+    if not _video_service:
+        raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
+
+    result = _video_service.detach_output(kind)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+@router.post("/latency/receiver")
+async def latency_receiver(req: LatencyReceiverRequest, request: Request):
+    """Start/stop receiving our own stream to measure network and end-to-end latency"""
+    lang = get_language_from_request(request)
+    if not _video_service:
+        raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
+
+    if req.enabled:
+        result = _video_service.start_latency_receiver(req.port)
+    else:
+        result = _video_service.stop_latency_receiver()
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
+@router.post("/latency/report")
+async def latency_report(req: LatencyReportRequest, request: Request):
+    """Accept stage percentiles measured by a remote receiver tool"""
+    lang = get_language_from_request(request)
+    if not _video_service:
+        raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
+
+    return _video_service.record_remote_latency(req.model_dump())
+
+
+@router.get("/recording")
+async def get_recording(request: Request):
+    """Current or last recording: segments, bytes written, write rate, dropped frames"""
+    lang = get_language_from_request(request)
+    if not _video_service:
+        raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
+
+    return {"recording": _video_service.get_recording_stats()}
+
+
+@router.post("/recording")
+async def set_recording(req: RecordingRequest, request: Request):
+    """Start/stop recording the encoded stream on board"""
+    lang = get_language_from_request(request)
+    if not _video_service:
+        raise HTTPException(status_code=503, detail=translate("services.video_not_initialized", lang))
+
+    if req.enabled:
+        result = _video_service.start_recording(prefix=req.prefix)
+    else:
+        result = _video_service.stop_recording()
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result["error"])
+    return result
+
+
 @router.get("/pipeline-string")
 async def get_pipeline_string(request: Request):
     """Get GStreamer pipeline string for Mission Planner"""
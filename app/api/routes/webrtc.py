@@ -56,6 +56,14 @@ class AdaptiveConfigRequest(BaseModel):
     min_framerate: Optional[int] = Field(None, ge=5, le=30)
     adaptation_enabled: Optional[bool] = None
     congestion_control: Optional[bool] = None
+    bitrate_policy: Optional[str] = Field(None, pattern="^(slowest|primary)$")
+    primary_peer_id: Optional[str] = None
+    bitrate_smoothing: Optional[float] = Field(None, gt=0, le=1)
+
+
+class SessionConfigRequest(BaseModel):
+    ice_mode: Optional[str] = Field(None, pattern="^(auto|host|stun)$")
+    prewarm_pool_size: Optional[int] = Field(None, ge=0, le=4)
 
 
 # ── Endpoints ────────────────────────────────────────────────────────────────
@@ -77,7 +85,8 @@ async def create_session(req: CreateSessionRequest, request: Request):
         raise HTTPException(status_code=503, detail=translate("services.webrtc_not_initialized", lang))
 
     # Use async create_peer_connection which creates the aiortc PC
-    result = await _webrtc_service.create_peer_connection(req.peer_id)
+    client_host = request.client.host if request.client else None
+    result = await _webrtc_service.create_peer_connection(req.peer_id, client_host=client_host)
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result.get("error", "Failed to create session"))
     return result
@@ -188,3 +197,26 @@ async def update_adaptive_config(req: AdaptiveConfigRequest, request: Request):
     if not result["success"]:
         raise HTTPException(status_code=400, detail="Failed to update configuration")
     return result
+
+
+@router.get("/session-config")
+async def get_session_config(request: Request):
+    lang = get_language_from_request(request)
+    if not _webrtc_service:
+        raise HTTPException(status_code=503, detail=translate("services.webrtc_not_initialized", lang))
+    return {"success": True, "config": dict(_webrtc_service.session_config)}
+
+
+@router.post("/session-config")
+async def update_session_config(req: SessionConfigRequest, request: Request):
+    """ICE mode (auto/host/stun) and size of the pre-warmed connection pool"""
+    lang = get_language_from_request(request)
+    if not _webrtc_service:
+        raise HTTPException(status_code=503, detail=translate("services.webrtc_not_initialized", lang))
+    config_dict = {k: v for k, v in req.model_dump().items() if v is not None}
+    if not config_dict:
+        raise HTTPException(status_code=400, detail="No configuration provided")
+    result = _webrtc_service.update_session_config(config_dict)
+    if not result["success"]:
+        raise HTTPException(status_code=400, detail=result.get("error"))
+    return result
@@ -36,12 +36,13 @@ from app.services.websocket_manager import websocket_manager  # noqa: E402
 from app.services.preferences import get_preferences  # noqa: E402
 from app.services.serial_detector import get_detector  # noqa: E402
 from app.services.gstreamer_service import init_gstreamer_service  # noqa: E402, F401
-from app.services.webrtc_service import init_webrtc_service  # noqa: E402
+from app.services.webrtc_service import init_webrtc_service, get_webrtc_service  # noqa: E402
 from app.services.video_stream_info import (  # noqa: E402
     init_video_stream_info_service,
     get_video_stream_info_service,
 )
 from app.services.opencv_service import init_opencv_service  # noqa: E402
+from app.services.video_device_service import get_video_device_service  # noqa: E402
 from app.api.routes import mavlink, system  # noqa: E402
 from app.api.routes import router as router_routes  # noqa: E402
 from app.api.routes import video as video_routes  # noqa: E402
@@ -156,9 +157,8 @@ def _broadcast_router_status(loop):
 
 def _auto_start_video():
     """Auto-start video streaming; intended to run in a background thread."""
-    import time
-
-    time.sleep(2)
+    # No settle delays: start() waits for the pipeline to reach PLAYING, and
+    # with warm standby it picks up the pipeline configure() is pre-rolling
     try:
         if not video_service:
             logger.warning(" Video service not available for auto-start")
@@ -166,7 +166,6 @@ def _auto_start_video():
         logger.info(" Attempting to auto-start video stream...")
         result = video_service.start()
         if result.get("success"):
-            time.sleep(1)
             status = video_service.get_status()
             if status.get("streaming"):
                 logger.info(" Video streaming auto-started successfully")
@@ -202,8 +201,13 @@ async def _lifespan_shutdown():
     svc = get_video_stream_info_service()
     if svc:
         svc.stop()
+    get_video_device_service().stop_hotplug()
     if video_service:
         video_service.shutdown()
+    webrtc_service = get_webrtc_service()
+    if webrtc_service:
+        # Stops the WebRTC media loop thread after closing its peers
+        webrtc_service.shutdown()
     if router_service:
         router_service.shutdown()
     if mavlink_service and mavlink_service.is_connected():
@@ -302,6 +306,7 @@ async def lifespan(app: FastAPI):
     # Initialize video streaming service
     video_service = init_gstreamer_service(websocket_manager, loop, webrtc_service)
     video_routes.set_video_service(video_service)
+    flight_logger.set_video_service(video_service)
 
     # Initialize video stream information service (for MAVLink VIDEO_STREAM_INFORMATION)
     video_stream_info_service = init_video_stream_info_service(mavlink_service, video_service)
@@ -328,6 +333,14 @@ async def lifespan(app: FastAPI):
     if video_config or streaming_config:
         video_service.configure(video_config=video_config, streaming_config=streaming_config)
 
+    # Push video device changes on hotplug instead of rescanning every 10 s
+    def _on_video_hotplug(scan_info):
+        asyncio.run_coroutine_threadsafe(websocket_manager.broadcast("video_devices", scan_info), loop)
+        # A camera that dropped out mid-stream is swapped back in behind the slate
+        video_service.reattach_source()
+
+    get_video_device_service().start_hotplug(_on_video_hotplug)
+
     # Set callback to broadcast router status changes via WebSocket (for immediate updates)
     router_service.set_status_callback(lambda: _broadcast_router_status(loop))
 
@@ -678,14 +691,13 @@ async def periodic_stats_broadcast():
                 services = SystemService.get_services_status()
                 await websocket_manager.broadcast("system_services", {"services": services, "count": len(services)})
 
-            # Video devices + VPN status every 10 seconds
+            # Video devices (unless pushed by the hotplug monitor) + VPN status every 10 seconds
             if counter % 10 == 0:
                 try:
-                    from app.services.video_device_service import get_video_device_service
-
                     vd_service = get_video_device_service()
-                    scan_info = vd_service.get_scan_info()
-                    await websocket_manager.broadcast("video_devices", scan_info)
+                    if not vd_service.hotplug_active:
+                        scan_info = vd_service.get_scan_info()
+                        await websocket_manager.broadcast("video_devices", scan_info)
                 except Exception as e:
                     logger.debug(f"Video devices broadcast error: {e}")
 
@@ -48,6 +48,7 @@ class VideoEncoderProvider(ABC):
                 'default_bitrate': int,  # kbps
                 'quality_control': bool,  # True if supports quality parameter
                 'live_quality_adjust': bool,  # True if can change quality without restart
+                'live_renegotiation': bool,  # Optional: resolution/fps change via encoder_caps without restart
                 'latency_estimate': str,  # 'low', 'medium', 'high'
                 'cpu_usage': str,  # 'low', 'medium', 'high'
                 'priority': int
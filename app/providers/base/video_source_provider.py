@@ -29,6 +29,7 @@ class VideoSourceProvider(ABC):
         self.display_name = "Generic Video Source"
         self.priority = 50  # Higher = preferred when multiple sources available
         self.gst_source_element = ""  # GStreamer element name (e.g., 'v4l2src', 'libcamerasrc')
+        self.hotplug = False  # Sources are /dev/video* nodes that can be re-probed one at a time
 
     @abstractmethod
     def is_available(self) -> bool:
@@ -76,6 +77,50 @@ class VideoSourceProvider(ABC):
         """
         pass
 
+    def get_capability_key(self, source_id: str) -> Optional[str]:
+        """
+        Identity of the hardware behind a source, for the persistent
+        capability cache.
+
+        Must be cheap (no device queries) and change whenever the
+        capabilities could: driver, bus position, card name, firmware
+        revision. Providers that can't tell return None and are probed
+        every time.
+
+        Args:
+            source_id: Unique identifier of the source
+
+        Returns:
+            Cache key, or None to skip the cache
+        """
+        return None
+
+    def get_source_capabilities_cached(self, source_id: str) -> Optional[Dict[str, Any]]:
+        """
+        get_source_capabilities(), served from the persistent capability
+        cache when the hardware has been seen before (re-probed once per
+        run in the background).
+        """
+        try:
+            key = self.get_capability_key(source_id)
+        except Exception as e:
+            logger.debug(f"No capability key for {source_id}: {e}")
+            key = None
+        if not key:
+            return self.get_source_capabilities(source_id)
+
+        from app.services.capability_cache import get_capability_cache
+
+        return get_capability_cache().get_or_probe(
+            f"{self.source_type}|{key}", source_id, self.get_source_capabilities, self._on_capabilities_changed
+        )
+
+    def _on_capabilities_changed(self):
+        """A background re-probe found new capabilities: drop stale discovery results"""
+        from app.providers.registry import get_provider_registry
+
+        get_provider_registry().invalidate_source_cache(self.source_type)
+
     @abstractmethod
     def build_source_element(self, source_id: str, config: Dict) -> Dict:
         """
@@ -114,6 +159,21 @@ class VideoSourceProvider(ABC):
         """
         pass
 
+    def discover_device(self, device: str) -> List[Dict[str, Any]]:
+        """
+        Probe a single device node after a hotplug event.
+
+        Only called on providers with ``hotplug = True``.
+
+        Args:
+            device: Device path (e.g., '/dev/video2')
+
+        Returns:
+            List[Dict]: Sources for that node, in discover_sources() format
+            (empty if the node isn't one of this provider's sources)
+        """
+        return []
+
     def find_source_by_identity(self, name: str, bus_info: str = "", driver: str = "") -> Optional[str]:
         """
         Find a source by its identity information (for stable device matching).
@@ -371,12 +371,24 @@ class ProviderRegistry:
 
         return available
 
-    def get_best_video_encoder(self, codec_family: Optional[str] = None) -> Optional[VideoEncoderProvider]:
+    def get_best_video_encoder(
+        self,
+        codec_family: Optional[str] = None,
+        width: Optional[int] = None,
+        height: Optional[int] = None,
+        framerate: Optional[int] = None,
+    ) -> Optional[VideoEncoderProvider]:
         """
         Get the best available video encoder, optionally filtered by codec family.
 
+        When a target mode is given and the board has an encoder benchmark
+        profile, encoders measured to sustain the mode come first, unmeasured
+        ones next, and encoders measured too slow last (priority order within
+        each group).
+
         Args:
             codec_family: Optional filter ('mjpeg', 'h264', 'h265')
+            width, height, framerate: Optional target mode for benchmark ranking
 
         Returns:
             VideoEncoderProvider instance with highest priority that is available
@@ -393,6 +405,17 @@ class ProviderRegistry:
         if not encoders:
             return None
 
+        if width and height and framerate:
+            try:
+                from app.services.encoder_benchmark import get_encoder_benchmark
+
+                benchmark = get_encoder_benchmark()
+                rank = {True: 0, None: 1, False: 2}
+                # sort() is stable, so priority order is kept within each group
+                encoders.sort(key=lambda e: rank[benchmark.can_sustain(e["codec_id"], width, height, framerate)])
+            except Exception as e:
+                logger.debug(f"Encoder benchmark ranking unavailable: {e}")
+
         # Already sorted by priority in get_available_video_encoders
         best_codec_id = encoders[0]["codec_id"]
         return self.get_video_encoder(best_codec_id)
@@ -508,6 +531,30 @@ class ProviderRegistry:
             self._source_discovery_cache.clear()
         logger.debug(f"Source discovery cache invalidated: {source_type or 'all'}")
 
+    def update_source_cache(self, source_type: str, device: str, sources: List[Dict]) -> None:
+        """Replace the cached sources of one device node (hotplug), leaving the rest of the cache as is.
+
+        Args:
+            source_type: Provider whose cache to patch
+            device: Device node that was added or removed
+            sources: That node's discover_device() result (empty on remove)
+        """
+        cached = self._source_discovery_cache.get(source_type)
+        if not cached:
+            return  # never discovered: the next lookup does a full discovery
+
+        kept = [source for source in cached[1] if source.get("device") != device]
+        known = {source.get("capabilities", {}).get("identity", {}).get("bus_info") for source in kept}
+        for source in sources:
+            bus_info = source.get("capabilities", {}).get("identity", {}).get("bus_info")
+            if bus_info and bus_info in known:
+                continue  # another node of a device already listed
+            kept.append(source)
+
+        kept.sort(key=lambda source: source.get("device", ""))
+        self._source_discovery_cache[source_type] = (time.time(), kept)
+        logger.debug(f"Source discovery cache updated: {source_type} {device}")
+
     def get_available_video_sources(self) -> List[Dict]:
         """
         Get list of all available video sources from all providers.
@@ -6,11 +6,15 @@ Detects and uses SoC hardware video encoding (V4L2 M2M, meson_venc, etc.)
 import subprocess
 import glob
 import logging
-from typing import Dict
+import re
+from typing import Dict, List, Optional
 from ..base.video_encoder_provider import VideoEncoderProvider
 
 logger = logging.getLogger(__name__)
 
+# "  video_gop_size 0x009909cb (int)    : min=0 max=2048 step=1 default=12 value=12"
+_CTRL_LINE = re.compile(r"^\s*(\w+)\s+0x[0-9a-f]+\s+\(")
+
 
 class HardwareH264Encoder(VideoEncoderProvider):
     """
@@ -39,6 +43,7 @@ class HardwareH264Encoder(VideoEncoderProvider):
         self.priority = 100  # Highest priority - hardware is always best
         self.encoder_device = self._detect_encoder_device()
         self._hw_jpegdec_available = self._check_hw_jpegdec()
+        self._driver_controls: Optional[Dict[str, Dict[str, int]]] = None
 
     def _detect_encoder_device(self) -> str:
         """
@@ -89,6 +94,68 @@ class HardwareH264Encoder(VideoEncoderProvider):
 
         return ""
 
+    def _query_driver_controls(self) -> Dict[str, Dict[str, int]]:
+        """
+        List the encoder driver's V4L2 controls (name → min/max), once.
+
+        Intra refresh and slice partitioning are optional in V4L2 M2M
+        drivers, so they are only set when the driver lists them.
+        """
+        if self._driver_controls is not None:
+            return self._driver_controls
+
+        controls = {}
+        if self.encoder_device:
+            try:
+                result = subprocess.run(
+                    ["v4l2-ctl", "-d", self.encoder_device, "--list-ctrls"],
+                    capture_output=True,
+                    text=True,
+                    timeout=2,
+                )
+                for line in result.stdout.splitlines():
+                    match = _CTRL_LINE.match(line)
+                    if match:
+                        controls[match.group(1)] = {k: int(v) for k, v in re.findall(r"(min|max)=(-?\d+)", line)}
+            except Exception as e:
+                logger.debug(f"Could not list controls of {self.encoder_device}: {e}")
+
+        self._driver_controls = controls
+        return controls
+
+    def _supports_intra_refresh(self) -> bool:
+        controls = self._query_driver_controls()
+        return "intra_refresh_period" in controls or "cyclic_intra_refresh_mbs" in controls
+
+    def _intra_refresh_controls(self, width: int, height: int, gop_size: int) -> List[str]:
+        """
+        extra-controls for a refresh wave every gop_size frames, split into
+        slices, or [] if the driver has no intra refresh control.
+        """
+        controls = self._query_driver_controls()
+        macroblocks = ((width + 15) // 16) * ((height + 15) // 16)
+        period = max(1, gop_size)
+
+        if "intra_refresh_period" in controls:
+            parts = [f"intra_refresh_period={period}"]
+            if "intra_refresh_period_type" in controls:
+                parts.append("intra_refresh_period_type=1")  # cyclic, not random
+        elif "cyclic_intra_refresh_mbs" in controls:
+            # Older drivers: intra macroblocks per frame rather than a period
+            parts = [f"cyclic_intra_refresh_mbs={-(-macroblocks // period)}"]
+        else:
+            return []
+
+        if "slice_partitioning_method" in controls and "number_of_mbs_in_a_slice" in controls:
+            parts.append("slice_partitioning_method=1")  # max macroblocks per slice
+            parts.append(f"number_of_mbs_in_a_slice={-(-macroblocks // 4)}")
+
+        # The wave replaces periodic IDRs: push the GOP out as far as the driver allows
+        gop_max = controls.get("video_gop_size", {}).get("max")
+        if gop_max:
+            parts.append(f"video_gop_size={gop_max}")
+        return parts
+
     @staticmethod
     def _check_hw_jpegdec() -> bool:
         """Check if v4l2jpegdec (hardware JPEG decoder) is available."""
@@ -150,6 +217,7 @@ class HardwareH264Encoder(VideoEncoderProvider):
             "max_bitrate": 20000,  # Hardware can handle much higher
             "default_bitrate": 3000,
             "quality_control": False,
+            "intra_refresh": self._supports_intra_refresh(),
             "live_quality_adjust": True,
             "latency_estimate": "ultra-low",  # ~10-30ms
             "cpu_usage": "ultra-low",  # <10%
@@ -217,8 +285,17 @@ class HardwareH264Encoder(VideoEncoderProvider):
             # property using the s-type (struct) control format.
             extra_controls_parts = [f"video_bitrate={bitrate * 1000}"]
 
+            # Intra refresh where the driver supports it (otherwise IDR GOPs as usual)
+            refresh_parts = []
+            if config.get("intra_refresh", False):
+                refresh_parts = self._intra_refresh_controls(width, height, gop_size)
+                if not refresh_parts:
+                    logger.info(f"HW encoder: {self.encoder_device} has no intra refresh control")
+
+            if refresh_parts:
+                extra_controls_parts.extend(refresh_parts)
             # GOP size → video_gop_size (keyframe interval)
-            if gop_size and gop_size > 0:
+            elif gop_size and gop_size > 0:
                 extra_controls_parts.append(f"video_gop_size={gop_size}")
 
             # B-frames disabled for low-latency FPV
@@ -276,6 +353,7 @@ class HardwareH264Encoder(VideoEncoderProvider):
                 "caps": [],
                 "rtp_payload_type": self.rtp_payload_type,
                 "rtp_payloader": "rtph264pay",
+                "intra_refresh": bool(refresh_parts),
                 "rtp_payloader_properties": {
                     "pt": self.rtp_payload_type,
                     "mtu": 1400,
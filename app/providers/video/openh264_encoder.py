@@ -48,7 +48,9 @@ class OpenH264Encoder(VideoEncoderProvider):
             "max_bitrate": 8000,
             "default_bitrate": 2500,
             "quality_control": False,
+            "intra_refresh": False,  # openh264enc exposes slices but no periodic intra refresh
             "live_quality_adjust": True,  # Can change bitrate and gop-size
+            "live_renegotiation": True,  # Resolution/framerate via encoder_caps without restart
             "latency_estimate": "very-low",  # ~20-50ms with gop-size=2 (2 keyframes/sec at 30fps)
             "cpu_usage": "low",  # ~25-35% on 720p30 (ARM NEON)
             "priority": self.priority,
@@ -81,6 +83,17 @@ class OpenH264Encoder(VideoEncoderProvider):
             source_format = config.get("source_format", "image/jpeg")
             opencv_enabled = config.get("opencv_enabled", False)
 
+            encoder_properties = {
+                "bitrate": bitrate * 1000,  # OpenH264 expects bps (bits per second)
+                "rate-control": 1,  # CBR (Constant Bitrate) mode
+                "gop-size": gop_size,  # Keyframe interval from config
+            }
+            if config.get("intra_refresh", False):
+                # No intra refresh in openh264enc: keep the IDR GOP but split frames
+                # into slices so a lost packet only damages its slice
+                encoder_properties["slice-mode"] = 1  # fixed number of slices
+                encoder_properties["num-slices"] = 4
+
             elements = []
 
             # Source-format aware decoder selection
@@ -99,6 +112,8 @@ class OpenH264Encoder(VideoEncoderProvider):
                 [
                     {"name": "videoconvert", "element": "videoconvert", "properties": {}},
                     {"name": "videoscale", "element": "videoscale", "properties": {}},
+                    # drop-only videorate lets encoder_caps lower the framerate live
+                    {"name": "videorate", "element": "videorate", "properties": {"drop-only": True}},
                     {
                         "name": "encoder_caps",
                         "element": "capsfilter",
@@ -119,11 +134,7 @@ class OpenH264Encoder(VideoEncoderProvider):
                     {
                         "name": "encoder",
                         "element": "openh264enc",
-                        "properties": {
-                            "bitrate": bitrate * 1000,  # OpenH264 expects bps (bits per second)
-                            "rate-control": 1,  # CBR (Constant Bitrate) mode
-                            "gop-size": gop_size,  # Keyframe interval from config
-                        },
+                        "properties": encoder_properties,
                     },
                     {
                         "name": "queue_post",
@@ -63,7 +63,9 @@ class X264Encoder(VideoEncoderProvider):
             "max_bitrate": 10000,
             "default_bitrate": 2000,
             "quality_control": False,
+            "intra_refresh": True,  # Periodic intra refresh instead of IDR GOPs
             "live_quality_adjust": True,  # Can change bitrate
+            "live_renegotiation": True,  # Resolution/framerate via encoder_caps without restart
             "latency_estimate": "medium",  # ~60-80ms
             "cpu_usage": "medium-high",  # ~40-60% on 720p30
             "priority": self.priority,
@@ -97,6 +99,27 @@ class X264Encoder(VideoEncoderProvider):
             # Lower = faster recovery from packet loss, higher = better compression
             gop_size = config.get("gop_size", 15)
 
+            # Intra refresh: instead of one IDR every gop_size frames, a column of
+            # intra macroblocks sweeps the picture over the same period, so frame
+            # sizes stay flat. sliced-threads already splits each frame into slices,
+            # which keeps a lost packet's damage to its slice until the wave passes.
+            intra_refresh = config.get("intra_refresh", False)
+
+            encoder_properties = {
+                "bitrate": bitrate,
+                "speed-preset": "ultrafast",
+                "tune": 0x00000004,  # zerolatency
+                "key-int-max": gop_size,
+                "bframes": 0,
+                "threads": 4,
+                "sliced-threads": True,
+                "rc-lookahead": 0,
+                "vbv-buf-capacity": 300,
+                "sync-lookahead": 0,
+            }
+            if intra_refresh:
+                encoder_properties["intra-refresh"] = True
+
             elements = []
 
             # Determine if we need a decoder and which one
@@ -129,6 +152,8 @@ class X264Encoder(VideoEncoderProvider):
                 [
                     {"name": "videoconvert", "element": "videoconvert", "properties": {}},
                     {"name": "videoscale", "element": "videoscale", "properties": {}},
+                    # drop-only videorate lets encoder_caps lower the framerate live
+                    {"name": "videorate", "element": "videorate", "properties": {"drop-only": True}},
                     {
                         "name": "encoder_caps",
                         "element": "capsfilter",
@@ -149,18 +174,7 @@ class X264Encoder(VideoEncoderProvider):
                     {
                         "name": "encoder",
                         "element": "x264enc",
-                        "properties": {
-                            "bitrate": bitrate,
-                            "speed-preset": "ultrafast",
-                            "tune": 0x00000004,  # zerolatency
-                            "key-int-max": gop_size,
-                            "bframes": 0,
-                            "threads": 4,
-                            "sliced-threads": True,
-                            "rc-lookahead": 0,
-                            "vbv-buf-capacity": 300,
-                            "sync-lookahead": 0,
-                        },
+                        "properties": encoder_properties,
                     },
                     {
                         "name": "queue_post",
@@ -186,6 +200,7 @@ class X264Encoder(VideoEncoderProvider):
                 "caps": [],
                 "rtp_payload_type": self.rtp_payload_type,
                 "rtp_payloader": "rtph264pay",
+                "intra_refresh": intra_refresh,
                 "rtp_payloader_properties": {
                     "pt": self.rtp_payload_type,
                     "mtu": 1400,
@@ -9,6 +9,7 @@ import re
 import logging
 from typing import Dict, List, Optional, Any
 from ..base.video_source_provider import VideoSourceProvider
+from .v4l2_camera import v4l2_capability_key
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,7 @@ class HDMICaptureSource(VideoSourceProvider):
         self.display_name = "HDMI Capture"
         self.priority = 75  # Higher than regular V4L2, lower than libcamera
         self.gst_source_element = "v4l2src"
+        self.hotplug = True
 
     def is_available(self) -> bool:
         """Check if v4l2-ctl is available (needed to detect HDMI capture)"""
@@ -92,67 +94,84 @@ class HDMICaptureSource(VideoSourceProvider):
             return []
 
         captures = []
-        devices = sorted(glob.glob("/dev/video*"))
-
-        for device in devices:
+        for device in sorted(glob.glob("/dev/video*")):
             try:
-                # Get device info
-                info_result = subprocess.run(
-                    ["v4l2-ctl", "-d", device, "--info"],
-                    capture_output=True,
-                    text=True,
-                    timeout=5,
-                )
-
-                if info_result.returncode != 0:
-                    continue
-
-                device_name = device
-                card_type = ""
-                driver = ""
-                is_capture = False
-
-                for line in info_result.stdout.split("\n"):
-                    if "Card type" in line:
-                        parts = line.split(":", 1)
-                        if len(parts) > 1:
-                            card_type = parts[1].strip()
-                    elif "Driver name" in line:
-                        parts = line.split(":", 1)
-                        if len(parts) > 1:
-                            driver = parts[1].strip()
-                    elif "Bus info" in line:
-                        parts = line.split(":", 1)
-                        if len(parts) > 1:
-                            _ = parts[1].strip()  # bus_info not used
-                    elif "Video Capture" in line:
-                        is_capture = True
-
-                # Skip if not a capture device
-                if not is_capture:
-                    continue
-
-                # Check if it's an HDMI capture device
-                if self._is_hdmi_capture_device(device_name, driver, card_type):
-                    caps = self.get_source_capabilities(device)
-                    if caps:
-                        captures.append(
-                            {
-                                "source_id": device,
-                                "name": card_type,
-                                "type": self.source_type,
-                                "device": device,
-                                "capabilities": caps,
-                                "provider": self.display_name,
-                            }
-                        )
-
+                capture = self._probe_device(device)
+                if capture:
+                    captures.append(capture)
             except Exception as e:
                 logger.debug(f"Skipping {device}: {e}")
                 continue
 
         return captures
 
+    def get_capability_key(self, source_id: str) -> Optional[str]:
+        return v4l2_capability_key(source_id)
+
+    def discover_device(self, device: str) -> List[Dict[str, Any]]:
+        """Probe one /dev/video* node after a hotplug event"""
+        try:
+            capture = self._probe_device(device)
+        except Exception as e:
+            logger.debug(f"Skipping {device}: {e}")
+            return []
+        return [capture] if capture else []
+
+    def _probe_device(self, device: str) -> Optional[Dict[str, Any]]:
+        """Source entry for *device* if it is an HDMI capture device"""
+        # Get device info
+        info_result = subprocess.run(
+            ["v4l2-ctl", "-d", device, "--info"],
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+
+        if info_result.returncode != 0:
+            return None
+
+        device_name = device
+        card_type = ""
+        driver = ""
+        is_capture = False
+
+        for line in info_result.stdout.split("\n"):
+            if "Card type" in line:
+                parts = line.split(":", 1)
+                if len(parts) > 1:
+                    card_type = parts[1].strip()
+            elif "Driver name" in line:
+                parts = line.split(":", 1)
+                if len(parts) > 1:
+                    driver = parts[1].strip()
+            elif "Bus info" in line:
+                parts = line.split(":", 1)
+                if len(parts) > 1:
+                    _ = parts[1].strip()  # bus_info not used
+            elif "Video Capture" in line:
+                is_capture = True
+
+        # Skip if not a capture device
+        if not is_capture:
+            return None
+
+        # Check if it's an HDMI capture device
+        if not self._is_hdmi_capture_device(device_name, driver, card_type):
+            return None
+
+        caps = self.get_source_capabilities_cached(device)
+        if not caps:
+            return None
+
+        return {
+            "source_id": device,
+            "name": card_type,
+            "type": self.source_type,
+            "device": device,
+            "capabilities": caps,
+            "provider": self.display_name,
+        }
+
     def get_source_capabilities(self, source_id: str) -> Optional[Dict[str, Any]]:
         """
         Get capabilities for HDMI capture device.
@@ -273,7 +292,7 @@ class HDMICaptureSource(VideoSourceProvider):
         Similar to V4L2 camera but optimized for capture cards.
         """
         try:
-            caps = self.get_source_capabilities(source_id)
+            caps = self.get_source_capabilities_cached(source_id)
             if not caps:
                 return {
                     "success": False,
@@ -321,7 +340,7 @@ class HDMICaptureSource(VideoSourceProvider):
 
     def validate_config(self, source_id: str, config: Dict) -> Dict[str, Any]:
         """Validate configuration for HDMI capture device"""
-        caps = self.get_source_capabilities(source_id)
+        caps = self.get_source_capabilities_cached(source_id)
         if not caps:
             return {
                 "valid": False,
@@ -3,6 +3,8 @@ LibCamera Source Provider
 Handles CSI cameras via libcamera (modern Raspberry Pi, some Radxa boards)
 """
 
+import glob
+import os
 import re
 import subprocess
 import logging
@@ -220,6 +222,19 @@ class LibCameraSource(VideoSourceProvider):
             "autowhitebalance": True,
         }
 
+    def get_capability_key(self, source_id: str) -> Optional[str]:
+        """Sensor sub-devices from sysfs (e.g. "imx219 10-0010") identify the CSI cameras"""
+        sensors = []
+        for name_file in sorted(glob.glob("/sys/class/video4linux/v4l-subdev*/name")):
+            try:
+                with open(name_file) as f:
+                    sensors.append(f.read().strip())
+            except OSError:
+                continue
+        if not sensors:
+            return None
+        return "|".join([source_id, ",".join(sensors), os.uname().release])
+
     def get_source_capabilities(self, source_id: str) -> Optional[Dict[str, Any]]:
         """Get capabilities for a libcamera source.
 
@@ -284,7 +299,7 @@ class LibCameraSource(VideoSourceProvider):
 
     def validate_config(self, source_id: str, config: Dict) -> Dict[str, Any]:
         """Validate configuration for libcamera source"""
-        caps = self.get_source_capabilities(source_id)
+        caps = self.get_source_capabilities_cached(source_id)
         if not caps:
             return {
                 "valid": False,
@@ -14,6 +14,43 @@ from ..base.video_source_provider import VideoSourceProvider
 logger = logging.getLogger(__name__)
 
 
+def _read_sysfs(path: str) -> str:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return ""
+
+
+def v4l2_capability_key(device: str) -> Optional[str]:
+    """
+    Capability cache key for a /dev/video* node, from sysfs only (no ioctls):
+    driver, bus position, card name, node index, USB ids + firmware
+    revision (bcdDevice) and kernel release.
+    """
+    node = os.path.basename(os.path.realpath(device))
+    sys_dir = f"/sys/class/video4linux/{node}"
+    if not os.path.isdir(sys_dir):
+        return None
+
+    hw_dir = os.path.realpath(f"{sys_dir}/device")
+    driver = os.path.basename(os.path.realpath(f"{hw_dir}/driver")) if os.path.exists(f"{hw_dir}/driver") else ""
+    # UVC nodes hang off a USB interface; ids and firmware revision are on its parent
+    usb_dir = hw_dir if os.path.exists(f"{hw_dir}/bcdDevice") else os.path.dirname(hw_dir)
+    usb_version = ":".join(_read_sysfs(f"{usb_dir}/{attr}") for attr in ("idVendor", "idProduct", "bcdDevice"))
+
+    return "|".join(
+        [
+            driver,
+            os.path.relpath(hw_dir, "/sys/devices"),
+            _read_sysfs(f"{sys_dir}/name"),
+            _read_sysfs(f"{sys_dir}/index"),
+            usb_version,
+            os.uname().release,
+        ]
+    )
+
+
 class V4L2CameraSource(VideoSourceProvider):
     """
     Video4Linux2 camera source provider.
@@ -30,6 +67,7 @@ class V4L2CameraSource(VideoSourceProvider):
         self.display_name = "V4L2 Camera"
         self.priority = 70  # High priority, widely compatible
         self.gst_source_element = "v4l2src"
+        self.hotplug = True
 
     def is_available(self) -> bool:
         """Check if v4l2-ctl is available"""
@@ -58,7 +96,7 @@ class V4L2CameraSource(VideoSourceProvider):
 
         for device in devices:
             try:
-                caps = self.get_source_capabilities(device)
+                caps = self.get_source_capabilities_cached(device)
                 if not caps or not caps.get("is_capture_device"):
                     continue
 
@@ -68,15 +106,8 @@ class V4L2CameraSource(VideoSourceProvider):
 
                 # Group by bus_info - only keep the first device for each physical camera
                 if bus_info not in devices_by_identity:
-                    devices_by_identity[bus_info] = {
-                        "source_id": device,
-                        "name": identity.get("name", device),
-                        "type": self.source_type,
-                        "device": device,
-                        "capabilities": caps,
-                        "provider": self.display_name,
-                        "all_devices": [device],  # Track all /dev/video* for this camera
-                    }
+                    devices_by_identity[bus_info] = self._source_entry(device, caps)
+                    devices_by_identity[bus_info]["all_devices"] = [device]  # Track all /dev/video* for this camera
                 else:
                     # Same physical camera, just track the device path
                     devices_by_identity[bus_info]["all_devices"].append(device)
@@ -96,6 +127,26 @@ class V4L2CameraSource(VideoSourceProvider):
         )
         return cameras
 
+    def get_capability_key(self, source_id: str) -> Optional[str]:
+        return v4l2_capability_key(source_id)
+
+    def discover_device(self, device: str) -> List[Dict[str, Any]]:
+        """Probe one /dev/video* node after a hotplug event"""
+        caps = self.get_source_capabilities_cached(device)
+        if not caps or not caps.get("is_capture_device"):
+            return []
+        return [self._source_entry(device, caps)]
+
+    def _source_entry(self, device: str, caps: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "source_id": device,
+            "name": caps.get("identity", {}).get("name", device),
+            "type": self.source_type,
+            "device": device,
+            "capabilities": caps,
+            "provider": self.display_name,
+        }
+
     def get_source_capabilities(self, source_id: str) -> Optional[Dict[str, Any]]:
         """
         Get detailed capabilities for a V4L2 device.
@@ -246,7 +297,7 @@ class V4L2CameraSource(VideoSourceProvider):
         Returns pipeline config with source element and caps filter
         """
         try:
-            caps = self.get_source_capabilities(source_id)
+            caps = self.get_source_capabilities_cached(source_id)
             if not caps:
                 return {
                     "success": False,
@@ -354,7 +405,7 @@ class V4L2CameraSource(VideoSourceProvider):
 
         Checks if requested resolution, framerate, and format are supported.
         """
-        caps = self.get_source_capabilities(source_id)
+        caps = self.get_source_capabilities_cached(source_id)
         if not caps:
             return {
                 "valid": False,
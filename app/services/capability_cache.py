@@ -0,0 +1,171 @@
+"""
+Video Capability Cache
+Persists video source capabilities (formats, resolutions, framerates)
+across restarts, keyed by the identity of the hardware behind a source.
+
+Enumerating a UVC camera's formats and frame intervals takes hundreds of
+milliseconds per device. With this cache a known camera's capabilities
+are served straight from preferences.json and re-probed once per run in
+the background, a few seconds after first use, so startup and the first
+device listing don't wait on the camera.
+
+Providers opt in through VideoSourceProvider.get_capability_key(); the
+key must be cheap to compute (sysfs reads, no device queries) and change
+whenever the capabilities could (driver, bus position, card name,
+firmware/USB revision, kernel).
+"""
+
+import copy
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+REVALIDATE_DELAY_S = 10.0  # leave startup alone before re-probing
+MAX_ENTRIES = 32  # oldest entries dropped beyond this
+
+
+class CapabilityCache:
+    """Persistent identity → capabilities map with lazy background revalidation"""
+
+    def __init__(self, preferences=None):
+        self._preferences = preferences
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._revalidating: set = set()
+
+    # ── Dependencies ──────────────────────────────────────────────────
+
+    def _get_preferences(self):
+        if self._preferences is None:
+            from app.services.preferences import get_preferences
+
+            self._preferences = get_preferences()
+        return self._preferences
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        """Called with the lock held"""
+        if self._entries is None:
+            try:
+                self._entries = dict(self._get_preferences().get_video_capabilities())
+            except Exception as e:
+                logger.warning(f"Failed to load video capability cache: {e}")
+                self._entries = {}
+        return self._entries
+
+    # ── Lookup ────────────────────────────────────────────────────────
+
+    def get_or_probe(
+        self,
+        key: str,
+        source_id: str,
+        probe: Callable[[str], Optional[Dict[str, Any]]],
+        on_change: Optional[Callable[[], Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Capabilities for *source_id*, from the cache when its hardware is known.
+
+        Args:
+            key: Hardware identity (see VideoSourceProvider.get_capability_key)
+            source_id: Source being looked up; replaces the cached device_path
+            probe: The provider's real capability query
+            on_change: Called if a background re-probe finds different capabilities
+
+        Returns:
+            Capabilities dict, or None if the probe failed.
+        """
+        with self._lock:
+            entry = self._load().get(key)
+
+        if entry is None:
+            capabilities = probe(source_id)
+            if capabilities:
+                self._store(key, capabilities)
+            return capabilities
+
+        self._schedule_revalidation(key, source_id, probe, on_change)
+        return self._for_source(entry["capabilities"], source_id)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Forget one entry, or all of them"""
+        with self._lock:
+            entries = self._load()
+            if key is None:
+                entries.clear()
+            else:
+                entries.pop(key, None)
+            self._persist()
+
+    # ── Internals ─────────────────────────────────────────────────────
+
+    def _schedule_revalidation(self, key, source_id, probe, on_change):
+        """Re-probe each entry once per run, after startup has settled"""
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+        timer = threading.Timer(REVALIDATE_DELAY_S, self._revalidate, args=(key, source_id, probe, on_change))
+        timer.daemon = True
+        timer.start()
+
+    def _revalidate(self, key, source_id, probe, on_change):
+        try:
+            capabilities = probe(source_id)
+        except Exception as e:
+            logger.debug(f"Capability revalidation of {source_id} failed: {e}")
+            return
+        if not capabilities:
+            return  # unplugged or busy: keep what we know
+
+        with self._lock:
+            entry = self._load().get(key)
+            unchanged = entry is not None and self._for_source(entry["capabilities"], source_id) == capabilities
+        if unchanged:
+            return
+
+        self._store(key, capabilities)
+        logger.info(f"Capabilities of {source_id} changed, cache updated")
+        if on_change:
+            try:
+                on_change()
+            except Exception as e:
+                logger.debug(f"Capability change callback failed: {e}")
+
+    def _store(self, key: str, capabilities: Dict[str, Any]):
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"capabilities": copy.deepcopy(capabilities), "updated": time.time()}
+            excess = len(entries) - MAX_ENTRIES
+            if excess > 0:
+                for stale in sorted(entries, key=lambda k: entries[k].get("updated", 0))[:excess]:
+                    del entries[stale]
+            self._persist()
+
+    def _persist(self):
+        """Called with the lock held"""
+        try:
+            self._get_preferences().set_video_capabilities(self._entries)
+        except Exception as e:
+            logger.warning(f"Failed to save video capability cache: {e}")
+
+    @staticmethod
+    def _for_source(capabilities: Dict[str, Any], source_id: str) -> Dict[str, Any]:
+        """Copy of cached capabilities for the node the hardware has now"""
+        result = copy.deepcopy(capabilities)
+        if str(result.get("device_path", "")).startswith("/dev/"):
+            result["device_path"] = source_id  # V4L2 nodes are renumbered on replug
+        return result
+
+
+# Global instance
+_capability_cache: Optional[CapabilityCache] = None
+
+
+def get_capability_cache() -> CapabilityCache:
+    """Get or create the global video capability cache"""
+    global _capability_cache
+    if _capability_cache is None:
+        _capability_cache = CapabilityCache()
+    return _capability_cache
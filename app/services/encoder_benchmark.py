@@ -0,0 +1,350 @@
+"""
+Encoder Benchmark Service
+Measures real encoder throughput on the running board and persists a
+per-board encoder profile used for encoder selection and UI presets.
+
+Each available encoder provider is run headless:
+    videotestsrc → capsfilter → <provider elements> → fakesink
+over a resolution × framerate matrix, recording achieved fps, CPU usage
+and per-frame encode latency.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+# Check if GStreamer is available
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    GSTREAMER_AVAILABLE = True
+except (ImportError, ValueError):
+    GSTREAMER_AVAILABLE = False
+    Gst = None
+
+
+class EncoderBenchmark:
+    """Runs encoder benchmarks and serves the stored per-board profile"""
+
+    DEFAULT_RESOLUTIONS = [(640, 480), (960, 720), (1280, 720), (1920, 1080)]
+    DEFAULT_FRAMERATES = [15, 30, 60]
+    DEFAULT_DURATION_S = 2.0
+
+    # Encoders are not benchmarked when they only repackage camera output
+    SKIP_CODECS = ("h264_passthrough",)
+
+    # A mode is "sustainable" when the encoder beats the target fps by this margin
+    SUSTAIN_MARGIN = 1.1
+
+    def __init__(self, registry=None, preferences=None):
+        self._registry = registry
+        self._preferences = preferences
+        self._lock = threading.Lock()
+        self._running = False
+        self._progress: Dict[str, Any] = {"done": 0, "total": 0, "current": None}
+        self._last_error: Optional[str] = None
+        self._profile: Optional[Dict[str, Any]] = None
+        self._profile_loaded = False
+
+    # ── Dependencies ──────────────────────────────────────────────────
+
+    def _get_registry(self):
+        if self._registry is None:
+            from app.providers.registry import get_provider_registry
+
+            self._registry = get_provider_registry()
+        return self._registry
+
+    def _get_preferences(self):
+        if self._preferences is None:
+            from app.services.preferences import get_preferences
+
+            self._preferences = get_preferences()
+        return self._preferences
+
+    @staticmethod
+    def get_board_key() -> str:
+        """Identify the running board (model + variant + kernel)"""
+        try:
+            from app.providers.board import BoardRegistry
+
+            board = BoardRegistry().get_detected_board()
+            if board:
+                return f"{board.board_model}|{board.variant.name}|{board.variant.kernel_version}"
+        except Exception as e:
+            logger.debug(f"Board detection unavailable for benchmark key: {e}")
+        return "unknown"
+
+    # ── Profile access ────────────────────────────────────────────────
+
+    def get_profile(self) -> Optional[Dict[str, Any]]:
+        """Get the stored benchmark profile for this board (or None)"""
+        if not self._profile_loaded:
+            try:
+                self._profile = self._get_preferences().get_encoder_benchmark(self.get_board_key())
+            except Exception as e:
+                logger.warning(f"Failed to load encoder benchmark: {e}")
+                self._profile = None
+            self._profile_loaded = True
+        return self._profile
+
+    def get_capacity(self, codec_id: str) -> Dict[str, float]:
+        """Best achieved fps per resolution ("WxH" → fps) for an encoder"""
+        profile = self.get_profile()
+        if not profile:
+            return {}
+        capacity: Dict[str, float] = {}
+        for entry in profile.get("results", {}).get(codec_id, []):
+            if entry.get("error"):
+                continue
+            key = f"{entry['width']}x{entry['height']}"
+            capacity[key] = max(capacity.get(key, 0.0), entry.get("achieved_fps", 0.0))
+        return capacity
+
+    def can_sustain(self, codec_id: str, width: int, height: int, framerate: int) -> Optional[bool]:
+        """Check measured capacity for a mode.
+
+        Returns True/False when the resolution was benchmarked for this
+        encoder, None when there is no data (callers keep static priorities).
+        """
+        fps = self.get_capacity(codec_id).get(f"{width}x{height}")
+        if fps is None:
+            return None
+        return fps >= framerate * self.SUSTAIN_MARGIN
+
+    # ── Benchmark run ─────────────────────────────────────────────────
+
+    def is_running(self) -> bool:
+        return self._running
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get benchmark status and stored profile"""
+        return {
+            "available": GSTREAMER_AVAILABLE,
+            "running": self._running,
+            "progress": dict(self._progress),
+            "last_error": self._last_error,
+            "board_key": self.get_board_key(),
+            "profile": self.get_profile(),
+        }
+
+    def run(
+        self,
+        codecs: Optional[List[str]] = None,
+        resolutions: Optional[List[tuple]] = None,
+        framerates: Optional[List[int]] = None,
+        duration_s: float = DEFAULT_DURATION_S,
+    ) -> Dict[str, Any]:
+        """Benchmark encoders over the resolution × framerate matrix (blocking).
+
+        Results replace the stored profile for this board.
+        """
+        if not GSTREAMER_AVAILABLE:
+            return {"success": False, "error": "GStreamer not available"}
+        if not self._lock.acquire(blocking=False):
+            return {"success": False, "error": "Benchmark already running"}
+
+        try:
+            self._running = True
+            self._last_error = None
+            registry = self._get_registry()
+            if codecs is None:
+                codecs = [
+                    e["codec_id"]
+                    for e in registry.get_available_video_encoders()
+                    if e["available"] and e["codec_id"] not in self.SKIP_CODECS
+                ]
+            resolutions = resolutions or self.DEFAULT_RESOLUTIONS
+            framerates = framerates or self.DEFAULT_FRAMERATES
+
+            self._progress = {"done": 0, "total": len(codecs) * len(resolutions) * len(framerates), "current": None}
+            results: Dict[str, List[Dict[str, Any]]] = {}
+
+            for codec_id in codecs:
+                provider = registry.get_video_encoder(codec_id)
+                if not provider or not provider.is_available():
+                    continue
+                results[codec_id] = []
+                for width, height in resolutions:
+                    for fps in framerates:
+                        self._progress["current"] = f"{codec_id} {width}x{height}@{fps}"
+                        entry = self._benchmark_mode(provider, width, height, fps, duration_s)
+                        results[codec_id].append(entry)
+                        self._progress["done"] += 1
+                        logger.info(
+                            f"[Benchmark] {codec_id} {width}x{height}@{fps}: "
+                            f"{entry.get('achieved_fps', 0)} fps, {entry.get('cpu_percent', 0)}% CPU"
+                        )
+
+            profile = {
+                "board_key": self.get_board_key(),
+                "timestamp": time.time(),
+                "duration_s": duration_s,
+                "results": results,
+            }
+            self._get_preferences().set_encoder_benchmark(profile["board_key"], profile)
+            self._profile = profile
+            self._profile_loaded = True
+            print(f"✅ Encoder benchmark complete: {len(results)} encoders")
+            return {"success": True, "profile": profile}
+
+        except Exception as e:
+            logger.error(f"Encoder benchmark failed: {e}")
+            self._last_error = str(e)
+            return {"success": False, "error": str(e)}
+        finally:
+            self._running = False
+            self._progress["current"] = None
+            self._lock.release()
+
+    def _build_benchmark_pipeline(self, provider, width: int, height: int, fps: int, num_buffers: int):
+        """Build videotestsrc → provider elements → fakesink; returns (pipeline, identity, sink)"""
+        config = {
+            "width": width,
+            "height": height,
+            "framerate": fps,
+            "bitrate": provider.get_capabilities().get("default_bitrate", 2000),
+            "quality": 85,
+            "gop_size": fps,
+            "source_format": "video/x-raw",  # Raw test source: no decoder
+        }
+        pipeline_config = provider.build_pipeline_elements(config)
+        if not pipeline_config.get("success"):
+            raise RuntimeError(pipeline_config.get("error", "Failed to build encoder elements"))
+
+        pipeline = Gst.Pipeline.new("encoder-benchmark")
+
+        src = Gst.ElementFactory.make("videotestsrc", "bench_src")
+        src.set_property("is-live", False)
+        src.set_property("num-buffers", num_buffers)
+        Gst.util_set_object_arg(src, "pattern", "ball")  # Motion, so P-frames aren't free
+        caps = Gst.ElementFactory.make("capsfilter", "bench_caps")
+        caps.set_property(
+            "caps", Gst.Caps.from_string(f"video/x-raw,format=I420,width={width},height={height},framerate={fps}/1")
+        )
+        elements = [src, caps]
+
+        identity = None
+        for elem_config in pipeline_config["elements"]:
+            if elem_config["name"] == "decoder":
+                continue
+            if elem_config["name"] == "encoder":
+                # Timestamp frames entering the encoder for latency measurement
+                identity = Gst.ElementFactory.make("identity", "bench_in")
+                identity.set_property("signal-handoffs", True)
+                elements.append(identity)
+            element = Gst.ElementFactory.make(elem_config["element"], elem_config["name"])
+            if not element:
+                raise RuntimeError(f"Failed to create {elem_config['element']}")
+            for prop, value in elem_config.get("properties", {}).items():
+                try:
+                    if prop == "caps" and isinstance(value, str):
+                        element.set_property(prop, Gst.Caps.from_string(value))
+                    elif isinstance(value, str):
+                        Gst.util_set_object_arg(element, prop, value)
+                    else:
+                        element.set_property(prop, value)
+                except Exception as e:
+                    logger.debug(f"Benchmark: failed to set {prop}={value} on {elem_config['name']}: {e}")
+            elements.append(element)
+
+        sink = Gst.ElementFactory.make("fakesink", "bench_sink")
+        sink.set_property("sync", False)
+        sink.set_property("signal-handoffs", True)
+        elements.append(sink)
+
+        for element in elements:
+            pipeline.add(element)
+        for i in range(len(elements) - 1):
+            if not elements[i].link(elements[i + 1]):
+                raise RuntimeError(f"Failed to link {elements[i].get_name()} → {elements[i + 1].get_name()}")
+
+        return pipeline, identity, sink
+
+    def _benchmark_mode(self, provider, width: int, height: int, fps: int, duration_s: float) -> Dict[str, Any]:
+        """Run one encoder at one mode and measure it"""
+        entry: Dict[str, Any] = {"width": width, "height": height, "framerate": fps}
+        num_buffers = max(10, int(fps * duration_s))
+        entry_times: Dict[int, float] = {}
+        latencies: List[float] = []
+        frames = [0]
+
+        def _on_encoder_input(_identity, buf):
+            entry_times[buf.pts] = time.perf_counter()
+
+        def _on_encoded(_sink, buf, _pad):
+            frames[0] += 1
+            started = entry_times.pop(buf.pts, None)
+            if started is not None:
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        pipeline = None
+        try:
+            pipeline, identity, sink = self._build_benchmark_pipeline(provider, width, height, fps, num_buffers)
+            if identity:
+                identity.connect("handoff", _on_encoder_input)
+            sink.connect("handoff", _on_encoded)
+
+            bus = pipeline.get_bus()
+            cpu_start = time.process_time()
+            wall_start = time.monotonic()
+            pipeline.set_state(Gst.State.PLAYING)
+            msg = bus.timed_pop_filtered(
+                int((duration_s * 10 + 5) * Gst.SECOND), Gst.MessageType.EOS | Gst.MessageType.ERROR
+            )
+            wall = time.monotonic() - wall_start
+            cpu = time.process_time() - cpu_start
+
+            if msg is None:
+                entry["error"] = "timeout"
+            elif msg.type == Gst.MessageType.ERROR:
+                err, _debug = msg.parse_error()
+                entry["error"] = str(err)
+
+            entry.update(self._summarize(frames[0], wall, cpu, latencies, fps))
+        except Exception as e:
+            entry["error"] = str(e)
+            entry.update(self._summarize(0, 0.0, 0.0, [], fps))
+        finally:
+            if pipeline:
+                pipeline.set_state(Gst.State.NULL)
+        return entry
+
+    @classmethod
+    def _summarize(cls, frames: int, wall_s: float, cpu_s: float, latencies: List[float], fps: int) -> Dict[str, Any]:
+        """Reduce raw measurements to the stored per-mode record.
+
+        cpu_percent is process CPU time over wall time (100 = one full core),
+        the same convention as top.
+        """
+        achieved = frames / wall_s if wall_s > 0 else 0.0
+        ordered = sorted(latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] if ordered else 0.0
+        return {
+            "frames": frames,
+            "achieved_fps": round(achieved, 1),
+            "cpu_percent": round(cpu_s / wall_s * 100, 1) if wall_s > 0 else 0.0,
+            "cpu_cores": os.cpu_count() or 1,
+            "latency_ms_avg": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+            "latency_ms_p95": round(p95, 2),
+            "sustainable": achieved >= fps * cls.SUSTAIN_MARGIN,
+        }
+
+
+# Global instance
+_encoder_benchmark: Optional[EncoderBenchmark] = None
+
+
+def get_encoder_benchmark() -> EncoderBenchmark:
+    """Get or create the global encoder benchmark service"""
+    global _encoder_benchmark
+    if _encoder_benchmark is None:
+        _encoder_benchmark = EncoderBenchmark()
+    return _encoder_benchmark
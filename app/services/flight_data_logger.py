@@ -60,6 +60,11 @@ class FlightDataLogger:
         self.csv_writer = None
         self.file_path = None
         self.session_active = False
+        self.video_service = None  # GStreamerService, for on-board video recording
+
+    def set_video_service(self, video_service):
+        """Record video alongside each session (streaming_config.record_flight_sessions)"""
+        self.video_service = video_service
 
     def start_session(self) -> Dict[str, Any]:
         """
@@ -93,11 +98,15 @@ class FlightDataLogger:
             self.session_active = True
             logger.info(f"Flight data logging started: {self.file_path}")
 
-            return {
+            result = {
                 "success": True,
                 "message": "Flight data logging started",
                 "file_path": str(self.file_path),
             }
+            if self._records_video():
+                # Segments share the CSV's name so they can be matched afterwards
+                result["video_recording"] = self.video_service.start_recording(prefix=f"flight-{timestamp}")
+            return result
 
         except Exception as e:
             logger.error(f"Error starting flight data logger: {e}")
@@ -188,16 +197,22 @@ class FlightDataLogger:
 
             logger.info(f"Flight data logging stopped: {final_path}")
 
-            return {
+            result = {
                 "success": True,
                 "message": "Flight data logging stopped",
                 "file_path": final_path,
             }
+            if self._records_video():
+                result["video_recording"] = self.video_service.stop_recording()
+            return result
 
         except Exception as e:
             logger.error(f"Error stopping flight data logger: {e}")
             return {"success": False, "message": str(e)}
 
+    def _records_video(self) -> bool:
+        return bool(self.video_service and self.video_service.streaming_config.record_flight_sessions)
+
     def is_active(self) -> bool:
         """Check if a logging session is active"""
         return self.session_active
@@ -0,0 +1,391 @@
+"""
+Glass-to-Glass Latency Instrumentation
+
+Stamps every H264 access unit with the wall-clock time its frame was
+captured and the time it left the encoder, as an SEI
+user_data_unregistered NAL, and measures the stages in between:
+
+    capture_to_encode   sender: encoder output vs. the buffer's capture PTS
+    encode_to_send      sender: encoder output until the output sink gets it
+    network             receiver: SEI encode time → arrival, minus the send stage
+    capture_to_receive  receiver: end to end, up to the decoder input
+
+The SEI travels inside the bitstream, so it survives every output (RTP,
+RTSP, WebRTC, MPEG-TS over SRT) and ordinary decoders skip it. Receiver
+stages compare the sender's and receiver's wall clocks: on one host that
+is the same clock; across hosts the result is only as good as their NTP
+or PTP sync.
+
+Run as a receiver tool on a ground station:
+
+    python -m app.services.frame_timing --port 5600 [--report http://<drone>:8000]
+"""
+
+import argparse
+import json
+import logging
+import struct
+import threading
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.services.h264_bitstream import NAL_TYPE_SEI, NalIndex, index_nals
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    GSTREAMER_AVAILABLE = True
+except (ImportError, ValueError):
+    GSTREAMER_AVAILABLE = False
+    Gst = None
+
+logger = logging.getLogger(__name__)
+
+# Identifies our user_data_unregistered SEI among others (x264 writes its own)
+TIMING_SEI_UUID = uuid.UUID("5f9d6c3e-2b8a-4e71-9c0d-4650565449ab").bytes
+SEI_USER_DATA_UNREGISTERED = 5
+NAL_TYPE_AUD = 9
+
+STAGES = ("capture_to_encode", "encode_to_send", "network", "capture_to_receive")
+STAGE_WINDOW = 600  # samples kept per stage (~20 s at 30 fps)
+PENDING_FRAMES = 120  # stamped frames waiting for the output sink
+
+H264_AU_CAPS = "video/x-h264,stream-format=byte-stream,alignment=au"
+
+
+# ── SEI ─────────────────────────────────────────────────────────────────────
+
+
+def _escape(rbsp: bytes) -> bytes:
+    """Add emulation prevention bytes: 00 00 0x (x ≤ 3) → 00 00 03 0x"""
+    out = bytearray()
+    zeros = 0
+    for byte in rbsp:
+        if zeros >= 2 and byte <= 3:
+            out.append(3)
+            zeros = 0
+        out.append(byte)
+        zeros = zeros + 1 if byte == 0 else 0
+    return bytes(out)
+
+
+def _unescape(ebsp: bytes) -> bytes:
+    return ebsp.replace(b"\x00\x00\x03", b"\x00\x00")
+
+
+def build_timing_sei(capture_us: int, encoded_us: int) -> bytes:
+    """Annex B SEI NAL (start code included) carrying both timestamps in µs since the epoch"""
+    payload = TIMING_SEI_UUID + struct.pack(">QQ", capture_us, encoded_us)
+    rbsp = bytes((SEI_USER_DATA_UNREGISTERED, len(payload))) + payload + b"\x80"
+    return b"\x00\x00\x00\x01" + bytes((NAL_TYPE_SEI,)) + _escape(rbsp)
+
+
+def stamp_access_unit(data: bytes, capture_us: int, encoded_us: int) -> bytes:
+    """Insert the timing SEI into an access unit, after its AUD if it has one"""
+    nals = index_nals(data)
+    at = nals[0][1] if nals and nals[0][2] == NAL_TYPE_AUD else 0
+    return data[:at] + build_timing_sei(capture_us, encoded_us) + data[at:]
+
+
+def read_timing_sei(data: bytes, nals: Optional[NalIndex] = None) -> Optional[Tuple[int, int]]:
+    """(capture_us, encoded_us) from a stamped access unit, or None"""
+    for start, end, nal_type in index_nals(data) if nals is None else nals:
+        if nal_type != NAL_TYPE_SEI:
+            continue
+        rbsp = _unescape(data[start + 1 : end])
+        if len(rbsp) >= 34 and rbsp[0] == SEI_USER_DATA_UNREGISTERED and rbsp[2:18] == TIMING_SEI_UUID:
+            return struct.unpack(">QQ", rbsp[18:34])
+    return None
+
+
+# ── Stage statistics ────────────────────────────────────────────────────────
+
+
+class LatencyStages:
+    """Rolling per-stage latency samples and their percentiles"""
+
+    def __init__(self, window: int = STAGE_WINDOW):
+        self._samples = {stage: deque(maxlen=window) for stage in STAGES}
+        # encode → send of recent frames, keyed by their SEI encode time, so
+        # an in-process receiver can take it out of the network stage
+        self._send_delays: "OrderedDict[int, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, ms: float):
+        with self._lock:
+            self._samples[stage].append(ms)
+
+    def record_send(self, encoded_us: int, ms: float):
+        with self._lock:
+            self._samples["encode_to_send"].append(ms)
+            self._send_delays[encoded_us] = ms
+            while len(self._send_delays) > PENDING_FRAMES:
+                self._send_delays.popitem(last=False)
+
+    def record_arrival(self, capture_us: int, encoded_us: int, arrival_us: int):
+        with self._lock:
+            send_ms = self._send_delays.pop(encoded_us, 0.0)
+            self._samples["network"].append(max(0.0, (arrival_us - encoded_us) / 1000 - send_ms))
+            self._samples["capture_to_receive"].append(max(0.0, (arrival_us - capture_us) / 1000))
+
+    def reset(self):
+        with self._lock:
+            for samples in self._samples.values():
+                samples.clear()
+            self._send_delays.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            snapshot = {stage: sorted(samples) for stage, samples in self._samples.items()}
+        return {stage: _percentiles(samples) for stage, samples in snapshot.items()}
+
+
+def _percentiles(samples: List[float]) -> Dict[str, Any]:
+    if not samples:
+        return {"samples": 0, "avg_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0}
+
+    def pick(fraction):
+        return round(samples[min(len(samples) - 1, int(len(samples) * fraction))], 2)
+
+    return {
+        "samples": len(samples),
+        "avg_ms": round(sum(samples) / len(samples), 2),
+        "p50_ms": pick(0.50),
+        "p95_ms": pick(0.95),
+        "p99_ms": pick(0.99),
+        "max_ms": round(samples[-1], 2),
+    }
+
+
+# ── Sender ──────────────────────────────────────────────────────────────────
+
+
+class FrameStamper:
+    """
+    appsink → appsrc relay between the encoder and the output tee.
+
+    Encoded buffers keep their PTS, which a live source sets to the
+    running time at capture, so base_time + PTS is the capture instant on
+    the pipeline clock. The relay costs one Python callback and one copy
+    per frame; it is only built while instrumentation is on.
+    """
+
+    def __init__(self, pipeline, stages: LatencyStages):
+        self._pipeline = pipeline
+        self.stages = stages
+        self._appsrc = None
+        self._caps = None
+        self._pending: "OrderedDict[int, Tuple[int, int]]" = OrderedDict()  # pts → (clock ns, encoded µs)
+        self._pending_lock = threading.Lock()
+        self._sent_probe = None
+
+    def create_elements(self) -> Optional[List[Any]]:
+        """[capsfilter, appsink, appsrc]; appsink and appsrc are joined by callbacks, not a link"""
+        caps = Gst.ElementFactory.make("capsfilter", "latency_caps")
+        appsink = Gst.ElementFactory.make("appsink", "latency_tap")
+        appsrc = Gst.ElementFactory.make("appsrc", "latency_src")
+        if not caps or not appsink or not appsrc:
+            return None
+        caps.set_property("caps", Gst.Caps.from_string(H264_AU_CAPS))
+        appsink.set_property("emit-signals", True)
+        appsink.set_property("sync", False)
+        appsink.connect("new-sample", self._on_sample)
+        appsrc.set_property("format", Gst.Format.TIME)
+        appsrc.set_property("is-live", True)
+        appsrc.set_property("do-timestamp", False)  # keep the capture PTS
+        appsrc.set_property("block", False)
+        self._appsrc = appsrc
+        return [caps, appsink, appsrc]
+
+    def watch_sent(self, sink):
+        """Time frames reaching an output sink (encode → send)"""
+        pad = sink.get_static_pad("sink")
+        if pad:
+            probe_type = Gst.PadProbeType.BUFFER | Gst.PadProbeType.BUFFER_LIST
+            self._sent_probe = (pad, pad.add_probe(probe_type, self._on_sent))
+
+    def stop(self):
+        if self._sent_probe:
+            pad, probe_id = self._sent_probe
+            try:
+                pad.remove_probe(probe_id)
+            except Exception:
+                pass
+            self._sent_probe = None
+
+    def _on_sample(self, appsink):
+        sample = appsink.emit("pull-sample")
+        if not sample:
+            return Gst.FlowReturn.OK
+        buf = sample.get_buffer()
+        success, map_info = buf.map(Gst.MapFlags.READ)
+        if not success:
+            return Gst.FlowReturn.OK
+        try:
+            data = bytes(map_info.data)
+        finally:
+            buf.unmap(map_info)
+
+        encoded_us = time.time_ns() // 1000
+        capture_us = encoded_us
+        clock = self._pipeline.get_clock()
+        if clock and buf.pts != Gst.CLOCK_TIME_NONE:
+            now_ns = clock.get_time()
+            encode_ns = max(0, now_ns - (self._pipeline.get_base_time() + buf.pts))
+            capture_us = encoded_us - encode_ns // 1000
+            self.stages.record("capture_to_encode", encode_ns / 1e6)
+            with self._pending_lock:
+                self._pending[buf.pts] = (now_ns, encoded_us)
+                while len(self._pending) > PENDING_FRAMES:
+                    self._pending.popitem(last=False)
+
+        out = Gst.Buffer.new_wrapped(stamp_access_unit(data, capture_us, encoded_us))
+        out.pts, out.dts, out.duration = buf.pts, buf.dts, buf.duration
+        if buf.has_flags(Gst.BufferFlags.DELTA_UNIT):
+            out.set_flags(Gst.BufferFlags.DELTA_UNIT)
+
+        caps = sample.get_caps()
+        if caps and (self._caps is None or not caps.is_equal(self._caps)):
+            self._appsrc.set_property("caps", caps)
+            self._caps = caps
+        return self._appsrc.emit("push-buffer", out)
+
+    def _on_sent(self, pad, info):
+        if info.type & Gst.PadProbeType.BUFFER_LIST:
+            buffers = info.get_buffer_list()
+            buf = buffers.get(0) if buffers.length() else None
+        else:
+            buf = info.get_buffer()
+        if buf is not None:
+            with self._pending_lock:
+                pending = self._pending.pop(buf.pts, None)
+            clock = self._pipeline.get_clock()
+            if pending and clock:
+                self.stages.record_send(pending[1], (clock.get_time() - pending[0]) / 1e6)
+        return Gst.PadProbeReturn.OK
+
+
+# ── Receiver ────────────────────────────────────────────────────────────────
+
+
+def udp_source(port: int) -> str:
+    """Pipeline fragment for the plain RTP/H264 UDP and multicast outputs"""
+    return (
+        f'udpsrc port={port} caps="application/x-rtp, media=(string)video, clock-rate=(int)90000, '
+        'encoding-name=(string)H264, payload=(int)96" ! rtph264depay'
+    )
+
+
+class LatencyReceiver:
+    """
+    Receives the stamped stream and records the network and end-to-end
+    stages. ``source`` is any pipeline fragment that ends in H264, e.g.
+    udp_source(5600) or "srtsrc uri=srt://:8890 ! tsdemux".
+    """
+
+    def __init__(self, stages: LatencyStages, source: str):
+        self.stages = stages
+        self.source = source
+        self.frames = 0
+        self.unstamped = 0
+        self._pipeline = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._pipeline is not None
+
+    def start(self) -> Dict[str, Any]:
+        if not GSTREAMER_AVAILABLE:
+            return {"success": False, "error": "GStreamer not available"}
+        if self._pipeline:
+            return {"success": False, "error": "Latency receiver already running"}
+        try:
+            pipeline = Gst.parse_launch(
+                f"{self.source} ! h264parse ! {H264_AU_CAPS} ! "
+                "appsink name=timing_sink emit-signals=true sync=false max-buffers=5 drop=true"
+            )
+        except Exception as e:
+            return {"success": False, "error": f"Invalid receiver pipeline: {e}"}
+        pipeline.get_by_name("timing_sink").connect("new-sample", self._on_sample)
+        pipeline.set_state(Gst.State.PLAYING)
+        self._pipeline = pipeline
+        print(f"⏱️ Latency receiver listening: {self.source}")
+        return {"success": True, "source": self.source}
+
+    def stop(self):
+        if self._pipeline:
+            self._pipeline.set_state(Gst.State.NULL)
+            self._pipeline = None
+
+    def get_status(self) -> Dict[str, Any]:
+        return {"running": self.is_running, "source": self.source, "frames": self.frames, "unstamped": self.unstamped}
+
+    def _on_sample(self, appsink):
+        arrival_us = time.time_ns() // 1000
+        sample = appsink.emit("pull-sample")
+        if not sample:
+            return Gst.FlowReturn.OK
+        buf = sample.get_buffer()
+        success, map_info = buf.map(Gst.MapFlags.READ)
+        if not success:
+            return Gst.FlowReturn.OK
+        try:
+            stamp = read_timing_sei(bytes(map_info.data))
+        finally:
+            buf.unmap(map_info)
+
+        self.frames += 1
+        if stamp:
+            self.stages.record_arrival(stamp[0], stamp[1], arrival_us)
+        else:
+            self.unstamped += 1
+        return Gst.FlowReturn.OK
+
+
+def _report(url: str, stages: Dict[str, Any], receiver: str):
+    body = json.dumps({"receiver": receiver, "stages": stages}).encode()
+    request = urllib.request.Request(
+        f"{url.rstrip('/')}/api/video/latency/report", data=body, headers={"Content-Type": "application/json"}
+    )
+    try:
+        urllib.request.urlopen(request, timeout=2).close()
+    except Exception as e:
+        logger.warning(f"Latency report to {url} failed: {e}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Measure glass-to-glass latency of a stamped FPV stream")
+    parser.add_argument("--port", type=int, default=5600, help="RTP/UDP port (ignored with --source)")
+    parser.add_argument("--source", help="GStreamer fragment producing H264, e.g. 'srtsrc uri=... ! tsdemux'")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between reports")
+    parser.add_argument("--report", metavar="URL", help="Post receiver stages to the sender's API")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    Gst.init(None)
+    stages = LatencyStages()
+    receiver = LatencyReceiver(stages, args.source or udp_source(args.port))
+    result = receiver.start()
+    if not result["success"]:
+        raise SystemExit(result["error"])
+    try:
+        while True:
+            time.sleep(args.interval)
+            stats = {stage: values for stage, values in stages.get_stats().items() if values["samples"]}
+            print(json.dumps({"frames": receiver.frames, "unstamped": receiver.unstamped, "stages": stats}))
+            if args.report:
+                _report(args.report, stats, receiver.source)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.stop()
+
+
+if __name__ == "__main__":
+    main()
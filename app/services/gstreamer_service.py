@@ -11,6 +11,7 @@ import threading
 import asyncio
 import queue
 import time
+from dataclasses import asdict
 from typing import Optional, Dict, Any
 
 logger = logging.getLogger(__name__)
@@ -43,6 +44,51 @@ from .video_config import (  # noqa: E402
     auto_detect_camera,
 )
 from .rtsp_server import RTSPServer  # noqa: E402
+from .output_fanout import OutputFanout  # noqa: E402
+from .frame_timing import FrameStamper, LatencyReceiver, LatencyStages, udp_source  # noqa: E402
+from .keyframe_manager import KeyframeManager  # noqa: E402
+from .stream_recorder import FINALIZE_TIMEOUT_S, RECORD_QUEUE_TIME_NS, StreamRecorder  # noqa: E402
+from .source_selector import SourceSelector  # noqa: E402
+from .rtcp_feedback import (  # noqa: E402
+    RTCP_RECV_PORT_OFFSET,
+    RTCP_SEND_PORT_OFFSET,
+    ReceiverReports,
+    RtcpSession,
+    read_session_report,
+)
+from .rtp_pacer import RtpPacer  # noqa: E402
+from .path_mtu import discover_path_mtu, rtp_mtu_for_path  # noqa: E402
+from app.utils.gstreamer import caps_yuv420_layout, structure_to_dict, yuv420_layout  # noqa: E402
+
+# Outputs that can hang off the shared encoder tee
+OUTPUT_KINDS = ("udp", "multicast", "rtsp", "webrtc", "srt", "record")
+
+# ULPFEC (rtpulpfecenc) on UDP/multicast outputs
+FEC_PAYLOAD_TYPE = 122
+FEC_LOSS_FACTOR = 3.0  # FEC percentage per % of packet loss (4G loss comes in bursts)
+FEC_DECAY_STEP = 5  # max percentage points removed per update once loss drops
+FEC_DEADBAND = 2  # ignore smaller changes
+FEC_PACKET_OVERHEAD = 18  # ULPFEC packet vs. the largest media packet it protects (RTP + FEC headers)
+
+DEFAULT_RTP_MTU = 1400  # payloader mtu when the provider doesn't set one
+
+# Encoders a generic "h264" request may resolve to (passthrough needs an H.264 camera)
+AUTO_H264_ENCODERS = ("h264_hardware", "h264", "h264_openh264")
+
+# SRT latency (ARQ window) from measured RTT: lost packets can be resent
+# about latency / RTT times before the receiver has to play on without them
+SRT_RTT_FACTOR = 4
+SRT_DEFAULT_LATENCY_MS = 120  # libsrt default, used until an RTT is known
+SRT_MIN_LATENCY_MS = 80
+SRT_MAX_LATENCY_MS = 2000
+SRT_LATENCY_DEADBAND = 0.2  # retune only on a >20% change
+
+# Warm standby: modes whose pipeline can sit PAUSED without side effects
+# (WebRTC activates its signalling service when the pipeline is built)
+WARM_STANDBY_MODES = ("udp", "multicast", "rtsp", "srt")
+STANDBY_PREROLL_TIMEOUT_S = 5
+# Settings that don't change the pipeline a standby was built for
+_STANDBY_NEUTRAL_SETTINGS = ("enabled", "auto_start", "warm_standby")
 
 
 class GStreamerService:
@@ -78,10 +124,59 @@ class GStreamerService:
 
         # RTSP Server for RTSP streaming mode
         self.rtsp_server: Optional[RTSPServer] = None
-        self._rtsp_stats_thread: Optional[threading.Thread] = None
-        self._rtsp_stats_running: bool = False
-        self._rtsp_monitor_thread: Optional[threading.Thread] = None
-        self._rtsp_monitor_running: bool = False
+
+        # Single-encode fan-out: every output is a branch off the encoder's tee
+        self._output_fanout: Optional[OutputFanout] = None
+        self._output_payloader: Optional[Dict[str, Any]] = None  # RTP payloader for UDP branches
+        self._webrtc_encoder_codec_id: Optional[str] = None  # provider behind webrtc_h264enc
+        self._intra_refresh_active: bool = False  # encoder refreshes in waves instead of IDR GOPs
+        self._fec_percentage: int = self.streaming_config.fec_min_percentage  # current ULPFEC redundancy
+        self._srt_rtt_ms: Optional[float] = None  # latest RTT for the SRT latency budget
+        self._srt_previous_counters: Optional[Dict[str, int]] = None  # for per-poll loss/retransmit rates
+        self._rtcp_sessions: Dict[str, RtcpSession] = {}  # UDP/multicast outputs with RTCP, by kind
+        self._rtcp_reports = ReceiverReports()
+        self._pacers: Dict[str, RtpPacer] = {}  # paced UDP/multicast outputs, by kind
+        # Path MTU: payloaders of the UDP/multicast outputs by kind, discovery results by host
+        self._mtu_targets: Dict[str, Dict[str, Any]] = {}
+        self._path_mtu: Dict[str, Dict[str, Any]] = {}
+        self._path_mtu_lock = threading.Lock()
+        self._path_mtu_checking = False
+        self._path_mtu_recheck = False
+
+        # Every IDR request goes through one manager that coalesces bursts
+        self._keyframes = KeyframeManager(
+            self._send_keyframe_to_encoder,
+            lambda: self.video_config.keyframe_min_interval_ms / 1000,
+            lambda: self._intra_refresh_active,
+        )
+
+        # Glass-to-glass latency instrumentation (streaming_config.latency_probe)
+        self._latency_stages = LatencyStages()
+        self._frame_stamper: Optional[FrameStamper] = None
+        self._latency_receiver: Optional[LatencyReceiver] = None
+        self._remote_latency: Optional[Dict[str, Any]] = None  # last report from a remote receiver tool
+
+        # On-board recording: a tee branch into splitmuxsink (no second encode)
+        self._recorder: Optional[StreamRecorder] = None
+        self._recording_request: Optional[Dict[str, Any]] = None  # kept across pipeline restarts
+
+        # Warm standby: pipeline built and PAUSED until start() (streaming_config.warm_standby)
+        self._start_lock = threading.RLock()  # start() and prepare() never build concurrently
+        self._standby_signature: Optional[str] = None  # config the paused pipeline was built for
+        self._shutting_down = False
+        self.startup_stats: Dict[str, Any] = {
+            "prepare_ms": None,  # time spent pre-rolling the standby pipeline
+            "prerolled": False,  # last start() used the standby pipeline
+            "time_to_first_packet_ms": None,  # start() → first encoded buffer, last start
+            "last_cold_ms": None,
+            "last_warm_ms": None,
+        }
+
+        # Camera behind an input-selector with a slate (streaming_config.source_fallback)
+        self._source_selector: Optional[SourceSelector] = None
+        self._source_device: Optional[str] = None  # device the camera segment captures
+        self._pipeline_codec_id: Optional[str] = None  # encoder provider the pipeline was built with
+        self._running_signature: Optional[str] = None  # config of the running pipeline, camera aside
 
         # OpenCV service for video processing
         self._opencv_service = None
@@ -89,12 +184,17 @@ class GStreamerService:
         self._opencv_running = False
         self._opencv_queue = None
         self._opencv_appsrc = None
+        self._opencv_pixel_format = "BGR"  # BGR, or I420/NV12 in native YUV mode
         self._opencv_frames_processed = 0
         self._opencv_frames_dropped = 0
 
         # WebRTC-OpenCV integration
         self._webrtc_opencv_appsink_idx = -1
 
+        # Live renegotiation: (width, height, fps) the source delivers, and last result
+        self._source_output: Optional[tuple] = None
+        self.last_renegotiation: Optional[Dict[str, Any]] = None
+
         # WebRTC integration
         self.webrtc_adapter = None
 
@@ -109,6 +209,8 @@ class GStreamerService:
             "last_bytes_count": 0,
             "current_fps": 0,
             "current_bitrate": 0,
+            "srt": None,  # srtsink statistics while in SRT mode / with an SRT output
+            "rtcp": None,  # worst receiver report of the UDP/multicast/RTSP receivers
         }
 
         # Encoder-specific statistics (populated via polling, NOT pad probes)
@@ -166,7 +268,23 @@ class GStreamerService:
         osd_enabled = config.get("osd_enabled", False)
         return filter_type != "none" or osd_enabled
 
-    def _create_opencv_processing_elements(self, pipeline, width, height, framerate):
+    def _get_opencv_pixel_format(self, pipeline_config: dict = None) -> str:
+        """Pick the raw format the OpenCV appsink/appsrc pair negotiates.
+
+        In native YUV mode the format matches what the encoder consumes
+        (NV12 for hardware encoders, I420 otherwise), so the provider's own
+        videoconvert runs in passthrough and no BGR round-trip is needed.
+        """
+        if not self._opencv_service or not self._opencv_service.uses_yuv():
+            return "BGR"
+        for elem in (pipeline_config or {}).get("elements", []):
+            if elem.get("name") == "encoder_caps":
+                caps = str(elem.get("properties", {}).get("caps", ""))
+                if "format=NV12" in caps:
+                    return "NV12"
+        return "I420"
+
+    def _create_opencv_processing_elements(self, pipeline, width, height, framerate, pixel_format="BGR"):
         """Create appsink and appsrc elements for OpenCV processing"""
         try:
             # Create appsink to capture frames
@@ -176,12 +294,12 @@ class GStreamerService:
             appsink.set_property("drop", True)  # Drop old frames if processing is slow
             appsink.set_property("sync", False)  # Don't sync to clock
 
-            # Set explicit BGR caps for OpenCV processing
-            caps_str = f"video/x-raw,format=BGR,width={width},height={height},framerate={framerate}/1"
+            # Set explicit caps for OpenCV processing (BGR or native I420/NV12)
+            caps_str = f"video/x-raw,format={pixel_format},width={width},height={height},framerate={framerate}/1"
             caps = Gst.Caps.from_string(caps_str)
             appsink.set_property("caps", caps)
 
-            print(f"   📥 OpenCV appsink configured: {width}x{height}@{framerate}fps, BGR format")
+            print(f"   📥 OpenCV appsink configured: {width}x{height}@{framerate}fps, {pixel_format} format")
 
             # Connect callback
             appsink.connect("new-sample", self._on_opencv_new_sample)
@@ -191,10 +309,8 @@ class GStreamerService:
             appsrc.set_property("format", Gst.Format.TIME)
             appsrc.set_property("is-live", True)
             appsrc.set_property("do-timestamp", True)  # TRUE for live sources
-            # Set explicit BGR caps for proper negotiation
-            caps_bgr_str = f"video/x-raw,format=BGR,width={width},height={height},framerate={framerate}/1"
-            caps_bgr = Gst.Caps.from_string(caps_bgr_str)
-            appsrc.set_property("caps", caps_bgr)
+            # Same caps as the appsink: frames are processed in place
+            appsrc.set_property("caps", Gst.Caps.from_string(caps_str))
             appsrc.set_property("stream-type", 0)  # GST_APP_STREAM_TYPE_STREAM
             appsrc.set_property("max-bytes", 0)  # No limit
             appsrc.set_property("block", False)  # Non-blocking
@@ -202,12 +318,13 @@ class GStreamerService:
             appsrc.set_property("min-latency", -1)
             appsrc.set_property("max-latency", -1)
 
-            print("   📤 OpenCV appsrc configured with explicit BGR caps")
+            print(f"   📤 OpenCV appsrc configured with explicit {pixel_format} caps")
 
             pipeline.add(appsink)
             pipeline.add(appsrc)
 
             self._opencv_appsrc = appsrc
+            self._opencv_pixel_format = pixel_format
 
             return appsink, appsrc
 
@@ -229,8 +346,13 @@ class GStreamerService:
             return
 
         try:
-            # Create black BGR frame
-            black_frame = np.zeros((height, width, 3), dtype=np.uint8)
+            if self._opencv_pixel_format in ("I420", "NV12"):
+                # Black in limited-range YUV: Y=16, neutral chroma (in GStreamer's padded plane layout)
+                offsets, _, size = yuv420_layout(self._opencv_pixel_format, width, height)
+                black_frame = np.full(size, 128, dtype=np.uint8)
+                black_frame[: offsets[1]] = 16
+            else:
+                black_frame = np.zeros((height, width, 3), dtype=np.uint8)
             frame_bytes = black_frame.tobytes()
 
             # Create GStreamer buffer
@@ -277,26 +399,32 @@ class GStreamerService:
             # Get format info to handle different pixel formats
             format_str = struct.get_value("format")
 
-            # Determine number of channels based on format
-            channels = 3
-            if format_str in ["RGBA", "BGRA"]:
-                channels = 4
-            elif format_str in ["RGB", "BGR"]:
-                channels = 3
+            # Determine array shape based on format
+            layout = None
+            if format_str in ["I420", "NV12"]:
+                # Planar 4:2:0 - Y plane followed by subsampled chroma, rows padded to the caps' strides
+                layout = caps_yuv420_layout(caps, format_str, width, height)
+                shape = (layout[2],)
+            elif format_str in ["RGBA", "BGRA"]:
+                shape = (height, width, 4)
             elif format_str in ["GRAY8"]:
-                channels = 1
+                shape = (height, width, 1)
+            else:
+                shape = (height, width, 3)
 
-            # Verify buffer size matches expected
-            expected_size = height * width * channels
+            # A short buffer can't be viewed as a frame; drop it rather than raise
+            expected_size = int(np.prod(shape))
             actual_size = map_info.size
-            if actual_size != expected_size:
-                print(f"⚠️ Buffer size mismatch: expected {expected_size}, got {actual_size}")
-
-            # Convert to numpy array with correct dimensions
-            frame_data = np.ndarray(shape=(height, width, channels), dtype=np.uint8, buffer=map_info.data)
+            if actual_size < expected_size:
+                buf.unmap(map_info)
+                self._opencv_frames_dropped += 1
+                print(
+                    f"⚠️ Buffer too small for {width}x{height} {format_str}: expected {expected_size}, got {actual_size}"
+                )
+                return Gst.FlowReturn.OK
 
-            # Copy frame data and ensure C-contiguous (important for OpenCV!)
-            frame = np.ascontiguousarray(frame_data)
+            # Copy frame data out of the mapped buffer (C-contiguous, important for OpenCV!)
+            frame = np.frombuffer(map_info.data, dtype=np.uint8, count=expected_size).reshape(shape).copy()
 
             buf.unmap(map_info)
 
@@ -311,6 +439,8 @@ class GStreamerService:
                     self._opencv_queue.put_nowait(
                         {
                             "frame": frame,
+                            "layout": layout,
+                            "size": (width, height),
                             "pts": buf.pts,
                             "duration": buf.duration,
                             "timestamp": time.time(),
@@ -329,6 +459,8 @@ class GStreamerService:
                                 self._opencv_queue.put_nowait(
                                     {
                                         "frame": frame,
+                                        "layout": layout,
+                                        "size": (width, height),
                                         "pts": buf.pts,
                                         "duration": buf.duration,
                                         "timestamp": time.time(),
@@ -375,7 +507,14 @@ class GStreamerService:
 
                 # Process with OpenCV
                 try:
-                    processed_frame = self._opencv_service.process_frame(frame)
+                    fmt = self._opencv_pixel_format
+                    if fmt in ("I420", "NV12"):
+                        width, height = frame_data.get("size", (self.video_config.width, self.video_config.height))
+                        processed_frame = self._opencv_service.process_frame_yuv(
+                            frame, fmt, width, height, frame_data.get("layout")
+                        )
+                    else:
+                        processed_frame = self._opencv_service.process_frame(frame)
                 except Exception as e:
                     print(f"❌ Frame {frame_count}: Processing failed: {e}")
                     import traceback
@@ -476,6 +615,7 @@ class GStreamerService:
         self._opencv_thread = None
         self._opencv_queue = None
         self._opencv_appsrc = None
+        self._opencv_pixel_format = "BGR"
 
     def is_available(self) -> bool:
         """Check if GStreamer is available"""
@@ -512,9 +652,13 @@ class GStreamerService:
             print(f"📡 Streaming mode: UDP multicast → {group}:{mport}")
         elif mode == "rtsp":
             print(f"📡 Streaming mode: RTSP Server → {self.streaming_config.rtsp_url}")
+        elif mode == "srt":
+            print(f"📡 Streaming mode: SRT {self.streaming_config.srt_mode} → {self._srt_uri()}")
         else:
             print(f"📡 Streaming mode: {mode}")
 
+        self._refresh_standby()
+
         # Broadcast updated status
         self._broadcast_status()
 
@@ -598,7 +742,7 @@ class GStreamerService:
                 "width": self.video_config.width,
                 "height": self.video_config.height,
                 "framerate": self.video_config.framerate,
-                "bitrate": self.video_config.h264_bitrate,
+                "bitrate": self._encoder_bitrate_kbps(),
                 "quality": self.video_config.quality,
             }
 
@@ -665,19 +809,21 @@ class GStreamerService:
                 w = self.video_config.width
                 h = self.video_config.height
                 fps = self.video_config.framerate
+                # x264enc/openh264enc both take I420 natively
+                pix_fmt = self._get_opencv_pixel_format()
 
-                opencv_appsink, opencv_appsrc = self._create_opencv_processing_elements(pipeline, w, h, fps)
+                opencv_appsink, opencv_appsrc = self._create_opencv_processing_elements(pipeline, w, h, fps, pix_fmt)
 
                 if opencv_appsink and opencv_appsrc:
-                    # Add capsfilter to force BGR conversion BEFORE appsink
+                    # Add capsfilter to force the processing format BEFORE appsink
                     capsfilter_bgr = Gst.ElementFactory.make("capsfilter", "opencv_capsfilter")
                     if capsfilter_bgr:
-                        cap_str = f"video/x-raw,format=BGR,width={w},height={h},framerate={fps}/1"
+                        cap_str = f"video/x-raw,format={pix_fmt},width={w},height={h},framerate={fps}/1"
                         caps = Gst.Caps.from_string(cap_str)
                         capsfilter_bgr.set_property("caps", caps)
                         pipeline.add(capsfilter_bgr)
                         elements.append(capsfilter_bgr)
-                        print("   🔧 BGR capsfilter inserted before appsink")
+                        print(f"   🔧 {pix_fmt} capsfilter inserted before appsink")
 
                     # Mark position for special linking AFTER adding capsfilter
                     # opencv_appsink_idx points to the appsink element that receives data
@@ -685,11 +831,12 @@ class GStreamerService:
                     elements.append(opencv_appsink)
                     elements.append(opencv_appsrc)
 
-                    # Add videoconvert after appsrc to ensure encoder gets the right format
-                    videoconv_post = Gst.ElementFactory.make("videoconvert", "webrtc_opencv_post_conv")
-                    if videoconv_post:
-                        pipeline.add(videoconv_post)
-                        elements.append(videoconv_post)
+                    # BGR needs converting back for the encoder; YUV is already in its format
+                    if pix_fmt == "BGR":
+                        videoconv_post = Gst.ElementFactory.make("videoconvert", "webrtc_opencv_post_conv")
+                        if videoconv_post:
+                            pipeline.add(videoconv_post)
+                            elements.append(videoconv_post)
 
                     # Start OpenCV processing thread
                     self._start_opencv_processing_thread()
@@ -703,15 +850,21 @@ class GStreamerService:
             # ── H264 encoder selection: try x264enc first, then openh264enc ──
             bitrate_kbps = self.video_config.h264_bitrate or 1500
             encoder_name = None
+            self._intra_refresh_active = False
 
             x264enc = Gst.ElementFactory.make("x264enc", "webrtc_h264enc")
             if x264enc:
                 encoder_name = "x264enc"
+                self._webrtc_encoder_codec_id = "h264"
                 x264enc.set_property("tune", 0x00000004)  # zerolatency
                 x264enc.set_property("speed-preset", 1)  # ultrafast
                 x264enc.set_property("bitrate", bitrate_kbps)
                 x264enc.set_property("key-int-max", self.video_config.framerate * 2)  # keyframe every 2s
                 x264enc.set_property("byte-stream", True)
+                if self.video_config.intra_refresh:
+                    # key-int-max becomes the refresh period; browsers still get IDRs on PLI/join
+                    x264enc.set_property("intra-refresh", True)
+                    self._intra_refresh_active = True
                 pipeline.add(x264enc)
                 elements.append(x264enc)
                 # Install encoder stats probes
@@ -721,6 +874,7 @@ class GStreamerService:
                 openh264enc = Gst.ElementFactory.make("openh264enc", "webrtc_h264enc")
                 if openh264enc:
                     encoder_name = "openh264enc"
+                    self._webrtc_encoder_codec_id = "h264_openh264"
                     openh264enc.set_property("bitrate", bitrate_kbps * 1000)
                     openh264enc.set_property("complexity", 0)  # low complexity
                     pipeline.add(openh264enc)
@@ -734,36 +888,26 @@ class GStreamerService:
 
             self.current_encoder_provider = f"WebRTC (H264 {encoder_name}→aiortc)"
 
-            # ── h264parse → normalize NAL format ──
-            h264parse = Gst.ElementFactory.make("h264parse", "webrtc_h264parse")
-            if h264parse:
-                h264parse.set_property("config-interval", -1)  # send SPS/PPS with every keyframe
-                pipeline.add(h264parse)
-                elements.append(h264parse)
+            # ── Latency instrumentation (SEI timestamps) ──
+            stamper_idx = self._insert_frame_stamper(pipeline, elements, "rtph264pay")
 
-            # ── Appsink — outputs H264 byte-stream ──
-            appsink = Gst.ElementFactory.make("appsink", "webrtc_appsink")
-            if not appsink:
-                self.last_error = "appsink GStreamer plugin not available"
+            # ── Output tee: WebRTC is the primary branch, UDP/RTSP can be attached live ──
+            tee = self._create_output_tee(pipeline)
+            if not tee:
+                self.last_error = "tee GStreamer plugin not available"
                 return False
-
-            appsink.set_property("emit-signals", True)
-            appsink.set_property("sync", False)
-            appsink.set_property("max-buffers", 3)
-            appsink.set_property("drop", True)
-            appsink.set_property(
-                "caps",
-                Gst.Caps.from_string("video/x-h264,stream-format=byte-stream,alignment=au"),
-            )
-            pipeline.add(appsink)
-            elements.append(appsink)
+            elements.append(tee)
+            self._output_payloader = {
+                "element": "rtph264pay",
+                "properties": {"pt": 96, "mtu": 1400, "config-interval": -1},
+            }
 
             # ── Link all elements ──
             # Special handling for OpenCV: the appsink ↔ appsrc connection uses callbacks
             # So we skip linking appsink → appsrc, but link everything else normally
             for i in range(len(elements) - 1):
-                # Skip ONLY the appsink → appsrc link when OpenCV is enabled
-                if opencv_appsink_idx >= 0 and i == opencv_appsink_idx:
+                # Skip ONLY the appsink → appsrc links (OpenCV, latency stamper)
+                if (opencv_appsink_idx >= 0 and i == opencv_appsink_idx) or i == stamper_idx:
                     continue
 
                 src_name = elements[i].get_name()
@@ -773,8 +917,9 @@ class GStreamerService:
                     logger.error(self.last_error)
                     return False
 
-            # ── Connect appsink signal ──
-            appsink.connect("new-sample", self._on_webrtc_appsink_sample)
+            # ── Primary output branch (h264parse → appsink) ──
+            if not self._attach_primary_output(pipeline, tee):
+                return False
 
             # ── GStreamer bus ──
             bus = pipeline.get_bus()
@@ -790,7 +935,7 @@ class GStreamerService:
             decode_step = "jpegdec → " if source_is_jpeg else ""
             print(
                 f"✅ WebRTC H264 pipeline built: {src_cfg['element']} → {decode_step}"
-                f"videoconvert → {encoder_name} → h264parse → appsink "
+                f"videoconvert → {encoder_name} → tee → h264parse → appsink "
                 f"({config['width']}x{config['height']}@{config['framerate']}fps @ {bitrate_kbps}kbps)"
             )
             return True
@@ -803,27 +948,45 @@ class GStreamerService:
             traceback.print_exc()
             return False
 
-    def force_keyframe(self):
-        """Force the GStreamer H264 encoder to produce an IDR keyframe.
-        Called when a new WebRTC peer connects so it gets SPS/PPS/IDR."""
+    def force_keyframe(self, reason: str = "api") -> bool:
+        """Request an IDR keyframe from the active encoder.
+
+        Called when a new WebRTC peer, RTSP client or output attaches so it
+        gets SPS/PPS/IDR, on PLI/FIR and on network events. Requests within
+        keyframe_min_interval_ms of the last IDR are merged into one."""
+        return self._keyframes.request(reason)["success"]
+
+    def get_keyframe_stats(self) -> Dict[str, Any]:
+        """Keyframe requests vs. IDRs actually issued"""
+        return self._keyframes.get_stats()
+
+    def _send_keyframe_to_encoder(self) -> bool:
+        """Send GstForceKeyUnit to whichever encoder the pipeline has"""
         if not self.pipeline or not GSTREAMER_AVAILABLE:
             return False
+        if (self._output_payloader or {}).get("element") == "rtpjpegpay":
+            return True  # every MJPEG frame is a keyframe
         try:
-            encoder = self.pipeline.get_by_name("webrtc_h264enc")
-            if encoder:
-                # Send force-keyunit event on the encoder's srcpad (upstream event
-                # must be sent on a downstream-facing pad to travel into the encoder)
-                result = Gst.Structure.new_from_string("GstForceKeyUnit, all-headers=(boolean)true")
-                structure = result[0] if isinstance(result, tuple) else result
-                event = Gst.Event.new_custom(Gst.EventType.CUSTOM_UPSTREAM, structure)
-                srcpad = encoder.get_static_pad("src")
-                success = srcpad.send_event(event)
-                print(f"🔑 Force keyframe requested → {success}")
-                return success
+            # h264parse: passthrough pipelines have no encoder; the event goes
+            # upstream to the camera source, which may honour it
+            for name in ("webrtc_h264enc", "encoder", "h264parse"):
+                element = self.pipeline.get_by_name(name)
+                if element:
+                    return self._send_force_key_unit(element)
         except Exception as e:
             print(f"⚠️ Force keyframe failed: {e}")
         return False
 
+    def _send_force_key_unit(self, encoder) -> bool:
+        """Send a GstForceKeyUnit event into an encoder element"""
+        # Send force-keyunit event on the encoder's srcpad (upstream event
+        # must be sent on a downstream-facing pad to travel into the encoder)
+        result = Gst.Structure.new_from_string("GstForceKeyUnit, all-headers=(boolean)true")
+        structure = result[0] if isinstance(result, tuple) else result
+        event = Gst.Event.new_custom(Gst.EventType.CUSTOM_UPSTREAM, structure)
+        srcpad = encoder.get_static_pad("src")
+        return bool(srcpad.send_event(event))
+
     def _install_encoder_probes(self, encoder_element):
         """NO-OP: Pad probes removed to eliminate GIL contention.
 
@@ -845,11 +1008,6 @@ class GStreamerService:
                 pass
         self._encoder_probe_ids.clear()
 
-    def _install_passthrough_probes(self, rtppay_element):
-        """NO-OP: Pad probes removed to eliminate GIL contention.
-        Stats are now collected via _poll_pipeline_stats()."""
-        pass
-
     def _on_webrtc_appsink_sample(self, appsink):
         """
         Called by GStreamer whenever a new H264 access unit is ready.
@@ -872,9 +1030,11 @@ class GStreamerService:
             try:
                 h264_data = bytes(map_info.data)
 
-                # Feed to WebRTC service → aiortc H264 passthrough
+                # Feed to WebRTC service → aiortc H264 passthrough, keeping
+                # the GStreamer PTS for the RTP timestamp
                 if self.webrtc_service:
-                    self.webrtc_service.push_video_frame(h264_data)
+                    pts_ns = buf.pts if buf.pts != Gst.CLOCK_TIME_NONE else None
+                    self.webrtc_service.push_video_frame(h264_data, pts_ns)
 
                 # Update stats
                 with self.stats_lock:
@@ -893,8 +1053,9 @@ class GStreamerService:
         Adapt requested codec to available board features.
 
         Smart codec selection:
-        1. If user requests 'h264' (generic), auto-upgrade to hardware H.264
-           if the board has a V4L2 M2M encoder available.
+        1. If user requests 'h264' (generic) and the board has a V4L2 M2M
+           encoder, use the registry's best H.264 encoder for the configured
+           mode; hardware is not picked once benchmarked too slow for it.
         2. If user requests a specific HW encoder that's unavailable, fall
            back gracefully: h264_hardware → h264 (x264) → mjpeg.
         3. Board feature list is consulted but the final word comes from
@@ -930,8 +1091,19 @@ class GStreamerService:
             if requested_codec_id in ("h264", "x264"):
                 hw_provider = registry.get_video_encoder("h264_hardware")
                 if hw_provider and hw_provider.is_available():
-                    print("🚀 Hardware H.264 encoder detected — auto-upgrading from software")
-                    return "h264_hardware"
+                    # Measured capacity (if benchmarked) overrides the static preference
+                    from app.services.encoder_benchmark import get_encoder_benchmark
+
+                    w, h, fps = self.video_config.width, self.video_config.height, self.video_config.framerate
+                    best = registry.get_best_video_encoder("h264", w, h, fps)
+                    chosen = best.codec_id if best and best.codec_id in AUTO_H264_ENCODERS else "h264"
+                    if chosen == "h264_hardware" and get_encoder_benchmark().can_sustain(chosen, w, h, fps) is False:
+                        chosen = "h264"
+                    if chosen == "h264_hardware":
+                        print("🚀 Hardware H.264 encoder detected — auto-upgrading from software")
+                    else:
+                        print(f"📊 Benchmark: {chosen} ranks best for {w}x{h}@{fps}")
+                    return chosen
 
             # If explicitly requesting hardware and it's available, use it
             if requested_codec_id in ("h264_hardware", "h264_hw", "h264_hw_meson"):
@@ -1001,26 +1173,7 @@ class GStreamerService:
                 return False
 
             # Get video source provider FIRST to determine source format
-            registry = get_provider_registry()
-
-            # Find which source provider handles this device
-            source_provider = None
-
-            for source_type in registry.list_video_source_providers():
-                sp = registry.get_video_source(source_type)
-                if sp and sp.is_available():
-                    # Check if this provider can handle the device
-                    sources = sp.discover_sources()
-                    for src in sources:
-                        if src["device"] == self.video_config.device:
-                            source_provider = sp
-                            break
-                    if source_provider:
-                        break
-
-            # Fallback to v4l2 if no provider found (backward compatibility)
-            if not source_provider:
-                source_provider = registry.get_video_source("v4l2")
+            source_provider = self._find_source_provider(registry, self.video_config.device)
 
             # Store source provider name for status reporting
             if source_provider:
@@ -1032,15 +1185,9 @@ class GStreamerService:
                 return False
 
             # Build config dict from video_config
-            config = {
-                "width": self.video_config.width,
-                "height": self.video_config.height,
-                "framerate": self.video_config.framerate,
-                "bitrate": self.video_config.h264_bitrate,
-                "quality": self.video_config.quality,
-                "gop_size": self.video_config.gop_size,
-                "opencv_enabled": self._is_opencv_enabled(),  # For HW decoder optimization
-            }
+            config = self._encoder_config()
+            # Upper bound for live renegotiation (videoscale/videorate can only go down)
+            self._source_output = (config["width"], config["height"], config["framerate"])
 
             # ═══════════════════════════════════════════════════════════════
             # BOARD-SPECIFIC PIPELINE HINTS
@@ -1136,6 +1283,9 @@ class GStreamerService:
                 print(f"❌ Failed to build pipeline elements: {pipeline_config.get('error', 'Unknown error')}")
                 self.last_error = pipeline_config.get("error", "Unknown error")
                 return False
+            self._intra_refresh_active = bool(pipeline_config.get("intra_refresh"))
+            if self.video_config.intra_refresh and not self._intra_refresh_active:
+                print(f"⚠️ {provider.display_name} has no intra refresh, keeping IDR GOPs")
 
             # Create GStreamer pipeline
             print(f"🔧 Building pipeline with encoder: {provider.display_name}")
@@ -1221,31 +1371,34 @@ class GStreamerService:
                         elements_list.append(videoconv)
 
                 # Create OpenCV processing elements
+                pix_fmt = self._get_opencv_pixel_format(pipeline_config)
                 appsink, appsrc = self._create_opencv_processing_elements(
-                    pipeline, config["width"], config["height"], config["framerate"]
+                    pipeline, config["width"], config["height"], config["framerate"], pix_fmt
                 )
 
                 if appsink and appsrc:
-                    # Add capsfilter to force BGR conversion BEFORE appsink
+                    # Add capsfilter to force the processing format BEFORE appsink
                     capsfilter_bgr = Gst.ElementFactory.make("capsfilter", "opencv_capsfilter_udp")
                     if capsfilter_bgr:
                         w, h, fps = config["width"], config["height"], config["framerate"]
-                        cap_str = f"video/x-raw,format=BGR,width={w},height={h},framerate={fps}/1"
+                        cap_str = f"video/x-raw,format={pix_fmt},width={w},height={h},framerate={fps}/1"
                         caps = Gst.Caps.from_string(cap_str)
                         capsfilter_bgr.set_property("caps", caps)
                         pipeline.add(capsfilter_bgr)
                         elements_list.append(capsfilter_bgr)
-                        print("   🔧 BGR capsfilter inserted before appsink")
+                        print(f"   🔧 {pix_fmt} capsfilter inserted before appsink")
 
                     # Mark position for special linking AFTER adding capsfilter
                     opencv_appsink_idx = len(elements_list)
                     elements_list.append(appsink)
                     elements_list.append(appsrc)
 
-                    # Add videoconvert after appsrc to ensure encoder gets the right format
-                    videoconv_post = Gst.ElementFactory.make("videoconvert", "videoconv_opencv_post")
-                    pipeline.add(videoconv_post)
-                    elements_list.append(videoconv_post)
+                    # BGR needs converting back; in YUV mode the provider's own
+                    # videoconvert ahead of encoder_caps is a passthrough
+                    if pix_fmt == "BGR":
+                        videoconv_post = Gst.ElementFactory.make("videoconvert", "videoconv_opencv_post")
+                        pipeline.add(videoconv_post)
+                        elements_list.append(videoconv_post)
 
                     # Start OpenCV processing thread
                     self._start_opencv_processing_thread()
@@ -1288,34 +1441,32 @@ class GStreamerService:
             # Install encoder stats probes
             if encoder_element:
                 self._install_encoder_probes(encoder_element)
-            else:
-                # No encoder (passthrough mode) - install probe on RTP payloader instead
-                print("📊 Passthrough mode: Installing probe on RTP payloader for stats")
-
-            # Add RTP payloader
-            rtppay = Gst.ElementFactory.make(pipeline_config["rtp_payloader"], "rtppay")
-            if not rtppay:
-                print(f"❌ Failed to create RTP payloader: {pipeline_config['rtp_payloader']}")
-                return False
 
-            for prop, value in pipeline_config["rtp_payloader_properties"].items():
-                rtppay.set_property(prop, value)
-
-            pipeline.add(rtppay)
-            elements_list.append(rtppay)
+            # Camera (up to raw video) goes behind an input-selector with a slate
+            # so it can drop out or be swapped without stopping the encoder
+            selector = None
+            split = self._raw_video_split(elements_list) if not opencv_enabled else None
+            if split and self.streaming_config.source_fallback:
+                selector = SourceSelector(pipeline, on_switch=lambda: self.force_keyframe("source_switch"))
+                if selector.create(config["width"], config["height"], config["framerate"]):
+                    elements_list.insert(split, selector.element)
+                else:
+                    print("⚠️ input-selector/videotestsrc unavailable, camera linked directly")
+                    selector = None
 
-            # Install passthrough probe on RTP payloader if no encoder
-            if not encoder_element:
-                self._install_passthrough_probes(rtppay)
+            # Latency instrumentation stamps each access unit before the fan-out
+            stamper_idx = self._insert_frame_stamper(pipeline, elements_list, pipeline_config["rtp_payloader"])
 
-            # Create sink based on streaming mode
-            sink = self._create_sink_for_mode()
-            if not sink:
-                print(f"❌ Failed to create sink for mode: {self.streaming_config.mode}")
+            # Encoded stream fans out from here; RTP payloading is per output
+            tee = self._create_output_tee(pipeline)
+            if not tee:
+                print("❌ Failed to create output tee")
                 return False
-
-            pipeline.add(sink)
-            elements_list.append(sink)
+            elements_list.append(tee)
+            self._output_payloader = {
+                "element": pipeline_config["rtp_payloader"],
+                "properties": dict(pipeline_config.get("rtp_payloader_properties", {})),
+            }
 
             # Link all elements in order
             # Special handling for OpenCV: don't link appsink → appsrc
@@ -1323,8 +1474,8 @@ class GStreamerService:
             opencv_skip_start = opencv_appsink_idx if opencv_appsink_idx >= 0 else -1
 
             for i in range(len(elements_list) - 1):
-                # Skip ONLY the appsink → appsrc link (they communicate via callbacks)
-                if opencv_skip_start >= 0 and i == opencv_skip_start:
+                # Skip ONLY the appsink → appsrc links (they communicate via callbacks)
+                if (opencv_skip_start >= 0 and i == opencv_skip_start) or i == stamper_idx:
                     continue
 
                 src_name = elements_list[i].get_name()
@@ -1333,9 +1484,15 @@ class GStreamerService:
                     logger.error(f"Failed to link {src_name} → {dst_name}")
                     return False
 
-            # WebRTC mode: add tee + appsink branch for JPEG frames to aiortc
-            if self.streaming_config.mode == "webrtc" and self.webrtc_service:
-                self._attach_webrtc_appsink(pipeline, elements_list)
+            if selector:
+                selector.adopt_camera(elements_list[:split])
+            self._source_selector = selector
+            self._source_device = self.video_config.device
+            self._pipeline_codec_id = codec_id
+
+            # Primary output from streaming mode; more can be attached while playing
+            if not self._attach_primary_output(pipeline, tee):
+                return False
 
             # Setup bus for messages
             bus = pipeline.get_bus()
@@ -1354,6 +1511,97 @@ class GStreamerService:
             self.last_error = str(e)
             return False
 
+    def _encoder_config(self) -> Dict[str, Any]:
+        """Provider config from video_config"""
+        return {
+            "width": self.video_config.width,
+            "height": self.video_config.height,
+            "framerate": self.video_config.framerate,
+            "bitrate": self._encoder_bitrate_kbps(),
+            "quality": self.video_config.quality,
+            "gop_size": self.video_config.gop_size,
+            "intra_refresh": self.video_config.intra_refresh,
+            "opencv_enabled": self._is_opencv_enabled(),  # For HW decoder optimization
+        }
+
+    @staticmethod
+    def _find_source_provider(registry, device: str):
+        """The video source provider that lists *device*, else v4l2"""
+        for source_type in registry.list_video_source_providers():
+            sp = registry.get_video_source(source_type)
+            if sp and sp.is_available():
+                if any(src["device"] == device for src in sp.discover_sources()):
+                    return sp
+        # Fallback to v4l2 if no provider found (backward compatibility)
+        return registry.get_video_source("v4l2")
+
+    @staticmethod
+    def _raw_video_split(elements_list: list) -> Optional[int]:
+        """Index where the camera segment ends: the provider's first raw-video stage"""
+        for index, element in enumerate(elements_list):
+            if element.get_name() == "videoconvert":
+                return index or None
+        return None  # passthrough: no raw video to switch
+
+    @staticmethod
+    def _make_element(elem_config: Dict[str, Any]):
+        element = Gst.ElementFactory.make(elem_config["element"], elem_config["name"])
+        if not element:
+            return None
+        for prop, value in elem_config.get("properties", {}).items():
+            if prop == "caps" and isinstance(value, str):
+                value = Gst.Caps.from_string(value)
+            element.set_property(prop, value)
+        return element
+
+    def _build_source_segment(self, device: str) -> Dict[str, Any]:
+        """Camera elements for *device* up to raw video, to feed the running pipeline's selector"""
+        from app.providers.registry import get_provider_registry
+
+        registry = get_provider_registry()
+        source_provider = self._find_source_provider(registry, device)
+        encoder = registry.get_video_encoder(self._pipeline_codec_id or "")
+        if not source_provider or not encoder:
+            return {"success": False, "error": "No provider for the new source"}
+
+        # The rest of the pipeline stays as negotiated: the new camera must deliver the same
+        config = self._encoder_config()
+        if self._source_output:
+            config["width"], config["height"], config["framerate"] = self._source_output
+        validation = source_provider.validate_config(device, config) or {}
+        adjusted = validation.get("adjusted_config") or {}
+        if not validation.get("valid", True) or any(
+            key in adjusted and adjusted[key] != config[key] for key in ("width", "height", "framerate")
+        ):
+            return {
+                "success": False,
+                "error": f"{device} can't deliver {config['width']}x{config['height']}@{config['framerate']}",
+            }
+
+        source = source_provider.build_source_element(device, config)
+        if not source["success"]:
+            return {"success": False, "error": source.get("error", "Failed to build source element")}
+        config["source_format"] = source.get("output_format", "image/jpeg")
+        pipeline_config = encoder.build_pipeline_elements(config)
+        if not pipeline_config["success"]:
+            return {"success": False, "error": pipeline_config.get("error", "Failed to build decoder")}
+
+        configs = [source["source_element"]]
+        if source["caps_filter"]:
+            configs.append(
+                {"element": "capsfilter", "name": "caps_filter", "properties": {"caps": source["caps_filter"]}}
+            )
+        configs += source.get("post_elements", [])
+        for elem_config in pipeline_config["elements"]:
+            if elem_config["name"] == "videoconvert":
+                break
+            configs.append(elem_config)
+
+        elements = [self._make_element(elem_config) for elem_config in configs]
+        if not all(elements):
+            return {"success": False, "error": "Failed to create source elements"}
+        return {"success": True, "elements": elements, "provider": source_provider.display_name}
+
     def _create_sink_for_mode(self):
         """
         Create appropriate sink element based on streaming mode.
@@ -1391,6 +1639,10 @@ class GStreamerService:
                 print(f"   → UDP multicast to {group}:{mport}")
                 return sink
 
+            elif mode == "srt":
+                # Mode 5: SRT — MPEG-TS with retransmission inside the latency budget
+                return self._create_srt_sink("sink")
+
             elif mode == "webrtc":
                 # Mode 4: WebRTC — pipeline sinks to fakesink;
                 # actual video is sent via aiortc from the appsink branch
@@ -1421,6 +1673,751 @@ class GStreamerService:
             print(f"   → Fallback to UDP: {self.streaming_config.udp_host}:{self.streaming_config.udp_port}")
         return sink
 
+    # ── Output fan-out ─────────────────────────────────────────────────────
+
+    def _create_output_tee(self, pipeline):
+        """Create the tee every output branch hangs off"""
+        tee = Gst.ElementFactory.make("tee", "output_tee")
+        if not tee:
+            return None
+        # Outputs come and go at runtime; a tee with no branch must not fail the pipeline
+        tee.set_property("allow-not-linked", True)
+        pipeline.add(tee)
+        self._output_fanout = OutputFanout(pipeline, tee)
+        return tee
+
+    def _attach_primary_output(self, pipeline, tee) -> bool:
+        """Attach the branch for the configured streaming mode"""
+        mode = self.streaming_config.mode
+        branch = self._build_output_branch(mode, primary=True)
+        elements = branch.get("elements") or []
+        if branch["success"]:
+            branch = self._output_fanout.attach(mode, elements, branch.get("info"))
+        if not branch["success"]:
+            self.last_error = branch["error"]
+            print(f"❌ Failed to attach {mode} output: {self.last_error}")
+            self._release_output_resources(mode)
+            return False
+        if self._frame_stamper and elements:
+            self._frame_stamper.watch_sent(elements[-1])
+        return True
+
+    def _insert_frame_stamper(self, pipeline, elements: list, payloader: str) -> int:
+        """
+        Append the latency stamper relay when instrumentation is on.
+
+        Returns the index of its appsink in ``elements`` (the appsink →
+        appsrc link must be skipped), or -1 when nothing was added.
+        """
+        self._frame_stamper = None
+        if not self.streaming_config.latency_probe:
+            return -1
+        if payloader != "rtph264pay":
+            print("⚠️ Latency instrumentation needs an H.264 stream, not stamping frames")
+            return -1
+        stamper = FrameStamper(pipeline, self._latency_stages)
+        stamper_elements = stamper.create_elements()
+        if not stamper_elements:
+            print("⚠️ appsink/appsrc not available, latency instrumentation disabled")
+            return -1
+        for element in stamper_elements:
+            pipeline.add(element)
+        elements.extend(stamper_elements)
+        self._frame_stamper = stamper
+        print("⏱️ Latency instrumentation: capture/encode time SEI in every frame")
+        return len(elements) - 2
+
+    def _build_output_branch(self, kind: str, params: Optional[Dict[str, Any]] = None, primary: bool = False):
+        """
+        Create the elements of one output branch (OutputFanout adds the queue).
+
+        The primary UDP/multicast output keeps the historical element names
+        ("rtppay", "sink"); outputs attached later get kind-prefixed names.
+        """
+        params = params or {}
+
+        if kind in ("udp", "multicast"):
+            payloader = self._output_payloader or {}
+            if not payloader.get("element"):
+                return {"success": False, "error": "Encoder has no RTP payloader"}
+
+            rtppay = Gst.ElementFactory.make(payloader["element"], "rtppay" if primary else f"{kind}_rtppay")
+            if not rtppay:
+                return {"success": False, "error": f"Failed to create RTP payloader: {payloader['element']}"}
+            for prop, value in payloader["properties"].items():
+                rtppay.set_property(prop, value)
+
+            if kind == "multicast":
+                host = params.get("host") or self.streaming_config.multicast_group
+                port = params.get("port") or self.streaming_config.multicast_port
+            else:
+                host = params.get("host") or self.streaming_config.udp_host
+                port = params.get("port") or self.streaming_config.udp_port
+
+            if self.streaming_config.path_mtu_discovery:
+                ceiling = payloader["properties"].get("mtu", DEFAULT_RTP_MTU)
+                self._mtu_targets[kind] = {"host": host, "rtppay": rtppay, "ceiling": ceiling}
+                self._apply_path_mtu(kind)  # known from an earlier stream; re-checked in the background
+                self.recheck_path_mtu()
+
+            if primary:
+                sink = self._create_sink_for_mode()
+            else:
+                sink = Gst.ElementFactory.make("udpsink", f"{kind}_sink")
+                if sink:
+                    sink.set_property("host", host)
+                    sink.set_property("port", port)
+                    if kind == "multicast":
+                        sink.set_property("auto-multicast", True)
+                        sink.set_property("ttl", params.get("ttl") or self.streaming_config.multicast_ttl)
+                    sink.set_property("sync", False)
+                    sink.set_property("async", False)
+            if not sink:
+                return {"success": False, "error": f"Failed to create sink for {kind}"}
+            elements = [rtppay, sink]
+            info = {"host": host, "port": port}
+            if self.streaming_config.fec_enabled:
+                fec = self._create_fec_encoder("fec" if primary else f"{kind}_fec")
+                if fec:
+                    elements.insert(1, fec)
+                    info["fec_pt"] = FEC_PAYLOAD_TYPE
+            if self.streaming_config.rtcp_feedback:
+                ttl = (params.get("ttl") or self.streaming_config.multicast_ttl) if kind == "multicast" else None
+                session = RtcpSession("rtcp" if primary else f"{kind}_rtcp", host, port, ttl)
+                rtcp = session.create_element()
+                if rtcp:
+                    elements.insert(len(elements) - 1, rtcp)
+                    self._rtcp_sessions[kind] = session
+                    info["rtcp"] = {
+                        "sender_reports_port": session.rtcp_port,
+                        "receiver_reports_port": session.report_port,
+                    }
+                else:
+                    print("⚠️ rtpbin not available, sending RTP without RTCP")
+            if self.streaming_config.rtp_pacing:
+                pacer = RtpPacer(
+                    "pacer" if primary else f"{kind}_pacer",
+                    self._pacing_target_kbps,
+                    self.streaming_config.pacing_rate_multiplier,
+                    self.streaming_config.pacing_max_delay_ms,
+                    framerate=self.video_config.framerate,
+                    packet_bytes=self._mtu_targets.get(kind, {}).get("payload_mtu")
+                    or payloader["properties"].get("mtu", DEFAULT_RTP_MTU),
+                )
+                paced = pacer.create_element(sink)
+                if paced:
+                    elements.insert(len(elements) - 1, paced)
+                    self._pacers[kind] = pacer
+                    info["pacing"] = {"multiplier": pacer.multiplier, "max_delay_ms": pacer.max_delay_ms}
+                else:
+                    print("⚠️ identity element not available, sending RTP unpaced")
+            return {"success": True, "elements": elements, "info": info}
+
+        if kind == "rtsp":
+            payloader = (self._output_payloader or {}).get("element") or "rtph264pay"
+            appsink = self._create_output_appsink("rtsp_appsink", self._on_rtsp_appsink_sample)
+            if not appsink:
+                return {"success": False, "error": "appsink GStreamer plugin not available"}
+            if not self.rtsp_server:
+                self.rtsp_server = RTSPServer(port=8554, mount_point="/fpv")
+            # New RTSP clients start on the next IDR instead of waiting a whole GOP
+            self.rtsp_server.start_shared(payloader, on_client=lambda: self.force_keyframe("rtsp_client"))
+            return {
+                "success": True,
+                "elements": [appsink],
+                "info": {"url": self.rtsp_server.get_url(self._get_streaming_ip())},
+            }
+
+        if kind == "srt":
+            payloader = (self._output_payloader or {}).get("element")
+            parser_factory = {"rtph264pay": "h264parse", "rtph265pay": "h265parse"}.get(payloader)
+            if not parser_factory:
+                return {"success": False, "error": "SRT output requires an H.264 or H.265 encoder"}
+            parser = Gst.ElementFactory.make(parser_factory, "srt_parse")
+            mux = Gst.ElementFactory.make("mpegtsmux", "srt_mux")
+            if not parser or not mux:
+                return {"success": False, "error": f"{parser_factory}/mpegtsmux GStreamer plugins not available"}
+            parser.set_property("config-interval", -1)  # SPS/PPS with every keyframe
+            mux.set_property("alignment", 7)  # 7 TS packets = 1316 bytes, one SRT payload
+            sink = self._create_sink_for_mode() if primary else self._create_srt_sink("srt_sink", params)
+            if not sink:
+                return {"success": False, "error": "srtsink GStreamer plugin not available (gst-plugins-bad)"}
+            return {
+                "success": True,
+                "elements": [parser, mux, sink],
+                "info": {"uri": sink.get_property("uri"), "latency_ms": sink.get_property("latency")},
+            }
+
+        if kind == "record":
+            config = self.streaming_config
+            request = self._recording_request or {}
+            self._recorder = StreamRecorder(
+                directory=params.get("directory") or request.get("directory") or self._recording_directory(),
+                prefix=request.get("prefix") or time.strftime("recording-%Y-%m-%d_%H-%M-%S"),
+                fmt=config.recording_format,
+                segment_s=config.recording_segment_s,
+                quota_mb=config.recording_quota_mb,
+                request_keyframe=lambda: self.force_keyframe("recording_split"),
+            )
+            result = self._recorder.create_elements((self._output_payloader or {}).get("element"))
+            if not result["success"]:
+                return result
+            return {
+                "success": True,
+                "elements": result["elements"],
+                "info": {"directory": str(self._recorder.directory), "format": self._recorder.format},
+                # Deep enough for SD card stalls; still leaky so the live outputs never wait
+                "queue_properties": {"max-size-buffers": 0, "max-size-time": RECORD_QUEUE_TIME_NS},
+            }
+
+        if kind == "webrtc":
+            if not self.webrtc_service:
+                return {"success": False, "error": "WebRTC service not available"}
+            if (self._output_payloader or {}).get("element") != "rtph264pay":
+                return {"success": False, "error": "WebRTC output requires an H.264 encoder"}
+
+            h264parse = Gst.ElementFactory.make("h264parse", "webrtc_h264parse")
+            appsink = self._create_output_appsink("webrtc_appsink", self._on_webrtc_appsink_sample)
+            if not h264parse or not appsink:
+                return {"success": False, "error": "h264parse/appsink GStreamer plugins not available"}
+            h264parse.set_property("config-interval", -1)  # send SPS/PPS with every keyframe
+            appsink.set_property(
+                "caps",
+                Gst.Caps.from_string("video/x-h264,stream-format=byte-stream,alignment=au"),
+            )
+
+            self.webrtc_service.activate()
+            # Give WebRTC service a back-reference for keyframe requests
+            self.webrtc_service._gstreamer_service = self
+            return {"success": True, "elements": [h264parse, appsink], "info": {}}
+
+        return {"success": False, "error": f"Unknown output: {kind}"}
+
+    def _create_fec_encoder(self, name: str):
+        """rtpulpfecenc protecting the RTP stream, or None (stream goes out unprotected)"""
+        fec = Gst.ElementFactory.make("rtpulpfecenc", name)
+        if not fec:
+            print("⚠️ rtpulpfecenc not available (gst-plugins-good ≥ 1.14), FEC disabled")
+            return None
+        config = self.streaming_config
+        self._fec_percentage = max(config.fec_min_percentage, min(config.fec_max_percentage, self._fec_percentage))
+        fec.set_property("pt", FEC_PAYLOAD_TYPE)
+        fec.set_property("multipacket", True)
+        self._set_fec_properties(fec, self._fec_percentage)
+        print(f"   → ULPFEC pt={FEC_PAYLOAD_TYPE} at {self._fec_percentage}%")
+        return fec
+
+    @staticmethod
+    def _set_fec_properties(fec, percentage: int):
+        fec.set_property("percentage", percentage)
+        # Keyframes cost a whole GOP when lost: protect them twice as much
+        fec.set_property("percentage-important", min(100, percentage * 2))
+
+    def _encoder_bitrate_kbps(self, bitrate: Optional[int] = None) -> Optional[int]:
+        """
+        What the encoder may spend of the bitrate budget (h264_bitrate by default).
+
+        ULPFEC sends ``percentage`` FEC packets per 100 media packets on
+        top of the media, so with FEC on the encoder gets
+        ``bitrate / (1 + percentage / 100)`` and the wire stays at the budget.
+        """
+        bitrate = self.video_config.h264_bitrate if bitrate is None else bitrate
+        if not bitrate or not self.streaming_config.fec_enabled:
+            return bitrate
+        return int(bitrate / (1 + self._fec_percentage / 100))
+
+    def set_fec_percentage(self, percentage: int) -> Dict[str, Any]:
+        """Change ULPFEC redundancy on every FEC-protected output, live"""
+        percentage = max(0, min(100, int(percentage)))
+        changed = percentage != self._fec_percentage
+        self._fec_percentage = percentage
+        if not self.pipeline:
+            return {"success": True, "fec_percentage": percentage, "applied": 0}
+        applied = 0
+        for name in ("fec", "udp_fec", "multicast_fec"):
+            fec = self.pipeline.get_by_name(name)
+            if fec:
+                self._set_fec_properties(fec, percentage)
+                applied += 1
+        if applied and changed and self.video_config.h264_bitrate:
+            # Re-split the budget between media and FEC
+            self.update_live_property("bitrate", self.video_config.h264_bitrate)
+        return {"success": True, "fec_percentage": percentage, "applied": applied}
+
+    def update_fec_for_loss(self, packet_loss_percent: float) -> Optional[Dict[str, Any]]:
+        """
+        Follow measured packet loss with the FEC redundancy.
+
+        Raises immediately (the next lost packet is already on its way)
+        and backs off by FEC_DECAY_STEP per update, so a short gap in
+        loss doesn't strip the protection before the next burst.
+        """
+        config = self.streaming_config
+        if not config.fec_enabled:
+            return None
+        target = int(round(packet_loss_percent * FEC_LOSS_FACTOR))
+        target = max(config.fec_min_percentage, min(config.fec_max_percentage, target))
+        current = self._fec_percentage
+        if target < current:
+            target = max(target, current - FEC_DECAY_STEP)
+        if target == current or (abs(target - current) < FEC_DEADBAND and target != config.fec_min_percentage):
+            return None
+        print(f"🛡️ FEC {current}% → {target}% (loss {packet_loss_percent:.1f}%)")
+        return self.set_fec_percentage(target)
+
+    # ── SRT ─────────────────────────────────────────────────────────────────
+
+    def _srt_uri(self, params: Optional[Dict[str, Any]] = None) -> str:
+        params = params or {}
+        config = self.streaming_config
+        port = params.get("port") or config.srt_port
+        if config.srt_mode == "listener":
+            return f"srt://:{port}?mode=listener"
+        return f"srt://{params.get('host') or config.srt_host}:{port}?mode=caller"
+
+    def _srt_latency_ms(self) -> int:
+        """Configured latency, else SRT_RTT_FACTOR × the last measured RTT"""
+        if self.streaming_config.srt_latency_ms:
+            return self.streaming_config.srt_latency_ms
+        if not self._srt_rtt_ms:
+            return SRT_DEFAULT_LATENCY_MS
+        return int(max(SRT_MIN_LATENCY_MS, min(SRT_MAX_LATENCY_MS, self._srt_rtt_ms * SRT_RTT_FACTOR)))
+
+    def _create_srt_sink(self, name: str, params: Optional[Dict[str, Any]] = None):
+        sink = Gst.ElementFactory.make("srtsink", name)
+        if not sink:
+            return None
+        uri = self._srt_uri(params)
+        latency = self._srt_latency_ms()
+        sink.set_property("uri", uri)
+        sink.set_property("latency", latency)
+        # Keep the encoder running while no receiver is connected
+        sink.set_property("wait-for-connection", False)
+        sink.set_property("sync", False)
+        sink.set_property("async", False)
+        print(f"   → SRT {uri} (latency {latency} ms)")
+        return sink
+
+    def _srt_sinks(self) -> list:
+        if not self.pipeline:
+            return []
+        names = ["srt_sink"] + (["sink"] if self.streaming_config.mode == "srt" else [])
+        return [sink for sink in (self.pipeline.get_by_name(name) for name in names) if sink]
+
+    def update_srt_latency(self, rtt_ms: float) -> Optional[Dict[str, Any]]:
+        """
+        Retune the SRT latency budget from a new RTT measurement.
+
+        SRT fixes the latency at handshake, so the new value applies to the
+        next connection (a listener's next caller, or a caller reconnect).
+        """
+        if not rtt_ms or rtt_ms <= 0:
+            return None
+        self._srt_rtt_ms = rtt_ms
+        if self.streaming_config.srt_latency_ms:
+            return None
+        latency = self._srt_latency_ms()
+        applied = 0
+        for sink in self._srt_sinks():
+            current = sink.get_property("latency")
+            if current and abs(latency - current) / current <= SRT_LATENCY_DEADBAND:
+                continue
+            sink.set_property("latency", latency)
+            applied += 1
+        if applied:
+            print(f"⏱️ SRT latency → {latency} ms (RTT {rtt_ms:.0f} ms)")
+        return {"success": True, "latency_ms": latency, "applied": applied}
+
+    def _read_srt_stats(self, sink) -> Optional[Dict[str, Any]]:
+        """
+        srtsink's "stats" as a flat dict. A listener reports one structure
+        per connected caller; the worst RTT caller is the one to adapt to.
+        """
+        structure = sink.get_property("stats")
+        if structure is None:
+            return None
+        stats = structure_to_dict(structure)
+        callers = stats.get("callers")
+        if callers:
+            callers = [structure_to_dict(caller) for caller in callers]
+            stats = max(callers, key=lambda caller: caller.get("rtt-ms", 0))
+            stats["callers"] = len(callers)
+        return stats
+
+    def _poll_srt_stats(self):
+        """Fold srtsink statistics into self.stats["srt"] (called from _poll_pipeline_stats)"""
+        sinks = self._srt_sinks()
+        if not sinks:
+            return
+        try:
+            raw = self._read_srt_stats(sinks[0])
+        except Exception as e:
+            logger.debug(f"SRT stats unavailable: {e}")
+            return
+        if not raw or "packets-sent" not in raw:
+            with self.stats_lock:
+                self.stats["srt"] = {"connected": False, "latency_ms": sinks[0].get_property("latency")}
+            return
+
+        counters = {
+            "sent": int(raw.get("packets-sent", 0)),
+            "lost": int(raw.get("packets-sent-lost", 0)),
+            "retransmitted": int(raw.get("packets-retransmitted", 0)),
+        }
+        previous = self._srt_previous_counters or {key: 0 for key in counters}
+        if counters["sent"] < previous["sent"]:  # new connection, counters restarted
+            previous = {key: 0 for key in counters}
+        self._srt_previous_counters = counters
+        sent = max(1, counters["sent"] - previous["sent"])
+
+        srt = {
+            "connected": True,
+            "callers": raw.get("callers", 1),
+            "rtt_ms": round(float(raw.get("rtt-ms", 0)), 1),
+            "latency_ms": int(raw.get("negotiated-latency-ms", 0)) or sinks[0].get_property("latency"),
+            "bandwidth_kbps": int(float(raw.get("bandwidth-mbps", 0)) * 1000),
+            "send_rate_kbps": int(float(raw.get("send-rate-mbps", 0)) * 1000),
+            "packets_sent": counters["sent"],
+            "packets_lost": counters["lost"],
+            "packets_retransmitted": counters["retransmitted"],
+            "packets_dropped": int(raw.get("packets-sent-dropped", 0)),
+            "loss_percent": round((counters["lost"] - previous["lost"]) / sent * 100, 2),
+            "retransmit_percent": round((counters["retransmitted"] - previous["retransmitted"]) / sent * 100, 2),
+            "send_buffer_ms": raw.get("send-buffer-ms", raw.get("snd-buf-ms")),
+        }
+        with self.stats_lock:
+            self.stats["srt"] = srt
+
+    def get_srt_metrics(self) -> Optional[Dict[str, Any]]:
+        """Connected SRT link metrics in the event bridge's latency_data shape"""
+        with self.stats_lock:
+            srt = self.stats.get("srt")
+        if not self.is_streaming or not srt or not srt.get("connected"):
+            return None
+        return {
+            "avg_rtt": srt["rtt_ms"],
+            "packet_loss": srt["loss_percent"],
+            "bandwidth_kbps": srt["bandwidth_kbps"],
+            "available": True,
+            "source": "srt",
+        }
+
+    def _pacing_target_kbps(self) -> Optional[int]:
+        """Bitrate the pacer spreads packets at (times its multiplier); None → measured rate"""
+        if (self._output_payloader or {}).get("element") == "rtpjpegpay":
+            return None  # MJPEG has a quality, not a bitrate
+        return self.video_config.h264_bitrate
+
+    def get_pacing_stats(self) -> Optional[Dict[str, Any]]:
+        """Burst size and pacing delay per paced output"""
+        if not self._pacers:
+            return None
+        pipeline = self.pipeline
+        stats = {}
+        for kind, pacer in list(self._pacers.items()):
+            # Frames held back while the pacer drains a burst wait in the branch queue
+            backlog = pipeline.get_by_name(f"{kind}_out_queue") if pipeline else None
+            stats[kind] = pacer.get_stats(backlog)
+        return stats
+
+    # ── Path MTU ────────────────────────────────────────────────────────────
+
+    def recheck_path_mtu(self) -> Dict[str, Any]:
+        """Re-discover the path MTU to every UDP/multicast destination (background)"""
+        if not self._mtu_targets:
+            return {"success": False, "error": "No RTP outputs"}
+        with self._path_mtu_lock:
+            if self._path_mtu_checking:
+                self._path_mtu_recheck = True  # the running check goes round once more
+                return {"success": True, "message": "Path MTU check already running"}
+            self._path_mtu_checking = True
+        threading.Thread(target=self._check_path_mtu, daemon=True, name="PathMtu").start()
+        return {"success": True, "message": "Path MTU check started"}
+
+    def _check_path_mtu(self):
+        while True:
+            with self._path_mtu_lock:
+                self._path_mtu_recheck = False
+            for host in {target["host"] for target in list(self._mtu_targets.values())}:
+                result = discover_path_mtu(host)
+                result["checked_at"] = time.time()
+                if not result["success"]:
+                    print(f"⚠️ Path MTU discovery to {host} failed: {result.get('error')}")
+                self._path_mtu[host] = result
+            for kind in list(self._mtu_targets):
+                self._apply_path_mtu(kind)
+            with self._path_mtu_lock:
+                if not self._path_mtu_recheck:
+                    self._path_mtu_checking = False
+                    return
+
+    def _apply_path_mtu(self, kind: str):
+        """Size the output's RTP packets to the path (live; payloaders pick it up per packet)"""
+        target = self._mtu_targets.get(kind)
+        result = self._path_mtu.get(target["host"]) if target else None
+        if not result or not result["success"]:
+            return
+        overhead = FEC_PACKET_OVERHEAD if self.streaming_config.fec_enabled else 0
+        mtu = rtp_mtu_for_path(result["mtu"], target["ceiling"], overhead)
+        if target.get("payload_mtu") != mtu:
+            try:
+                target["rtppay"].set_property("mtu", mtu)
+            except Exception as e:
+                logger.debug(f"Failed to set payloader MTU: {e}")
+                return
+            print(f"📏 {kind}: RTP packets ≤ {mtu} bytes (path MTU {result['mtu']} to {target['host']})")
+        target["payload_mtu"] = mtu
+        pacer = self._pacers.get(kind)
+        if pacer:
+            pacer.packet_bytes = mtu
+
+    def get_path_mtu_status(self) -> Optional[Dict[str, Any]]:
+        """Path MTU and payloader mtu per UDP/multicast output"""
+        if not self._mtu_targets:
+            return None
+        status = {}
+        for kind, target in list(self._mtu_targets.items()):
+            result = self._path_mtu.get(target["host"]) or {}
+            status[kind] = {
+                "host": target["host"],
+                "path_mtu": result.get("mtu"),
+                "route_mtu": result.get("route_mtu"),
+                "source": result.get("source"),
+                "error": result.get("error"),
+                "checked_at": result.get("checked_at"),
+                "payload_mtu": target.get("payload_mtu", target["ceiling"]),
+            }
+        return status
+
+    def _poll_rtcp_stats(self):
+        """Fold RTCP receiver reports into self.stats["rtcp"] (called from _poll_pipeline_stats)"""
+        reports = {}
+        for kind, session in list(self._rtcp_sessions.items()):
+            try:
+                reports[kind] = session.read_report()
+            except Exception as e:
+                logger.debug(f"RTCP stats unavailable for {kind}: {e}")
+        if self.rtsp_server:
+            for session in self.rtsp_server.get_rtp_sessions():
+                try:
+                    reports[f"rtsp:{id(session):x}"] = read_session_report(session)
+                except Exception as e:
+                    logger.debug(f"RTSP RTCP stats unavailable: {e}")
+        if not reports:
+            return
+
+        self._rtcp_reports.update(reports)
+        worst = self._rtcp_reports.worst()
+        with self.stats_lock:
+            self.stats["rtcp"] = {**worst, "sessions": len(reports)} if worst else None
+
+    def get_rtcp_metrics(self) -> Optional[Dict[str, Any]]:
+        """Latest RTCP receiver report in the event bridge's latency_data shape"""
+        with self.stats_lock:
+            rtcp = self.stats.get("rtcp")
+        if not self.is_streaming or not rtcp:
+            return None
+        metrics = {
+            "jitter": rtcp["jitter_ms"],
+            "packet_loss": rtcp["fraction_lost_percent"],
+            "available": True,
+            "source": "rtcp",
+        }
+        if rtcp["rtt_ms"] > 0:  # needs a receiver that echoes our sender reports
+            metrics["avg_rtt"] = rtcp["rtt_ms"]
+        return metrics
+
+    # ── Glass-to-glass latency ──────────────────────────────────────────────
+
+    def start_latency_receiver(self, port: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Receive our own UDP/multicast stream and record the network and
+        end-to-end stages (loopback or a receiver sharing this host's clock).
+        """
+        if self._latency_receiver and self._latency_receiver.is_running:
+            return {"success": False, "error": "Latency receiver already running"}
+        port = port or self.streaming_config.udp_port
+        self._latency_receiver = LatencyReceiver(self._latency_stages, udp_source(port))
+        result = self._latency_receiver.start()
+        if not result["success"]:
+            self._latency_receiver = None
+        return result
+
+    def stop_latency_receiver(self) -> Dict[str, Any]:
+        if not self._latency_receiver:
+            return {"success": False, "error": "Latency receiver not running"}
+        self._latency_receiver.stop()
+        self._latency_receiver = None
+        return {"success": True}
+
+    def record_remote_latency(self, report: Dict[str, Any]) -> Dict[str, Any]:
+        """Keep the stage percentiles posted by a remote receiver tool"""
+        self._remote_latency = {**report, "reported_at": time.time()}
+        return {"success": True}
+
+    def get_latency_stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.streaming_config.latency_probe,
+            "stamping": self._frame_stamper is not None,
+            "stages": self._latency_stages.get_stats(),
+            "receiver": self._latency_receiver.get_status() if self._latency_receiver else None,
+            "remote": self._remote_latency,
+        }
+
+    # ── On-board recording ──────────────────────────────────────────────────
+
+    def start_recording(self, prefix: Optional[str] = None, directory: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Record the encoded stream to segmented files. Kept across pipeline
+        restarts until stop_recording(); if not streaming yet, recording
+        starts with the stream.
+        """
+        if self._recorder and self._recorder.active:
+            return {"success": False, "error": "Already recording"}
+        self._recording_request = {"prefix": prefix, "directory": directory}
+        if not self.is_streaming or not self._output_fanout:
+            return {"success": True, "pending": True, "message": "Recording starts with the stream"}
+        result = self.attach_output("record")
+        if not result["success"]:
+            self._recording_request = None
+        return result
+
+    def stop_recording(self) -> Dict[str, Any]:
+        """
+        Stop recording. Returns at once: the branch is drained and the last
+        segment finished in the background (``finalizing`` in the result).
+        """
+        was_requested = self._recording_request is not None
+        self._recording_request = None
+        finalizing = False
+        if self._output_fanout and self._output_fanout.has("record"):
+            result = self.detach_output("record")
+            if not result["success"]:
+                return result
+            finalizing = result.get("draining", False)
+        elif not was_requested:
+            return {"success": False, "error": "Not recording"}
+        return {"success": True, "finalizing": finalizing, "recording": self.get_recording_stats()}
+
+    def get_recording_stats(self) -> Optional[Dict[str, Any]]:
+        """Current (or last) recording: segments, bytes written, write rate, dropped frames"""
+        stats = self._recorder.get_stats() if self._recorder else None
+        if stats is not None or self._recording_request is not None:
+            return {**(stats or {}), "requested": self._recording_request is not None}
+        return None
+
+    def _recording_directory(self) -> str:
+        return self.streaming_config.recording_directory or os.path.join(
+            os.path.expanduser("~"), "flight-records", "video"
+        )
+
+    def _finish_recording(self):
+        """
+        Finish the last segment before the pipeline goes down.
+
+        Blocks stop() for up to FINALIZE_TIMEOUT_S: the muxer writes the
+        segment's index from the running pipeline, so it can't be left to
+        the background like stop_recording() does.
+        """
+        if not self._output_fanout or not self._output_fanout.has("record") or not self._recorder:
+            return
+        drained = self._recorder.begin_finalize()
+        result = self._output_fanout.detach("record", drained=drained)
+        if result.get("draining"):
+            drained.wait(FINALIZE_TIMEOUT_S)
+        self._recorder.abort()
+
+    def _create_output_appsink(self, name: str, callback):
+        appsink = Gst.ElementFactory.make("appsink", name)
+        if not appsink:
+            return None
+        appsink.set_property("emit-signals", True)
+        appsink.set_property("sync", False)
+        appsink.set_property("max-buffers", 3)
+        appsink.set_property("drop", True)
+        appsink.connect("new-sample", callback)
+        return appsink
+
+    def _release_output_resources(self, kind: str):
+        """Tear down what an output owns outside the pipeline"""
+        self._rtcp_sessions.pop(kind, None)
+        pacer = self._pacers.pop(kind, None)
+        if pacer:
+            pacer.stop()
+        self._mtu_targets.pop(kind, None)
+        if kind == "rtsp" and self.rtsp_server:
+            self.rtsp_server.stop()
+            self.rtsp_server = None
+        elif kind == "webrtc" and self.webrtc_service and self.webrtc_service.is_active:
+            try:
+                self.webrtc_service.deactivate()
+            except Exception as e:
+                print(f"⚠️ Error deactivating WebRTC service: {e}")
+
+    def _on_rtsp_appsink_sample(self, appsink):
+        """Forward an encoded sample to the shared RTSP media"""
+        try:
+            sample = appsink.emit("pull-sample")
+            if sample and self.rtsp_server:
+                self.rtsp_server.push_sample(sample)
+        except Exception as e:
+            print(f"⚠️ RTSP appsink error: {e}")
+        return Gst.FlowReturn.OK
+
+    def attach_output(self, kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Attach an output to the running stream without restarting it.
+
+        Args:
+            kind: One of OUTPUT_KINDS
+            params: Optional destination override ({"host", "port", "ttl"}) for UDP/multicast
+        """
+        if kind not in OUTPUT_KINDS:
+            return {"success": False, "error": f"Unknown output: {kind}"}
+        if not self.is_streaming or not self._output_fanout:
+            return {"success": False, "error": "Not streaming"}
+        if self._output_fanout.has(kind):
+            return {"success": False, "error": f"Output '{kind}' already attached"}
+
+        branch = self._build_output_branch(kind, params)
+        if branch["success"]:
+            branch = self._output_fanout.attach(
+                kind, branch["elements"], branch.get("info"), branch.get("queue_properties")
+            )
+        if not branch["success"]:
+            self._release_output_resources(kind)
+            if kind == "record" and self._recorder:
+                self._recorder.abort()
+            return branch
+        if kind == "record":
+            self._recorder.watch_queue(self.pipeline.get_by_name("record_out_queue"))
+
+        # The new output can only decode from an IDR
+        self.force_keyframe(f"{kind}_output")
+        self._broadcast_status()
+        return branch
+
+    def detach_output(self, kind: str) -> Dict[str, Any]:
+        """Detach an output; the remaining outputs keep streaming"""
+        if not self._output_fanout:
+            return {"success": False, "error": "Not streaming"}
+
+        if kind == "record" and self._recorder:
+            # EOS down the branch so the last segment is finished, not truncated
+            result = self._output_fanout.detach(kind, drained=self._recorder.begin_finalize())
+            if result["success"] and not result["draining"]:
+                self._recorder.abort()
+        else:
+            result = self._output_fanout.detach(kind)
+        if result["success"]:
+            self._release_output_resources(kind)
+            self._broadcast_status()
+        return result
+
+    def get_outputs(self) -> Dict[str, Any]:
+        """Outputs currently fed by the shared encoder"""
+        return self._output_fanout.list_outputs() if self._output_fanout else {}
+
     def _setup_stats_probes(self):
         """NO-OP: Per-frame pad probes removed to eliminate GIL contention.
 
@@ -1452,7 +2449,7 @@ class GStreamerService:
             # Use TIME position query — universally supported by live sources.
             # Estimate frames from elapsed pipeline time × configured framerate.
             position_ns = -1
-            for element_name in ["sink", "rtppay", "encoder"]:
+            for element_name in ["sink", "rtppay", "encoder", "h264parse"]:
                 elem = self.pipeline.get_by_name(element_name)
                 if not elem:
                     continue
@@ -1505,6 +2502,11 @@ class GStreamerService:
                     self.stats["last_stats_time"] = now
                     self.stats["last_frames_count"] = self.stats["frames_sent"]
 
+            self._poll_srt_stats()
+            self._poll_rtcp_stats()
+            for pacer in list(self._pacers.values()):
+                pacer.refresh()  # follow bitrate changes
+
         except Exception as e:
             logger.debug(f"Pipeline stats poll error: {e}")
 
@@ -1525,6 +2527,11 @@ class GStreamerService:
             # Print element that caused the error
             if message.src:
                 print(f"   Element: {message.src.get_name()}")
+            # Camera failure with a slate to fall back on: the stream goes on
+            if self._source_selector and self._source_selector.owns(message.src):
+                self._source_selector.camera_lost(str(err))
+                self._broadcast_status()
+                return True
             self._broadcast_status()
             # Auto-stop to clean up pipeline state
             try:
@@ -1622,14 +2629,8 @@ class GStreamerService:
         except Exception:
             pass
 
-    def start(self) -> Dict[str, Any]:
-        """Start video streaming"""
-        if not GSTREAMER_AVAILABLE:
-            return {"success": False, "message": "GStreamer not available"}
-
-        if self.is_streaming:
-            return {"success": False, "message": "Already streaming"}
-
+    def _check_start_config(self) -> Optional[Dict[str, Any]]:
+        """Camera and destination checks shared by start() and prepare(); error result or None"""
         # Auto-detect camera if device is not configured or doesn't exist
         if not self.video_config.device or not os.path.exists(self.video_config.device):
             detected = auto_detect_camera()
@@ -1656,26 +2657,36 @@ class GStreamerService:
                 )
                 return {"success": False, "message": msg}
 
-        # Check if using RTSP Server mode
-        if self.streaming_config.mode == "rtsp":
-            return self._start_rtsp_server()
-
-        # Activate WebRTC service if in webrtc mode
-        if self.streaming_config.mode == "webrtc" and self.webrtc_service:
-            try:
-                self.webrtc_service.activate()
-                # Give WebRTC service a back-reference for keyframe requests
-                self.webrtc_service._gstreamer_service = self
-                print("\u2705 WebRTC service activated")
-            except Exception as e:
-                print(f"\u26a0\ufe0f WebRTC activation error: {e}")
-
-        # Validate streaming configuration for UDP/multicast modes (skip for webrtc)
-        if self.streaming_config.mode not in ("webrtc",) and not self.streaming_config.udp_host:
+        # Validate streaming configuration for UDP/multicast modes (RTSP/WebRTC serve clients)
+        if self.streaming_config.mode == "srt":
+            if self.streaming_config.srt_mode == "caller" and not self.streaming_config.srt_host:
+                return {
+                    "success": False,
+                    "message": "No SRT receiver address configured for caller mode",
+                }
+        elif self.streaming_config.mode not in ("webrtc", "rtsp") and not self.streaming_config.udp_host:
             return {
                 "success": False,
                 "message": "No destination IP configured for streaming",
             }
+        return None
+
+    def start(self) -> Dict[str, Any]:
+        """Start video streaming (only a state change when a warm standby pipeline is ready)"""
+        requested_at = time.monotonic()
+        if not GSTREAMER_AVAILABLE:
+            return {"success": False, "message": "GStreamer not available"}
+
+        with self._start_lock:
+            return self._start(requested_at)
+
+    def _start(self, requested_at: float) -> Dict[str, Any]:
+        if self.is_streaming:
+            return {"success": False, "message": "Already streaming"}
+
+        error = self._check_start_config()
+        if error:
+            return error
 
         # ═══════════════════════════════════════════════════════════════
         # WARNING: UDP over 4G without VPN
@@ -1714,12 +2725,18 @@ class GStreamerService:
             except Exception:
                 pass  # Non-critical: don't block streaming start
 
-        # Build pipeline
-        if not self.build_pipeline():
-            return {
-                "success": False,
-                "message": self.last_error or "Failed to build pipeline",
-            }
+        # Build pipeline, unless one was pre-rolled for this exact configuration
+        prerolled = self._standby_signature is not None and self._standby_signature == self._config_signature()
+        if prerolled:
+            print("▶️ Starting from warm standby")
+        else:
+            self._discard_standby()
+            if not self.build_pipeline():
+                return {
+                    "success": False,
+                    "message": self.last_error or "Failed to build pipeline",
+                }
+        self._standby_signature = None
 
         # Setup stats probes for metrics
         self._setup_stats_probes()
@@ -1728,13 +2745,9 @@ class GStreamerService:
         self._optimize_for_streaming()
 
         # Start GLib main loop in background thread
-        self.main_loop = GLib.MainLoop()
-        self.main_loop_thread = threading.Thread(target=self.main_loop.run, daemon=True, name="GLibMainLoop")
-        self.main_loop_thread.start()
+        self._start_main_loop()
 
         # Start pipeline
-        import time
-
         # Reset stats counters for new stream
         with self.stats_lock:
             self.stats["start_time"] = time.time()
@@ -1745,6 +2758,11 @@ class GStreamerService:
             self.stats["last_bytes_count"] = 0
             self.stats["current_fps"] = 0
             self.stats["current_bitrate"] = 0
+            self.stats["srt"] = None
+            self.stats["rtcp"] = None
+            self._latency_stages.reset()
+            self._srt_previous_counters = None
+            self._rtcp_reports = ReceiverReports()
 
             # Reset encoder stats
             self.encoder_stats = {
@@ -1760,6 +2778,7 @@ class GStreamerService:
                 "avg_frame_size_bytes": 0,
             }
 
+        self._watch_first_packet(requested_at, prerolled)
         ret = self.pipeline.set_state(Gst.State.PLAYING)
 
         if ret == Gst.StateChangeReturn.FAILURE:
@@ -1774,106 +2793,157 @@ class GStreamerService:
             return {"success": False, "message": self.last_error}
 
         self.is_streaming = True
+        self._running_signature = self._config_signature(ignore_source=True)
 
         self._start_stats_broadcast()
 
+        if self._recording_request is not None:
+            recording = self.attach_output("record")
+            if not recording["success"]:
+                print(f"⚠️ Recording not started: {recording['error']}")
+
         self._broadcast_status()
 
-        return {
+        result = {
             "success": True,
             "message": "Streaming started",
             "codec": self.video_config.codec,
             "resolution": f"{self.video_config.width}x{self.video_config.height}",
             "destination": f"{self.streaming_config.udp_host}:{self.streaming_config.udp_port}",
+            "outputs": list(self.get_outputs()),
+            "prerolled": prerolled,
         }
+        if self.rtsp_server and self.rtsp_server.is_running():
+            result["url"] = self.rtsp_server.get_url(self._get_streaming_ip())
+            print(f"   📺 Connect with VLC: {result['url']}")
+        return result
 
-    def _start_rtsp_server(self) -> Dict[str, Any]:
-        """Start RTSP server for RTSP streaming mode"""
-        import time
-
-        print("📡 Starting RTSP Server mode...")
-
-        # Create RTSP server if not exists
-        if not self.rtsp_server:
-            self.rtsp_server = RTSPServer(port=8554, mount_point="/fpv")
-            # Connect OpenCV service if available
-            if self._opencv_service:
-                self.rtsp_server.set_opencv_service(self._opencv_service)
+    def _start_main_loop(self):
+        """GLib main loop for bus messages, started once per pipeline"""
+        if self.main_loop and self.main_loop.is_running():
+            return
+        self.main_loop = GLib.MainLoop()
+        self.main_loop_thread = threading.Thread(target=self.main_loop.run, daemon=True, name="GLibMainLoop")
+        self.main_loop_thread.start()
 
-        # Start server with video configuration
-        try:
-            self.rtsp_server.start(
-                device=self.video_config.device,
-                codec=self.video_config.codec,
-                width=self.video_config.width,
-                height=self.video_config.height,
-                framerate=self.video_config.framerate,
-                bitrate=self.video_config.h264_bitrate,
-                quality=self.video_config.quality,
-            )
+    # ── Warm standby ─────────────────────────────────────────────────────────
 
-            self.is_streaming = True
+    def prepare(self) -> Dict[str, Any]:
+        """
+        Build the configured pipeline and hold it PAUSED: the camera is
+        opened and negotiated and the encoder initialised, but live sources
+        don't push data until PLAYING. start() then only changes state.
+        """
+        if not GSTREAMER_AVAILABLE:
+            return {"success": False, "message": "GStreamer not available"}
 
-            # Set provider info for RTSP mode
-            encoder_name = self.rtsp_server._encoder_display_name or self.video_config.codec
-            self.current_encoder_provider = f"RTSP Server ({encoder_name})"
-            self.current_source_provider = f"{self.video_config.device}"
+        with self._start_lock:
+            if self.is_streaming:
+                return {"success": False, "message": "Already streaming"}
+            if self.streaming_config.mode not in WARM_STANDBY_MODES:
+                return {
+                    "success": False,
+                    "message": f"Warm standby not supported in {self.streaming_config.mode} mode",
+                }
+            if self._standby_signature == self._config_signature():
+                return {"success": True, "message": "Pipeline already in warm standby"}
+
+            self._discard_standby()
+            error = self._check_start_config()
+            if error:
+                return error
+
+            began = time.monotonic()
+            if not self.build_pipeline():
+                return {"success": False, "message": self.last_error or "Failed to build pipeline"}
+            self._start_main_loop()
+
+            ret = self.pipeline.set_state(Gst.State.PAUSED)
+            if ret != Gst.StateChangeReturn.FAILURE:
+                # Live sources report NO_PREROLL here: open and negotiated, not producing
+                ret = self.pipeline.get_state(timeout=STANDBY_PREROLL_TIMEOUT_S * Gst.SECOND)[0]
+            if ret == Gst.StateChangeReturn.FAILURE:
+                self.last_error = "Failed to pre-roll pipeline"
+                self.stop()
+                return {"success": False, "message": self.last_error}
 
-            # Initialize stats for RTSP mode (keep at 0 - RTSP only streams when clients connect)
-            with self.stats_lock:
-                self.stats["start_time"] = time.time()
-                self.stats["frames_sent"] = 0
-                self.stats["bytes_sent"] = 0
-                self.stats["last_stats_time"] = None
-                self.stats["last_frames_count"] = 0
-                self.stats["last_bytes_count"] = 0
-                self.stats["current_fps"] = 0
-                self.stats["current_bitrate"] = 0
+            self._standby_signature = self._config_signature()
+            self.startup_stats["prepare_ms"] = round((time.monotonic() - began) * 1000, 1)
+            print(f"⏸️ Pipeline pre-rolled in warm standby ({self.startup_stats['prepare_ms']:.0f} ms)")
+            self._broadcast_status()
+            return {
+                "success": True,
+                "message": "Pipeline in warm standby",
+                "prepare_ms": self.startup_stats["prepare_ms"],
+            }
 
-            # Start RTSP client monitor - will activate stats when clients connect
-            self._start_rtsp_client_monitor()
+    def get_startup_stats(self) -> Dict[str, Any]:
+        return {
+            "warm_standby": self.streaming_config.warm_standby,
+            "standby_ready": self._standby_signature is not None,
+            **self.startup_stats,
+        }
 
-            # Get streaming IP
-            ip_address = self._get_streaming_ip()
-            rtsp_url = self.rtsp_server.get_url(ip_address)
+    def _config_signature(self, ignore_source: bool = False) -> str:
+        """Everything the built pipeline depends on (apart from the camera with ignore_source)"""
+        video = {k: v for k, v in asdict(self.video_config).items() if not (ignore_source and k == "device")}
+        streaming = {k: v for k, v in asdict(self.streaming_config).items() if k not in _STANDBY_NEUTRAL_SETTINGS}
+        return repr((sorted(video.items()), sorted(streaming.items())))
+
+    def _discard_standby(self):
+        """Tear down a paused pipeline that is no longer wanted (or no longer matches the config)"""
+        with self._start_lock:
+            if self._standby_signature is None or self.is_streaming:
+                return
+            self._standby_signature = None
+            print("⏹️ Discarding warm standby pipeline")
+            self.stop()
 
-            print("✅ RTSP Server started successfully")
-            print(f"   📺 Connect with VLC: {rtsp_url}")
+    def _refresh_standby(self):
+        """After a config change: drop a stale standby and pre-roll again in the background"""
+        if self.is_streaming or self._shutting_down:
+            return
+        if self._standby_signature is not None and (
+            not self.streaming_config.warm_standby or self._standby_signature != self._config_signature()
+        ):
+            self._discard_standby()
+        if self.streaming_config.warm_standby and self._standby_signature is None:
+            self._prepare_in_background()
+
+    def _prepare_in_background(self):
+        def _prepare():
+            result = self.prepare()
+            if not result["success"]:
+                print(f"⚠️ Warm standby not ready: {result['message']}")
+
+        threading.Thread(target=_prepare, daemon=True, name="VideoWarmStandby").start()
+
+    def _watch_first_packet(self, requested_at: float, prerolled: bool):
+        """Time from start() to the first encoded buffer reaching the output tee"""
+        self.startup_stats["prerolled"] = prerolled
+        self.startup_stats["time_to_first_packet_ms"] = None
+        tee = self._output_fanout.tee if self._output_fanout else None
+        pad = tee.get_static_pad("sink") if tee else None
+        if not pad:
+            return
 
-            self._broadcast_status()
+        def _on_first_buffer(pad, info):
+            elapsed_ms = round((time.monotonic() - requested_at) * 1000, 1)
+            self.startup_stats["time_to_first_packet_ms"] = elapsed_ms
+            self.startup_stats["last_warm_ms" if prerolled else "last_cold_ms"] = elapsed_ms
+            print(f"⏱️ First packet {elapsed_ms:.0f} ms after start ({'pre-rolled' if prerolled else 'cold'})")
+            return Gst.PadProbeReturn.REMOVE
 
-            return {
-                "success": True,
-                "message": "RTSP Server started",
-                "codec": self.video_config.codec,
-                "resolution": f"{self.video_config.width}x{self.video_config.height}",
-                "url": rtsp_url,
-            }
-        except Exception as e:
-            print(f"❌ Failed to start RTSP Server: {e}")
-            return {"success": False, "message": f"Failed to start RTSP Server: {str(e)}"}
+        pad.add_probe(Gst.PadProbeType.BUFFER, _on_first_buffer)
 
     def stop(self) -> Dict[str, Any]:
         """Stop video streaming"""
-        # Stop RTSP monitors if running
-        if hasattr(self, "_rtsp_monitor_running") and self._rtsp_monitor_running:
-            self._stop_rtsp_client_monitor()
-        if hasattr(self, "_rtsp_stats_running") and self._rtsp_stats_running:
-            self._stop_rtsp_stats_estimator()
-
-        # Check if RTSP server is running
-        if self.rtsp_server and self.rtsp_server.is_running():
-            print("🛑 Stopping RTSP Server...")
-            self.rtsp_server.stop()
-            self.rtsp_server = None
-            self.is_streaming = False
-            self._broadcast_status()
-            return {"success": True, "message": "RTSP Server stopped"}
-
         if not self.is_streaming and not self.pipeline:
             return {"success": False, "message": "Not streaming"}
 
         print("🛑 Stopping video stream...")
+        was_streaming = self.is_streaming
+        self._standby_signature = None
 
         # Stop WebRTC adapter if active
         if self.webrtc_adapter:
@@ -1896,10 +2966,28 @@ class GStreamerService:
 
         # Remove encoder stats probes before stopping pipeline
         self._remove_encoder_probes()
+        if self._frame_stamper:
+            self._frame_stamper.stop()
+            self._frame_stamper = None
+        self._finish_recording()
+        self._keyframes.cancel()
 
         if self.pipeline:
             self.pipeline.set_state(Gst.State.NULL)
             self.pipeline = None
+        self._output_fanout = None
+        self._source_selector = None
+        self._running_signature = None
+        self._rtcp_sessions.clear()
+        for pacer in self._pacers.values():
+            pacer.stop()
+        self._pacers.clear()
+        self._mtu_targets.clear()
+
+        # RTSP clients were fed from the pipeline's tee
+        if self.rtsp_server:
+            self.rtsp_server.stop()
+            self.rtsp_server = None
 
         if self.main_loop and self.main_loop.is_running():
             self.main_loop.quit()
@@ -1912,129 +3000,11 @@ class GStreamerService:
 
         self._broadcast_status()
 
-        return {"success": True, "message": "Streaming stopped"}
-
-    def _start_rtsp_client_monitor(self):
-        """Start monitoring RTSP clients and manage stats estimation"""
-        import threading
-
-        self._rtsp_monitor_running = True
-
-        def monitor_clients():
-            """Monitor RTSP clients and start/stop stats estimator accordingly"""
-            import time
-
-            stats_active = False
-
-            while self._rtsp_monitor_running and self.is_streaming:
-                time.sleep(1.0)  # Check every second
-
-                if not self.is_streaming or not self.rtsp_server:
-                    break
-
-                # Get number of clients from RTSP server
-                rtsp_stats = self.rtsp_server.get_stats()
-                clients = rtsp_stats.get("clients_connected", 0)
-
-                # Start stats when first client connects
-                if clients > 0 and not stats_active:
-                    print("📊 First RTSP client connected, starting stats estimation")
-                    self._start_rtsp_stats_estimator()
-                    stats_active = True
-
-                # Stop stats when all clients disconnect
-                elif clients == 0 and stats_active:
-                    print("⏹️  All RTSP clients disconnected, stopping stats estimation")
-                    self._stop_rtsp_stats_estimator()
-                    stats_active = False
-                    # Reset stats to 0
-                    with self.stats_lock:
-                        self.stats["frames_sent"] = 0
-                        self.stats["bytes_sent"] = 0
-                        self.stats["current_fps"] = 0
-                        self.stats["current_bitrate"] = 0
-                        self.stats["last_stats_time"] = None
-
-        self._rtsp_monitor_thread = threading.Thread(target=monitor_clients, daemon=True)
-        self._rtsp_monitor_thread.start()
-
-    def _stop_rtsp_client_monitor(self):
-        """Stop the RTSP client monitor thread"""
-        if hasattr(self, "_rtsp_monitor_running"):
-            self._rtsp_monitor_running = False
-        if hasattr(self, "_rtsp_monitor_thread") and self._rtsp_monitor_thread:
-            self._rtsp_monitor_thread.join(timeout=2)
-
-    def _start_rtsp_stats_estimator(self):
-        """Start a background thread to estimate RTSP statistics.
-
-        RTSP mode runs its own internal GStreamer pipeline inside the RTSP
-        server, so we cannot attach pad probes from outside.  Instead we
-        estimate bytes/frames from configured parameters and use real
-        RTSP session-pool data (client count) to only count stats when
-        at least one client is actually receiving data.
-        """
-        import threading
-
-        self._rtsp_stats_running = True
+        # Have the next start() ready again
+        if was_streaming and self.streaming_config.warm_standby and not self._shutting_down:
+            self._prepare_in_background()
 
-        def estimate_stats():
-            import time
-
-            with self.stats_lock:
-                self.stats["last_stats_time"] = time.time()
-
-            while self._rtsp_stats_running and self.is_streaming:
-                time.sleep(1.0)
-
-                if not self.is_streaming:
-                    break
-
-                # Only accumulate stats when there are active RTSP clients
-                clients = 0
-                if self.rtsp_server:
-                    rtsp_info = self.rtsp_server.get_stats()
-                    clients = rtsp_info.get("clients_connected", 0)
-
-                if clients <= 0:
-                    # No clients — zero out rate but don't accumulate
-                    with self.stats_lock:
-                        now = time.time()
-                        self.stats["current_fps"] = 0
-                        self.stats["current_bitrate"] = 0
-                        self.stats["last_stats_time"] = now
-                    continue
-
-                with self.stats_lock:
-                    # Use configured values as estimate (RTSP internal pipeline)
-                    fps = self.video_config.framerate or 30
-                    self.stats["frames_sent"] += fps
-
-                    # Estimate bitrate from config, codec-aware
-                    codec = (self.video_config.codec or "mjpeg").lower()
-                    if "h264" in codec:
-                        bps = (self.video_config.h264_bitrate or 2000) * 1000
-                    else:
-                        # MJPEG: estimate from quality + resolution + fps
-                        quality = self.video_config.quality or 85
-                        pixels = (self.video_config.width or 960) * (self.video_config.height or 720)
-                        bpp = 0.3 + (quality / 100) * 1.7
-                        bps = int(pixels * bpp * fps)
-
-                    self.stats["bytes_sent"] += bps // 8
-
-                    now = time.time()
-                    self._update_rates_locked(now)
-
-        self._rtsp_stats_thread = threading.Thread(target=estimate_stats, daemon=True)
-        self._rtsp_stats_thread.start()
-
-    def _stop_rtsp_stats_estimator(self):
-        """Stop the RTSP statistics estimator thread"""
-        if hasattr(self, "_rtsp_stats_running"):
-            self._rtsp_stats_running = False
-        if hasattr(self, "_rtsp_stats_thread") and self._rtsp_stats_thread:
-            self._rtsp_stats_thread.join(timeout=2)
+        return {"success": True, "message": "Streaming stopped"}
 
     def update_live_property(self, property_name: str, value) -> Dict[str, Any]:
         """Update a pipeline element property without restarting using provider info"""
@@ -2042,11 +3012,14 @@ class GStreamerService:
             return {"success": False, "message": "Not streaming"}
 
         encoder = self.pipeline.get_by_name("encoder")
+        codec_id = self.video_config.codec.lower()
         if not encoder:
+            # WebRTC mode runs its own x264enc/openh264enc
+            encoder = self.pipeline.get_by_name("webrtc_h264enc")
+            codec_id = self._webrtc_encoder_codec_id
+        if not encoder or not codec_id:
             return {"success": False, "message": "Encoder element not found"}
 
-        codec_id = self.video_config.codec.lower()
-
         try:
             # Import here to avoid circular dependency
             from app.providers.registry import get_provider_registry
@@ -2070,8 +3043,13 @@ class GStreamerService:
                 # Clamp value to allowed range
                 value = max(prop_info["min"], min(prop_info["max"], int(value)))
 
+                # The bitrate is the budget on the wire; the encoder gets what FEC leaves of it
+                encoder_value = value
+                if property_name in ("bitrate", "h264_bitrate"):
+                    encoder_value = max(prop_info["min"], self._encoder_bitrate_kbps(value))
+
                 # Apply multiplier if needed (e.g., OpenH264 uses bps instead of kbps)
-                actual_value = value * prop_info.get("multiplier", 1)
+                actual_value = encoder_value * prop_info.get("multiplier", 1)
 
                 # Set the property on the encoder
                 encoder.set_property(prop_info["property"], actual_value)
@@ -2097,8 +3075,174 @@ class GStreamerService:
             print(f"❌ {error_msg}")
             return {"success": False, "message": error_msg}
 
+    def renegotiate_output(self, width: int, height: int, framerate: int, timeout: float = 2.0) -> Dict[str, Any]:
+        """Change output resolution/framerate on the running pipeline.
+
+        Rewrites the encoder_caps capsfilter fed by videoscale/videorate and
+        forces a keyframe; the source, payloader and sinks keep running.
+        Blocks up to ``timeout`` seconds waiting for the first keyframe at the
+        new size to leave the encoder and reports that gap.
+
+        Returns success=False when the active encoder/pipeline cannot
+        renegotiate - callers should then fall back to configure() + restart().
+        """
+        if not self.is_streaming or not self.pipeline:
+            return {"success": False, "message": "Not streaming"}
+
+        capsfilter = self.pipeline.get_by_name("encoder_caps")
+        encoder = self.pipeline.get_by_name("encoder")
+        if not capsfilter or not encoder:
+            return {"success": False, "message": "Pipeline has no encoder_caps stage"}
+
+        codec_id = self.video_config.codec.lower()
+        try:
+            from app.providers.registry import get_provider_registry
+
+            provider = get_provider_registry().get_video_encoder(codec_id)
+        except Exception as e:
+            return {"success": False, "message": f"Encoder provider lookup failed: {e}"}
+        if not provider or not provider.get_capabilities().get("live_renegotiation", False):
+            return {"success": False, "message": f"Encoder {codec_id} cannot renegotiate live"}
+
+        src_w, src_h, src_fps = self._source_output or (0, 0, 0)
+        if width > src_w or height > src_h or framerate > src_fps:
+            return {
+                "success": False,
+                "message": f"{width}x{height}@{framerate} exceeds source output {src_w}x{src_h}@{src_fps}",
+            }
+        if framerate != self.video_config.framerate and not self.pipeline.get_by_name("videorate"):
+            return {"success": False, "message": "No videorate element for framerate change"}
+
+        # Keep the raw format the encoder was negotiated with (I420/NV12)
+        fmt = "I420"
+        try:
+            current_fmt = capsfilter.get_property("caps").get_structure(0).get_value("format")
+            if isinstance(current_fmt, str):
+                fmt = current_fmt
+        except Exception:
+            pass
+
+        # One-shot probe: removed as soon as the new keyframe passes, so it
+        # doesn't reintroduce per-frame GIL contention
+        first_keyframe = threading.Event()
+
+        def _on_encoded(pad, info):
+            buf = info.get_buffer()
+            if buf is not None and not buf.has_flags(Gst.BufferFlags.DELTA_UNIT):
+                first_keyframe.set()
+                return Gst.PadProbeReturn.REMOVE
+            return Gst.PadProbeReturn.OK
+
+        srcpad = encoder.get_static_pad("src")
+        probe_id = srcpad.add_probe(Gst.PadProbeType.BUFFER, _on_encoded) if srcpad else None
+
+        old = f"{self.video_config.width}x{self.video_config.height}@{self.video_config.framerate}"
+        new = f"{width}x{height}@{framerate}"
+        start = time.monotonic()
+        try:
+            caps_str = f"video/x-raw,format={fmt},width={width},height={height},framerate={framerate}/1"
+            capsfilter.set_property("caps", Gst.Caps.from_string(caps_str))
+            self._send_force_key_unit(encoder)
+        except Exception as e:
+            if probe_id:
+                srcpad.remove_probe(probe_id)
+            return {"success": False, "message": f"Renegotiation failed: {e}"}
+
+        observed = first_keyframe.wait(timeout)
+        gap_ms = round((time.monotonic() - start) * 1000, 1) if observed else None
+        if not observed and probe_id:
+            srcpad.remove_probe(probe_id)
+
+        self.video_config.width = width
+        self.video_config.height = height
+        self.video_config.framerate = framerate
+
+        self.last_renegotiation = {
+            "timestamp": time.time(),
+            "old": old,
+            "new": new,
+            "gap_ms": gap_ms,
+        }
+        gap_str = f"{gap_ms} ms" if gap_ms is not None else f"no keyframe within {timeout}s"
+        print(f"🔄 Live renegotiation {old} → {new} (gap: {gap_str})")
+        self._broadcast_status()
+
+        return {"success": True, "method": "live", "old": old, "new": new, "gap_ms": gap_ms}
+
+    def switch_source(self, device: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Swap the camera of the running pipeline behind the source selector.
+
+        The slate covers the gap until the new camera's first frame; the
+        encoder, outputs and their clients keep their session and resync on
+        the keyframe forced at the switch. ``restart`` in a failed result
+        means the change needs a pipeline rebuild instead.
+        """
+        device = device or self.video_config.device
+        with self._start_lock:
+            if not self.is_streaming or not self._source_selector:
+                return {"success": False, "restart": True, "message": "Running pipeline has no source selector"}
+            segment = self._build_source_segment(device)
+            if not segment["success"]:
+                return {"success": False, "restart": True, "message": segment["error"]}
+
+            print(f"🔀 Switching video source → {device}")
+            result = self._source_selector.attach_camera(segment["elements"])
+            if result["success"] or result.get("attached"):
+                self.video_config.device = device
+                self._source_device = device
+                self.current_source_provider = segment["provider"]
+
+        if result["success"]:
+            print(f"✅ Video source switched to {device} in {result['switch_ms']:.0f} ms")
+        else:
+            print(f"⚠️ Video source switch: {result['error']}")
+        self._broadcast_status()
+        return {
+            "success": result["success"],
+            "method": "source_switch",
+            "message": "Video source switched" if result["success"] else result["error"],
+            "device": device,
+            "switch_ms": result.get("switch_ms"),
+        }
+
+    def reattach_source(self):
+        """After a hotplug change: bring a camera lost mid-stream back from the slate"""
+        if not self.is_streaming or not self._source_selector or self._source_selector.has_camera:
+            return
+        device = self.video_config.device
+        try:
+            from app.providers.registry import get_provider_registry
+            from app.services.preferences import get_preferences
+
+            # The saved camera may come back on another node: find it by identity
+            prefs = get_preferences().get_video_config()
+            if prefs.get("device_name"):
+                source = get_provider_registry().find_video_source_by_identity(
+                    prefs["device_name"], prefs.get("device_bus_info", "")
+                )
+                if source:
+                    device = source.get("device") or source["source_id"]
+        except Exception as e:
+            logger.debug(f"Camera identity lookup failed: {e}")
+        if not device or not os.path.exists(device):
+            return
+        threading.Thread(target=self.switch_source, args=(device,), daemon=True, name="VideoSourceReattach").start()
+
     def restart(self) -> Dict[str, Any]:
         """Restart video streaming with current configuration"""
+        # Only the camera changed: swap it behind the slate instead of rebuilding
+        if (
+            self.is_streaming
+            and self._source_selector
+            and self.video_config.device != self._source_device
+            and self._running_signature == self._config_signature(ignore_source=True)
+        ):
+            result = self.switch_source(self.video_config.device)
+            if not result.get("restart"):
+                return result
+            print(f"⚠️ Source switch not possible ({result['message']}), restarting pipeline")
+
         self.stop()
         import time
 
@@ -2128,6 +3272,12 @@ class GStreamerService:
             "current_fps": stats_copy.get("current_fps", 0),
             "current_bitrate": stats_copy.get("current_bitrate", 0),
             "current_bitrate_formatted": f"{stats_copy.get('current_bitrate', 0)} kbps",
+            "encoder_bitrate": self._encoder_bitrate_kbps(),  # h264_bitrate less the FEC overhead
+            "srt": stats_copy.get("srt"),
+            "rtcp": stats_copy.get("rtcp"),
+            "pacing": self.get_pacing_stats(),
+            "latency": self.get_latency_stats() if self.streaming_config.latency_probe else None,
+            "keyframes": self.get_keyframe_stats(),
             "health": self._calculate_health(
                 stats_copy.get("errors", 0),
                 stats_copy.get("current_fps", 0),
@@ -2148,6 +3298,8 @@ class GStreamerService:
                 "quality": self.video_config.quality,
                 "h264_bitrate": self.video_config.h264_bitrate,
                 "auto_start": self.streaming_config.auto_start,
+                "warm_standby": self.streaming_config.warm_standby,
+                "source_fallback": self.streaming_config.source_fallback,
                 # Streaming mode configuration
                 "mode": self.streaming_config.mode,
                 "udp_host": self.streaming_config.udp_host,
@@ -2155,6 +3307,21 @@ class GStreamerService:
                 "multicast_group": self.streaming_config.multicast_group,
                 "multicast_port": self.streaming_config.multicast_port,
                 "multicast_ttl": self.streaming_config.multicast_ttl,
+                "fec_enabled": self.streaming_config.fec_enabled,
+                "fec_min_percentage": self.streaming_config.fec_min_percentage,
+                "fec_max_percentage": self.streaming_config.fec_max_percentage,
+                "fec_percentage": self._fec_percentage,
+                "rtcp_feedback": self.streaming_config.rtcp_feedback,
+                "rtp_pacing": self.streaming_config.rtp_pacing,
+                "pacing_rate_multiplier": self.streaming_config.pacing_rate_multiplier,
+                "pacing_max_delay_ms": self.streaming_config.pacing_max_delay_ms,
+                "path_mtu_discovery": self.streaming_config.path_mtu_discovery,
+                "srt_mode": self.streaming_config.srt_mode,
+                "srt_host": self.streaming_config.srt_host,
+                "srt_port": self.streaming_config.srt_port,
+                "srt_latency_ms": self.streaming_config.srt_latency_ms,
+                "srt_effective_latency_ms": self._srt_latency_ms(),
+                "latency_probe": self.streaming_config.latency_probe,
                 "rtsp_enabled": self.streaming_config.rtsp_enabled,
                 "rtsp_url": self.streaming_config.rtsp_url,
                 "rtsp_transport": self.streaming_config.rtsp_transport,
@@ -2188,6 +3355,10 @@ class GStreamerService:
                 ),
             },
             "encoder_stats": self.encoder_stats.copy(),
+            "outputs": self.get_outputs(),
+            "startup": self.get_startup_stats(),
+            "source": self._source_selector.get_stats() if self._source_selector else None,
+            "path_mtu": self.get_path_mtu_status(),
         }
 
     def _format_uptime(self, seconds: int) -> str:
@@ -2289,20 +3460,85 @@ class GStreamerService:
             f'clock-rate=(int)90000, encoding-name=(string){enc_name}, payload=(int){pt}"'
         )
         parse_elem = f" ! {parse}" if parse else ""
+        receive = ""
+        fec_note = ""
+        if self.streaming_config.fec_enabled:
+            # FEC packets share the SSRC (pt 122): rtpstorage keeps recent packets
+            # for rtpulpfecdec, the jitterbuffer reports the gaps it must fill
+            receive = (
+                f"rtpstorage size-time=220000000 ! rtpssrcdemux ! "
+                f"application/x-rtp, payload=(int){pt}, clock-rate=(int)90000, media=(string)video, "
+                f"encoding-name=(string){enc_name} ! rtpjitterbuffer do-lost=true latency=50 ! "
+                f"rtpulpfecdec pt={FEC_PAYLOAD_TYPE} ! "
+            )
+            fec_note = f", ULPFEC pt {FEC_PAYLOAD_TYPE}"
+        result["fec"] = {
+            "enabled": self.streaming_config.fec_enabled,
+            "pt": FEC_PAYLOAD_TYPE,
+            "percentage": self._fec_percentage,
+        }
         result["pipelines"]["udp"] = {
-            "description": f"UDP unicast on port {udp_port}",
-            "pipeline": f"udpsrc port={udp_port} caps={caps} ! {depay}{parse_elem} ! {dec} ! {sink}",
+            "description": f"UDP unicast on port {udp_port}{fec_note}",
+            "pipeline": f"udpsrc port={udp_port} caps={caps} ! {receive}{depay}{parse_elem} ! {dec} ! {sink}",
         }
 
         # --- Multicast ---
         result["pipelines"]["multicast"] = {
-            "description": f"Multicast {mc_group}:{mc_port}",
+            "description": f"Multicast {mc_group}:{mc_port}{fec_note}",
             "pipeline": (
                 f"udpsrc multicast-group={mc_group} port={mc_port} auto-multicast=true "
-                f"caps={caps} ! {depay}{parse_elem} ! {dec} ! {sink}"
+                f"caps={caps} ! {receive}{depay}{parse_elem} ! {dec} ! {sink}"
             ),
         }
 
+        # --- UDP/multicast through rtpbin: receiver reports back to the drone ---
+        if self.streaming_config.rtcp_feedback:
+            rtpbin = "rtpbin name=rtpbin latency=50 do-lost=true"
+            if self.streaming_config.fec_enabled:
+                # Recovery inside rtpbin (GStreamer >= 1.20), so the reports count loss before FEC
+                rtpbin += f" fec-decoders='fec,0=\"rtpulpfecdec\\ pt\\={FEC_PAYLOAD_TYPE}\";'"
+            play = f"rtpbin. ! {depay}{parse_elem} ! {dec} ! {sink}"
+            send_rr = f"rtpbin.send_rtcp_src_0 ! udpsink host={ip} sync=false async=false port="
+            result["rtcp"] = {
+                "enabled": True,
+                "sender_reports_port_offset": RTCP_SEND_PORT_OFFSET,
+                "receiver_reports_port_offset": RTCP_RECV_PORT_OFFSET,
+            }
+            result["pipelines"]["udp_rtcp"] = {
+                "description": f"UDP unicast on port {udp_port} with RTCP receiver reports{fec_note}",
+                "pipeline": (
+                    f"{rtpbin} udpsrc port={udp_port} caps={caps} ! rtpbin.recv_rtp_sink_0 {play} "
+                    f"udpsrc port={udp_port + RTCP_SEND_PORT_OFFSET} ! rtpbin.recv_rtcp_sink_0 "
+                    f"{send_rr}{udp_port + RTCP_RECV_PORT_OFFSET}"
+                ),
+            }
+            result["pipelines"]["multicast_rtcp"] = {
+                "description": f"Multicast {mc_group}:{mc_port} with RTCP receiver reports{fec_note}",
+                "pipeline": (
+                    f"{rtpbin} udpsrc multicast-group={mc_group} port={mc_port} auto-multicast=true caps={caps} ! "
+                    f"rtpbin.recv_rtp_sink_0 {play} "
+                    f"udpsrc multicast-group={mc_group} port={mc_port + RTCP_SEND_PORT_OFFSET} auto-multicast=true ! "
+                    f"rtpbin.recv_rtcp_sink_0 {send_rr}{mc_port + RTCP_RECV_PORT_OFFSET}"
+                ),
+            }
+        else:
+            result["rtcp"] = {"enabled": False}
+
+        # --- SRT (MPEG-TS; the receiver takes the opposite SRT role) ---
+        if parse:
+            srt_port = self.streaming_config.srt_port
+            if self.streaming_config.srt_mode == "listener":
+                srt_uri = f"srt://{ip}:{srt_port}?mode=caller"
+            else:
+                srt_uri = f"srt://:{srt_port}?mode=listener"
+            result["pipelines"]["srt"] = {
+                "description": f"SRT {srt_uri} (latency {self._srt_latency_ms()} ms)",
+                "pipeline": (
+                    f"srtsrc uri={srt_uri} latency={self._srt_latency_ms()} ! "
+                    f"tsdemux latency=0 ! {parse} ! {dec} ! {sink_low_lat}"
+                ),
+            }
+
         # --- RTSP ---
         transport = (self.streaming_config.rtsp_transport or "tcp").lower()
         result["pipelines"]["rtsp"] = {
@@ -2324,6 +3560,10 @@ class GStreamerService:
         # If using RTSP Server, generate RTSP pipeline string
         if mode == "rtsp":
             return self._get_rtsp_pipeline_string()
+        if mode == "srt":
+            srt = self.get_client_pipeline_strings()["pipelines"].get("srt")
+            if srt:
+                return srt["pipeline"]
 
         # Default UDP/multicast mode
         try:
@@ -2556,7 +3796,9 @@ class GStreamerService:
 
     def shutdown(self):
         """Cleanup on shutdown"""
+        self._shutting_down = True
         self.stop()
+        self.stop_latency_receiver()
         print("🛑 GStreamer service shutdown")
 
 
@@ -0,0 +1,136 @@
+"""
+Keyframe Request Manager
+
+Every IDR request (new WebRTC peers, PLI/FIR, RTSP clients, attached
+outputs, cell changes, the adaptive GOP) goes through one gate. Requests
+that arrive within the minimum interval of the last IDR are merged, so a
+burst costs at most two IDRs: one straight away and one at the end of
+the interval for whoever asked after it. Back-to-back IDRs are several
+times the size of a P-frame; on 4G they show up as bitrate spikes and
+queueing delay.
+
+With intra refresh on, the encoder never sends periodic IDRs: a column
+of intra macroblocks sweeps the picture every GOP instead. Requests that
+only ask an existing decoder to recover (network events, the adaptive
+GOP) are then answered by the wave already in progress rather than an
+IDR. New receivers and WebRTC PLI still get an IDR, since browsers and
+some players won't start decoding from a recovery point.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MIN_INTERVAL_MS = 500
+
+# Reasons a refresh wave can answer when intra refresh is active
+REFRESH_WAVE_REASONS = frozenset({"gop", "cell_change", "band_change", "reconnection"})
+
+
+class KeyframeManager:
+    """
+    Coalesces keyframe requests from all callers.
+
+    ``issue`` sends the IDR to whichever encoder is active and returns
+    whether it was accepted. ``min_interval`` returns the current minimum
+    spacing between IDRs in seconds (read on every request, so config
+    changes apply immediately). ``intra_refresh`` returns whether the
+    active encoder is refreshing periodically, in which case requests in
+    REFRESH_WAVE_REASONS don't cost an IDR.
+    """
+
+    def __init__(
+        self,
+        issue: Callable[[], bool],
+        min_interval: Callable[[], float] = lambda: DEFAULT_MIN_INTERVAL_MS / 1000,
+        intra_refresh: Callable[[], bool] = lambda: False,
+    ):
+        self._issue = issue
+        self._min_interval = min_interval
+        self._intra_refresh = intra_refresh
+        self._lock = threading.Lock()
+        self._last_issued: Optional[float] = None  # monotonic
+        self._last_issued_at: Optional[float] = None  # wall clock, for status
+        self._deferred: Optional[threading.Timer] = None
+        self._deferred_reasons: Counter = Counter()
+        self._stats = {"requests": 0, "issued": 0, "coalesced": 0, "failed": 0, "refresh_waves": 0}
+        self._by_reason: Counter = Counter()
+
+    def request(self, reason: str = "api") -> Dict[str, Any]:
+        """
+        Ask for an IDR. Issued now if the last one is older than the
+        minimum interval, otherwise merged into the pending follow-up.
+        Answered by the running refresh wave when intra refresh allows it.
+        """
+        with self._lock:
+            self._stats["requests"] += 1
+            self._by_reason[reason] += 1
+            if reason in REFRESH_WAVE_REASONS and self._intra_refresh():
+                self._stats["refresh_waves"] += 1
+                return {"success": True, "issued": False, "coalesced": False, "refresh_wave": True}
+
+            now = time.monotonic()
+            interval = max(0.0, self._min_interval())
+            wait = 0.0 if self._last_issued is None else self._last_issued + interval - now
+
+            if wait > 0:
+                self._stats["coalesced"] += 1
+                self._deferred_reasons[reason] += 1
+                if not self._deferred:
+                    self._deferred = threading.Timer(wait, self._issue_deferred)
+                    self._deferred.daemon = True
+                    self._deferred.start()
+                return {"success": True, "issued": False, "coalesced": True, "in_s": round(wait, 3)}
+
+            self._last_issued = now
+
+        issued = self._send(reason)
+        return {"success": issued, "issued": issued, "coalesced": False}
+
+    def cancel(self):
+        """Drop a pending follow-up IDR (pipeline stopping)"""
+        with self._lock:
+            if self._deferred:
+                self._deferred.cancel()
+                self._deferred = None
+            self._deferred_reasons.clear()
+            self._last_issued = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self._stats,
+                "by_reason": dict(self._by_reason),
+                "pending": self._deferred is not None,
+                "min_interval_ms": int(self._min_interval() * 1000),
+                "intra_refresh": bool(self._intra_refresh()),
+                "last_issued_at": self._last_issued_at,
+            }
+
+    def _issue_deferred(self):
+        with self._lock:
+            self._deferred = None
+            reasons = "+".join(sorted(self._deferred_reasons))
+            self._deferred_reasons.clear()
+            self._last_issued = time.monotonic()
+        self._send(reasons or "deferred")
+
+    def _send(self, reason: str) -> bool:
+        try:
+            issued = bool(self._issue())
+        except Exception as e:
+            logger.debug(f"Keyframe request failed: {e}")
+            issued = False
+        with self._lock:
+            if issued:
+                self._stats["issued"] += 1
+                self._last_issued_at = time.time()
+            else:
+                self._stats["failed"] += 1
+                self._last_issued = None  # nothing was sent, don't hold back the next request
+        print(f"🔑 Keyframe ({reason}) → {'issued' if issued else 'no encoder'}")
+        return issued
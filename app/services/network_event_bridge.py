@@ -145,6 +145,7 @@ class EventBridgeConfig:
     # Bitrate mapping (score → kbps)
     max_bitrate_kbps: int = 8000
     min_bitrate_kbps: int = 500
+    srt_bandwidth_headroom: float = 0.8  # Share of SRT's bandwidth estimate left to the encoder
 
     # Smoothing
     score_smoothing: float = 0.3  # EMA alpha (0=no change, 1=instant)
@@ -271,7 +272,6 @@ class NetworkEventBridge:
         # Cooldowns to avoid flapping
         self._last_cell_change_time: float = 0
         self._last_bitrate_change_time: float = 0
-        self._last_keyframe_time: float = 0
 
         # Adaptive resolution state (4.8)
         self._low_score_since: float = 0.0  # timestamp when score first dropped below threshold
@@ -407,6 +407,9 @@ class NetworkEventBridge:
                             f"[Bridge] Primary interface changed: "
                             f"{self._primary_interface or 'none'} → {new_iface} (type: {new_type})"
                         )
+                        # Different path, possibly a different tunnel: RTP packet size follows
+                        if self._primary_interface:
+                            self._recheck_path_mtu()
                     self._primary_interface = new_iface
                     self._primary_type = new_type
                 else:
@@ -441,6 +444,26 @@ class NetworkEventBridge:
                     except Exception:
                         latency_data = None
 
+                # UDP/multicast/RTSP receivers report loss and jitter of the
+                # video stream itself; RTT only when they echo our sender reports
+                rtcp_data = self._get_rtcp_transport_metrics()
+                if rtcp_data:
+                    if latency_data:
+                        rtcp_data.setdefault("avg_rtt", latency_data.get("avg_rtt", 0))
+                    latency_data = rtcp_data
+
+                # WebRTC viewers: RTCP receiver reports measure the actual
+                # media path, so they take precedence over ping probes
+                webrtc_data = self._get_webrtc_transport_metrics()
+                if webrtc_data:
+                    latency_data = webrtc_data
+
+                # Same for SRT: its ACKs measure the RTT and loss of the video link
+                srt_data = self._get_srt_transport_metrics()
+                if srt_data:
+                    srt_data.setdefault("jitter", latency_data.get("jitter", 0) if latency_data else 0)
+                    latency_data = srt_data
+
                 # Diagnostic log every ~30s
                 if _cycle_count % 15 == 1:
                     cell_str = f"OK sinr={cell_data.get('sinr')}" if cell_data else "None"
@@ -489,6 +512,11 @@ class NetworkEventBridge:
                 # 6b. Adaptive resolution (pipeline restart when score is critically low)
                 await self._apply_adaptive_resolution()
 
+                # 6c. UDP/multicast FEC redundancy and the SRT latency budget follow the link
+                if latency_data:
+                    self._apply_adaptive_fec(latency_data)
+                    self._apply_srt_latency(latency_data)
+
                 # 7. Broadcast status
                 await self._broadcast_status()
 
@@ -514,6 +542,45 @@ class NetworkEventBridge:
     # Metric Collection
     # ======================
 
+    def _get_webrtc_transport_metrics(self) -> Optional[Dict]:
+        """RTT/jitter/loss of the WebRTC viewers from server-side RTCP stats"""
+        if not self._webrtc_service:
+            return None
+        try:
+            return self._webrtc_service.get_transport_metrics()
+        except Exception as e:
+            logger.debug(f"WebRTC transport metrics unavailable: {e}")
+            return None
+
+    def _recheck_path_mtu(self):
+        """Re-discover the path MTU of the video outputs after a route change"""
+        if not self._gstreamer_service or not hasattr(self._gstreamer_service, "recheck_path_mtu"):
+            return
+        try:
+            self._gstreamer_service.recheck_path_mtu()
+        except Exception as e:
+            logger.debug(f"Path MTU recheck failed: {e}")
+
+    def _get_rtcp_transport_metrics(self) -> Optional[Dict]:
+        """Loss/jitter/RTT from the RTCP receiver reports of the RTP outputs"""
+        if not self._gstreamer_service or not hasattr(self._gstreamer_service, "get_rtcp_metrics"):
+            return None
+        try:
+            return self._gstreamer_service.get_rtcp_metrics()
+        except Exception as e:
+            logger.debug(f"RTCP metrics unavailable: {e}")
+            return None
+
+    def _get_srt_transport_metrics(self) -> Optional[Dict]:
+        """RTT/loss/bandwidth of a connected SRT output"""
+        if not self._gstreamer_service or not hasattr(self._gstreamer_service, "get_srt_metrics"):
+            return None
+        try:
+            return self._gstreamer_service.get_srt_metrics()
+        except Exception as e:
+            logger.debug(f"SRT metrics unavailable: {e}")
+            return None
+
     async def _get_cell_metrics(self) -> Optional[Dict]:
         """Get current cellular metrics from modem provider"""
         if not self._modem_provider:
@@ -984,14 +1051,14 @@ class NetworkEventBridge:
             # Cell handover: force keyframe + temporary bitrate reduction
             if now - self._last_cell_change_time > 5:  # Cooldown 5s
                 await asyncio.sleep(self.config.cell_change_keyframe_delay_ms / 1000)
-                self._force_keyframe()
+                self._force_keyframe("cell_change")
                 actions_taken.append(VideoAction.FORCE_KEYFRAME)
                 self._last_cell_change_time = now
                 logger.info("Cell change → forced keyframe")
 
         elif event_type == NetworkEvent.BAND_CHANGE:
             # Band change: force keyframe + recalibrate
-            self._force_keyframe()
+            self._force_keyframe("band_change")
             actions_taken.append(VideoAction.FORCE_KEYFRAME)
             logger.info("Band change → forced keyframe")
 
@@ -1063,13 +1130,23 @@ class NetworkEventBridge:
             logger.warning("Network disconnection detected")
 
         elif event_type == NetworkEvent.RECONNECTION:
-            self._force_keyframe()
+            self._force_keyframe("reconnection")
             actions_taken.append(VideoAction.FORCE_KEYFRAME)
             logger.info("Reconnection → forced keyframe")
 
         # Record event
+        self._record_event(event_type, details, actions_taken, timestamp=now)
+
+    def _record_event(
+        self,
+        event_type: NetworkEvent,
+        details: Dict,
+        actions_taken: List[VideoAction],
+        timestamp: Optional[float] = None,
+    ):
+        """Append an event to the bounded history"""
         bridge_event = BridgeEvent(
-            timestamp=now,
+            timestamp=timestamp if timestamp is not None else time.time(),
             event=event_type,
             details=details,
             actions_taken=actions_taken,
@@ -1147,6 +1224,12 @@ class NetworkEventBridge:
 
             # ── H.264 family: adapt bitrate ──
             target_bitrate = self._quality_score.recommended_bitrate_kbps
+            # SRT estimates the link bandwidth; leave headroom for retransmissions
+            srt_data = self._get_srt_transport_metrics()
+            if srt_data and srt_data.get("bandwidth_kbps"):
+                target_bitrate = min(
+                    target_bitrate, int(srt_data["bandwidth_kbps"] * self.config.srt_bandwidth_headroom)
+                )
             current_bitrate = getattr(current_config, "h264_bitrate", 1500) or 1500
 
             # Limit change rate
@@ -1184,6 +1267,30 @@ class NetworkEventBridge:
         except Exception:
             pass  # logger.debug(f"Adaptive bitrate error: {e}")
 
+    def _apply_adaptive_fec(self, latency_data: Dict):
+        """Hand the measured packet loss to the UDP/multicast ULPFEC encoder"""
+        gst = self._gstreamer_service
+        if not gst or not gst.is_streaming or not latency_data.get("available", True):
+            return
+        if gst.streaming_config.mode not in ("udp", "multicast"):
+            return
+        try:
+            result = gst.update_fec_for_loss(latency_data.get("packet_loss", 0))
+            if result and result.get("success"):
+                logger.info(f"[Bridge] FEC redundancy → {result['fec_percentage']}%")
+        except Exception as e:
+            logger.debug(f"Adaptive FEC error: {e}")
+
+    def _apply_srt_latency(self, latency_data: Dict):
+        """Size the SRT retransmission window from the measured RTT"""
+        gst = self._gstreamer_service
+        if not gst or not gst.is_streaming or not latency_data.get("available", True):
+            return
+        try:
+            gst.update_srt_latency(latency_data.get("avg_rtt", 0))
+        except Exception as e:
+            logger.debug(f"SRT latency tuning error: {e}")
+
     # ======================
     # Adaptive Resolution (4.8)
     # ======================
@@ -1193,7 +1300,8 @@ class NetworkEventBridge:
 
         Rules:
         * Score < ``_adaptive_res_threshold`` for > ``_adaptive_res_hold_s``
-          → stop pipeline, reconfigure with recommended resolution, restart.
+          → renegotiate the running pipeline to the recommended resolution
+          (full restart only if the encoder can't renegotiate live).
         * Score recovers above threshold+15 for > hold time
           → restore original resolution.
         * Minimum ``_adaptive_res_cooldown_s`` between changes to avoid flapping.
@@ -1249,8 +1357,7 @@ class NetworkEventBridge:
                 f"for {elapsed_low:.0f}s → downscaling {cur_w}x{cur_h} → {new_w}x{new_h} @ {rec_fps}fps"
             )
 
-            self._gstreamer_service.configure(video_config={"width": new_w, "height": new_h, "framerate": rec_fps})
-            self._gstreamer_service.restart()
+            change = await self._change_resolution(new_w, new_h, rec_fps, VideoAction.REDUCE_RESOLUTION, score)
             self._last_resolution_change_time = now
             self._low_score_since = 0
 
@@ -1264,6 +1371,8 @@ class NetworkEventBridge:
                             "framerate": rec_fps,
                             "quality_score": score,
                             "reason": "adaptive_downscale",
+                            "method": change["method"],
+                            "gap_ms": change["gap_ms"],
                         },
                     )
                 except Exception:
@@ -1280,8 +1389,7 @@ class NetworkEventBridge:
                         f"[AdaptiveRes] Score recovered to {score:.0f} — "
                         f"restoring {cfg.width}x{cfg.height} → {orig_w}x{orig_h}"
                     )
-                    self._gstreamer_service.configure(video_config={"width": orig_w, "height": orig_h, "framerate": 30})
-                    self._gstreamer_service.restart()
+                    change = await self._change_resolution(orig_w, orig_h, 30, VideoAction.RESTORE_RESOLUTION, score)
                     self._last_resolution_change_time = now
 
                     if self._websocket_manager:
@@ -1294,6 +1402,8 @@ class NetworkEventBridge:
                                     "framerate": 30,
                                     "quality_score": score,
                                     "reason": "adaptive_restore",
+                                    "method": change["method"],
+                                    "gap_ms": change["gap_ms"],
                                 },
                             )
                         except Exception:
@@ -1301,19 +1411,54 @@ class NetworkEventBridge:
 
                 self._pre_downscale_resolution = None
 
+    async def _change_resolution(
+        self, width: int, height: int, framerate: int, action: VideoAction, score: float
+    ) -> Dict[str, Any]:
+        """Apply a resolution change, live if possible, and record the video gap.
+
+        Tries GStreamerService.renegotiate_output() first (source and sinks
+        stay up); falls back to configure() + restart() when the encoder
+        can't renegotiate. The measured gap is stored in the event history.
+        """
+        gs = self._gstreamer_service
+        cfg = gs.video_config
+        old_resolution = f"{cfg.width}x{cfg.height}"
+        loop = asyncio.get_event_loop()
+
+        result = await loop.run_in_executor(None, gs.renegotiate_output, width, height, framerate)
+        if result.get("success"):
+            method = "live"
+            gap_ms = result.get("gap_ms")
+        else:
+            logger.info(f"[AdaptiveRes] Live renegotiation unavailable ({result.get('message')}) → restarting pipeline")
+            method = "restart"
+            start = time.monotonic()
+            gs.configure(video_config={"width": width, "height": height, "framerate": framerate})
+            await loop.run_in_executor(None, gs.restart)
+            gap_ms = round((time.monotonic() - start) * 1000, 1)
+
+        self._record_event(
+            NetworkEvent.QUALITY_CHANGE,
+            {
+                "old_resolution": old_resolution,
+                "new_resolution": f"{width}x{height}",
+                "framerate": framerate,
+                "quality_score": round(score, 1),
+                "method": method,
+                "gap_ms": gap_ms,
+            },
+            [action],
+        )
+        return {"method": method, "gap_ms": gap_ms}
+
     # ======================
     # Video Action Helpers
     # ======================
 
-    def _force_keyframe(self):
-        """Force an IDR keyframe from GStreamer encoder"""
-        now = time.time()
-        if now - self._last_keyframe_time < 0.5:  # Max 2 keyframes/sec
-            return
-
+    def _force_keyframe(self, reason: str):
+        """Request an IDR keyframe (coalesced by the GStreamer keyframe manager)"""
         if self._gstreamer_service and self._gstreamer_service.is_streaming:
-            self._gstreamer_service.force_keyframe()
-            self._last_keyframe_time = now
+            self._gstreamer_service.force_keyframe(reason)
 
     def _adjust_bitrate_percent(self, percent: float):
         """Adjust bitrate by percentage (negative = reduce)"""
@@ -7,9 +7,12 @@ from __future__ import annotations
 
 import math
 import threading
+import time
 import logging
 from typing import Optional, Dict, Any
 
+from app.utils.gstreamer import FrameLayout, yuv420_layout
+
 try:
     import cv2
     import numpy as np
@@ -33,6 +36,24 @@ class OpenCVService:
     OSD_UPDATE_RATE_HZ = 10
     OSD_UPDATE_INTERVAL = 1.0 / OSD_UPDATE_RATE_HZ
 
+    # Pixel formats the processing path can work on natively.
+    # "bgr" needs videoconvert passes around the appsink/appsrc pair,
+    # "yuv" works directly on the I420/NV12 planes the encoders consume.
+    PIXEL_FORMATS = ("bgr", "yuv")
+    YUV_FORMATS = ("I420", "NV12")
+
+    # Contour colour (0, 255, 0) BGR expressed as BT.601 limited-range YUV
+    CONTOUR_COLOR_YUV = (145, 54, 34)
+
+    # Filters that can run as a reduced-resolution overlay on the full frame
+    ANALYSIS_FILTERS = ("edges", "threshold", "contours")
+    # Overlay colours for analysis results as (BGR, BT.601 limited-range YUV)
+    ANALYSIS_COLORS = {
+        "edges": ((0, 255, 0), CONTOUR_COLOR_YUV),
+        "threshold": ((255, 0, 255), (107, 202, 222)),
+        "contours": ((0, 255, 0), CONTOUR_COLOR_YUV),
+    }
+
     def __init__(self):
         self.enabled = False
         self._opencv_available = OPENCV_AVAILABLE
@@ -48,6 +69,12 @@ class OpenCVService:
             "edgeThreshold2": 200,
             "blurKernel": 15,
             "thresholdValue": 127,
+            "pixel_format": "bgr",
+            # Reduced-resolution analysis: run edges/threshold/contours on a
+            # downscaled copy at a fixed rate and draw results on the full frame
+            "analysis_overlay": False,
+            "analysis_scale": 0.5,  # Linear factor (0.5 = 1/4 of the pixels)
+            "analysis_rate_hz": 10,  # 0 = analyse every frame
         }
         self._lock = threading.Lock()
         self._telemetry_service = None
@@ -59,6 +86,12 @@ class OpenCVService:
         self._osd_cache_size: tuple = (0, 0)  # (height, width) of cached overlay
         self._osd_last_update: float = 0.0  # Timestamp of last OSD update
         self._osd_cached_values: dict = {}  # Cached telemetry values for comparison
+        # Luma/alpha planes derived from _osd_cache for the YUV path
+        self._osd_cache_yuv: Optional[tuple] = None
+
+        # Cached analysis result, reused on frames between analysis runs
+        self._analysis_cache: Optional[dict] = None
+        self._analysis_stats = {"runs": 0, "reused_frames": 0, "last_analysis_ms": 0.0}
 
         logger.info("OpenCV Service initialized")
 
@@ -118,6 +151,15 @@ class OpenCVService:
         """Update OpenCV configuration"""
         with self._lock:
             self.config.update(config)
+            if self.config.get("pixel_format") not in self.PIXEL_FORMATS:
+                logger.warning(f"Unknown pixel format {self.config.get('pixel_format')!r}, falling back to bgr")
+                self.config["pixel_format"] = "bgr"
+            try:
+                scale = float(self.config.get("analysis_scale", 0.5))
+            except (TypeError, ValueError):
+                scale = 0.5
+            self.config["analysis_scale"] = min(1.0, max(0.1, scale))
+            self._analysis_cache = None
             logger.info(f"OpenCV config updated: {self.config}")
         return self.get_config()
 
@@ -126,6 +168,11 @@ class OpenCVService:
         with self._lock:
             return self.config.copy()
 
+    def uses_yuv(self) -> bool:
+        """Check if frames should be processed as native YUV planes"""
+        with self._lock:
+            return self.config.get("pixel_format", "bgr") == "yuv"
+
     def set_telemetry_service(self, telemetry_service):
         """Set telemetry service for OSD data"""
         self._telemetry_service = telemetry_service
@@ -180,8 +227,6 @@ class OpenCVService:
         - Enough time has passed since last update (throttling)
         - Telemetry values have changed significantly
         """
-        import time
-
         now = time.monotonic()
 
         # Check if cache exists and matches frame size
@@ -208,8 +253,6 @@ class OpenCVService:
 
         This is called only when OSD needs to update, not every frame.
         """
-        import time
-
         # Create transparent overlay (BGRA with alpha channel)
         overlay = np.zeros((frame_h, frame_w, 4), dtype=np.uint8)
 
@@ -322,6 +365,7 @@ class OpenCVService:
             # Check if we need to regenerate the OSD overlay
             if self._should_update_osd(climb_rate, yaw_deg, frame_h, frame_w):
                 self._osd_cache = self._render_osd_overlay(frame_h, frame_w, climb_rate, yaw_deg)
+                self._osd_cache_yuv = None
 
             # Fast blend cached overlay onto frame
             if self._osd_cache is not None:
@@ -332,6 +376,80 @@ class OpenCVService:
 
         return frame
 
+    # ── Reduced-resolution analysis ──────────────────────────────────
+
+    def _analysis_due(self, filter_type: str, frame_h: int, frame_w: int) -> bool:
+        """Check if the cached analysis result must be recomputed.
+
+        Analysis runs at most analysis_rate_hz times per second, independent
+        of the stream framerate; frames in between reuse the cached result.
+        """
+        cache = self._analysis_cache
+        if cache is None or cache["filter"] != filter_type or cache["size"] != (frame_h, frame_w):
+            return True
+        rate = self.config.get("analysis_rate_hz", 10)
+        if not rate or rate <= 0:
+            return True
+        return time.monotonic() - cache["timestamp"] >= 1.0 / rate
+
+    def _run_analysis(self, small_gray: np.ndarray, filter_type: str, frame_h: int, frame_w: int) -> None:
+        """Run the analysis filter on a downscaled grey image and cache full-res results"""
+        start = time.monotonic()
+        result = {"filter": filter_type, "size": (frame_h, frame_w), "timestamp": start, "contours": None, "mask": None}
+
+        if filter_type == "contours":
+            _, thresh = cv2.threshold(small_gray, 127, 255, cv2.THRESH_BINARY)
+            contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+            # Scale polylines back to full-resolution coordinates
+            small_h, small_w = small_gray.shape[:2]
+            factor = np.array([frame_w / small_w, frame_h / small_h], dtype=np.float32)
+            result["contours"] = [(c * factor).astype(np.int32) for c in contours]
+        else:
+            if filter_type == "edges":
+                threshold1 = self.config.get("edgeThreshold1", 100)
+                threshold2 = self.config.get("edgeThreshold2", 200)
+                small_mask = cv2.Canny(small_gray, threshold1, threshold2)
+            else:
+                threshold_val = self.config.get("thresholdValue", 127)
+                _, small_mask = cv2.threshold(small_gray, threshold_val, 255, cv2.THRESH_BINARY)
+            # Upscale once per analysis run, not per frame
+            result["mask"] = cv2.resize(small_mask, (frame_w, frame_h), interpolation=cv2.INTER_NEAREST) > 0
+
+        self._analysis_cache = result
+        self._analysis_stats["runs"] += 1
+        self._analysis_stats["last_analysis_ms"] = round((time.monotonic() - start) * 1000, 2)
+
+    def _downscale_for_analysis(self, image: np.ndarray) -> np.ndarray:
+        """Return a copy of image reduced by analysis_scale (INTER_AREA)"""
+        scale = self.config.get("analysis_scale", 0.5)
+        if scale >= 1.0:
+            return image
+        return cv2.resize(image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    def _apply_analysis_overlay(self, frame: np.ndarray, filter_type: str) -> np.ndarray:
+        """Draw reduced-resolution analysis results onto the full-resolution BGR frame"""
+        frame_h, frame_w = frame.shape[:2]
+        if self._analysis_due(filter_type, frame_h, frame_w):
+            small = self._downscale_for_analysis(frame)
+            self._run_analysis(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), filter_type, frame_h, frame_w)
+        else:
+            self._analysis_stats["reused_frames"] += 1
+
+        if not frame.flags.writeable:
+            frame = frame.copy()
+
+        color, _ = self.ANALYSIS_COLORS[filter_type]
+        cache = self._analysis_cache
+        if cache["contours"] is not None:
+            cv2.drawContours(frame, cache["contours"], -1, color, 2)
+        elif filter_type == "threshold":
+            # Tint the thresholded area so the underlying image stays visible
+            mask = cache["mask"]
+            frame[mask] = frame[mask] // 2 + np.array(color, dtype=np.uint8) // 2
+        else:
+            frame[cache["mask"]] = color
+        return frame
+
     def process_frame(self, frame: np.ndarray) -> np.ndarray:
         """
         Process a single video frame with the configured filter.
@@ -360,7 +478,11 @@ class OpenCVService:
                 return self._draw_osd(frame, osd_enabled)
 
             try:
-                if filter_type == "edges":
+                if self.config.get("analysis_overlay", False) and filter_type in self.ANALYSIS_FILTERS:
+                    # Analyse a downscaled copy, draw the results on the original
+                    processed = self._apply_analysis_overlay(frame, filter_type)
+
+                elif filter_type == "edges":
                     # Canny edge detection
                     gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
                     threshold1 = self.config.get("edgeThreshold1", 100)
@@ -411,6 +533,224 @@ class OpenCVService:
                 # Try to apply OSD even if filter failed
                 return self._draw_osd(frame, osd_enabled)
 
+    # ── Native YUV (I420 / NV12) processing ──────────────────────────
+
+    @staticmethod
+    def _split_yuv_planes(frame: np.ndarray, fmt: str, width: int, height: int, layout: Optional[FrameLayout] = None):
+        """Return writable views of the Y and chroma planes of a YUV frame.
+
+        ``layout`` gives the plane offsets and row strides in the frame's
+        bytes (GStreamer pads rows to 4 bytes); it defaults to GStreamer's
+        layout for these dimensions. For I420 the chroma is returned as a
+        tuple of (U, V) planes of shape (height/2, width/2); for NV12 as a
+        single interleaved (height/2, width/2, 2) plane. No data is copied.
+        """
+        offsets, strides, _ = layout or yuv420_layout(fmt, width, height)
+        flat = frame.reshape(-1)
+        c_w, c_h = (width + 1) // 2, (height + 1) // 2
+
+        def plane(index: int, rows: int, row_bytes: int) -> np.ndarray:
+            start = offsets[index]
+            return flat[start : start + strides[index] * rows].reshape(rows, strides[index])[:, :row_bytes]
+
+        y = plane(0, height, width)
+        if fmt == "NV12":
+            return y, plane(1, c_h, c_w * 2).reshape(c_h, c_w, 2)
+        return y, (plane(1, c_h, c_w), plane(2, c_h, c_w))
+
+    @staticmethod
+    def _fill_chroma(chroma, value: int = 128):
+        """Set chroma plane(s) to a constant (128 = neutral grey)"""
+        if isinstance(chroma, tuple):
+            for plane in chroma:
+                plane.fill(value)
+        else:
+            chroma.fill(value)
+
+    def _draw_contours_yuv(self, y: np.ndarray, chroma, contours) -> None:
+        """Draw contours into the Y plane and the half-resolution chroma plane(s)"""
+        y_val, u_val, v_val = self.CONTOUR_COLOR_YUV
+        cv2.drawContours(y, contours, -1, y_val, 2)
+        half = [(c // 2).astype(np.int32) for c in contours]
+        if isinstance(chroma, tuple):
+            cv2.drawContours(chroma[0], half, -1, u_val, 1)
+            cv2.drawContours(chroma[1], half, -1, v_val, 1)
+        else:
+            cv2.drawContours(chroma, half, -1, (u_val, v_val), 1)
+
+    def _apply_analysis_overlay_yuv(self, y: np.ndarray, chroma, filter_type: str) -> None:
+        """Draw reduced-resolution analysis results into the full-resolution YUV planes"""
+        frame_h, frame_w = y.shape
+        if self._analysis_due(filter_type, frame_h, frame_w):
+            self._run_analysis(self._downscale_for_analysis(y), filter_type, frame_h, frame_w)
+        else:
+            self._analysis_stats["reused_frames"] += 1
+
+        cache = self._analysis_cache
+        if cache["contours"] is not None:
+            self._draw_contours_yuv(y, chroma, cache["contours"])
+            return
+
+        _, (y_val, u_val, v_val) = self.ANALYSIS_COLORS[filter_type]
+        mask = cache["mask"]
+        c_mask = mask[::2, ::2]
+        if filter_type == "threshold":
+            y[mask] = y[mask] // 2 + y_val // 2
+            if isinstance(chroma, tuple):
+                chroma[0][c_mask] = chroma[0][c_mask] // 2 + u_val // 2
+                chroma[1][c_mask] = chroma[1][c_mask] // 2 + v_val // 2
+            else:
+                chroma[c_mask] = chroma[c_mask] // 2 + np.array([u_val, v_val], dtype=np.uint8) // 2
+        else:
+            y[mask] = y_val
+            if isinstance(chroma, tuple):
+                chroma[0][c_mask] = u_val
+                chroma[1][c_mask] = v_val
+            else:
+                chroma[c_mask] = (u_val, v_val)
+
+    def _get_osd_yuv_planes(self) -> Optional[tuple]:
+        """Derive (luma, alpha, chroma_alpha) from the cached BGRA overlay.
+
+        Computed once per overlay refresh (OSD_UPDATE_RATE_HZ), not per frame.
+        """
+        if self._osd_cache is None:
+            return None
+        if self._osd_cache_yuv is None:
+            overlay = self._osd_cache
+            luma = cv2.cvtColor(overlay[:, :, :3], cv2.COLOR_BGR2GRAY)
+            alpha = overlay[:, :, 3]
+            self._osd_cache_yuv = (luma, alpha, alpha[::2, ::2])
+        return self._osd_cache_yuv
+
+    def _draw_osd_yuv(self, y: np.ndarray, chroma, osd_enabled: bool) -> None:
+        """Blend the cached OSD overlay directly into the YUV planes.
+
+        OSD text is white with a black shadow, so luma carries the glyphs and
+        chroma only needs to be pulled to neutral under them.
+        """
+        if not osd_enabled or not self._telemetry_service:
+            return
+
+        try:
+            frame_h, frame_w = y.shape
+            telemetry = self._telemetry_service.get_telemetry()
+            climb_rate = telemetry.get("speed", {}).get("climb_rate", 0.0)
+            yaw_deg = math.degrees(telemetry.get("attitude", {}).get("yaw", 0.0))
+
+            if self._should_update_osd(climb_rate, yaw_deg, frame_h, frame_w):
+                self._osd_cache = self._render_osd_overlay(frame_h, frame_w, climb_rate, yaw_deg)
+                self._osd_cache_yuv = None
+
+            planes = self._get_osd_yuv_planes()
+            if planes is None:
+                return
+            luma, alpha, chroma_alpha = planes
+
+            mask = alpha > 0
+            if not np.any(mask):
+                return
+            a = alpha[mask].astype(np.float32) / 255.0
+            y[mask] = (a * luma[mask] + (1.0 - a) * y[mask]).astype(np.uint8)
+
+            c_mask = chroma_alpha > 0
+            ca = chroma_alpha[c_mask].astype(np.float32) / 255.0
+            if isinstance(chroma, tuple):
+                for plane in chroma:
+                    plane[c_mask] = (ca * 128.0 + (1.0 - ca) * plane[c_mask]).astype(np.uint8)
+            else:
+                ca = ca[:, np.newaxis]
+                chroma[c_mask] = (ca * 128.0 + (1.0 - ca) * chroma[c_mask]).astype(np.uint8)
+
+        except Exception as e:
+            logger.error(f"Error drawing OSD (YUV): {e}", exc_info=True)
+
+    def process_frame_yuv(
+        self, frame: np.ndarray, fmt: str, width: int, height: int, layout: Optional[FrameLayout] = None
+    ) -> np.ndarray:
+        """
+        Process a single I420/NV12 frame in place, without colour conversion.
+
+        Luma-only filters (edges, threshold, grayscale) touch the Y plane and
+        neutralise chroma; blur runs per plane; contours and OSD are drawn into
+        Y and the subsampled chroma.
+
+        Args:
+            frame: uint8 array holding the buffer's bytes as delivered by GStreamer
+            fmt: "I420" or "NV12"
+            width: Frame width in pixels (must be even)
+            height: Frame height in pixels (must be even)
+            layout: Plane offsets/strides (default: GStreamer's layout for the size)
+
+        Returns:
+            Processed frame in the same layout
+        """
+        if not OPENCV_AVAILABLE:
+            return frame
+        if not self.enabled or frame is None:
+            return frame
+        if fmt not in self.YUV_FORMATS:
+            logger.warning(f"Unsupported YUV format: {fmt}")
+            return frame
+
+        with self._lock:
+            if not frame.flags["C_CONTIGUOUS"] or not frame.flags.writeable:
+                frame = np.array(frame, copy=True, order="C")
+
+            filter_type = self.config.get("filter", "none")
+            osd_enabled = self.config.get("osd_enabled", False)
+
+            try:
+                y, chroma = self._split_yuv_planes(frame, fmt, width, height, layout)
+            except ValueError as e:
+                logger.error(f"Invalid {fmt} frame for {width}x{height}: {e}")
+                return frame
+
+            try:
+                if self.config.get("analysis_overlay", False) and filter_type in self.ANALYSIS_FILTERS:
+                    self._apply_analysis_overlay_yuv(y, chroma, filter_type)
+
+                elif filter_type == "edges":
+                    threshold1 = self.config.get("edgeThreshold1", 100)
+                    threshold2 = self.config.get("edgeThreshold2", 200)
+                    y[:] = cv2.Canny(y, threshold1, threshold2)
+                    self._fill_chroma(chroma)
+
+                elif filter_type == "blur":
+                    kernel = self.config.get("blurKernel", 15)
+                    if kernel % 2 == 0:
+                        kernel += 1
+                    # Chroma is half resolution, so half the kernel gives the same spatial blur
+                    c_kernel = max(1, kernel // 2) | 1
+                    cv2.GaussianBlur(y, (kernel, kernel), 0, dst=y)
+                    if isinstance(chroma, tuple):
+                        for plane in chroma:
+                            cv2.GaussianBlur(plane, (c_kernel, c_kernel), 0, dst=plane)
+                    else:
+                        chroma[:] = cv2.GaussianBlur(chroma, (c_kernel, c_kernel), 0)
+
+                elif filter_type == "grayscale":
+                    self._fill_chroma(chroma)
+
+                elif filter_type == "threshold":
+                    threshold_val = self.config.get("thresholdValue", 127)
+                    cv2.threshold(y, threshold_val, 255, cv2.THRESH_BINARY, dst=y)
+                    self._fill_chroma(chroma)
+
+                elif filter_type == "contours":
+                    _, thresh = cv2.threshold(y, 127, 255, cv2.THRESH_BINARY)
+                    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+                    self._draw_contours_yuv(y, chroma, contours)
+
+                elif filter_type != "none":
+                    logger.warning(f"Unknown filter type: {filter_type}")
+
+            except Exception as e:
+                logger.error(f"Error processing {fmt} frame: {e}")
+
+            self._draw_osd_yuv(y, chroma, osd_enabled)
+            return frame
+
     def build_gstreamer_element(self) -> Optional[str]:
         """
         Build GStreamer element string for appsink/appsrc pipeline.
@@ -425,12 +765,19 @@ class OpenCVService:
         # For GStreamer integration, we'd use:
         # videoconvert ! video/x-raw,format=BGR ! appsink + appsrc + videoconvert
         # This is a placeholder - full integration would require GStreamer Python bindings
+        if self.uses_yuv():
+            return "video/x-raw,format=I420"
         return "videoconvert ! video/x-raw,format=BGR"
 
     def get_status(self) -> Dict[str, Any]:
         """Get service status"""
         with self._lock:
-            return {"opencv_enabled": self.enabled, "opencv_version": cv2.__version__, "config": self.config.copy()}
+            return {
+                "opencv_enabled": self.enabled,
+                "opencv_version": cv2.__version__,
+                "config": self.config.copy(),
+                "analysis": self._analysis_stats.copy(),
+            }
 
 
 # Global service instance
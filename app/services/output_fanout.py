@@ -0,0 +1,205 @@
+"""
+Output Fan-out
+
+Shares one encoded stream between several outputs. The encoder chain
+ends in a ``tee``; every output (UDP, multicast, RTSP, WebRTC) is a
+branch on one of its request pads and can be attached or detached while
+the pipeline is PLAYING without touching the other branches. However
+many outputs are active, the camera is captured and encoded once.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.utils.gstreamer import request_pad
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    GSTREAMER_AVAILABLE = True
+except (ImportError, ValueError):
+    GSTREAMER_AVAILABLE = False
+    Gst = None
+
+logger = logging.getLogger(__name__)
+
+# Per-branch queue depth. The queue leaks its oldest buffers, so a stalled
+# output (slow RTSP client, blocked socket) never back-pressures the tee
+# and with it every other output.
+BRANCH_QUEUE_BUFFERS = 5
+
+
+class OutputFanout:
+    """
+    Manages output branches hanging off an encoded-stream tee.
+
+    Each branch is ``tee.src_N → queue → <output elements>``. The queue
+    is created here; callers only supply the output-specific elements.
+    """
+
+    def __init__(self, pipeline, tee):
+        self._pipeline = pipeline
+        self._tee = tee
+        self._branches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tee(self):
+        return self._tee
+
+    def has(self, output_id: str) -> bool:
+        with self._lock:
+            return output_id in self._branches
+
+    def list_outputs(self) -> Dict[str, Dict[str, Any]]:
+        """Attached outputs with their info and attach time"""
+        with self._lock:
+            return {
+                output_id: {"attached_at": branch["attached_at"], **branch["info"]}
+                for output_id, branch in self._branches.items()
+            }
+
+    def attach(
+        self,
+        output_id: str,
+        elements: List[Any],
+        info: Optional[Dict[str, Any]] = None,
+        queue_properties: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Add a branch to the tee.
+
+        Args:
+            output_id: Unique output name (e.g. 'udp', 'rtsp')
+            elements: Output elements in link order, not yet in the pipeline
+            info: Extra details reported by list_outputs()
+            queue_properties: Overrides for the branch queue limits (it stays leaky)
+        """
+        if not GSTREAMER_AVAILABLE:
+            return {"success": False, "error": "GStreamer not available"}
+
+        with self._lock:
+            if output_id in self._branches:
+                return {"success": False, "error": f"Output '{output_id}' already attached"}
+
+            queue = Gst.ElementFactory.make("queue", f"{output_id}_out_queue")
+            if not queue:
+                return {"success": False, "error": "Failed to create queue"}
+            queue.set_property("leaky", 2)  # downstream: drop oldest
+            queue.set_property("max-size-buffers", BRANCH_QUEUE_BUFFERS)
+            queue.set_property("max-size-bytes", 0)
+            queue.set_property("max-size-time", 0)
+            for prop, value in (queue_properties or {}).items():
+                queue.set_property(prop, value)
+
+            branch = [queue] + list(elements)
+            for element in branch:
+                self._pipeline.add(element)
+
+            for upstream, downstream in zip(branch, branch[1:]):
+                if not upstream.link(downstream):
+                    self._remove_elements(branch)
+                    return {
+                        "success": False,
+                        "error": f"Failed to link {upstream.get_name()} → {downstream.get_name()}",
+                    }
+
+            # Bring the branch up to the pipeline's state (sink first) before
+            # the tee can push into it
+            for element in reversed(branch):
+                element.sync_state_with_parent()
+
+            tee_pad = request_pad(self._tee, "src_%u")
+            if not tee_pad or tee_pad.link(queue.get_static_pad("sink")) != Gst.PadLinkReturn.OK:
+                if tee_pad:
+                    self._tee.release_request_pad(tee_pad)
+                self._remove_elements(branch)
+                return {"success": False, "error": f"Failed to link tee → {output_id}"}
+
+            self._branches[output_id] = {
+                "pad": tee_pad,
+                "elements": branch,
+                "info": dict(info or {}),
+                "attached_at": time.time(),
+            }
+
+        print(f"🔀 Output attached: {output_id}")
+        return {"success": True, "output": output_id}
+
+    def detach(
+        self, output_id: str, drained: Optional[threading.Event] = None, drain_timeout: float = 5.0
+    ) -> Dict[str, Any]:
+        """
+        Remove a branch; the others keep flowing.
+
+        With ``drained``, the unlinked branch gets an EOS first (so a muxer
+        can finish its file) and is removed once the event is set or after
+        ``drain_timeout`` seconds. ``draining`` in the result says whether
+        that happened; a pipeline that isn't playing can't drain.
+        """
+        with self._lock:
+            branch = self._branches.pop(output_id, None)
+        if not branch:
+            return {"success": False, "error": f"Output '{output_id}' not attached"}
+
+        draining = False
+        if self._is_playing():
+            draining = drained is not None
+            branch["drained"] = drained
+            branch["drain_timeout"] = drain_timeout
+            # Unlink only once no buffer is in flight on this tee pad
+            branch["pad"].add_probe(Gst.PadProbeType.IDLE, self._on_tee_pad_idle, branch)
+        else:
+            self._release_branch(branch)
+
+        print(f"🔀 Output detached: {output_id}")
+        return {"success": True, "output": output_id, "draining": draining}
+
+    def _is_playing(self) -> bool:
+        try:
+            return self._pipeline.get_state(0)[1] == Gst.State.PLAYING
+        except Exception:
+            return False
+
+    def _on_tee_pad_idle(self, pad, info, branch):
+        drained = branch.get("drained")
+        if drained is None:
+            self._release_branch(branch)
+            return Gst.PadProbeReturn.REMOVE
+
+        self._unlink_branch(branch)
+        branch["elements"][0].get_static_pad("sink").send_event(Gst.Event.new_eos())
+
+        def remove_when_drained():
+            if not drained.wait(branch["drain_timeout"]):
+                logger.warning("Output branch did not drain in time, removing it anyway")
+            self._remove_elements(branch["elements"])
+
+        threading.Thread(target=remove_when_drained, daemon=True, name="OutputDrain").start()
+        return Gst.PadProbeReturn.REMOVE
+
+    def _release_branch(self, branch: Dict[str, Any]):
+        self._unlink_branch(branch)
+        self._remove_elements(branch["elements"])
+
+    def _unlink_branch(self, branch: Dict[str, Any]):
+        pad = branch["pad"]
+        queue = branch["elements"][0]
+        try:
+            pad.unlink(queue.get_static_pad("sink"))
+            self._tee.release_request_pad(pad)
+        except Exception as e:
+            logger.warning(f"Failed to unlink output branch: {e}")
+
+    def _remove_elements(self, elements: List[Any]):
+        for element in elements:
+            try:
+                element.set_state(Gst.State.NULL)
+                self._pipeline.remove(element)
+            except Exception as e:
+                logger.debug(f"Failed to remove {element}: {e}")
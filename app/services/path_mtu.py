@@ -0,0 +1,103 @@
+"""
+Path MTU Discovery
+
+RTP packets larger than the path MTU are fragmented, or dropped outright
+by tunnels (Tailscale/WireGuard over 4G) that don't pass fragments; with
+fragmentation one lost fragment loses the whole packet. The payloaders'
+``mtu`` should therefore fit the path to each streaming destination.
+
+discover_path_mtu() asks the kernel: a connected UDP socket with
+IP_MTU_DISCOVER=IP_PMTUDISC_DO reports the route's MTU (the tunnel
+interface's, or a cached PMTU) through IP_MTU. Full-size probes with DF
+set then let routers further along answer "fragmentation needed", which
+lowers the cached PMTU; probing stops once a probe passes without
+lowering it. Paths that silently drop DF packets (ICMP filtered) can't
+be detected this way and keep the route MTU.
+
+Probes go to the discard port, not to the video receiver. Multicast
+destinations only get the route MTU.
+"""
+
+import errno
+import ipaddress
+import logging
+import socket
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+# Linux values; the socket module only exports some of them
+IP_MTU_DISCOVER = getattr(socket, "IP_MTU_DISCOVER", 10)
+IP_PMTUDISC_DO = getattr(socket, "IP_PMTUDISC_DO", 2)
+IP_MTU = getattr(socket, "IP_MTU", 14)
+
+IPV4_UDP_OVERHEAD = 28  # IPv4 (20) + UDP (8) headers around an RTP packet
+MIN_PATH_MTU = 576  # every IPv4 host must accept this
+PROBE_PORT = 9  # discard
+PROBE_WAIT_S = 0.3  # for a "fragmentation needed" answer to a probe
+MAX_PROBES = 4  # each ICMP answer can lower the PMTU once (nested tunnels)
+MAX_PROBE_MTU = 1500  # nothing larger is sent anyway (and loopback's 64k isn't a path)
+
+
+def discover_path_mtu(
+    host: str, port: int = PROBE_PORT, probe_wait: float = PROBE_WAIT_S, max_mtu: int = MAX_PROBE_MTU
+) -> Dict[str, Any]:
+    """
+    Path MTU to ``host``.
+
+    Returns {"success", "host", "mtu", "route_mtu", "source", "probes"};
+    ``source`` is "route" when no router reported a smaller MTU, "icmp"
+    when one did.
+    """
+    try:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    except OSError as e:
+        return {"success": False, "host": host, "error": str(e)}
+
+    try:
+        sock.setsockopt(socket.IPPROTO_IP, IP_MTU_DISCOVER, IP_PMTUDISC_DO)
+        sock.connect((host, port))
+        route_mtu = sock.getsockopt(socket.IPPROTO_IP, IP_MTU)
+        mtu = start = min(route_mtu, max_mtu)
+        probes = 0
+        # Routers don't answer for multicast; the interface MTU is all there is
+        max_probes = 0 if ipaddress.ip_address(host).is_multicast else MAX_PROBES
+
+        while probes < max_probes and mtu > MIN_PATH_MTU:
+            probes += 1
+            try:
+                sock.send(bytes(mtu - IPV4_UDP_OVERHEAD))
+            except OSError as e:
+                # EMSGSIZE: an earlier answer already lowered the PMTU;
+                # ECONNREFUSED: port unreachable from the host, so the probe got there
+                if e.errno not in (errno.EMSGSIZE, errno.ECONNREFUSED):
+                    raise
+            time.sleep(probe_wait)
+            lowered = min(sock.getsockopt(socket.IPPROTO_IP, IP_MTU), max_mtu)
+            if lowered >= mtu:
+                break
+            mtu = lowered
+
+        return {
+            "success": True,
+            "host": host,
+            "mtu": max(MIN_PATH_MTU, mtu),
+            "route_mtu": route_mtu,
+            "source": "icmp" if mtu < start else "route",
+            "probes": probes,
+        }
+    except (OSError, ValueError) as e:
+        logger.debug(f"Path MTU discovery to {host} failed: {e}")
+        return {"success": False, "host": host, "error": str(e)}
+    finally:
+        sock.close()
+
+
+def rtp_mtu_for_path(path_mtu: int, ceiling: int, overhead: int = 0) -> int:
+    """
+    Payloader ``mtu`` (whole RTP packet) that fits in ``path_mtu`` after
+    the IP/UDP headers and ``overhead`` (e.g. ULPFEC packets, which are
+    larger than the media packets they protect). Never above ``ceiling``.
+    """
+    return max(MIN_PATH_MTU - IPV4_UDP_OVERHEAD, min(ceiling, path_mtu - IPV4_UDP_OVERHEAD - overhead))
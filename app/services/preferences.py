@@ -98,6 +98,8 @@ class PreferencesService:
                 "udp_port": 5600,
                 "enabled": False,  # Not enabled by default
                 "auto_start": False,
+                "warm_standby": False,  # Pre-roll the pipeline at boot for a near-instant start
+                "source_fallback": True,  # Slate instead of a stopped stream when the camera drops out
             },
             "vpn": {
                 "provider": "",  # No provider by default (empty = none, "tailscale", "zerotier", "wireguard")
@@ -369,6 +371,28 @@ class PreferencesService:
         with self._lock:
             return self._preferences.get("video", {}).get("auto_adaptive_resolution", True)
 
+    def get_encoder_benchmark(self, board_key: str) -> Optional[Dict[str, Any]]:
+        """Get persisted encoder benchmark results for a board."""
+        with self._lock:
+            return self._preferences.get("encoder_benchmarks", {}).get(board_key)
+
+    def set_encoder_benchmark(self, board_key: str, results: Dict[str, Any]):
+        """Persist encoder benchmark results for a board."""
+        with self._lock:
+            self._preferences.setdefault("encoder_benchmarks", {})[board_key] = results
+            self._save()
+
+    def get_video_capabilities(self) -> Dict[str, Any]:
+        """Get the persisted video capability cache (hardware identity → capabilities)."""
+        with self._lock:
+            return dict(self._preferences.get("video_capabilities", {}))
+
+    def set_video_capabilities(self, entries: Dict[str, Any]):
+        """Persist the video capability cache."""
+        with self._lock:
+            self._preferences["video_capabilities"] = dict(entries)
+            self._save()
+
     # ==================== Streaming Configuration ====================
 
     def get_streaming_config(self) -> Dict[str, Any]:
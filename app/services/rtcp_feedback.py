@@ -0,0 +1,192 @@
+"""
+RTCP Receiver-Report Feedback
+
+The UDP and multicast outputs send plain RTP, so nothing about the video
+path itself comes back to the drone. RtcpSession puts an ``rtpbin``
+session in the output branch: it sends RTCP sender reports next to the
+RTP stream (port + 1) and listens for the receivers' reports (port + 5,
+the rtpbin examples' layout). Each receiver report block carries the
+fraction of packets lost, the interarrival jitter and, through LSR/DLSR,
+the round-trip time of the real media path (VPN included).
+
+RTSP clients send receiver reports on their own; read_session_report()
+works on the RTSP server's sessions as well.
+"""
+
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.utils.gstreamer import request_pad, structure_to_dict
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    GSTREAMER_AVAILABLE = True
+except (ImportError, ValueError):
+    GSTREAMER_AVAILABLE = False
+    Gst = None
+
+logger = logging.getLogger(__name__)
+
+RTCP_SEND_PORT_OFFSET = 1  # sender reports go to the receiver's RTP port + 1
+RTCP_RECV_PORT_OFFSET = 5  # receiver reports come back to our RTP port + 5
+RTP_VIDEO_CLOCK_RATE = 90000  # jitter is reported in RTP timestamp units
+REPORT_STALE_S = 10.0  # RTCP interval is ~5 s; two missed reports → no data
+
+
+def report_from_source_stats(source_stats: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The worst receiver report about our stream, from an RTPSession's
+    "source-stats" (as dicts). None until a receiver has reported.
+
+    rtpsession keeps a report block on the source that sent it: a remote
+    (non-internal) source whose ``rb-ssrc`` names our sender.
+    """
+    ours = {source.get("ssrc") for source in source_stats if source.get("internal")}
+    receivers = [
+        source
+        for source in source_stats
+        if not source.get("internal") and source.get("have-rb") and source.get("rb-ssrc") in ours
+    ]
+    if not receivers:
+        return None
+
+    reports = [
+        {
+            "ssrc": source.get("ssrc"),
+            "sender_ssrc": source.get("rb-ssrc"),
+            "fraction_lost_percent": round(source.get("rb-fractionlost", 0) * 100 / 256, 2),
+            "packets_lost": int(source.get("rb-packetslost", 0)),
+            "jitter_ms": round(source.get("rb-jitter", 0) * 1000 / RTP_VIDEO_CLOCK_RATE, 2),
+            # LSR/DLSR based, in 1/65536 s; 0 until a report echoes one of our SRs
+            "rtt_ms": round(source.get("rb-round-trip", 0) * 1000 / 65536, 1),
+            "highest_seq": source.get("rb-exthighestseq", 0),
+        }
+        for source in receivers
+    ]
+    worst = max(reports, key=lambda r: (r["fraction_lost_percent"], r["rtt_ms"], r["jitter_ms"]))
+    return {**worst, "receivers": len(reports)}
+
+
+def read_session_report(session) -> Optional[Dict[str, Any]]:
+    """Receiver report of an RTPSession (rtpbin "get-internal-session" / GstRTSPStream)"""
+    stats = session.get_property("stats")
+    if stats is None:
+        return None
+    source_stats = stats.get_value("source-stats") or []
+    return report_from_source_stats([structure_to_dict(s) for s in source_stats])
+
+
+class ReceiverReports:
+    """Latest report per RTP session; only reports that are still arriving count"""
+
+    def __init__(self):
+        self._reports: Dict[str, Dict[str, Any]] = {}
+
+    def update(self, reports: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        """Take this poll's reports by session; sessions that are gone are dropped"""
+        now = time.time()
+        current = {}
+        for key, report in reports.items():
+            previous = self._reports.get(key)
+            if report is None:
+                if previous:
+                    current[key] = previous
+                continue
+            # A new report block moves the highest sequence number (or changes loss/jitter)
+            same = previous is not None and all(
+                previous[field] == report[field] for field in ("highest_seq", "packets_lost", "jitter_ms")
+            )
+            report["received_at"] = previous["received_at"] if same else now
+            current[key] = report
+        self._reports = current
+
+    def worst(self) -> Optional[Dict[str, Any]]:
+        """Freshest-data worst case across sessions: the path to adapt to"""
+        now = time.time()
+        fresh = [
+            {"session": key, **report}
+            for key, report in self._reports.items()
+            if now - report["received_at"] < REPORT_STALE_S
+        ]
+        if not fresh:
+            return None
+        return max(fresh, key=lambda r: (r["fraction_lost_percent"], r["rtt_ms"], r["jitter_ms"]))
+
+
+class RtcpSession:
+    """
+    ``rtpbin`` send session wrapped in a bin with plain sink/src pads, so
+    it drops into a linear output branch between payloader and udpsink::
+
+        sink → rtpbin.send_rtp_sink_0 … send_rtp_src_0 → src
+        rtpbin.send_rtcp_src_0 → udpsink  host:port+1
+        udpsrc :port+5 → rtpbin.recv_rtcp_sink_0
+    """
+
+    def __init__(self, name: str, host: str, port: int, multicast_ttl: Optional[int] = None):
+        self.name = name
+        self.host = host
+        self.port = port
+        self.multicast_ttl = multicast_ttl
+        self._rtpbin = None
+
+    @property
+    def rtcp_port(self) -> int:
+        return self.port + RTCP_SEND_PORT_OFFSET
+
+    @property
+    def report_port(self) -> int:
+        return self.port + RTCP_RECV_PORT_OFFSET
+
+    def create_element(self):
+        """The session bin, or None when rtpbin isn't available"""
+        if not GSTREAMER_AVAILABLE:
+            return None
+
+        session_bin = Gst.Bin.new(self.name)
+        rtpbin = Gst.ElementFactory.make("rtpbin", f"{self.name}_rtpbin")
+        rtcp_out = Gst.ElementFactory.make("udpsink", f"{self.name}_out")
+        rtcp_in = Gst.ElementFactory.make("udpsrc", f"{self.name}_in")
+        if not rtpbin or not rtcp_out or not rtcp_in:
+            return None
+
+        rtcp_out.set_property("host", self.host)
+        rtcp_out.set_property("port", self.rtcp_port)
+        rtcp_out.set_property("sync", False)
+        rtcp_out.set_property("async", False)
+        if self.multicast_ttl is not None:
+            rtcp_out.set_property("auto-multicast", True)
+            rtcp_out.set_property("ttl", self.multicast_ttl)
+        rtcp_in.set_property("port", self.report_port)
+        rtcp_in.set_property("caps", Gst.Caps.from_string("application/x-rtcp"))
+
+        for element in (rtpbin, rtcp_out, rtcp_in):
+            session_bin.add(element)
+
+        rtp_sink = request_pad(rtpbin, "send_rtp_sink_0")
+        rtp_src = rtpbin.get_static_pad("send_rtp_src_0")
+        rtcp_src = request_pad(rtpbin, "send_rtcp_src_0")
+        rtcp_sink = request_pad(rtpbin, "recv_rtcp_sink_0")
+        if not rtp_sink or not rtp_src or not rtcp_src or not rtcp_sink:
+            return None
+        if (
+            rtcp_src.link(rtcp_out.get_static_pad("sink")) != Gst.PadLinkReturn.OK
+            or rtcp_in.get_static_pad("src").link(rtcp_sink) != Gst.PadLinkReturn.OK
+        ):
+            return None
+
+        session_bin.add_pad(Gst.GhostPad.new("sink", rtp_sink))
+        session_bin.add_pad(Gst.GhostPad.new("src", rtp_src))
+        self._rtpbin = rtpbin
+        return session_bin
+
+    def read_report(self) -> Optional[Dict[str, Any]]:
+        if not self._rtpbin:
+            return None
+        session = self._rtpbin.emit("get-internal-session", 0)
+        return read_session_report(session) if session else None
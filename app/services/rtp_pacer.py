@@ -0,0 +1,175 @@
+"""
+RTP Pacing
+
+The payloader hands udpsink a whole frame's packets at once, so a 40-packet
+IDR leaves the board as one line-rate burst. On a cellular uplink that
+burst lands in the modem's buffer in one go, and everything sharing the
+link (MAVLink telemetry, the next frame) waits behind it.
+
+RtpPacer spaces the packets out in C: an ``identity`` element between the
+payloader and the sink sleeps ``sleep-time`` after every packet, so packets
+never touch Python and the pacer costs no GIL time per packet. The spacing
+is derived from ``multiplier × target bitrate`` and re-derived from the
+stats poll (~4 Hz) as the bitrate changes. It is also capped so that an
+average frame leaves within ``max_delay_ms``. Larger frames (IDRs) take
+proportionally longer, and while they drain the frames behind them wait
+in the branch's leaky queue. That queue's fill level is reported as the
+pacing delay.
+"""
+
+import logging
+import time
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    GSTREAMER_AVAILABLE = True
+except (ImportError, ValueError):
+    GSTREAMER_AVAILABLE = False
+    Gst = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PACKET_BYTES = 1400  # payloader mtu when none is known
+MIN_RATE_KBPS = 100
+
+
+class RtpPacer:
+    """
+    Packet pacer for a linear output branch::
+
+        rtppay → identity (sleep-time) → udpsink
+
+    Without a target bitrate (MJPEG), the rate is measured from the sink's
+    ``bytes-served`` counter between refreshes.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        target_kbps: Callable[[], Optional[int]],
+        multiplier: float = 1.5,
+        max_delay_ms: float = 30.0,
+        framerate: int = 30,
+        packet_bytes: int = DEFAULT_PACKET_BYTES,
+    ):
+        self.name = name
+        self.multiplier = multiplier
+        self.max_delay_ms = max_delay_ms
+        self.framerate = max(1, framerate or 30)
+        self.packet_bytes = packet_bytes or DEFAULT_PACKET_BYTES  # payloader mtu; path MTU discovery updates it
+        self._target_kbps = target_kbps  # current encoder bitrate; None/0 → measured sink rate
+        self._element = None
+        self._sink = None
+        self._served = None  # (time, bytes-served) at the last refresh
+        self._measured_kbps = 0
+        self._base_kbps = 0
+        self._delay_ms_max = 0.0
+        self.stats = {"rate_kbps": 0, "packet_spacing_us": 0, "rate_source": None}
+
+    def create_element(self, sink=None):
+        """
+        The pacing element, or None when identity isn't available.
+
+        Args:
+            sink: The branch's udpsink, read for the measured rate when there is no target bitrate
+        """
+        if not GSTREAMER_AVAILABLE:
+            return None
+
+        element = Gst.ElementFactory.make("identity", self.name)
+        if not element:
+            return None
+        element.set_property("silent", True)
+        element.set_property("sync", False)
+        element.set_property("signal-handoffs", False)
+        self._element = element
+        self._sink = sink
+        self.refresh()
+        return element
+
+    def stop(self):
+        self._element = None
+        self._sink = None
+
+    def refresh(self):
+        """Re-derive the packet spacing from the current bitrate (stats poll thread)"""
+        if not self._element:
+            return
+        spacing_us, rate_kbps, source = self._spacing()
+        if spacing_us != self.stats["packet_spacing_us"]:
+            try:
+                self._element.set_property("sleep-time", spacing_us)
+            except Exception as e:
+                logger.debug(f"Failed to set pacer sleep-time: {e}")
+                return
+        self.stats.update({"rate_kbps": rate_kbps, "packet_spacing_us": spacing_us, "rate_source": source})
+
+    def get_stats(self, backlog_queue=None) -> Dict[str, Any]:
+        """
+        Paced rate and spacing, estimated burst size and spread, and pacing delay.
+
+        Args:
+            backlog_queue: The branch queue in front of the payloader; its level is the pacing delay
+        """
+        delay_ms = 0.0
+        if backlog_queue is not None:
+            try:
+                delay_ms = round(backlog_queue.get_property("current-level-time") / 1_000_000, 2)
+            except Exception as e:
+                logger.debug(f"Failed to read pacing backlog: {e}")
+        self._delay_ms_max = max(self._delay_ms_max, delay_ms)
+        burst = self._frame_packets()
+        return {
+            **self.stats,
+            "multiplier": self.multiplier,
+            "max_delay_ms": self.max_delay_ms,
+            "burst_packets_avg": round(burst, 1),
+            "frame_spread_ms_avg": round(burst * self.stats["packet_spacing_us"] / 1000, 2),
+            "pacing_delay_ms": delay_ms,
+            "pacing_delay_ms_max": self._delay_ms_max,
+        }
+
+    # ── Internals ───────────────────────────────────────────────────────────
+
+    def _base_rate_kbps(self):
+        target = self._target_kbps() or 0
+        if target:
+            return target, "target"
+        return self._measure_kbps(), "measured"
+
+    def _measure_kbps(self) -> int:
+        if self._sink is None:
+            return 0
+        try:
+            served = int(self._sink.get_property("bytes-served"))
+        except Exception as e:
+            logger.debug(f"Failed to read udpsink bytes-served: {e}")
+            return 0
+        now = time.monotonic()
+        if self._served and now > self._served[0] and served >= self._served[1]:
+            self._measured_kbps = int((served - self._served[1]) * 8 / (now - self._served[0]) / 1000)
+        self._served = (now, served)
+        return self._measured_kbps
+
+    def _frame_packets(self) -> float:
+        """Packets in an average frame: its full-mtu packets plus the partial last one"""
+        return self._base_kbps * 1000 / 8 / self.packet_bytes / self.framerate + 1
+
+    def _spacing(self):
+        base_kbps, source = self._base_rate_kbps()
+        self._base_kbps = base_kbps
+        if not base_kbps:
+            return 0, 0, None  # nothing measured yet: unpaced
+        rate_kbps = max(MIN_RATE_KBPS, base_kbps * self.multiplier)
+        # A fixed sleep per packet, so count packets, not bytes: every frame ends in a
+        # short packet, and the stream must still average multiplier × its packet rate
+        packets_per_s = base_kbps * 1000 / 8 / self.packet_bytes + self.framerate
+        spacing = 1 / (self.multiplier * packets_per_s)
+        frame_packets = packets_per_s / self.framerate
+        spacing = min(spacing, self.max_delay_ms / 1000 / frame_packets)
+        return int(spacing * 1_000_000), int(rate_kbps), source
@@ -7,7 +7,7 @@ import gi
 
 gi.require_version("Gst", "1.0")
 gi.require_version("GstRtspServer", "1.0")
-from gi.repository import GstRtspServer, GLib  # noqa: E402
+from gi.repository import Gst, GstRtspServer, GLib  # noqa: E402
 import threading  # noqa: E402
 import logging  # noqa: E402
 
@@ -21,6 +21,11 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Shared mode: encoded data an appsrc may hold for a client that isn't
+# keeping up (~0.5 s at 8 Mbit/s). Beyond it the oldest data is dropped,
+# like the leaky branch queues of the output fan-out.
+SHARED_SRC_MAX_BYTES = 512 * 1024
+
 
 class RTSPServer:
     """
@@ -45,8 +50,15 @@ class RTSPServer:
         self._encoder_display_name = None  # Track which encoder was used
         self._opencv_service = None  # OpenCV service for video processing
 
+        # Shared mode: appsrcs of prepared media, fed by push_sample()
+        self._shared_appsrcs = []
+        self._shared_medias = []  # for the clients' RTCP receiver reports
+        self._shared_lock = threading.Lock()
+        self._shared_unleaky = set()  # appsrcs without leaky-type (GStreamer < 1.20)
+        self._on_shared_client = None
+
         # Statistics tracking
-        self.stats = {"frames_sent": 0, "bytes_sent": 0, "clients_connected": 0}
+        self.stats = {"frames_sent": 0, "bytes_sent": 0, "clients_connected": 0, "frames_dropped": 0}
         self.stats_lock = threading.Lock()
 
         print(f"📡 Initializing RTSP Server on port {port}, mount point: {mount_point}")
@@ -213,15 +225,7 @@ class RTSPServer:
                         parts.append(cap)
 
                     encoder_str = " ! ".join(parts) if parts else "videoconvert"
-                    payloader = result.get("rtp_payloader", "rtph264pay")
-
-                    # Add payloader properties for RTSP compatibility
-                    if "h264" in payloader:
-                        payloader_str = f"{payloader} name=pay0 pt=96 config-interval=1 aggregate-mode=zero-latency"
-                    elif "jpeg" in payloader:
-                        payloader_str = f"{payloader} name=pay0 pt=26"
-                    else:
-                        payloader_str = f"{payloader} name=pay0 pt=96"
+                    payloader_str = self._payloader_string(result.get("rtp_payloader", "rtph264pay"))
 
                     self._encoder_display_name = provider.display_name
                     logger.info(f"RTSP encoder from provider: {provider.display_name}")
@@ -240,6 +244,15 @@ class RTSPServer:
             "rtph264pay name=pay0 pt=96 config-interval=1 aggregate-mode=zero-latency",
         )
 
+    @staticmethod
+    def _payloader_string(payloader: str) -> str:
+        """RTP payloader launch fragment with RTSP-compatible properties"""
+        if "h264" in payloader:
+            return f"{payloader} name=pay0 pt=96 config-interval=1 aggregate-mode=zero-latency"
+        if "jpeg" in payloader:
+            return f"{payloader} name=pay0 pt=26"
+        return f"{payloader} name=pay0 pt=96"
+
     def start(self, device="/dev/video0", codec="h264", width=960, height=720, framerate=30, bitrate=2000, quality=85):
         """
         Start the RTSP server in a separate thread
@@ -257,6 +270,110 @@ class RTSPServer:
             print("⚠️ RTSP Server already running")
             return
 
+        pipeline_str = self.create_pipeline_string(device, codec, width, height, framerate, bitrate, quality)
+        self._serve(pipeline_str)
+
+    def start_shared(self, payloader="rtph264pay", on_client=None):
+        """
+        Start the RTSP server fed from another pipeline's encoded output.
+
+        The media pipeline is just appsrc → payloader; encoded samples are
+        pushed in with push_sample(), so RTSP clients share the main
+        pipeline's encoder instead of opening the camera a second time.
+
+        Args:
+            payloader: RTP payloader element matching the encoded stream
+            on_client: Called when a client's media is set up (e.g. to force a keyframe)
+        """
+        if self.running:
+            print("⚠️ RTSP Server already running")
+            return
+
+        self._on_shared_client = on_client
+        parse = "h264parse ! " if "h264" in payloader else ""
+        pipeline_str = (
+            "appsrc name=shared_src is-live=true format=time do-timestamp=true block=false "
+            f"max-bytes={SHARED_SRC_MAX_BYTES} ! "
+            f"{parse}{self._payloader_string(payloader)}"
+        )
+        self._serve(pipeline_str, shared_source=True)
+
+    def push_sample(self, sample) -> bool:
+        """Push an encoded sample to every prepared shared media. Returns False if nobody is watching."""
+        with self._shared_lock:
+            appsrcs = list(self._shared_appsrcs)
+            unleaky = set(self._shared_unleaky)
+        if not appsrcs:
+            return False
+
+        # Drop the upstream timestamps: they belong to the main pipeline's
+        # clock base. The appsrc restamps with its own running time.
+        buf = sample.get_buffer().copy()
+        buf.pts = Gst.CLOCK_TIME_NONE
+        buf.dts = Gst.CLOCK_TIME_NONE
+        caps = sample.get_caps()
+        dropped = 0
+        for appsrc in appsrcs:
+            if caps and appsrc.get_property("caps") is None:
+                appsrc.set_property("caps", caps)
+            # A leaky appsrc drops its oldest data itself; an older one would queue without bound
+            if appsrc in unleaky and appsrc.get_property("current-level-bytes") >= SHARED_SRC_MAX_BYTES:
+                dropped += 1
+                continue
+            appsrc.emit("push-buffer", buf)
+
+        with self.stats_lock:
+            self.stats["frames_sent"] += 1
+            self.stats["bytes_sent"] += buf.get_size()
+            self.stats["frames_dropped"] += dropped
+        return True
+
+    def _on_media_configure(self, factory, media):
+        appsrc = media.get_element().get_child_by_name("shared_src")
+        if not appsrc:
+            return
+        try:
+            appsrc.set_property("leaky-type", 2)  # downstream: drop oldest
+            leaky = True
+        except TypeError:
+            leaky = False  # GStreamer < 1.20: push_sample() drops instead
+        with self._shared_lock:
+            self._shared_appsrcs.append(appsrc)
+            self._shared_medias.append(media)
+            if not leaky:
+                self._shared_unleaky.add(appsrc)
+        media.connect("unprepared", self._on_media_unprepared, appsrc)
+        if self._on_shared_client:
+            try:
+                self._on_shared_client()
+            except Exception as e:
+                logger.debug(f"RTSP client callback failed: {e}")
+
+    def _on_media_unprepared(self, media, appsrc):
+        with self._shared_lock:
+            if appsrc in self._shared_appsrcs:
+                self._shared_appsrcs.remove(appsrc)
+            if media in self._shared_medias:
+                self._shared_medias.remove(media)
+            self._shared_unleaky.discard(appsrc)
+
+    def get_rtp_sessions(self) -> list:
+        """RTPSession of every prepared shared media (RTCP from the RTSP clients)"""
+        with self._shared_lock:
+            medias = list(self._shared_medias)
+        sessions = []
+        for media in medias:
+            try:
+                for i in range(media.n_streams()):
+                    session = media.get_stream(i).get_rtpsession()
+                    if session:
+                        sessions.append(session)
+            except Exception as e:
+                logger.debug(f"RTSP media session unavailable: {e}")
+        return sessions
+
+    def _serve(self, pipeline_str: str, shared_source: bool = False):
+        """Mount a media factory for pipeline_str and run the server"""
         print("🚀 Starting RTSP Server...")
 
         # Create server
@@ -268,9 +385,10 @@ class RTSPServer:
 
         # Create factory with pipeline
         factory = GstRtspServer.RTSPMediaFactory()
-        pipeline_str = self.create_pipeline_string(device, codec, width, height, framerate, bitrate, quality)
         factory.set_launch(f"( {pipeline_str} )")
         factory.set_shared(True)  # Share pipeline with multiple clients
+        if shared_source:
+            factory.connect("media-configure", self._on_media_configure)
 
         print(f"   📹 Pipeline: {pipeline_str}")
 
@@ -358,6 +476,10 @@ class RTSPServer:
         # Reset stats
         with self.stats_lock:
             self.stats["clients_connected"] = 0
+        with self._shared_lock:
+            self._shared_appsrcs.clear()
+            self._shared_unleaky.clear()
+            self._shared_medias.clear()
 
         self.running = False
         self.server = None
@@ -386,6 +508,15 @@ class RTSPServer:
             except Exception as e:
                 logger.debug(f"Could not get session count: {e}")
 
+        # Shared mode: what the leaky appsrcs of the current clients dropped
+        with self._shared_lock:
+            leaky = [appsrc for appsrc in self._shared_appsrcs if appsrc not in self._shared_unleaky]
+        for appsrc in leaky:
+            try:
+                stats["frames_dropped"] += appsrc.get_property("dropped")
+            except Exception as e:
+                logger.debug(f"Could not get appsrc drop count: {e}")
+
         return stats
 
     def get_url(self, ip="localhost"):
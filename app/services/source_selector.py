@@ -0,0 +1,266 @@
+"""
+Source Selector
+
+Keeps the encoder and outputs running while the camera changes. The
+camera's elements up to raw video (source, caps, decoder) form a segment
+that feeds an ``input-selector``; a second selector input is a
+``videotestsrc`` slate with the same caps. When the camera is lost or
+swapped the selector switches to the slate, the camera segment is torn
+down and a new one is attached, and the encoder, payloaders, sinks and
+their clients (GCS decoder, RTSP/WebRTC peers) never see the pipeline
+stop. Only a keyframe is needed for them to pick up the new picture.
+
+The slate only runs while it is shown.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from app.utils.gstreamer import request_pad
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    GSTREAMER_AVAILABLE = True
+except (ImportError, ValueError):
+    GSTREAMER_AVAILABLE = False
+    Gst = None
+
+logger = logging.getLogger(__name__)
+
+SLATE_PATTERN = "smpte"  # colour bars: clearly "no camera", not a dark scene
+SWITCH_TIMEOUT_S = 5.0  # new camera must deliver its first frame within this
+
+
+class SourceSelector:
+    """
+    input-selector between a swappable camera segment and a slate.
+
+    ``<camera segment> → selector.sink_N ┐
+    videotestsrc → capsfilter → sink_M  ┴→ selector → <raw video chain>``
+    """
+
+    def __init__(self, pipeline, on_switch: Optional[Callable[[], Any]] = None):
+        self._pipeline = pipeline
+        self._on_switch = on_switch  # called once a new camera is on air (keyframe request)
+        self._selector = None
+        self._slate: List[Any] = []
+        self._slate_pad = None
+        self._camera: List[Any] = []
+        self._camera_pad = None
+        self._active = "camera"  # or "slate"
+        self._lock = threading.RLock()
+
+        self.stats = {
+            "switches": 0,
+            "camera_losses": 0,
+            "last_switch_ms": None,  # attach request → first frame of the new camera on air
+            "last_loss": None,
+        }
+
+    @property
+    def element(self):
+        return self._selector
+
+    @property
+    def has_camera(self) -> bool:
+        """A camera segment is attached (possibly still waiting for its first frame)"""
+        return bool(self._camera)
+
+    @property
+    def on_slate(self) -> bool:
+        return self._active == "slate"
+
+    def create(self, width: int, height: int, framerate: int) -> bool:
+        """Create the selector and the slate (added to the pipeline, slate idle)"""
+        if not GSTREAMER_AVAILABLE:
+            return False
+
+        selector = Gst.ElementFactory.make("input-selector", "source_selector")
+        slate_src = Gst.ElementFactory.make("videotestsrc", "slate_src")
+        slate_caps = Gst.ElementFactory.make("capsfilter", "slate_caps")
+        if not selector or not slate_src or not slate_caps:
+            return False
+
+        # Inactive inputs drop their buffers instead of waiting on the active one
+        selector.set_property("sync-streams", False)
+        slate_src.set_property("is-live", True)
+        slate_src.set_property("pattern", SLATE_PATTERN)
+        slate_caps.set_property(
+            "caps",
+            Gst.Caps.from_string(
+                f"video/x-raw,format=I420,width={width},height={height},"
+                f"framerate={framerate}/1,pixel-aspect-ratio=1/1"
+            ),
+        )
+        # Left out of pipeline state changes until it's needed
+        slate_src.set_locked_state(True)
+
+        for element in (selector, slate_src, slate_caps):
+            self._pipeline.add(element)
+        slate_pad = request_pad(selector, "sink_%u")
+        if (
+            not slate_src.link(slate_caps)
+            or not slate_pad
+            or slate_caps.get_static_pad("src").link(slate_pad) != Gst.PadLinkReturn.OK
+        ):
+            for element in (selector, slate_src, slate_caps):
+                self._pipeline.remove(element)
+            return False
+
+        self._selector = selector
+        self._slate = [slate_src, slate_caps]
+        self._slate_pad = slate_pad
+        return True
+
+    def adopt_camera(self, elements: List[Any]) -> bool:
+        """Take over a camera segment the pipeline builder already linked to the selector"""
+        with self._lock:
+            peer = elements[-1].get_static_pad("src").get_peer()
+            if not peer:
+                return False
+            self._camera = list(elements)
+            self._camera_pad = peer
+            self._watch_camera_pad(peer)
+            self._selector.set_property("active-pad", peer)
+            self._active = "camera"
+            return True
+
+    def owns(self, element) -> bool:
+        """Whether *element* belongs to the current camera segment"""
+        with self._lock:
+            names = {camera_element.get_name() for camera_element in self._camera}
+        return element is not None and element.get_name() in names
+
+    def camera_lost(self, reason: str) -> None:
+        """Camera failed: put the slate on air and drop the camera segment"""
+        with self._lock:
+            if not self._camera:
+                return
+            self.stats["camera_losses"] += 1
+            self.stats["last_loss"] = {"reason": reason, "time": time.time()}
+        self.release_camera()
+        print(f"📺 Camera lost ({reason}), showing slate")
+
+    def release_camera(self) -> None:
+        """
+        Switch to the slate and remove the camera segment from the pipeline.
+        Not with the lock held: stopping the camera waits for its streaming thread.
+        """
+        with self._lock:
+            self._show_slate()
+            camera, pad = self._camera, self._camera_pad
+            self._camera, self._camera_pad = [], None
+
+        for element in camera:
+            try:
+                element.set_state(Gst.State.NULL)
+            except Exception as e:
+                logger.debug(f"Failed to stop {element}: {e}")
+        if camera and pad:
+            try:
+                camera[-1].get_static_pad("src").unlink(pad)
+                self._selector.release_request_pad(pad)
+            except Exception as e:
+                logger.warning(f"Failed to unlink camera segment: {e}")
+        for element in camera:
+            try:
+                self._pipeline.remove(element)
+            except Exception as e:
+                logger.debug(f"Failed to remove {element}: {e}")
+
+    def attach_camera(self, elements: List[Any], timeout: float = SWITCH_TIMEOUT_S) -> Dict[str, Any]:
+        """
+        Add a new camera segment (elements in link order, not yet in the
+        pipeline) and switch to it once its first frame arrives.
+
+        The slate stays on air until then. ``switch_ms`` in the result is
+        the time from this call to the switch; on timeout the segment stays
+        attached and takes over whenever it starts delivering.
+        """
+        if not GSTREAMER_AVAILABLE or not self._selector:
+            return {"success": False, "error": "No source selector"}
+
+        requested = time.monotonic()
+        self.release_camera()
+        with self._lock:
+            for element in elements:
+                self._pipeline.add(element)
+            pad = request_pad(self._selector, "sink_%u")
+            linked = all(a.link(b) for a, b in zip(elements, elements[1:]))
+            if not linked or not pad or elements[-1].get_static_pad("src").link(pad) != Gst.PadLinkReturn.OK:
+                if pad:
+                    self._selector.release_request_pad(pad)
+                for element in elements:
+                    self._pipeline.remove(element)
+                return {"success": False, "error": "Failed to link camera to source selector"}
+
+            self._camera = list(elements)
+            self._camera_pad = pad
+            self._watch_camera_pad(pad)
+            first_frame = threading.Event()
+            pad.add_probe(Gst.PadProbeType.BUFFER, self._on_first_camera_buffer, (pad, first_frame, requested))
+            for element in reversed(elements):
+                element.sync_state_with_parent()
+
+        if not first_frame.wait(timeout):
+            return {"success": False, "attached": True, "error": f"No frames from camera within {timeout:.0f}s"}
+        return {"success": True, "switch_ms": self.stats["last_switch_ms"]}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"active": "slate" if self.on_slate else "camera", **self.stats}
+
+    # ── Internals ───────────────────────────────────────────────────────────
+
+    def _watch_camera_pad(self, pad):
+        # A failing source sends EOS after its error; it must not end the stream
+        pad.add_probe(Gst.PadProbeType.EVENT_DOWNSTREAM, self._drop_eos)
+
+    @staticmethod
+    def _drop_eos(pad, info):
+        if info.get_event().type == Gst.EventType.EOS:
+            return Gst.PadProbeReturn.DROP
+        return Gst.PadProbeReturn.OK
+
+    def _on_first_camera_buffer(self, pad, info, data):
+        camera_pad, first_frame, requested = data
+        with self._lock:
+            if self._camera_pad is not camera_pad:
+                return Gst.PadProbeReturn.REMOVE  # replaced before it delivered
+            self._selector.set_property("active-pad", camera_pad)
+            self._active = "camera"
+            self.stats["switches"] += 1
+            self.stats["last_switch_ms"] = round((time.monotonic() - requested) * 1000, 1)
+        # Not from this streaming thread: stopping the slate waits for its own
+        threading.Thread(target=self._after_switch, daemon=True, name="SourceSwitch").start()
+        first_frame.set()
+        return Gst.PadProbeReturn.REMOVE
+
+    def _after_switch(self):
+        if self._on_switch:
+            try:
+                self._on_switch()
+            except Exception as e:
+                logger.debug(f"Source switch callback failed: {e}")
+        self._stop_slate()
+
+    def _show_slate(self):
+        """Called with the lock held"""
+        slate_src = self._slate[0]
+        slate_src.set_locked_state(False)
+        slate_src.sync_state_with_parent()
+        self._selector.set_property("active-pad", self._slate_pad)
+        self._active = "slate"
+
+    def _stop_slate(self):
+        with self._lock:
+            if self.on_slate:
+                return
+            slate_src = self._slate[0]
+            slate_src.set_locked_state(True)
+        slate_src.set_state(Gst.State.NULL)
@@ -0,0 +1,316 @@
+"""
+On-board Stream Recorder
+
+Records the stream that is already being encoded for the live outputs.
+The recording is one more branch on the output tee (see OutputFanout):
+
+    tee → queue (leaky) → parser → splitmuxsink (muxer → filesink)
+
+so nothing is decoded or encoded a second time. The branch queue holds
+about two seconds of stream, enough to ride out an SD card write stall;
+beyond that it drops the oldest recorded frames instead of holding back
+the tee and with it the live outputs.
+
+Segments roll over every ``segment_s`` seconds at a keyframe and the
+directory is kept under ``quota_mb`` by deleting the oldest segments
+first. MP4 is written fragmented, so a segment cut short by a power
+loss still plays.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    GSTREAMER_AVAILABLE = True
+except (ImportError, ValueError):
+    GSTREAMER_AVAILABLE = False
+    Gst = None
+
+logger = logging.getLogger(__name__)
+
+# Container → muxer element
+RECORDING_FORMATS = {"mp4": "mp4mux", "mkv": "matroskamux", "ts": "mpegtsmux"}
+
+# Stream payloader → parser in front of the muxer
+RECORDING_PARSERS = {"rtph264pay": "h264parse", "rtph265pay": "h265parse", "rtpjpegpay": "jpegparse"}
+
+RECORD_QUEUE_TIME_NS = 2_000_000_000  # stream held while the disk is slow
+MP4_FRAGMENT_MS = 1000  # fragmented MP4: at most this much lost on power loss
+FINALIZE_TIMEOUT_S = 5.0
+
+_SEGMENT_NAME = re.compile(r"_\d{5}\.(mp4|mkv|ts)$")
+
+
+class StreamRecorder:
+    """
+    Segmented recording of the encoded stream for one session.
+
+    ``request_keyframe`` is called when a segment should start, so the
+    split goes through the same keyframe manager as every other IDR
+    request instead of splitmuxsink asking the encoder directly.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        prefix: str = "recording",
+        fmt: str = "mp4",
+        segment_s: int = 60,
+        quota_mb: int = 4096,
+        request_keyframe: Optional[Callable[[], Any]] = None,
+    ):
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self.format = fmt if fmt in RECORDING_FORMATS else "mp4"
+        self.segment_s = segment_s
+        self.quota_bytes = quota_mb * 1024 * 1024
+        self._request_keyframe = request_keyframe
+
+        self._lock = threading.Lock()
+        self._finalized = threading.Event()
+        self._stopping = False
+        self._active = False
+        self._started_at: Optional[float] = None
+        self._stopped_at: Optional[float] = None
+        self._filesink = None
+        self._keyframe_timer: Optional[threading.Timer] = None
+
+        self._current: Optional[str] = None
+        self._opened = 0
+        self._closed = 0
+        self._closed_bytes = 0
+        self._largest_segment = 0
+        self._dropped = 0
+        self._deleted = 0
+
+    # ── Pipeline ────────────────────────────────────────────────────────────
+
+    def create_elements(self, payloader: str) -> Dict[str, Any]:
+        """Parser + splitmuxsink for the tee branch (the fan-out adds the queue)"""
+        if not GSTREAMER_AVAILABLE:
+            return {"success": False, "error": "GStreamer not available"}
+        if payloader not in RECORDING_PARSERS:
+            return {"success": False, "error": "Recording requires an H.264, H.265 or MJPEG stream"}
+        if self.format == "ts" and payloader == "rtpjpegpay":
+            return {"success": False, "error": "MPEG-TS can't carry MJPEG, record as mp4 or mkv"}
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            return {"success": False, "error": f"Recording directory not writable: {e}"}
+
+        splitmux = Gst.ElementFactory.make("splitmuxsink", "record_splitmux")
+        muxer = Gst.ElementFactory.make(RECORDING_FORMATS[self.format], "record_mux")
+        filesink = Gst.ElementFactory.make("filesink", "record_filesink")
+        if not splitmux or not muxer or not filesink:
+            return {
+                "success": False,
+                "error": f"splitmuxsink/{RECORDING_FORMATS[self.format]} GStreamer plugins not available",
+            }
+
+        if self.format == "mp4":
+            muxer.set_property("fragment-duration", MP4_FRAGMENT_MS)
+        filesink.set_property("async", False)
+        splitmux.set_property("muxer", muxer)
+        splitmux.set_property("sink", filesink)
+        splitmux.set_property("max-size-time", self.segment_s * Gst.SECOND)
+        splitmux.set_property("max-size-bytes", 0)
+        splitmux.set_property("send-keyframe-requests", True)  # intercepted in _on_upstream_event
+        splitmux.connect("format-location", self._on_format_location)
+
+        sink_pad = filesink.get_static_pad("sink")
+        if sink_pad:
+            sink_pad.add_probe(Gst.PadProbeType.EVENT_DOWNSTREAM, self._on_filesink_event)
+        self._filesink = filesink
+
+        elements = [splitmux]
+        parser = Gst.ElementFactory.make(RECORDING_PARSERS[payloader], "record_parse")
+        if parser:
+            if payloader != "rtpjpegpay":
+                parser.set_property("config-interval", -1)  # SPS/PPS at every segment start
+            elements.insert(0, parser)
+        elif payloader != "rtpjpegpay":
+            return {"success": False, "error": f"{RECORDING_PARSERS[payloader]} GStreamer plugin not available"}
+
+        with self._lock:
+            self._active = True
+            self._started_at = time.time()
+        print(
+            f"⏺️ Recording {self.format} to {self.directory} "
+            f"({self.segment_s}s segments, {self.quota_bytes // (1024 * 1024)} MB quota)"
+        )
+        return {"success": True, "elements": elements}
+
+    def watch_queue(self, queue):
+        """Count frames the branch queue drops and route split requests through us"""
+        if not queue:
+            return
+        queue.set_property("silent", False)
+        queue.connect("overrun", self._on_overrun)
+        src_pad = queue.get_static_pad("src")
+        if src_pad:
+            src_pad.add_probe(Gst.PadProbeType.EVENT_UPSTREAM, self._on_upstream_event)
+
+    def begin_finalize(self) -> threading.Event:
+        """
+        Mark the recording as ending. The caller sends EOS down the branch;
+        the returned event is set once the last segment has been written.
+        """
+        with self._lock:
+            self._stopping = True
+            if self._keyframe_timer:
+                self._keyframe_timer.cancel()
+                self._keyframe_timer = None
+            if self._closed >= self._opened:
+                self._finish()
+        return self._finalized
+
+    def abort(self):
+        """The branch is gone without EOS (pipeline failed or stopped)"""
+        with self._lock:
+            self._stopping = True
+            if self._keyframe_timer:
+                self._keyframe_timer.cancel()
+                self._keyframe_timer = None
+            self._finish()
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    # ── Stats ───────────────────────────────────────────────────────────────
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            current_bytes = self._file_size(self._current) if self._active else 0
+            written = self._closed_bytes + current_bytes
+            end = time.time() if self._active else (self._stopped_at or time.time())
+            elapsed = end - self._started_at if self._started_at else 0
+            return {
+                "recording": self._active,
+                "format": self.format,
+                "directory": str(self.directory),
+                "segment_s": self.segment_s,
+                "quota_mb": self.quota_bytes // (1024 * 1024),
+                "segments": self._opened,
+                "current_segment": self._current if self._active else None,
+                "bytes_written": written,
+                "write_kbps": round(written * 8 / 1000 / elapsed, 1) if elapsed > 0 else 0.0,
+                "dropped_frames": self._dropped,
+                "deleted_segments": self._deleted,
+                "disk_used_mb": round(sum(size for _, size, _ in self._list_segments()) / (1024 * 1024), 1),
+                "duration_s": round(elapsed, 1),
+            }
+
+    # ── Callbacks (streaming threads) ───────────────────────────────────────
+
+    def _on_format_location(self, splitmux, fragment_id):
+        """Name the next segment and make room for it"""
+        location = str(self.directory / f"{self.prefix}_{fragment_id:05d}.{self.format}")
+        with self._lock:
+            self._current = location
+            self._opened += 1
+            self._enforce_quota(keep=location)
+        logger.info(f"Recording segment: {location}")
+        return location
+
+    def _on_filesink_event(self, pad, info):
+        """EOS reaches the filesink once per segment, after the muxer has finished it"""
+        event = info.get_event()
+        if event and event.type == Gst.EventType.EOS:
+            with self._lock:
+                size = self._file_size(self._current)
+                self._closed += 1
+                self._closed_bytes += size
+                self._largest_segment = max(self._largest_segment, size)
+                if self._stopping and self._closed >= self._opened:
+                    self._finish()
+        return Gst.PadProbeReturn.OK
+
+    def _on_upstream_event(self, pad, info):
+        """
+        Replace splitmuxsink's GstForceKeyUnit with a keyframe-manager
+        request at the same running time
+        """
+        event = info.get_event()
+        structure = event.get_structure() if event and event.type == Gst.EventType.CUSTOM_UPSTREAM else None
+        if not structure or structure.get_name() != "GstForceKeyUnit" or not self._request_keyframe:
+            return Gst.PadProbeReturn.OK
+
+        delay = 0.0
+        found, running_time = structure.get_uint64("running-time")
+        element = pad.get_parent_element()
+        clock = element.get_clock() if element else None
+        if found and clock and running_time != Gst.CLOCK_TIME_NONE:
+            now = clock.get_time() - element.get_base_time()
+            delay = max(0.0, (running_time - now) / Gst.SECOND)
+
+        with self._lock:
+            if self._stopping:
+                return Gst.PadProbeReturn.DROP
+            if self._keyframe_timer:
+                self._keyframe_timer.cancel()
+            self._keyframe_timer = threading.Timer(delay, self._request_keyframe)
+            self._keyframe_timer.daemon = True
+            self._keyframe_timer.start()
+        return Gst.PadProbeReturn.DROP
+
+    def _on_overrun(self, queue):
+        # Leaky queue full: it drops the oldest recorded frame next
+        with self._lock:
+            self._dropped += 1
+
+    # ── Internals ───────────────────────────────────────────────────────────
+
+    def _finish(self):
+        """Called with the lock held"""
+        if self._active:
+            self._active = False
+            self._stopped_at = time.time()
+            print(f"⏹️ Recording stopped: {self._opened} segments, {self._dropped} frames dropped")
+        self._finalized.set()
+
+    def _list_segments(self) -> List[tuple]:
+        """(path, size, mtime) of every recorded segment in the directory, oldest first"""
+        segments = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and _SEGMENT_NAME.search(entry.name):
+                    stat = entry.stat()
+                    segments.append((entry.path, stat.st_size, stat.st_mtime))
+        except OSError:
+            return []
+        return sorted(segments, key=lambda segment: segment[2])
+
+    def _enforce_quota(self, keep: str):
+        """Delete the oldest segments until the next one fits. Called with the lock held."""
+        segments = [segment for segment in self._list_segments() if segment[0] != keep]
+        used = sum(size for _, size, _ in segments)
+        reserve = self._largest_segment  # room for the segment being opened
+        for path, size, _ in segments:
+            if used + reserve <= self.quota_bytes:
+                break
+            try:
+                os.remove(path)
+                used -= size
+                self._deleted += 1
+                print(f"🗑️ Recording quota: deleted {os.path.basename(path)}")
+            except OSError as e:
+                logger.warning(f"Failed to delete old segment {path}: {e}")
+
+    @staticmethod
+    def _file_size(path: Optional[str]) -> int:
+        try:
+            return os.path.getsize(path) if path else 0
+        except OSError:
+            return 0
@@ -138,6 +138,8 @@ class VideoConfig:
     h264_preset: str = "ultrafast"  # ultrafast, superfast, veryfast
     h264_tune: str = "zerolatency"
     gop_size: int = 15  # Keyframe interval (IDR frames). 15=0.25s@60fps, good for WiFi/UDP
+    keyframe_min_interval_ms: int = 500  # Requested IDRs closer than this are merged into one
+    intra_refresh: bool = False  # Refresh wave every gop_size frames instead of IDRs (x264, some HW encoders)
 
     # Buffer tuning
     max_latency_ms: int = 50
@@ -150,6 +152,7 @@ class VideoConfig:
         self.quality = max(1, min(100, int(self.quality)))
         self.h264_bitrate = max(100, min(50000, int(self.h264_bitrate)))
         self.gop_size = max(1, min(300, int(self.gop_size)))
+        self.keyframe_min_interval_ms = max(0, min(5000, int(self.keyframe_min_interval_ms)))
         if self.codec not in ("mjpeg", "h264", "h264_openh264", "h264_hardware", "h264_v4l2"):
             self.codec = "mjpeg"
 
@@ -158,7 +161,7 @@ class VideoConfig:
 class StreamingConfig:
     """Network streaming configuration with multiple modes"""
 
-    # Streaming mode: 'udp', 'rtsp', 'multicast', 'webrtc'
+    # Streaming mode: 'udp', 'rtsp', 'multicast', 'webrtc', 'srt'
     mode: str = "udp"
 
     # Mode 1: Direct UDP (unicast) - Current default
@@ -178,17 +181,73 @@ class StreamingConfig:
     multicast_port: int = 5600
     multicast_ttl: int = 1  # Time-to-live (1 = local network only)
 
+    # UDP/multicast forward error correction (ULPFEC, RFC 5109)
+    # The redundancy follows measured packet loss between these bounds
+    fec_enabled: bool = False
+    fec_min_percentage: int = 0  # FEC packets per 100 media packets with no loss
+    fec_max_percentage: int = 50
+
+    # RTCP on UDP/multicast: sender reports on port + 1, receiver reports
+    # (loss, jitter, RTT of the video path) expected back on port + 5
+    rtcp_feedback: bool = True
+
+    # UDP/multicast pacing: spread each frame's packets at a multiple of the
+    # target bitrate instead of one burst per frame (modem buffer, telemetry)
+    rtp_pacing: bool = False
+    pacing_rate_multiplier: float = 1.5
+    pacing_max_delay_ms: int = 30  # caps the spacing so an average frame leaves within this
+
+    # Size RTP packets to the path MTU of each UDP/multicast destination
+    # (VPN tunnels over 4G drop or fragment full-size packets)
+    path_mtu_discovery: bool = True
+
+    # Mode 5: SRT (MPEG-TS over SRT)
+    # Best for: lossy 4G links - retransmission within a bounded latency
+    srt_mode: str = "caller"  # 'caller' (connect to srt_host) or 'listener' (receivers connect here)
+    srt_host: str = ""  # Receiver address in caller mode
+    srt_port: int = 8890
+    srt_latency_ms: int = 0  # ARQ window; 0 = auto from measured RTT
+
+    # Glass-to-glass instrumentation: timestamp SEI in every H.264 frame
+    # and per-stage latency in the video stats (one extra copy per frame)
+    latency_probe: bool = False
+
+    # On-board recording of the encoded stream (tee branch, no second encode)
+    recording_format: str = "mp4"  # 'mp4' (fragmented), 'mkv' or 'ts'
+    recording_segment_s: int = 60  # new file every N seconds, at a keyframe
+    recording_quota_mb: int = 4096  # oldest segments deleted beyond this
+    recording_directory: str = ""  # empty = ~/flight-records/video
+    record_flight_sessions: bool = False  # start/stop with FlightDataLogger sessions
+
     # Enable/disable streaming
     enabled: bool = True
     auto_start: bool = True
+    # Build the pipeline ahead of start() and hold it PAUSED (camera open,
+    # encoder initialised) so starting the stream is only a state change
+    warm_standby: bool = False
+    # Camera behind an input-selector with a test-pattern slate: a lost or
+    # swapped camera doesn't stop the encoder and outputs
+    source_fallback: bool = True
 
     def __post_init__(self):
         """Clamp and validate all values to safe ranges."""
-        if self.mode not in ("udp", "multicast", "rtsp", "webrtc"):
+        if self.mode not in ("udp", "multicast", "rtsp", "webrtc", "srt"):
             self.mode = "udp"
+        if self.srt_mode not in ("caller", "listener"):
+            self.srt_mode = "caller"
+        self.srt_port = max(1024, min(65535, int(self.srt_port)))
+        self.srt_latency_ms = max(0, min(10000, int(self.srt_latency_ms)))
+        if self.recording_format not in ("mp4", "mkv", "ts"):
+            self.recording_format = "mp4"
+        self.recording_segment_s = max(5, min(3600, int(self.recording_segment_s)))
+        self.recording_quota_mb = max(100, min(1_000_000, int(self.recording_quota_mb)))
         self.udp_port = max(1024, min(65535, int(self.udp_port)))
         self.multicast_port = max(1024, min(65535, int(self.multicast_port)))
         self.multicast_ttl = max(1, min(255, int(self.multicast_ttl)))
+        self.fec_min_percentage = max(0, min(100, int(self.fec_min_percentage)))
+        self.fec_max_percentage = max(self.fec_min_percentage, min(100, int(self.fec_max_percentage)))
+        self.pacing_rate_multiplier = max(1.0, min(10.0, float(self.pacing_rate_multiplier)))
+        self.pacing_max_delay_ms = max(1, min(500, int(self.pacing_max_delay_ms)))
         if self.rtsp_transport not in ("tcp", "udp"):
             self.rtsp_transport = "tcp"
         # Validate multicast group is in 224.0.0.0 – 239.255.255.255
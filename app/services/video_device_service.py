@@ -6,7 +6,9 @@ Provides a unified view of detected video hardware with capabilities.
 
 import logging
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.services.video_hotplug import VideoHotplugMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +20,10 @@ class VideoDeviceService:
 
     This is a read-only discovery layer that does NOT modify providers,
     registry, or the streaming pipeline.
+
+    With the hotplug monitor running, /dev/video* providers are only
+    re-probed for the node that changed and their cached sources never
+    expire; other providers (network streams, libcamera) keep the TTL.
     """
 
     def __init__(self):
@@ -25,6 +31,8 @@ class VideoDeviceService:
         self._scan_timestamp: Optional[float] = None
         self._scanning = False
         self._cache_ttl: float = 30.0  # seconds
+        self._hotplug: Optional[VideoHotplugMonitor] = None
+        self._on_hotplug_update: Optional[Callable[[Dict[str, Any]], None]] = None
 
     def scan_devices(self) -> List[Dict[str, Any]]:
         """
@@ -66,7 +74,10 @@ class VideoDeviceService:
                     continue
 
                 try:
-                    sources = registry.discover_sources_cached(source_type)
+                    if self.hotplug_active and provider.hotplug:
+                        sources = registry.discover_sources_cached(source_type, ttl=float("inf"))
+                    else:
+                        sources = registry.discover_sources_cached(source_type)
                 except Exception as e:
                     logger.error(f"Failed to discover sources from {source_type}: {e}")
                     continue
@@ -139,7 +150,8 @@ class VideoDeviceService:
     def get_devices(self) -> List[Dict[str, Any]]:
         """
         Get cached device list.  Scans on first call or when the cache
-        has expired (TTL = 30 s by default).
+        has expired (TTL = 30 s by default; with hotplug active the
+        rescan doesn't re-probe /dev/video* devices).
 
         Returns:
             List of video devices.
@@ -165,6 +177,75 @@ class VideoDeviceService:
             pass
         logger.info("Video device cache invalidated")
 
+    # ── Hotplug ──────────────────────────────────────────────────────────────
+
+    @property
+    def hotplug_active(self) -> bool:
+        return bool(self._hotplug and self._hotplug.running)
+
+    def start_hotplug(self, on_update: Optional[Callable[[Dict[str, Any]], None]] = None) -> bool:
+        """
+        Follow /dev/video* add/remove events instead of rescanning periodically.
+
+        Args:
+            on_update: Called with get_scan_info() after each hotplug change
+                (from the monitor thread).
+
+        Returns:
+            False if netlink uevents aren't available (keep polling).
+        """
+        if self.hotplug_active:
+            return True
+        self._on_hotplug_update = on_update
+        self._hotplug = VideoHotplugMonitor(self._handle_hotplug)
+        return self._hotplug.start()
+
+    def stop_hotplug(self) -> None:
+        if self._hotplug:
+            self._hotplug.stop()
+            self._hotplug = None
+
+    def apply_hotplug(self, changes: List[Tuple[str, str]]) -> Dict[str, Any]:
+        """
+        Update the inventory for added/removed device nodes, re-probing only
+        those nodes.
+
+        Args:
+            changes: (action, device) pairs, e.g. [("add", "/dev/video2")]
+
+        Returns:
+            The updated scan info.
+        """
+        if self._scan_timestamp is None:
+            return self.get_scan_info()  # nothing cached yet: full scan
+
+        try:
+            from app.providers.registry import get_provider_registry
+
+            registry = get_provider_registry()
+            for source_type in registry.list_video_source_providers():
+                provider = registry.get_video_source(source_type)
+                if not provider or not provider.hotplug:
+                    continue
+                for action, device in changes:
+                    try:
+                        sources = [] if action == "remove" else provider.discover_device(device)
+                    except Exception as e:
+                        logger.debug(f"Hotplug probe of {device} by {source_type} failed: {e}")
+                        sources = []
+                    registry.update_source_cache(source_type, device, sources)
+        except Exception as e:
+            logger.error(f"Hotplug update failed, rescanning: {e}")
+            self.invalidate_cache()
+
+        self.scan_devices()
+        return self.get_scan_info()
+
+    def _handle_hotplug(self, changes: List[Tuple[str, str]]) -> None:
+        scan_info = self.apply_hotplug(changes)
+        if self._on_hotplug_update:
+            self._on_hotplug_update(scan_info)
+
     def get_device_by_id(self, device_id: str) -> Optional[Dict[str, Any]]:
         """
         Get a specific device by its device_id.
@@ -194,6 +275,7 @@ class VideoDeviceService:
             "count": len(devices),
             "scan_timestamp": self._scan_timestamp,
             "scanning": self._scanning,
+            "hotplug": self.hotplug_active,
         }
 
     def _get_active_device(self) -> str:
@@ -0,0 +1,173 @@
+"""
+Video Device Hotplug Monitor
+
+Listens for kernel uevents on a NETLINK_KOBJECT_UEVENT socket and reports
+video4linux add/remove events as they happen, so the device inventory is
+updated when a camera is plugged or unplugged instead of being rescanned
+on a timer.
+
+The kernel multicasts a uevent the moment a /dev/video* node is created or
+removed (devtmpfs creates the node before the event is sent), so there is
+no need to wait for udev. One camera usually creates several nodes
+(capture + metadata) back to back; events arriving within
+HOTPLUG_SETTLE_S of each other are handled as one change.
+"""
+
+import logging
+import select
+import socket
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+NETLINK_KOBJECT_UEVENT = 15
+UEVENT_KERNEL_GROUP = 1  # raw kernel events (group 2 is udev's re-broadcast)
+UEVENT_RCVBUF_BYTES = 1024 * 1024  # a USB hub replug sends a burst of events
+HOTPLUG_SETTLE_S = 0.05
+HOTPLUG_ACTIONS = ("add", "remove")
+
+
+def parse_uevent(data: bytes) -> Optional[Dict[str, str]]:
+    """
+    Parse a kernel uevent: ``action@devpath\\0KEY=VALUE\\0...``
+
+    Returns the KEY=VALUE fields, or None for anything else (such as
+    libudev's binary messages).
+    """
+    fields = data.split(b"\0")
+    if b"@" not in fields[0]:
+        return None
+
+    event = {}
+    for field in fields[1:]:
+        key, sep, value = field.partition(b"=")
+        if sep:
+            event[key.decode(errors="replace")] = value.decode(errors="replace")
+    return event if "ACTION" in event else None
+
+
+class VideoHotplugMonitor:
+    """
+    Background thread reading video4linux uevents.
+
+    ``on_change`` is called from the monitor thread with the settled list
+    of ``(action, device)`` changes, e.g. ``[("add", "/dev/video2")]``.
+    """
+
+    def __init__(self, on_change: Callable[[List[Tuple[str, str]]], None]):
+        self._on_change = on_change
+        self._sock: Optional[socket.socket] = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self.stats = {
+            "events": 0,
+            "changes": 0,
+            "last_event": None,
+            "last_handled_ms": None,
+        }
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def start(self) -> bool:
+        """Open the uevent socket and start listening. False if netlink isn't usable here."""
+        if self._running:
+            return True
+
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, NETLINK_KOBJECT_UEVENT)
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UEVENT_RCVBUF_BYTES)
+            except OSError:
+                pass
+            sock.bind((0, UEVENT_KERNEL_GROUP))
+        except (AttributeError, OSError) as e:
+            # AttributeError: no AF_NETLINK on this platform
+            print(f"⚠️ Video hotplug monitor unavailable, falling back to periodic scans: {e}")
+            return False
+
+        self._sock = sock
+        self._running = True
+        self._thread = threading.Thread(target=self._monitor_loop, daemon=True, name="VideoHotplug")
+        self._thread.start()
+        print("✅ Video hotplug monitor started (netlink uevents)")
+        return True
+
+    def stop(self):
+        """Stop listening and close the socket"""
+        self._running = False
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self._sock:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def get_stats(self) -> Dict:
+        return {"running": self._running, **self.stats}
+
+    # ── Internals ───────────────────────────────────────────────────────────
+
+    def _monitor_loop(self):
+        while self._running:
+            try:
+                first = self._read_change(timeout=0.5)
+                if not first:
+                    continue
+                received = time.monotonic()
+                changes = [first]
+                # Let the rest of the device's nodes arrive
+                while True:
+                    change = self._read_change(timeout=HOTPLUG_SETTLE_S)
+                    if not change:
+                        break
+                    changes.append(change)
+
+                changes = self._coalesce(changes)
+                self.stats["changes"] += len(changes)
+                self.stats["last_event"] = {"action": changes[-1][0], "device": changes[-1][1], "time": time.time()}
+                print(f"🔌 Video hotplug: {', '.join(f'{action} {device}' for action, device in changes)}")
+                self._on_change(changes)
+                self.stats["last_handled_ms"] = round((time.monotonic() - received) * 1000, 1)
+            except Exception as e:
+                if self._running:
+                    logger.error(f"Video hotplug monitor error: {e}")
+                    time.sleep(1)
+
+    def _read_change(self, timeout: float) -> Optional[Tuple[str, str]]:
+        """Next video4linux add/remove within *timeout*, skipping unrelated events"""
+        deadline = time.monotonic() + timeout
+        while self._running:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            readable, _, _ = select.select([self._sock], [], [], remaining)
+            if not readable:
+                return None
+
+            event = parse_uevent(self._sock.recv(UEVENT_RCVBUF_BYTES))
+            if not event:
+                continue
+            self.stats["events"] += 1
+            if (
+                event.get("SUBSYSTEM") == "video4linux"
+                and event.get("ACTION") in HOTPLUG_ACTIONS
+                and event.get("DEVNAME")
+            ):
+                return event["ACTION"], f"/dev/{event['DEVNAME']}"
+        return None
+
+    @staticmethod
+    def _coalesce(changes: List[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        """Last action per device, in order of first appearance"""
+        latest: Dict[str, str] = {}
+        for action, device in changes:
+            latest[device] = action
+        return [(action, device) for device, action in latest.items()]
@@ -8,28 +8,36 @@ Real WebRTC implementation using aiortc:
 - ICE candidate trickle
 - Adaptive bitrate for 4G optimization
 - Connection stats monitoring
+- Dedicated media event loop thread, so API handlers can't delay RTP
 """
 
 import asyncio
+import ipaddress
+import logging
 import time
 import threading
 import uuid
 import fractions
 import math
-import queue as thread_queue
-from typing import Optional, Dict, Any, List
+import struct
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, field
 
+from app.services.h264_bitstream import NalIndex, index_nals, is_keyframe, nal_views
+
 try:
     from aiortc import RTCPeerConnection, RTCSessionDescription
+    from aiortc import RTCConfiguration, RTCIceServer
     from aiortc import MediaStreamTrack
-    from av import VideoFrame
-    import numpy as np
+    from aiortc.mediastreams import MediaStreamError
+    from av import Packet
 
     AIORTC_AVAILABLE = True
 except ImportError:
     AIORTC_AVAILABLE = False
 
+logger = logging.getLogger(__name__)
 
 # ── Constants for H264 RTP packetization ─────────────────────────────────────
 
@@ -43,6 +51,182 @@ NAL_TYPE_STAP_A = 24
 VIDEO_CLOCK_RATE = 90000
 VIDEO_TIME_BASE = fractions.Fraction(1, VIDEO_CLOCK_RATE)
 
+# ── Congestion feedback → GStreamer encoder ─────────────────────────────────
+
+BITRATE_POLICIES = ("slowest", "primary")
+BITRATE_UPDATE_INTERVAL = 1.0  # s between encoder bitrate increases
+BITRATE_DEADBAND = 0.05  # ignore changes smaller than 5% of the current bitrate
+
+# ── Session setup ───────────────────────────────────────────────────────────
+
+# "host": host candidates only (LAN, field AP, Tailscale) - no STUN round trip
+# "stun": host + server-reflexive via STUN; "auto": host for local clients
+ICE_MODES = ("auto", "host", "stun")
+PREWARM_MAX_AGE = 60.0  # s; older pre-gathered candidates may no longer match the interfaces
+# Tailscale and carrier-grade NAT addresses count as local (not is_private)
+SHARED_ADDRESS_SPACE = ipaddress.ip_network("100.64.0.0/10")
+
+# ── Server-side transport stats ─────────────────────────────────────────────
+
+STATS_INTERVAL = 2.0  # s between stats monitor passes (getStats sampling included)
+STATS_SAMPLE_TIMEOUT = 1.0  # s to wait for one getStats() round on the media loop
+
+# ── Media event loop ────────────────────────────────────────────────────────
+
+LOOP_LAG_PROBE_INTERVAL = 0.05  # s the lag probe sleeps between wake-ups
+LOOP_LAG_WINDOW = 200  # probe samples kept per loop (~10s)
+MEDIA_LOOP_STOP_TIMEOUT = 2.0  # s to let pending pc.close() calls finish on shutdown
+
+# ── H264 broadcast ring ──────────────────────────────────────────────────────
+
+H264_RING_SIZE = 90  # ~3s at 30fps: the last IDR stays reachable with the default 2s GOP
+PEER_MAX_LAG = 5  # access units a peer may fall behind before it skips to an IDR
+PEER_KEYFRAME_MIN_INTERVAL = 1.0  # s between IDRs requested for resyncing peers (all peers share it)
+
+
+class H264Ring:
+    """
+    Fixed-size ring of H264 access units shared by all peers.
+
+    One writer (the GStreamer appsink thread) and any number of readers,
+    each with its own cursor, so every peer sees every access unit.
+    """
+
+    def __init__(self, size: int = H264_RING_SIZE):
+        self._size = size
+        self._slots: List[Optional[tuple]] = [None] * size  # (seq, data, is_idr, pts_ns, pushed_at, nals)
+        self._next_seq = 0
+        self._last_idr_seq = -1
+        self._lock = threading.Lock()
+        self._listeners: List[Any] = []  # called (from the writer thread) after every push
+
+    @property
+    def head(self) -> int:
+        """Sequence number the next access unit will get"""
+        with self._lock:
+            return self._next_seq
+
+    def oldest(self) -> int:
+        """Oldest sequence number still in the ring"""
+        with self._lock:
+            return max(0, self._next_seq - self._size)
+
+    def push(self, data: bytes, is_idr: bool, pts_ns: Optional[int] = None, nals: Optional[NalIndex] = None) -> int:
+        with self._lock:
+            seq = self._next_seq
+            self._slots[seq % self._size] = (seq, data, is_idr, pts_ns, time.monotonic(), nals)
+            self._next_seq += 1
+            if is_idr:
+                self._last_idr_seq = seq
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+        return seq
+
+    def get(self, seq: int) -> Optional[tuple]:
+        """(data, is_idr, pts_ns, pushed_at, nals) for seq, or None if not written yet or already overwritten"""
+        with self._lock:
+            slot = self._slots[seq % self._size]
+            if slot is None or slot[0] != seq:
+                return None
+            return slot[1:]
+
+    def add_listener(self, callback):
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def latest_idr(self) -> int:
+        """Sequence number of the newest IDR still in the ring, or -1"""
+        with self._lock:
+            if self._last_idr_seq < max(0, self._next_seq - self._size):
+                return -1
+            return self._last_idr_seq
+
+    def reader(self, max_lag: int = PEER_MAX_LAG, on_keyframe_needed=None) -> "H264PeerReader":
+        return H264PeerReader(self, max_lag, on_keyframe_needed)
+
+
+class H264PeerReader:
+    """
+    One peer's cursor into an H264Ring with its own drop policy.
+
+    A reader starts at the live edge and waits for an IDR. When it falls
+    more than max_lag access units behind, it jumps to the newest IDR in
+    the ring if that IDR is itself within max_lag of the head; otherwise
+    (the usual case with GOPs longer than max_lag) it drops straight to
+    the live edge and waits for the next one, asking the encoder for it.
+    """
+
+    def __init__(self, ring: H264Ring, max_lag: int = PEER_MAX_LAG, on_keyframe_needed=None):
+        self.ring = ring
+        self._max_lag = max_lag
+        self._on_keyframe_needed = on_keyframe_needed
+        self._cursor = ring.head
+        self._awaiting_idr = True
+        # GStreamer PTS of the last access unit returned (None if the buffer had none)
+        self.last_pts_ns: Optional[int] = None
+        self.last_pushed_at: float = 0.0
+        # NAL index of the last access unit returned (None if it wasn't indexed on push)
+        self.last_nals: Optional[NalIndex] = None
+        # delivery_ms: ring push → handed to the sender, for the last access unit
+        self.stats = {"frames_sent": 0, "frames_dropped": 0, "idr_skips": 0, "lag": 0, "delivery_ms": 0.0}
+
+    def next_access_unit(self) -> Optional[bytes]:
+        """Next access unit for this peer, or None if it's caught up"""
+        head = self.ring.head
+        if head - self._cursor > self._max_lag or self._cursor < self.ring.oldest():
+            self._skip_ahead(head)
+
+        while self._cursor < head:
+            entry = self.ring.get(self._cursor)
+            if entry is None:
+                # Overwritten between the checks above and here
+                self._skip_ahead(head)
+                continue
+            data, is_idr, pts_ns, pushed_at, nals = entry
+            if self._awaiting_idr and not is_idr:
+                self._cursor += 1
+                self.stats["frames_dropped"] += 1
+                continue
+            self._awaiting_idr = False
+            self._cursor += 1
+            self.last_pts_ns = pts_ns
+            self.last_pushed_at = pushed_at
+            self.last_nals = nals
+            self.stats["frames_sent"] += 1
+            self.stats["lag"] = head - self._cursor
+            self.stats["delivery_ms"] = round((time.monotonic() - pushed_at) * 1000, 2)
+            return data
+
+        self.stats["lag"] = 0
+        return None
+
+    def _skip_ahead(self, head: int):
+        idr = self.ring.latest_idr()
+        # A stale IDR would only leave the peer lagging again from there
+        if idr > self._cursor and head - idr <= self._max_lag:
+            self.stats["frames_dropped"] += idr - self._cursor
+            self.stats["idr_skips"] += 1
+            self._cursor = idr
+            self._awaiting_idr = False
+            return
+
+        # Nothing decodable ahead: resume at the live edge from the next IDR
+        self.stats["frames_dropped"] += head - self._cursor
+        self._cursor = head
+        if not self._awaiting_idr:
+            self._awaiting_idr = True
+            if self._on_keyframe_needed:
+                self._on_keyframe_needed()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "awaiting_idr": self._awaiting_idr}
+
 
 # ── H264 Passthrough Encoder ────────────────────────────────────────────────
 
@@ -54,154 +238,121 @@ if AIORTC_AVAILABLE:
         pre-encoded H264 NALUs from GStreamer instead of re-encoding.
 
         GStreamer encodes H264 (using x264enc/openh264enc) → appsink sends
-        H264 byte-stream access units → this encoder splits into NAL units
-        and packetizes for RTP without any re-encoding.
+        H264 byte-stream access units → H264PassthroughTrack yields them as
+        packets → aiortc calls pack(), which splits into NAL units and
+        packetizes for RTP without any re-encoding.
         """
 
-        def __init__(self, h264_queue: thread_queue.Queue, framerate: int = 30):
-            self._h264_queue = h264_queue
-            self._framerate = framerate
-            self.__target_bitrate = 1500000  # Not used but required by interface
-            self._frame_count = 0
-            # For pack() compatibility
-            self.buffer_data = b""
-            self.buffer_pts = None
+        def __init__(self, on_target_bitrate=None):
+            self.__target_bitrate = 1500000
             self.codec = None
+            # aiortc sets target_bitrate from the peer's REMB estimate; the
+            # callback forwards it to the GStreamer encoder (bps)
+            self._on_target_bitrate = on_target_bitrate
 
         @staticmethod
-        def _split_bitstream(buf: bytes):
-            """Split H264 byte-stream into individual NAL units."""
-            i = 0
-            while True:
-                i = buf.find(b"\x00\x00\x01", i)
-                if i == -1:
-                    return
-                i += 3
-                nal_start = i
-                i = buf.find(b"\x00\x00\x01", i)
-                if i == -1:
-                    yield buf[nal_start : len(buf)]
-                    return
-                elif buf[i - 1] == 0:
-                    yield buf[nal_start : i - 1]
-                else:
-                    yield buf[nal_start:i]
+        def _split_bitstream(buf: bytes) -> List[memoryview]:
+            """Split H264 byte-stream into individual NAL units (zero-copy views)."""
+            return nal_views(buf, index_nals(buf))
 
         @staticmethod
-        def _packetize_fu_a(data: bytes) -> list:
+        def _packetize_fu_a(data) -> list:
             """Fragment a large NAL unit into FU-A packets."""
+            view = memoryview(data)
             available_size = PACKET_MAX - FU_A_HEADER_SIZE
-            payload_size = len(data) - NAL_HEADER_SIZE
+            payload_size = len(view) - NAL_HEADER_SIZE
             num_packets = math.ceil(payload_size / available_size)
             num_larger_packets = payload_size % num_packets
             package_size = payload_size // num_packets
 
-            f_nri = data[0] & (0x80 | 0x60)
-            nal = data[0] & 0x1F
+            f_nri = view[0] & (0x80 | 0x60)
+            nal = view[0] & 0x1F
             fu_indicator = f_nri | NAL_TYPE_FU_A
             fu_header_end = bytes([fu_indicator, nal | 0x40])
             fu_header_middle = bytes([fu_indicator, nal])
             fu_header_start = bytes([fu_indicator, nal | 0x80])
-            fu_header = fu_header_start
 
             packages = []
             offset = NAL_HEADER_SIZE
-            while offset < len(data):
-                if num_larger_packets > 0:
-                    num_larger_packets -= 1
-                    payload = data[offset : offset + package_size + 1]
-                    offset += package_size + 1
-                else:
-                    payload = data[offset : offset + package_size]
-                    offset += package_size
-                if offset == len(data):
+            for index in range(num_packets):
+                size = package_size + 1 if index < num_larger_packets else package_size
+                if index == 0:
+                    fu_header = fu_header_start
+                elif index == num_packets - 1:
                     fu_header = fu_header_end
-                packages.append(fu_header + payload)
-                fu_header = fu_header_middle
+                else:
+                    fu_header = fu_header_middle
+                # bytes + memoryview: one allocation of the final size, one copy
+                packages.append(fu_header + view[offset : offset + size])
+                offset += size
 
             return packages
 
         @staticmethod
-        def _packetize_stap_a(data, packages_iterator):
-            """Aggregate small NAL units into STAP-A packets."""
-            from struct import pack
-
-            counter = 0
-            available_size = PACKET_MAX - STAP_A_HEADER_SIZE
-            stap_header = NAL_TYPE_STAP_A | (data[0] & 0xE0)
-            payload = bytes()
-            try:
-                nalu = data
-                while len(nalu) <= available_size and counter < 9:
-                    stap_header |= nalu[0] & 0x80
-                    nri = nalu[0] & 0x60
-                    if stap_header & 0x60 < nri:
-                        stap_header = stap_header & 0x9F | nri
-                    available_size -= LENGTH_FIELD_SIZE + len(nalu)
-                    counter += 1
-                    payload += pack("!H", len(nalu)) + nalu
-                    nalu = next(packages_iterator)
-                if counter == 0:
-                    nalu = next(packages_iterator)
-            except StopIteration:
-                nalu = None
-            if counter <= 1:
-                return data, nalu
-            else:
-                return bytes([stap_header]) + payload, nalu
+        def _packetize_stap_a(nalus, size: int) -> bytes:
+            """Aggregate small NAL units into one STAP-A packet of a known size."""
+            packet = bytearray(size)
+            stap_header = NAL_TYPE_STAP_A | (nalus[0][0] & 0xE0)
+            offset = STAP_A_HEADER_SIZE
+            for nalu in nalus:
+                stap_header |= nalu[0] & 0x80
+                nri = nalu[0] & 0x60
+                if stap_header & 0x60 < nri:
+                    stap_header = stap_header & 0x9F | nri
+                length = len(nalu)
+                struct.pack_into("!H", packet, offset, length)
+                offset += LENGTH_FIELD_SIZE
+                packet[offset : offset + length] = nalu
+                offset += length
+            packet[0] = stap_header
+            return bytes(packet)
 
         @classmethod
         def _packetize(cls, packages) -> list:
-            """RTP-packetize a sequence of NAL units."""
+            """RTP-packetize a sequence of NAL units (bytes or memoryviews)."""
             packetized = []
-            packages_iterator = iter(packages)
-            package = next(packages_iterator, None)
-            while package is not None:
+            count = len(packages)
+            i = 0
+            while i < count:
+                package = packages[i]
                 if len(package) > PACKET_MAX:
                     packetized.extend(cls._packetize_fu_a(package))
-                    package = next(packages_iterator, None)
+                    i += 1
+                    continue
+
+                # Aggregate this and the following small NALs while they fit
+                j = i
+                size = STAP_A_HEADER_SIZE
+                while j < count and j - i < 9 and size + LENGTH_FIELD_SIZE + len(packages[j]) <= PACKET_MAX:
+                    size += LENGTH_FIELD_SIZE + len(packages[j])
+                    j += 1
+
+                if j - i <= 1:
+                    packetized.append(bytes(package))
+                    i += 1
                 else:
-                    result, package = cls._packetize_stap_a(package, packages_iterator)
-                    packetized.append(result)
+                    packetized.append(cls._packetize_stap_a(packages[i:j], size))
+                    i = j
             return packetized
 
-        def encode(self, frame, force_keyframe=False):
-            """
-            Called by aiortc RTCRtpSender. Instead of encoding the frame,
-            reads pre-encoded H264 data from the GStreamer queue.
-            Returns (list[bytes], timestamp) — RTP-packetized H264 NALUs.
-            """
-            self._frame_count += 1
-
-            # Try to get H264 data from GStreamer
-            h264_data = None
-            try:
-                h264_data = self._h264_queue.get_nowait()
-            except thread_queue.Empty:
-                pass
-
-            if not h264_data:
-                return [], frame.pts if hasattr(frame, "pts") else self._frame_count
-
-            # Split byte-stream into NAL units and packetize for RTP
-            nals = list(self._split_bitstream(h264_data))
-            if not nals:
-                return [], frame.pts if hasattr(frame, "pts") else self._frame_count
-
-            from aiortc.mediastreams import convert_timebase
+        def _packetize_au(self, data: bytes, nals: Optional[NalIndex] = None) -> list:
+            """RTP-packetize an access unit, reusing its NAL index when it has one."""
+            if nals is None:
+                nals = index_nals(data)
+            return self._packetize(nal_views(data, nals))
 
-            timestamp = (
-                convert_timebase(frame.pts, frame.time_base, VIDEO_TIME_BASE)
-                if hasattr(frame, "pts") and hasattr(frame, "time_base")
-                else self._frame_count
-            )
-
-            return self._packetize(nals), timestamp
+        def encode(self, frame, force_keyframe=False):
+            """Encoder interface only: H264PassthroughTrack never yields raw frames."""
+            return [], 0
 
         def pack(self, packet):
-            """Pack interface for compatibility."""
-            packages = list(self._split_bitstream(bytes(packet)))
-            return self._packetize(packages), 0
+            """
+            Called by aiortc RTCRtpSender with one access unit from
+            H264PassthroughTrack. Returns (list[bytes], timestamp) —
+            RTP-packetized H264 NALUs and the packet's 90 kHz timestamp.
+            """
+            nals = getattr(packet, "opaque", None)
+            return self._packetize_au(bytes(packet), nals), packet.pts or 0
 
         @property
         def target_bitrate(self) -> int:
@@ -210,56 +361,84 @@ if AIORTC_AVAILABLE:
         @target_bitrate.setter
         def target_bitrate(self, bitrate: int) -> None:
             self.__target_bitrate = max(100000, min(bitrate, 10000000))
+            if self._on_target_bitrate:
+                self._on_target_bitrate(self.__target_bitrate)
 
 
-# ── Timing Video Track ──────────────────────────────────────────────────────
+# ── Passthrough Video Track ─────────────────────────────────────────────────
 
 if AIORTC_AVAILABLE:
 
-    class TimingVideoTrack(MediaStreamTrack):
+    class H264PassthroughTrack(MediaStreamTrack):
         """
-        A video track that provides timing frames to aiortc's RTCRtpSender.
+        A per-peer video track that yields GStreamer's H264 access units
+        as they arrive.
 
-        The actual H264 encoding is done by GStreamer. This track only provides
-        dummy frames at the correct framerate so aiortc calls the encoder
-        (our H264PassthroughEncoder) at the right cadence.
+        recv() sleeps until the ring is pushed to, then returns the peer's
+        next access unit as a Packet stamped from the GStreamer PTS. aiortc
+        passes packets (not frames) to the encoder's pack(), so there is no
+        fixed cadence to wait for and no raw frame to allocate.
         """
 
         kind = "video"
 
-        def __init__(self, width=640, height=480, framerate=30):
+        def __init__(self, reader: H264PeerReader):
             super().__init__()
-            self._width = width
-            self._height = height
-            self._framerate = framerate
-            self._frame_count = 0
-            self._start_time = None
-            # Small black frame — the encoder ignores it anyway
-            self._blank = np.zeros((height, width, 3), dtype=np.uint8)
+            self.reader = reader
+            self._wakeup = asyncio.Event()
+            self._loop: Optional[asyncio.AbstractEventLoop] = None
+            self._first_ts_ns: Optional[int] = None
+
+        def _on_push(self):
+            # Called from the GStreamer thread
+            loop = self._loop
+            if loop is not None and not loop.is_closed():
+                loop.call_soon_threadsafe(self._wakeup.set)
 
         async def recv(self):
-            """
-            Provide a timing frame at the target framerate.
-            The H264PassthroughEncoder ignores this frame and reads from the
-            H264 queue instead.
-            """
-            if self._start_time is None:
-                self._start_time = time.time()
+            if self.readyState != "live":
+                raise MediaStreamError
 
-            self._frame_count += 1
-            pts = self._frame_count
-            time_base = fractions.Fraction(1, self._framerate)
+            if self._loop is None:
+                self._loop = asyncio.get_running_loop()
+                self.reader.ring.add_listener(self._on_push)
 
-            # Pace delivery to target framerate
-            target_time = self._start_time + (self._frame_count / self._framerate)
-            wait = target_time - time.time()
-            if wait > 0:
-                await asyncio.sleep(wait)
+            while True:
+                # Clear before reading so a push landing in between isn't lost
+                self._wakeup.clear()
+                data = self.reader.next_access_unit()
+                if data is not None:
+                    break
+                await self._wakeup.wait()
+                if self.readyState != "live":
+                    raise MediaStreamError
+
+            packet = Packet(data)
+            packet.pts = self._rtp_timestamp()
+            packet.time_base = VIDEO_TIME_BASE
+            # Hand the NAL index from push time on to the encoder's pack()
+            # (PyAV < 12 has no Packet.opaque; pack() then re-indexes)
+            try:
+                packet.opaque = self.reader.last_nals
+            except AttributeError:
+                pass
+            return packet
+
+        def _rtp_timestamp(self) -> int:
+            """90 kHz timestamp from the GStreamer PTS (arrival time if the buffer had none)"""
+            ts_ns = self.reader.last_pts_ns
+            if ts_ns is None:
+                ts_ns = int(self.reader.last_pushed_at * 1_000_000_000)
+            if self._first_ts_ns is None:
+                self._first_ts_ns = ts_ns
+            return ((ts_ns - self._first_ts_ns) * VIDEO_CLOCK_RATE // 1_000_000_000) & 0xFFFFFFFF
 
-            frame = VideoFrame.from_ndarray(self._blank, format="bgr24")
-            frame.pts = pts
-            frame.time_base = time_base
-            return frame
+        def stop(self):
+            super().stop()
+            self.reader.ring.remove_listener(self._on_push)
+            # Release a recv() that is waiting for the next access unit
+            if self._loop is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._wakeup.set)
 
 
 # ── Peer Dataclass ───────────────────────────────────────────────────────────
@@ -280,6 +459,45 @@ class WebRTCPeer:
     remote_sdp: Optional[str] = None
     stats: Dict[str, Any] = field(default_factory=dict)
     last_activity: float = field(default_factory=time.time)
+    h264_reader: Any = None  # H264PeerReader feeding this peer's sender
+    estimated_bitrate_kbps: Optional[int] = None  # last REMB estimate from this peer
+    keyframe_requests: int = 0  # PLI/FIR received from this peer
+    connected_at: Optional[float] = None  # when ICE/DTLS reached "connected"
+    nack_count: int = 0  # retransmissions requested by this peer (RTCP NACK)
+    transport_stats: Dict[str, Any] = field(default_factory=dict)  # sampled from aiortc getStats()
+
+
+# ── Event loop lag ──────────────────────────────────────────────────────────
+
+
+class LoopLagProbe:
+    """
+    Measures how late an event loop wakes a sleeping coroutine.
+
+    Anything that blocks the loop (a sync handler, a long computation)
+    shows up as lag, and on the media loop that lag is RTP send jitter.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_PROBE_INTERVAL, window: int = LOOP_LAG_WINDOW):
+        self.interval = interval
+        self._samples = deque(maxlen=window)
+
+    async def run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self._samples.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def get_stats(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "samples": len(samples),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p95_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 2),
+            "max_ms": round(samples[-1] * 1000, 2),
+        }
 
 
 # ── WebRTC Service ───────────────────────────────────────────────────────────
@@ -292,8 +510,17 @@ class WebRTCService:
 
     def __init__(self, websocket_manager=None, event_loop=None):
         self.websocket_manager = websocket_manager
+        # The API (FastAPI) loop: WebSocket broadcasts only
         self.event_loop = event_loop
 
+        # Peer connections, RTP/SRTP and pacing run on their own loop in
+        # the WebRTCMedia thread (see start_media_loop)
+        self._media_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._media_thread: Optional[threading.Thread] = None
+        self._media_lag = LoopLagProbe()
+        self._api_lag = LoopLagProbe()
+        self._lag_probes: List[Any] = []
+
         # Reference to GStreamer service (set externally for keyframe requests)
         self._gstreamer_service = None
 
@@ -301,8 +528,8 @@ class WebRTCService:
         self.peers: Dict[str, WebRTCPeer] = {}
         self._lock = threading.Lock()
 
-        # Shared video track
-        self._video_track = None
+        # H264 access units from GStreamer, read by each peer's track at its own pace
+        self._h264_ring: Optional[H264Ring] = None
 
         # Service state
         self.is_active: bool = False
@@ -323,6 +550,12 @@ class WebRTCService:
             "keyframe_interval": 2,
             "adaptation_enabled": True,
             "congestion_control": True,
+            # Whose bandwidth estimate drives the encoder with several peers:
+            # "slowest" (nobody stalls) or "primary" (primary_peer_id, else
+            # the longest-connected peer)
+            "bitrate_policy": "slowest",
+            "primary_peer_id": None,
+            "bitrate_smoothing": 0.3,  # EMA weight of a new estimate when raising
         }
 
         # Stats tracking
@@ -335,100 +568,99 @@ class WebRTCService:
             "avg_bitrate_kbps": 0,
             "adaptation_events": 0,
             "packet_loss_percent": 0.0,
+            "avg_jitter_ms": 0.0,
             "current_gop_interval": 2,
+            "resync_keyframes_suppressed": 0,
         }
 
         # Dynamic GOP adaptation state
         self._last_keyframe_time: float = 0
+        self._last_resync_keyframe: float = float("-inf")  # shared by all peers' readers
         self._adaptive_gop_interval: float = 2.0  # seconds between keyframes
 
+        # Session setup: ICE mode and pre-gathered (created_at, host_only, pc, track) entries
+        self.session_config = {
+            "ice_mode": "auto",
+            "prewarm_pool_size": 1,
+        }
+        self._prewarm_pool: List[tuple] = []
+        self._prewarm_refilling = False
+
+        # Congestion feedback state: encoder bitrate we last applied, the
+        # configured bitrate to restore when feedback stops, and throttles
+        self._applied_bitrate_kbps: Optional[float] = None
+        self._baseline_bitrate_kbps: Optional[int] = None
+        self._last_bitrate_update: float = 0
+        # Serialises _apply_bitrate_policy (REMB, stats and API threads). Not
+        # self._lock: the encoder update broadcasts status, which takes it.
+        self._bitrate_lock = threading.Lock()
+
         if AIORTC_AVAILABLE:
             print("✅ WebRTC service initialized (aiortc available)")
         else:
             print("⚠️ WebRTC service initialized (aiortc NOT available)")
 
-    # ── Video Track & H264 Queue ───────────────────────────────────────────
+    # ── Video Track & H264 Ring ────────────────────────────────────────────
 
-    def get_or_create_video_track(self, width=640, height=480, framerate=30):
-        """Get the shared timing video track, creating if needed."""
+    def create_video_track(self):
+        """Create a peer's passthrough track with its own reader on the shared ring."""
         if not AIORTC_AVAILABLE:
             return None
-        if not self._video_track:
-            self._video_track = TimingVideoTrack(width, height, framerate)
-            # Create shared H264 queue for passthrough
-            self._h264_queue = thread_queue.Queue(maxsize=5)
-        return self._video_track
+        if self._h264_ring is None:
+            self._h264_ring = H264Ring()
+        reader = self._h264_ring.reader(on_keyframe_needed=self._request_resync_keyframe)
+        return H264PassthroughTrack(reader)
 
-    def push_video_frame(self, h264_data: bytes):
+    def push_video_frame(self, h264_data: bytes, pts_ns: Optional[int] = None):
         """
-        Push H264 encoded data from GStreamer into the shared queue.
+        Push H264 encoded data from GStreamer into the shared ring.
         Called from GStreamer thread — must be thread-safe.
-        The H264PassthroughEncoder reads from this queue.
 
-        Implements intelligent frame skipping:
-        - IDR frames (NAL type 5) are always prioritized
-        - P/B frames may be dropped during congestion
+        Never blocks or drops here: each peer's H264PeerReader decides
+        what to skip when that peer lags (see PEER_MAX_LAG). Waiting
+        tracks are woken immediately.
         """
-        if not hasattr(self, "_h264_queue") or self._h264_queue is None:
+        ring = self._h264_ring
+        if ring is None:
             return
-        try:
-            # Check if this is an IDR frame (keyframe) - NAL type 5
-            is_idr = self._is_idr_frame(h264_data)
-
-            if self._h264_queue.full():
-                if is_idr:
-                    # IDR frame: always make room by dropping oldest
-                    try:
-                        self._h264_queue.get_nowait()
-                    except thread_queue.Empty:
-                        pass
-                else:
-                    # P/B frame during congestion: drop it
-                    return
+        # Index the NAL units once; the IDR check and the packetizer share it
+        nals = index_nals(h264_data)
+        ring.push(h264_data, is_keyframe(nals), pts_ns, nals)
 
-            self._h264_queue.put_nowait(h264_data)
-        except (thread_queue.Full, Exception):
-            pass
+    def _request_keyframe(self, reason: str = "webrtc_reader"):
+        """Ask the GStreamer encoder for an IDR (a peer is waiting for one)"""
+        if self._gstreamer_service:
+            self._gstreamer_service.force_keyframe(reason)
 
-    @staticmethod
-    def _is_idr_frame(h264_data: bytes) -> bool:
-        """
-        Check if H264 access unit contains an IDR frame.
-        IDR NAL unit type = 5 (masked from byte after start code).
-        Also considers SPS (7) and PPS (8) as high priority.
-        """
-        if not h264_data or len(h264_data) < 5:
-            return False
+    def _request_resync_keyframe(self):
+        """A lagging peer resynced at the live edge and waits for an IDR.
 
-        # Find NAL start codes and check types
-        i = 0
-        while i < len(h264_data) - 4:
-            # Look for start code (0x000001 or 0x00000001)
-            if h264_data[i : i + 3] == b"\x00\x00\x01":
-                nal_type = h264_data[i + 3] & 0x1F
-                if nal_type in (5, 7, 8):  # IDR, SPS, PPS
-                    return True
-                i += 4
-            elif h264_data[i : i + 4] == b"\x00\x00\x00\x01":
-                nal_type = h264_data[i + 4] & 0x1F
-                if nal_type in (5, 7, 8):  # IDR, SPS, PPS
-                    return True
-                i += 5
-            else:
-                i += 1
-        return False
+        Every IDR costs bitrate on every peer, so requests from all readers
+        share one PEER_KEYFRAME_MIN_INTERVAL; a peer that resyncs within it
+        waits for the IDR already on its way (or the next GOP).
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_resync_keyframe < PEER_KEYFRAME_MIN_INTERVAL:
+                self.global_stats["resync_keyframes_suppressed"] += 1
+                return
+            self._last_resync_keyframe = now
+        self._request_keyframe("webrtc_reader")
 
     # ── Lifecycle ────────────────────────────────────────────────────────────
 
     def activate(self):
         self.is_active = True
+        self.start_media_loop()
         self._start_stats_monitor()
+        self._schedule_prewarm_refill()
         self._add_log("info", "WebRTC service activated")
         print("🔗 WebRTC service activated")
 
     def deactivate(self):
         self.is_active = False
         self._stop_stats_monitor()
+        self._drain_prewarm_pool()
 
         with self._lock:
             peer_ids = list(self.peers.keys())
@@ -439,24 +671,119 @@ class WebRTCService:
         with self._lock:
             self.peers.clear()
 
-        if self._video_track:
-            try:
-                self._video_track.stop()
-            except Exception:
-                pass
-            self._video_track = None
-
-        # Clear H264 queue
-        if hasattr(self, "_h264_queue"):
-            self._h264_queue = None
+        self._h264_ring = None
 
         self._add_log("info", "WebRTC service deactivated")
         print("🔗 WebRTC service deactivated")
 
+    # ── Media Event Loop ─────────────────────────────────────────────────────
+
+    def start_media_loop(self):
+        """Start the WebRTCMedia thread and its event loop (idempotent)"""
+        if not AIORTC_AVAILABLE or self._media_loop_running():
+            return
+        loop = asyncio.new_event_loop()
+        ready = threading.Event()
+
+        def _run():
+            asyncio.set_event_loop(loop)
+            loop.call_soon(ready.set)
+            try:
+                loop.run_forever()
+            finally:
+                loop.close()
+
+        self._media_thread = threading.Thread(target=_run, daemon=True, name="WebRTCMedia")
+        self._media_thread.start()
+        ready.wait(timeout=2)
+        self._media_loop = loop
+
+        self._lag_probes = [asyncio.run_coroutine_threadsafe(self._media_lag.run(), loop)]
+        if self.event_loop and self.event_loop.is_running():
+            self._lag_probes.append(asyncio.run_coroutine_threadsafe(self._api_lag.run(), self.event_loop))
+        self._add_log("info", "Media event loop started")
+
+    def stop_media_loop(self):
+        """Let pending work (pc.close()) finish, then stop the media thread"""
+        loop = self._media_loop
+        if not self._media_loop_running():
+            return
+        for probe in self._lag_probes:
+            probe.cancel()
+        self._lag_probes = []
+        try:
+            asyncio.run_coroutine_threadsafe(self._drain_media_loop(), loop).result(timeout=MEDIA_LOOP_STOP_TIMEOUT + 1)
+        except Exception as e:
+            logger.debug(f"Media loop drain failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        if self._media_thread:
+            self._media_thread.join(timeout=2)
+        self._media_loop = None
+        self._media_thread = None
+
+    @staticmethod
+    async def _drain_media_loop():
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if not tasks:
+            return
+        _, pending = await asyncio.wait(tasks, timeout=MEDIA_LOOP_STOP_TIMEOUT)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def _media_loop_running(self) -> bool:
+        return self._media_loop is not None and self._media_loop.is_running()
+
+    async def _on_media_loop(self, coro):
+        """
+        Await a coroutine on the media loop from the API loop.
+
+        Runs it inline when no media loop is running (service not
+        activated) or when already on the media loop.
+        """
+        loop = self._media_loop
+        if not self._media_loop_running() or asyncio.get_running_loop() is loop:
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+    def _peer_loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        """Loop that owns the peer connections: the media loop, else the API loop"""
+        return self._media_loop if self._media_loop_running() else self.event_loop
+
+    def _submit_to_media_loop(self, coro):
+        """Fire-and-forget from any thread"""
+        loop = self._peer_loop()
+        if not loop:
+            coro.close()
+            return None
+        try:
+            return asyncio.run_coroutine_threadsafe(coro, loop)
+        except Exception:
+            coro.close()
+            return None
+
+    def get_loop_lag(self) -> Dict[str, Any]:
+        """Wake-up lag of the media loop vs the API loop"""
+        return {
+            "media_loop_running": self._media_loop_running(),
+            "media": self._media_lag.get_stats(),
+            "api": self._api_lag.get_stats(),
+        }
+
     # ── Peer Management (aiortc) ─────────────────────────────────────────────
 
-    async def create_peer_connection(self, peer_id=None):
-        """Create a new aiortc RTCPeerConnection with video track."""
+    async def create_peer_connection(self, peer_id=None, client_host: Optional[str] = None):
+        """Create a peer's RTCPeerConnection on the media loop"""
+        return await self._on_media_loop(self._create_peer_connection(peer_id, client_host))
+
+    async def _create_peer_connection(self, peer_id=None, client_host: Optional[str] = None):
+        """
+        Create a new aiortc RTCPeerConnection with video track.
+
+        Takes a pre-warmed connection (ICE candidates already gathered) from
+        the pool when one fits, so handle_offer() doesn't wait on STUN.
+        client_host picks host-only ICE for LAN/VPN viewers in "auto" mode.
+        """
         if not AIORTC_AVAILABLE:
             return {"success": False, "error": "aiortc not installed"}
 
@@ -464,11 +791,12 @@ class WebRTCService:
             peer_id = str(uuid.uuid4())[:8]
 
         try:
-            pc = RTCPeerConnection()
-            video_track = self.get_or_create_video_track()
-
-            if video_track:
-                pc.addTrack(video_track)
+            host_only = self._use_host_only_ice(client_host)
+            prewarmed = self._take_prewarmed(host_only)
+            if prewarmed:
+                pc, video_track = prewarmed
+            else:
+                pc, video_track = self._new_peer_connection(host_only)
 
             @pc.on("connectionstatechange")
             async def on_state_change():
@@ -479,29 +807,45 @@ class WebRTCService:
                     if peer:
                         if state == "connected":
                             peer.state = "connected"
+                            peer.connected_at = time.time()
                         elif state in ("failed", "closed"):
                             peer.state = "disconnected"
                         self.global_stats["active_peers"] = sum(
                             1 for p in self.peers.values() if p.state == "connected"
                         )
+                if state == "connected":
+                    # First decodable frame now rather than at the next GOP boundary
+                    self._request_keyframe("webrtc_connected")
                 self._broadcast_status()
 
             with self._lock:
-                peer = WebRTCPeer(peer_id=peer_id, pc=pc, video_track=video_track)
+                peer = WebRTCPeer(
+                    peer_id=peer_id,
+                    pc=pc,
+                    video_track=video_track,
+                    h264_reader=video_track.reader if video_track else None,
+                )
                 self.peers[peer_id] = peer
                 self.global_stats["total_peers"] += 1
 
-            self._add_log("info", f"Peer {peer_id}: created")
+            self._add_log(
+                "info",
+                f"Peer {peer_id}: created ({'host-only ICE' if host_only else 'STUN'}"
+                f"{', pre-warmed' if prewarmed else ''})",
+            )
             self._broadcast_status()
+            self._schedule_prewarm_refill()
 
             return {
                 "success": True,
                 "peer_id": peer_id,
                 "config": {
-                    "iceServers": self._get_ice_servers(),
+                    # Host-only: the browser needn't wait on STUN either
+                    "iceServers": [] if host_only else self._get_ice_servers(),
                     "sdpSemantics": "unified-plan",
                 },
                 "adaptive_config": self.adaptive_config,
+                "prewarmed": bool(prewarmed),
             }
 
         except Exception as e:
@@ -511,6 +855,9 @@ class WebRTCService:
     async def handle_offer(self, peer_id: str, sdp: str) -> Dict[str, Any]:
         """Handle browser SDP offer → create and return SDP answer.
         Forces H264 codec and installs passthrough encoder."""
+        return await self._on_media_loop(self._handle_offer(peer_id, sdp))
+
+    async def _handle_offer(self, peer_id: str, sdp: str) -> Dict[str, Any]:
         if not AIORTC_AVAILABLE:
             return {"success": False, "error": "aiortc not installed"}
 
@@ -536,7 +883,7 @@ class WebRTCService:
             await pc.setLocalDescription(answer)
 
             # Install H264 passthrough encoder on all video senders
-            self._install_passthrough_encoder(pc)
+            self._install_passthrough_encoder(pc, peer_id)
 
             with self._lock:
                 peer = self.peers.get(peer_id)
@@ -625,29 +972,31 @@ class WebRTCService:
             print(f"⚠️ SDP modification failed: {e}")
             return sdp
 
-    def _install_passthrough_encoder(self, pc: "RTCPeerConnection"):
+    def _install_passthrough_encoder(self, pc: "RTCPeerConnection", peer_id: Optional[str] = None):
         """
         Replace aiortc's default H264/VP8 encoder with our H264PassthroughEncoder
-        on all video RTP senders.
+        on all video RTP senders, and route the sender's congestion feedback
+        (REMB bitrate, PLI/FIR) to the GStreamer encoder.
 
         This must be called AFTER setLocalDescription so the senders exist.
         """
         try:
-            h264_queue = getattr(self, "_h264_queue", None)
-            if not h264_queue:
-                print("⚠️ No H264 queue available for passthrough encoder")
-                return
-
             for sender in pc.getSenders():
                 if sender.kind == "video":
-                    passthrough = H264PassthroughEncoder(h264_queue)
+                    passthrough = H264PassthroughEncoder(
+                        on_target_bitrate=lambda bps: self._on_peer_bitrate_estimate(peer_id, bps)
+                    )
                     # Access private attribute (name-mangled)
                     sender._RTCRtpSender__encoder = passthrough
+                    # aiortc answers PLI/FIR by flagging its own encoder, which
+                    # never runs in passthrough; ask GStreamer for the IDR instead
+                    sender._send_keyframe = lambda: self._on_peer_keyframe_request(peer_id)
+                    sender._retransmit = self._count_nacks(peer_id, sender._retransmit)
                     print("✅ Installed H264 passthrough encoder on sender")
 
             # Force keyframe so the new peer gets SPS/PPS/IDR immediately
             if self._gstreamer_service:
-                self._gstreamer_service.force_keyframe()
+                self._gstreamer_service.force_keyframe("webrtc_peer")
 
         except Exception as e:
             print(f"⚠️ Failed to install passthrough encoder: {e}")
@@ -689,13 +1038,14 @@ class WebRTCService:
         return {"success": True}
 
     def update_peer_stats(self, peer_id: str, stats: Dict) -> Dict[str, Any]:
+        """Client-reported stats; only used for peers without server-side transport stats"""
         with self._lock:
             peer = self.peers.get(peer_id)
             if not peer:
                 return {"success": False, "error": "Peer not found"}
             peer.stats = stats
             peer.last_activity = time.time()
-            self._recalculate_global_stats()
+        self._recalculate_global_stats()
         return {"success": True}
 
     def disconnect_peer(self, peer_id: str) -> Dict[str, Any]:
@@ -712,22 +1062,371 @@ class WebRTCService:
             if not peer:
                 return
             pc = peer.pc
+            video_track = peer.video_track
             peer.state = "disconnected"
             del self.peers[peer_id]
             self.global_stats["active_peers"] = sum(1 for p in self.peers.values() if p.state == "connected")
         self._add_log("info", f"Peer {peer_id}: disconnected")
-        if pc and self.event_loop:
+        self._apply_bitrate_policy()
+        if video_track:
             try:
-                asyncio.run_coroutine_threadsafe(pc.close(), self.event_loop)
+                video_track.stop()
             except Exception:
                 pass
+        if pc:
+            self._submit_to_media_loop(pc.close())
+
+    # ── Session Setup: ICE Mode & Pre-warmed Pool ────────────────────────────
+
+    def update_session_config(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        if config.get("ice_mode", "auto") not in ICE_MODES:
+            return {"success": False, "error": f"ice_mode must be one of {', '.join(ICE_MODES)}"}
+        for key, value in config.items():
+            if key in self.session_config:
+                self.session_config[key] = value
+        self._add_log("info", f"Session config updated: {config}")
+        # Pooled connections may have been gathered for the other mode
+        self._drain_prewarm_pool()
+        self._schedule_prewarm_refill()
+        return {"success": True, "config": dict(self.session_config)}
+
+    @staticmethod
+    def _is_local_address(host: Optional[str]) -> bool:
+        """LAN, link-local, loopback or Tailscale/CGNAT address"""
+        try:
+            address = ipaddress.ip_address(host)
+        except (TypeError, ValueError):
+            return False
+        if address.version == 4 and address in SHARED_ADDRESS_SPACE:
+            return True
+        return address.is_private or address.is_link_local or address.is_loopback
+
+    def _use_host_only_ice(self, client_host: Optional[str] = None) -> bool:
+        mode = self.session_config.get("ice_mode", "auto")
+        if mode == "host":
+            return True
+        if mode == "stun":
+            return False
+        return self._is_local_address(client_host)
+
+    def _rtc_configuration(self, host_only: bool):
+        if host_only:
+            return RTCConfiguration(iceServers=[])
+        return RTCConfiguration(iceServers=[RTCIceServer(urls=server["urls"]) for server in self._get_ice_servers()])
+
+    def _new_peer_connection(self, host_only: bool):
+        """RTCPeerConnection with this service's video track already added"""
+        pc = RTCPeerConnection(configuration=self._rtc_configuration(host_only))
+        video_track = self.create_video_track()
+        if video_track:
+            pc.addTrack(video_track)
+        return pc, video_track
+
+    async def _prewarm_one(self, host_only: bool):
+        """Create a connection and gather its ICE candidates ahead of any offer"""
+        pc, video_track = self._new_peer_connection(host_only)
+        # aiortc matches the browser's video m-line to this unassociated
+        # transceiver, and setLocalDescription() skips gathering once the
+        # gatherer has completed
+        for transceiver in pc.getTransceivers():
+            await transceiver.sender.transport.transport.iceGatherer.gather()
+        return (time.monotonic(), host_only, pc, video_track)
+
+    def _take_prewarmed(self, host_only: bool):
+        """Pop a fresh pooled (pc, track) for the ICE mode, or None"""
+        cutoff = time.monotonic() - PREWARM_MAX_AGE
+        with self._lock:
+            expired = [entry for entry in self._prewarm_pool if entry[0] < cutoff]
+            self._prewarm_pool = [entry for entry in self._prewarm_pool if entry[0] >= cutoff]
+            match = next((entry for entry in self._prewarm_pool if entry[1] == host_only), None)
+            if match:
+                self._prewarm_pool.remove(match)
+        self._close_prewarmed(expired)
+        return (match[2], match[3]) if match else None
+
+    def _prewarm_ice_modes(self) -> Tuple[bool, ...]:
+        """
+        The ICE configurations (host_only flags) offers can ask for in this mode.
+
+        "auto" picks per viewer (LAN/VPN → host-only, else STUN), so it
+        pools prewarm_pool_size connections of each.
+        """
+        mode = self.session_config.get("ice_mode", "auto")
+        if mode == "host":
+            return (True,)
+        if mode == "stun":
+            return (False,)
+        return (True, False)
+
+    def _schedule_prewarm_refill(self):
+        """Top the pool up on the media loop (callable from any thread)"""
+        loop = self._peer_loop()
+        if not AIORTC_AVAILABLE or not self.is_active or not loop or not loop.is_running():
+            return
+        with self._lock:
+            if self._prewarm_refilling:
+                return
+            self._prewarm_refilling = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._refill_prewarm_pool(), loop)
+        except Exception:
+            self._prewarm_refilling = False
+
+    async def _refill_prewarm_pool(self):
+        try:
+            modes = self._prewarm_ice_modes()
+            while self.is_active:
+                cutoff = time.monotonic() - PREWARM_MAX_AGE
+                with self._lock:
+                    expired = [entry for entry in self._prewarm_pool if entry[0] < cutoff]
+                    self._prewarm_pool = [entry for entry in self._prewarm_pool if entry[0] >= cutoff]
+                    size = self.session_config.get("prewarm_pool_size", 0)
+                    # The mode with the fewest pooled connections first
+                    pooled = {mode: sum(entry[1] == mode for entry in self._prewarm_pool) for mode in modes}
+                    host_only = min(modes, key=pooled.get)
+                    missing = size - pooled[host_only]
+                self._close_prewarmed(expired)
+                if missing <= 0:
+                    break
+                entry = await self._prewarm_one(host_only)
+                with self._lock:
+                    self._prewarm_pool.append(entry)
+        except Exception as e:
+            self._add_log("warning", f"Pre-warming peer connection failed: {e}")
+        finally:
+            self._prewarm_refilling = False
+
+    def _drain_prewarm_pool(self):
+        with self._lock:
+            entries = self._prewarm_pool
+            self._prewarm_pool = []
+        self._close_prewarmed(entries)
+
+    def _close_prewarmed(self, entries):
+        for _, _, pc, video_track in entries:
+            if video_track:
+                try:
+                    video_track.stop()
+                except Exception:
+                    pass
+            self._submit_to_media_loop(pc.close())
+
+    # ── Congestion Feedback ──────────────────────────────────────────────────
+
+    def _on_peer_bitrate_estimate(self, peer_id: Optional[str], bitrate_bps: int):
+        """REMB from a peer (via aiortc's target_bitrate) → per-peer estimate"""
+        with self._lock:
+            peer = self.peers.get(peer_id)
+            if not peer:
+                return
+            peer.estimated_bitrate_kbps = int(bitrate_bps // 1000)
+        self._apply_bitrate_policy()
+
+    def _on_peer_keyframe_request(self, peer_id: Optional[str]):
+        """PLI/FIR from a peer → GStreamer keyframe (bursts are coalesced there)"""
+        with self._lock:
+            peer = self.peers.get(peer_id)
+            if peer:
+                peer.keyframe_requests += 1
+        if self._gstreamer_service:
+            self._gstreamer_service.force_keyframe("pli")
+
+    def _count_nacks(self, peer_id: Optional[str], retransmit):
+        """Wrap a sender's _retransmit (one call per NACKed packet) to count NACKs"""
+
+        async def _retransmit(sequence_number: int):
+            with self._lock:
+                peer = self.peers.get(peer_id)
+                if peer:
+                    peer.nack_count += 1
+            await retransmit(sequence_number)
+
+        return _retransmit
+
+    def _select_bitrate_estimate(self) -> Optional[int]:
+        """The estimate the encoder should follow under the configured policy (kbps)"""
+        with self._lock:
+            peers = [p for p in self.peers.values() if p.estimated_bitrate_kbps and p.state != "disconnected"]
+            if not peers:
+                return None
+            if self.adaptive_config.get("bitrate_policy") == "primary":
+                primary_id = self.adaptive_config.get("primary_peer_id")
+                primary = next((p for p in peers if p.peer_id == primary_id), None)
+                if primary is None:
+                    primary = min(peers, key=lambda p: p.created_at)
+                return primary.estimated_bitrate_kbps
+            return min(p.estimated_bitrate_kbps for p in peers)
+
+    def _apply_bitrate_policy(self):
+        """
+        Steer the GStreamer encoder bitrate from the peers' estimates.
+
+        Drops are applied at once (the viewer is already buffering); rises
+        are smoothed and rate-limited so a single optimistic REMB doesn't
+        overshoot. When no peer reports an estimate any more, the bitrate
+        the pipeline was configured with is restored.
+        """
+        gst = self._gstreamer_service
+        if not gst or not self.adaptive_config.get("congestion_control", True):
+            return
+
+        with self._bitrate_lock:
+            estimate = self._select_bitrate_estimate()
+            if estimate is None:
+                if self._baseline_bitrate_kbps is not None:
+                    gst.update_live_property("bitrate", self._baseline_bitrate_kbps)
+                    self._add_log("info", f"Congestion feedback ended: bitrate → {self._baseline_bitrate_kbps} kbps")
+                self._baseline_bitrate_kbps = None
+                self._applied_bitrate_kbps = None
+                return
+
+            if self._baseline_bitrate_kbps is None:
+                self._baseline_bitrate_kbps = gst.video_config.h264_bitrate
+                self._applied_bitrate_kbps = float(self._baseline_bitrate_kbps)
+
+            with self._lock:
+                min_bitrate = self.adaptive_config["min_bitrate"]
+                max_bitrate = self.adaptive_config["max_bitrate"]
+                alpha = self.adaptive_config.get("bitrate_smoothing", 0.3)
+            target = max(min_bitrate, min(max_bitrate, estimate))
+            current = self._applied_bitrate_kbps
+            now = time.monotonic()
+            if target < current:
+                new_bitrate = float(target)
+            else:
+                if now - self._last_bitrate_update < BITRATE_UPDATE_INTERVAL:
+                    return
+                new_bitrate = alpha * target + (1 - alpha) * current
+
+            if abs(new_bitrate - current) < current * BITRATE_DEADBAND:
+                return
+
+            result = gst.update_live_property("bitrate", int(new_bitrate))
+            if not result.get("success"):
+                return
+            self._applied_bitrate_kbps = new_bitrate
+            self._last_bitrate_update = now
+            with self._lock:
+                self.adaptive_config["target_bitrate"] = int(new_bitrate)
+                self.global_stats["adaptation_events"] += 1
+        self._add_log("info", f"Bitrate → {int(new_bitrate)} kbps (peer estimate {estimate} kbps)")
+
+    # ── Transport Stats (server-side) ────────────────────────────────────────
+
+    def _collect_transport_stats(self):
+        """
+        Sample every connected peer's aiortc getStats() on the media loop.
+
+        Runs from the stats monitor thread at STATS_INTERVAL, so browsers
+        no longer need to POST their stats for the adaptation to work.
+        """
+        loop = self._peer_loop()
+        if not AIORTC_AVAILABLE or not loop or not loop.is_running():
+            return
+        with self._lock:
+            peers = [(pid, p.pc) for pid, p in self.peers.items() if p.state == "connected" and p.pc]
+        if not peers:
+            return
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._sample_transport_stats(peers), loop)
+            reports = future.result(timeout=STATS_SAMPLE_TIMEOUT)
+        except Exception as e:
+            logger.debug(f"WebRTC getStats sampling failed: {e}")
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            for peer_id, report in reports.items():
+                peer = self.peers.get(peer_id)
+                if peer and report:
+                    peer.transport_stats = self._summarize_transport_stats(report, peer, now)
+
+    @staticmethod
+    async def _sample_transport_stats(peers) -> Dict[str, Any]:
+        reports = {}
+        for peer_id, pc in peers:
+            try:
+                reports[peer_id] = await pc.getStats()
+            except Exception:
+                reports[peer_id] = None
+        return reports
+
+    @staticmethod
+    def _summarize_transport_stats(report, peer: WebRTCPeer, now: float) -> Dict[str, Any]:
+        """Reduce an RTCStatsReport to the video sender's per-peer metrics"""
+        outbound = remote = None
+        for stats in report.values():
+            if getattr(stats, "kind", None) != "video":
+                continue
+            if stats.type == "outbound-rtp":
+                outbound = stats
+            elif stats.type == "remote-inbound-rtp":
+                remote = stats
+
+        previous = peer.transport_stats
+        bytes_sent = outbound.bytesSent if outbound else previous.get("bytes_sent", 0)
+        bitrate_kbps = previous.get("bitrate_kbps", 0)
+        if outbound and previous.get("sampled_at"):
+            elapsed = now - previous["sampled_at"]
+            if elapsed > 0:
+                bitrate_kbps = round(max(0, bytes_sent - previous.get("bytes_sent", 0)) * 8 / elapsed / 1000)
+
+        summary = {
+            "source": "rtcp",
+            "sampled_at": now,
+            "bytes_sent": bytes_sent,
+            "packets_sent": outbound.packetsSent if outbound else previous.get("packets_sent", 0),
+            "bitrate_kbps": bitrate_kbps,
+            "nack_count": peer.nack_count,
+            "pli_count": peer.keyframe_requests,
+            "rtt_ms": previous.get("rtt_ms", 0),
+            "packet_loss_percent": previous.get("packet_loss_percent", 0.0),
+            "jitter_ms": previous.get("jitter_ms", 0.0),
+            "packets_lost": previous.get("packets_lost", 0),
+        }
+        if remote:
+            if remote.roundTripTime is not None:
+                summary["rtt_ms"] = round(remote.roundTripTime * 1000, 1)
+            # RTCP fraction lost is 8-bit fixed point; jitter is in RTP clock units
+            summary["packet_loss_percent"] = round(remote.fractionLost / 256 * 100, 2)
+            summary["jitter_ms"] = round(remote.jitter / VIDEO_CLOCK_RATE * 1000, 1)
+            summary["packets_lost"] = remote.packetsLost
+        return summary
+
+    def _peer_metrics(self, peer: WebRTCPeer) -> Dict[str, Any]:
+        """Server-measured transport stats when available, else what the client posted"""
+        return peer.transport_stats or peer.stats
+
+    def get_transport_metrics(self) -> Optional[Dict[str, Any]]:
+        """
+        Worst-case viewer path metrics from RTCP, for NetworkEventBridge.
+
+        None when no connected peer has fresh server-side stats.
+        """
+        cutoff = time.monotonic() - 2 * STATS_INTERVAL
+        with self._lock:
+            samples = [
+                p.transport_stats
+                for p in self.peers.values()
+                if p.state == "connected" and p.transport_stats.get("sampled_at", 0) >= cutoff
+            ]
+        if not samples:
+            return None
+        return {
+            "avg_rtt": max(s["rtt_ms"] for s in samples),
+            "jitter": max(s["jitter_ms"] for s in samples),
+            "packet_loss": max(s["packet_loss_percent"] for s in samples),
+            "peers": len(samples),
+            "available": True,
+        }
 
     # ── Legacy sync wrapper for tests ────────────────────────────────────────
 
     def create_offer(self, peer_id=None):
         """Sync wrapper — used by tests and non-async contexts."""
-        if self.event_loop and self.event_loop.is_running():
-            future = asyncio.run_coroutine_threadsafe(self.create_peer_connection(peer_id), self.event_loop)
+        loop = self._peer_loop()
+        if loop and loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(self._create_peer_connection(peer_id), loop)
             try:
                 return future.result(timeout=5)
             except Exception as e:
@@ -767,7 +1466,10 @@ class WebRTCService:
                         "state": peer.state,
                         "created_at": peer.created_at,
                         "last_activity": peer.last_activity,
-                        "stats": peer.stats,
+                        "stats": self._peer_metrics(peer),
+                        "video": peer.h264_reader.get_stats() if peer.h264_reader else None,
+                        "estimated_bitrate_kbps": peer.estimated_bitrate_kbps,
+                        "keyframe_requests": peer.keyframe_requests,
                         "ice_candidates_count": len(peer.ice_candidates_remote),
                     }
                 )
@@ -777,6 +1479,9 @@ class WebRTCService:
                 "peers_connected": sum(1 for p in self.peers.values() if p.state == "connected"),
                 "global_stats": dict(self.global_stats),
                 "adaptive_config": dict(self.adaptive_config),
+                "session_config": dict(self.session_config),
+                "prewarmed_connections": len(self._prewarm_pool),
+                "loop_lag": self.get_loop_lag(),
                 "aiortc_available": AIORTC_AVAILABLE,
                 "log": list(self._log_buffer[-50:]),
             }
@@ -785,10 +1490,14 @@ class WebRTCService:
         return list(self._log_buffer[-limit:])
 
     def update_adaptive_config(self, config):
-        for key, value in config.items():
-            if key in self.adaptive_config:
-                self.adaptive_config[key] = value
+        if config.get("bitrate_policy", "slowest") not in BITRATE_POLICIES:
+            return {"success": False, "error": f"bitrate_policy must be one of {', '.join(BITRATE_POLICIES)}"}
+        with self._lock:
+            for key, value in config.items():
+                if key in self.adaptive_config:
+                    self.adaptive_config[key] = value
         self._add_log("info", f"Adaptive config updated: {config}")
+        self._apply_bitrate_policy()
         self._broadcast_status()
         return {"success": True, "config": self.adaptive_config}
 
@@ -838,18 +1547,24 @@ class WebRTCService:
         ]
 
     def _recalculate_global_stats(self):
-        connected = [p for p in self.peers.values() if p.state == "connected"]
-        if not connected:
-            return
-        total_rtt = sum(p.stats.get("rtt_ms", 0) for p in connected if p.stats)
-        total_br = sum(p.stats.get("bitrate_kbps", 0) for p in connected if p.stats)
-        total_loss = sum(p.stats.get("packet_loss_percent", 0) for p in connected if p.stats)
-        count = len([p for p in connected if p.stats])
-        if count > 0:
-            self.global_stats["avg_rtt_ms"] = round(total_rtt / count, 1)
-            self.global_stats["avg_bitrate_kbps"] = round(total_br / count)
-            self.global_stats["packet_loss_percent"] = round(total_loss / count, 2)
-            self.global_stats["active_peers"] = len(connected)
+        """Averages over the connected peers. Takes self._lock: call it with the lock released."""
+        with self._lock:
+            connected = [p for p in self.peers.values() if p.state == "connected"]
+            if not connected:
+                return
+            metrics = [m for m in (self._peer_metrics(p) for p in connected) if m]
+            count = len(metrics)
+            if count > 0:
+                self.global_stats["avg_rtt_ms"] = round(sum(m.get("rtt_ms", 0) for m in metrics) / count, 1)
+                self.global_stats["avg_bitrate_kbps"] = round(sum(m.get("bitrate_kbps", 0) for m in metrics) / count)
+                self.global_stats["packet_loss_percent"] = round(
+                    sum(m.get("packet_loss_percent", 0) for m in metrics) / count, 2
+                )
+                self.global_stats["avg_jitter_ms"] = round(sum(m.get("jitter_ms", 0) for m in metrics) / count, 1)
+                self.global_stats["total_bytes_sent"] = sum(
+                    p.transport_stats.get("bytes_sent", 0) for p in connected if p.transport_stats
+                )
+                self.global_stats["active_peers"] = len(connected)
 
     def _add_log(self, level, message):
         entry = {"timestamp": time.time(), "level": level, "message": message}
@@ -865,10 +1580,12 @@ class WebRTCService:
         def _monitor():
             while not self._stats_stop.is_set():
                 self._cleanup_stale_peers()
+                self._schedule_prewarm_refill()
+                self._collect_transport_stats()
                 self._recalculate_global_stats()
                 self._adapt_gop_dynamically()
                 self._broadcast_status()
-                self._stats_stop.wait(2.0)
+                self._stats_stop.wait(STATS_INTERVAL)
 
         self._stats_thread = threading.Thread(target=_monitor, daemon=True, name="WebRTCStats")
         self._stats_thread.start()
@@ -913,7 +1630,7 @@ class WebRTCService:
         now = time.time()
         if now - self._last_keyframe_time >= self._adaptive_gop_interval:
             if self._gstreamer_service and self.global_stats.get("active_peers", 0) > 0:
-                self._gstreamer_service.force_keyframe()
+                self._gstreamer_service.force_keyframe("gop")
                 self._last_keyframe_time = now
 
                 # Log significant changes
@@ -943,11 +1660,8 @@ class WebRTCService:
                 self._add_log("warning", f"Peer {pid}: timed out")
                 pc = self.peers[pid].pc
                 del self.peers[pid]
-                if pc and self.event_loop:
-                    try:
-                        asyncio.run_coroutine_threadsafe(pc.close(), self.event_loop)
-                    except Exception:
-                        pass
+                if pc:
+                    self._submit_to_media_loop(pc.close())
             if stale:
                 self.global_stats["active_peers"] = sum(1 for p in self.peers.values() if p.state == "connected")
 
@@ -971,6 +1685,7 @@ class WebRTCService:
 
     def shutdown(self):
         self.deactivate()
+        self.stop_media_loop()
         print("🛑 WebRTC service shutdown")
 
 
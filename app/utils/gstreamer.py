@@ -2,15 +2,28 @@
 GStreamer utility helpers.
 
 Centralised, cached checks for GStreamer plugin availability so that
-every encoder / source provider does not shell out individually.
+every encoder / source provider does not shell out individually, small
+helpers shared by the pipeline services, and raw video frame layout
+helpers.
 """
 
 import logging
 import subprocess
-from typing import Dict
+from typing import Any, Dict, Tuple
+
+try:
+    import gi
+
+    gi.require_version("GstVideo", "1.0")
+    from gi.repository import GstVideo
+except (ImportError, ValueError):
+    GstVideo = None
 
 logger = logging.getLogger(__name__)
 
+# (plane offsets, plane strides, minimum buffer size) in bytes
+FrameLayout = Tuple[Tuple[int, ...], Tuple[int, ...], int]
+
 # Module-level cache: element_name → bool
 _gst_plugin_cache: Dict[str, bool] = {}
 
@@ -55,3 +68,63 @@ def is_gst_element_available(element: str) -> bool:
         logger.debug("GStreamer element '%s' is available", element)
 
     return available
+
+
+def request_pad(element, template: str):
+    """Request a pad from *element*'s *template* (e.g. ``src_%u``)"""
+    if hasattr(element, "request_pad_simple"):
+        return element.request_pad_simple(template)
+    return element.get_request_pad(template)  # GStreamer < 1.20
+
+
+def structure_to_dict(structure) -> Dict[str, Any]:
+    """A GstStructure's fields as a dict (element ``stats`` properties)"""
+    return {
+        structure.nth_field_name(i): structure.get_value(structure.nth_field_name(i))
+        for i in range(structure.n_fields())
+    }
+
+
+def _round_up(value: int, multiple: int) -> int:
+    return (value + multiple - 1) // multiple * multiple
+
+
+def yuv420_layout(fmt: str, width: int, height: int) -> FrameLayout:
+    """GStreamer's default plane layout for an I420 or NV12 frame.
+
+    Rows are padded to 4 bytes (gst_video_info_set_format), so frames whose
+    width or chroma width isn't a multiple of 4 (854, 426 …) are not tightly
+    packed.
+    """
+    chroma_h = _round_up(height, 2) // 2
+    y_stride = _round_up(width, 4)
+    chroma_offset = y_stride * _round_up(height, 2)
+    if fmt == "NV12":
+        return (0, chroma_offset), (y_stride, y_stride), chroma_offset + y_stride * chroma_h
+    c_stride = _round_up(_round_up(width, 2) // 2, 4)
+    v_offset = chroma_offset + c_stride * chroma_h
+    return (0, chroma_offset, v_offset), (y_stride, c_stride, c_stride), v_offset + c_stride * chroma_h
+
+
+def caps_yuv420_layout(caps, fmt: str, width: int, height: int) -> FrameLayout:
+    """Plane layout of I420/NV12 buffers with these caps.
+
+    Read from GstVideo.VideoInfo when the bindings are there, otherwise
+    computed the same way. Appsinks don't advertise GstVideoMeta, so
+    upstream hands them buffers in exactly this layout.
+    """
+    planes = 2 if fmt == "NV12" else 3
+    if GstVideo is not None:
+        try:
+            if hasattr(GstVideo.VideoInfo, "new_from_caps"):
+                info = GstVideo.VideoInfo.new_from_caps(caps)
+            else:  # GStreamer < 1.20
+                info = GstVideo.VideoInfo()
+                info.from_caps(caps)
+            offsets = tuple(int(o) for o in info.offset[:planes])
+            strides = tuple(int(s) for s in info.stride[:planes])
+            if len(offsets) == planes and len(strides) == planes:
+                return offsets, strides, int(info.size)
+        except (TypeError, ValueError, AttributeError) as e:
+            logger.debug(f"VideoInfo unavailable for {fmt} caps, using default layout: {e}")
+    return yuv420_layout(fmt, width, height)
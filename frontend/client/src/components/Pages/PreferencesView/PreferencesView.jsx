@@ -88,6 +88,7 @@ const PreferencesView = () => {
   const setPolicyRouting = (v) => savePref({ network: { policy_routing_enabled: v } })
   const setVpnHealthCheck = (v) => savePref({ network: { vpn_health_check_enabled: v } })
   const setAutoStart = (v) => savePref({ streaming: { auto_start: v } })
+  const setWarmStandby = (v) => savePref({ streaming: { warm_standby: v } })
   const setAutoConnect = (v) => savePref({ serial: { auto_connect: v } })
   const setAutoStartOnArm = (v) => savePref({ flight_session: { auto_start_on_arm: v } })
 
@@ -217,6 +218,13 @@ const PreferencesView = () => {
               onChange={setAutoStart}
               disabled={saving}
             />
+            <PrefRow
+              label={t('preferences.video.warmStandby')}
+              description={t('preferences.video.warmStandbyDesc')}
+              checked={prefs.streaming?.warm_standby === true}
+              onChange={setWarmStandby}
+              disabled={saving}
+            />
             <PrefRow
               label={t('preferences.video.adaptiveBitrate')}
               description={t('preferences.video.adaptiveBitrateDesc')}
@@ -1,6 +1,7 @@
 import { useTranslation } from 'react-i18next'
 import { BITRATE_OPTIONS, GOP_OPTIONS, RANGES, VIDEO_DEFAULTS, safeInt } from './videoConstants'
 import { formatBitrate } from '../../../utils/formatters'
+import Toggle from '../../Toggle/Toggle'
 
 const EncodingConfigCard = ({
   config,
@@ -15,6 +16,7 @@ const EncodingConfigCard = ({
   const isLiveEditable = streaming && config.mode === 'udp'
   const isH264 =
     config.codec === 'h264' || config.codec === 'h264_openh264' || config.codec === 'h264_hardware'
+  const supportsIntraRefresh = !!availableCodecs.find((c) => c.id === config.codec)?.intra_refresh
 
   return (
     <div className="card" data-testid="encoding-card">
@@ -177,6 +179,21 @@ const EncodingConfigCard = ({
               </small>
             </div>
           )}
+
+          {/* Intra refresh — only for encoders that support it */}
+          {supportsIntraRefresh && (
+            <div className={`form-group ${streaming ? 'field-disabled' : ''}`}>
+              <label>{t('views.video.intraRefresh')}</label>
+              <Toggle
+                checked={!!config.intra_refresh}
+                onChange={(e) =>
+                  updateConfig((prev) => ({ ...prev, intra_refresh: e.target.checked }))
+                }
+                disabled={streaming}
+              />
+              <small>{t('views.video.intraRefreshHint')}</small>
+            </div>
+          )}
         </>
       )}
     </div>
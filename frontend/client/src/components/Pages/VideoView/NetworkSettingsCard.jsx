@@ -37,6 +37,14 @@ const NetworkSettingsCard = ({
         : { valid: false, error: 'views.video.validation.emptyHost' }
       : { valid: true }
 
+  // SRT caller needs a host to dial; a listener waits for the receiver
+  const srtHostValidation =
+    config.mode === 'srt' && (config.srt_mode || VIDEO_DEFAULTS.SRT_MODE) === 'caller'
+      ? config.srt_host && config.srt_host.trim() !== ''
+        ? { valid: isValidHost(config.srt_host), error: 'views.video.validation.invalidHost' }
+        : { valid: false, error: 'views.video.validation.emptyHost' }
+      : { valid: true }
+
   // Port validations - check if empty or invalid
   const udpPortValidation =
     config.mode === 'udp'
@@ -60,7 +68,8 @@ const NetworkSettingsCard = ({
     !udpPortValidation.valid ||
     !multicastPortValidation.valid ||
     multicastError ||
-    !rtspValidation.valid
+    !rtspValidation.valid ||
+    !srtHostValidation.valid
 
   // Notify parent of validation state changes
   useEffect(() => {
@@ -85,12 +94,14 @@ const NetworkSettingsCard = ({
           <option value="multicast">{t('views.video.modeMulticast')}</option>
           <option value="rtsp">{t('views.video.modeRtsp')}</option>
           <option value="webrtc">{t('views.video.modeWebrtc')}</option>
+          <option value="srt">{t('views.video.modeSrt')}</option>
         </select>
         <small>
           {config.mode === 'udp' && t('views.video.modeUdpDesc')}
           {config.mode === 'multicast' && t('views.video.modeMulticastDesc')}
           {config.mode === 'rtsp' && t('views.video.modeRtspDesc')}
           {config.mode === 'webrtc' && t('views.video.modeWebrtcDesc')}
+          {config.mode === 'srt' && t('views.video.modeSrtDesc')}
         </small>
       </div>
 
@@ -234,6 +245,72 @@ const NetworkSettingsCard = ({
         </>
       )}
 
+      {/* SRT Settings */}
+      {config.mode === 'srt' && (
+        <>
+          <div className={`form-group ${streaming ? 'field-disabled' : ''}`}>
+            <label>{t('views.video.srtMode')}</label>
+            <select
+              value={config.srt_mode || VIDEO_DEFAULTS.SRT_MODE}
+              onChange={(e) => updateConfig((prev) => ({ ...prev, srt_mode: e.target.value }))}
+              disabled={streaming}
+            >
+              <option value="caller">{t('views.video.srtCaller')}</option>
+              <option value="listener">{t('views.video.srtListener')}</option>
+            </select>
+          </div>
+          {(config.srt_mode || VIDEO_DEFAULTS.SRT_MODE) === 'caller' && (
+            <div className={`form-group ${streaming ? 'field-disabled' : ''}`}>
+              <label>{t('views.video.srtHost')}</label>
+              <input
+                type="text"
+                value={config.srt_host || ''}
+                onChange={(e) => updateConfig((prev) => ({ ...prev, srt_host: e.target.value }))}
+                placeholder="192.168.1.100"
+                disabled={streaming}
+                className={!srtHostValidation.valid ? 'input-error' : ''}
+              />
+              {!srtHostValidation.valid && (
+                <small className="field-error">{t(srtHostValidation.error)}</small>
+              )}
+            </div>
+          )}
+          <div className={`form-group ${streaming ? 'field-disabled' : ''}`}>
+            <label>{t('views.video.srtPort')}</label>
+            <input
+              type="number"
+              value={config.srt_port ?? VIDEO_DEFAULTS.SRT_PORT}
+              onChange={(e) =>
+                updateConfig((prev) => ({
+                  ...prev,
+                  srt_port: safeInt(e.target.value, VIDEO_DEFAULTS.SRT_PORT),
+                }))
+              }
+              min="1024"
+              max="65535"
+              disabled={streaming}
+            />
+          </div>
+          <div className={`form-group ${streaming ? 'field-disabled' : ''}`}>
+            <label>{t('views.video.srtLatency')}</label>
+            <input
+              type="number"
+              value={config.srt_latency_ms ?? VIDEO_DEFAULTS.SRT_LATENCY_MS}
+              onChange={(e) =>
+                updateConfig((prev) => ({
+                  ...prev,
+                  srt_latency_ms: safeInt(e.target.value, VIDEO_DEFAULTS.SRT_LATENCY_MS),
+                }))
+              }
+              min={RANGES.SRT_LATENCY.MIN}
+              max={RANGES.SRT_LATENCY.MAX}
+              disabled={streaming}
+            />
+            <small>{t('views.video.srtLatencyHint')}</small>
+          </div>
+        </>
+      )}
+
       {/* WebRTC Settings */}
       {config.mode === 'webrtc' && (
         <div className="info-box">{t('views.video.modeWebrtcInfo')}</div>
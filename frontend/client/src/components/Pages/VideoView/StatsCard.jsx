@@ -80,6 +80,13 @@ const StatsCard = ({ status, webrtcVideoStats, autoAdaptiveBitrate }) => {
               <span className="stat-label">{t('views.video.dataSent')}</span>
               <span className="stat-value-sm">{stats.bytes_sent_mb} MB</span>
             </div>
+            {/* Encoder share of the bitrate once FEC overhead is taken off */}
+            {config.fec_enabled && stats.encoder_bitrate > 0 && (
+              <div className="stat-item-secondary">
+                <span className="stat-label">{t('views.video.encoderBitrateFec')}</span>
+                <span className="stat-value-sm">{formatBitrate(stats.encoder_bitrate)}</span>
+              </div>
+            )}
             <div className="stat-item-secondary">
               <span className="stat-label">{t('views.video.errors')}</span>
               <span className={`stat-value-sm ${stats.errors > 0 ? 'error-count' : ''}`}>
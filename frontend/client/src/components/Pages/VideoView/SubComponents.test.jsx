@@ -469,6 +469,17 @@ describe('StatsCard', () => {
     expect(screen.getByText('2.1 Mbps')).toBeInTheDocument()
   })
 
+  it('renders encoder bitrate with FEC', () => {
+    const fecStatus = {
+      ...statusData,
+      stats: { ...statusData.stats, encoder_bitrate: 1600 },
+      config: { ...statusData.config, fec_enabled: true },
+    }
+    render(<StatsCard status={fecStatus} />)
+    expect(screen.getByText('views.video.encoderBitrateFec')).toBeInTheDocument()
+    expect(screen.getByText('1.6 Mbps')).toBeInTheDocument()
+  })
+
   it('renders codec info', () => {
     render(<StatsCard status={statusData} />)
     expect(screen.getByText(/H264.*1920x1080/)).toBeInTheDocument()
@@ -4,7 +4,15 @@ import { useTranslation } from 'react-i18next'
 import { useWebSocket } from '../../../contexts/WebSocketContext'
 import { useToast } from '../../../contexts/ToastContext'
 import api from '../../../services/api'
-import { VIDEO_DEFAULTS, FALLBACK_FPS, EMPTY_STATUS, TIMING, safeInt } from './videoConstants'
+import {
+  VIDEO_DEFAULTS,
+  FALLBACK_FPS,
+  EMPTY_STATUS,
+  TIMING,
+  safeInt,
+  filterFpsByCapacity,
+  filterResolutionsByCapacity,
+} from './videoConstants'
 import StatusBanner from './StatusBanner'
 import VideoSourceCard from './VideoSourceCard'
 import EncodingConfigCard from './EncodingConfigCard'
@@ -33,6 +41,7 @@ const VideoView = () => {
     quality: VIDEO_DEFAULTS.QUALITY,
     h264_bitrate: VIDEO_DEFAULTS.H264_BITRATE,
     gop_size: VIDEO_DEFAULTS.GOP_SIZE,
+    intra_refresh: false,
     mode: VIDEO_DEFAULTS.MODE,
     udp_host: VIDEO_DEFAULTS.UDP_HOST,
     udp_port: VIDEO_DEFAULTS.UDP_PORT,
@@ -42,6 +51,10 @@ const VideoView = () => {
     rtsp_enabled: false,
     rtsp_url: VIDEO_DEFAULTS.RTSP_URL,
     rtsp_transport: VIDEO_DEFAULTS.RTSP_TRANSPORT,
+    srt_mode: VIDEO_DEFAULTS.SRT_MODE,
+    srt_host: '',
+    srt_port: VIDEO_DEFAULTS.SRT_PORT,
+    srt_latency_ms: VIDEO_DEFAULTS.SRT_LATENCY_MS,
     auto_start: false,
   })
   const [actionLoading, setActionLoading] = useState(null)
@@ -75,6 +88,7 @@ const VideoView = () => {
       quality: safeInt(config.quality, VIDEO_DEFAULTS.QUALITY),
       h264_bitrate: safeInt(config.h264_bitrate, VIDEO_DEFAULTS.H264_BITRATE),
       gop_size: safeInt(config.gop_size, VIDEO_DEFAULTS.GOP_SIZE),
+      intra_refresh: !!config.intra_refresh,
     }
   }, [videoDevices, config])
 
@@ -268,6 +282,10 @@ const VideoView = () => {
         rtsp_enabled: config.rtsp_enabled,
         rtsp_url: config.rtsp_url,
         rtsp_transport: config.rtsp_transport,
+        srt_mode: config.srt_mode,
+        srt_host: config.srt_host,
+        srt_port: safeInt(config.srt_port, VIDEO_DEFAULTS.SRT_PORT),
+        srt_latency_ms: safeInt(config.srt_latency_ms, VIDEO_DEFAULTS.SRT_LATENCY_MS),
         auto_start: config.auto_start,
       })
 
@@ -372,13 +390,32 @@ const VideoView = () => {
     [videoDevices, config.device]
   )
 
-  const availableResolutions = useMemo(() => currentDevice?.resolutions || [], [currentDevice])
+  // Measured encoder capacity for the selected codec (empty until the board is benchmarked)
+  const measuredFps = useMemo(
+    () => systemCodecs.find((c) => c.id === config.codec)?.measured_fps || {},
+    [systemCodecs, config.codec]
+  )
+
+  const availableResolutions = useMemo(
+    () =>
+      filterResolutionsByCapacity(
+        currentDevice?.resolutions || [],
+        currentDevice?.fps_by_resolution,
+        measuredFps
+      ),
+    [currentDevice, measuredFps]
+  )
 
   const currentResolution = `${config.width}x${config.height}`
 
   const availableFps = useMemo(
-    () => currentDevice?.fps_by_resolution?.[currentResolution] || FALLBACK_FPS,
-    [currentDevice, currentResolution]
+    () =>
+      filterFpsByCapacity(
+        currentDevice?.fps_by_resolution?.[currentResolution] || FALLBACK_FPS,
+        measuredFps,
+        currentResolution
+      ),
+    [currentDevice, currentResolution, measuredFps]
   )
 
   // Derive available codecs from the selected device's compatible_codecs + system codecs
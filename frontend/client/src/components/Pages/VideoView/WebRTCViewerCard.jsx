@@ -31,7 +31,7 @@ const WebRTCViewerCard = forwardRef(
     }, [])
 
     const startStatsCollection = useCallback(
-      (pc, pId) => {
+      (pc) => {
         if (statsIntervalRef.current) clearInterval(statsIntervalRef.current)
 
         statsIntervalRef.current = setInterval(async () => {
@@ -73,21 +73,8 @@ const WebRTCViewerCard = forwardRef(
                 jitter: inboundVideo.jitter ? Math.round(inboundVideo.jitter * 1000) : 0,
               }
 
+              // Display only: the server samples transport stats itself (RTCP)
               if (onStatsUpdate) onStatsUpdate(newStats)
-
-              // Report stats to server
-              api
-                .post('/api/webrtc/stats', {
-                  peer_id: pId,
-                  stats: {
-                    rtt_ms: newStats.rtt,
-                    bitrate_kbps: newStats.bitrate,
-                    fps: newStats.fps,
-                    packets_lost: newStats.packetsLost,
-                    jitter_ms: newStats.jitter,
-                  },
-                })
-                .catch(() => {})
             }
           } catch {
             // Stats collection failed, ignore
@@ -157,7 +144,7 @@ const WebRTCViewerCard = forwardRef(
           if (state === 'connected' || state === 'completed') {
             setConnectionState('connected')
             api.post('/api/webrtc/connected', { peer_id: newPeerId }).catch(() => {})
-            startStatsCollection(pc, newPeerId)
+            startStatsCollection(pc)
           } else if (state === 'failed' || state === 'disconnected') {
             setConnectionState('disconnected')
             stopStatsCollection()
@@ -16,6 +16,9 @@ export const VIDEO_DEFAULTS = {
   MULTICAST_TTL: 1,
   RTSP_URL: 'rtsp://localhost:8554/fpv',
   RTSP_TRANSPORT: 'tcp',
+  SRT_MODE: 'caller',
+  SRT_PORT: 8890,
+  SRT_LATENCY_MS: 0,
 }
 
 /** Bitrate options for H.264 encoding (kbps) */
@@ -43,6 +46,7 @@ export const RANGES = {
   QUALITY: { MIN: 10, MAX: 100 },
   PORT: { MIN: 1024, MAX: 65535 },
   TTL: { MIN: 1, MAX: 255 },
+  SRT_LATENCY: { MIN: 0, MAX: 10000 },
 }
 
 /** UI timing constants in milliseconds */
@@ -166,3 +170,38 @@ export const validateRtspUrl = (url) => {
   }
   return { valid: true }
 }
+
+/** Measured encoder fps must beat the target by this margin (matches backend benchmark) */
+export const BENCHMARK_SUSTAIN_MARGIN = 1.1
+
+/**
+ * Keep only frame rates the selected encoder was measured to sustain.
+ * Unmeasured resolutions keep every option; never returns an empty list.
+ * @param {number[]} fpsList - frame rates offered by the camera
+ * @param {Object<string, number>} measuredFps - max encoder fps per "WxH" (from /api/video/codecs)
+ * @param {string} resolution - "WxH"
+ * @returns {number[]}
+ */
+export const filterFpsByCapacity = (fpsList, measuredFps, resolution) => {
+  const max = measuredFps?.[resolution]
+  if (!max) return fpsList
+  const fitting = fpsList.filter((fps) => fps * BENCHMARK_SUSTAIN_MARGIN <= max)
+  return fitting.length > 0 ? fitting : fpsList
+}
+
+/**
+ * Keep only resolutions where the encoder sustains at least one camera frame rate.
+ * @param {string[]} resolutions - "WxH" list offered by the camera
+ * @param {Object<string, number[]>} fpsByResolution - camera frame rates per resolution
+ * @param {Object<string, number>} measuredFps - max encoder fps per "WxH"
+ * @returns {string[]}
+ */
+export const filterResolutionsByCapacity = (resolutions, fpsByResolution, measuredFps) => {
+  const fitting = resolutions.filter((res) => {
+    const max = measuredFps?.[res]
+    if (!max) return true
+    const fpsList = fpsByResolution?.[res] || FALLBACK_FPS
+    return fpsList.some((fps) => fps * BENCHMARK_SUSTAIN_MARGIN <= max)
+  })
+  return fitting.length > 0 ? fitting : resolutions
+}
@@ -13,6 +13,8 @@ import {
   isValidHost,
   validatePort,
   validateRtspUrl,
+  filterFpsByCapacity,
+  filterResolutionsByCapacity,
   VIDEO_DEFAULTS,
   BITRATE_OPTIONS,
   GOP_OPTIONS,
@@ -288,3 +290,32 @@ describe('validateRtspUrl', () => {
     expect(result.error).toBe('views.video.validation.invalidRtspFormat')
   })
 })
+
+// ---------------------------------------------------------------------------
+// Encoder benchmark capacity filters
+// ---------------------------------------------------------------------------
+describe('filterFpsByCapacity', () => {
+  it('keeps everything when the resolution was not benchmarked', () => {
+    expect(filterFpsByCapacity([60, 30, 15], {}, '1920x1080')).toEqual([60, 30, 15])
+  })
+
+  it('drops frame rates above measured capacity', () => {
+    expect(filterFpsByCapacity([60, 30, 15], { '1920x1080': 40 }, '1920x1080')).toEqual([30, 15])
+  })
+
+  it('never returns an empty list', () => {
+    expect(filterFpsByCapacity([60, 30], { '1920x1080': 5 }, '1920x1080')).toEqual([60, 30])
+  })
+})
+
+describe('filterResolutionsByCapacity', () => {
+  it('drops resolutions the encoder cannot sustain', () => {
+    const fpsByRes = { '1920x1080': [30], '1280x720': [30] }
+    const measured = { '1920x1080': 12, '1280x720': 45 }
+    expect(filterResolutionsByCapacity(['1920x1080', '1280x720'], fpsByRes, measured)).toEqual(['1280x720'])
+  })
+
+  it('keeps unmeasured resolutions', () => {
+    expect(filterResolutionsByCapacity(['640x480'], {}, { '1920x1080': 12 })).toEqual(['640x480'])
+  })
+})
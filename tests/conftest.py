@@ -14,6 +14,8 @@ sys.modules["gi"] = MagicMock()
 sys.modules["gi.repository"] = MagicMock()
 
 import os  # noqa: E402
+import shutil  # noqa: E402
+import subprocess  # noqa: E402
 import pytest  # noqa: E402
 import json  # noqa: E402
 from unittest.mock import Mock, patch, MagicMock  # noqa: E402
@@ -146,6 +148,7 @@ def mock_gstreamer():
         mock_gst.StateChangeReturn.SUCCESS = 1
         mock_gst.StateChangeReturn.ASYNC = 2
         mock_gst.StateChangeReturn.FAILURE = 0
+        mock_gst.SECOND = 1_000_000_000
 
         # Mock element creation
         mock_gst.ElementFactory.make.return_value = MagicMock()
@@ -153,6 +156,27 @@ def mock_gstreamer():
         yield mock_gst
 
 
+@pytest.fixture
+def gstreamer_service(mock_gstreamer):
+    """
+    GStreamerService running on the mocked Gst
+
+    The H.264 RTP payloader is already chosen, so output branches can be
+    built without a pipeline; the mocked Gst is available as ``service.gst``
+    """
+    with (
+        patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True),
+        patch("app.services.gstreamer_service.Gst", mock_gstreamer),
+        patch("app.services.gstreamer_service.GLib"),
+    ):
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service._output_payloader = {"element": "rtph264pay", "properties": {"pt": 96}}
+        service.gst = mock_gstreamer
+        yield service
+
+
 @pytest.fixture
 def mock_subprocess():
     """
@@ -588,3 +612,34 @@ def pytest_configure(config):
     config.addinivalue_line("markers", "hardware: tests requiring physical hardware (deselect in CI)")
     config.addinivalue_line("markers", "slow: slow running tests")
     config.addinivalue_line("markers", "integration: integration tests")
+    config.addinivalue_line(
+        "markers",
+        "requires_gst(*elements, netem=False): skip unless real GStreamer has these elements "
+        "(netem=True: also root and iproute2/tc for network namespaces)",
+    )
+
+
+_gst_probes = {}
+
+
+def _gst_elements_available(elements) -> bool:
+    """Probe real GStreamer in a subprocess, since gi is mocked in this one"""
+    if elements not in _gst_probes:
+        check = (
+            "import gi; gi.require_version('Gst', '1.0'); from gi.repository import Gst; Gst.init(None); "
+            f"assert all(Gst.ElementFactory.find(e) for e in {elements!r})"
+        )
+        _gst_probes[elements] = subprocess.run([sys.executable, "-c", check], capture_output=True).returncode == 0
+    return _gst_probes[elements]
+
+
+def pytest_runtest_setup(item):
+    """Skip tests marked requires_gst when their pipeline can't run here"""
+    marker = item.get_closest_marker("requires_gst")
+    if marker is None:
+        return
+    if marker.kwargs.get("netem") and (os.geteuid() != 0 or not shutil.which("ip") or not shutil.which("tc")):
+        pytest.skip("needs root and iproute2/tc")
+    elements = tuple(marker.args)
+    if not _gst_elements_available(elements):
+        pytest.skip(f"needs GStreamer with {', '.join(elements)}")
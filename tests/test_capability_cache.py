@@ -0,0 +1,147 @@
+"""
+Capability Cache Tests
+
+Tests for the persistent video capability cache: serving known hardware
+without probing, persistence across restarts, background revalidation,
+and the providers' use of it through VideoSourceProvider.
+"""
+
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.providers.video_source.v4l2_camera import V4L2CameraSource, v4l2_capability_key
+from app.services.capability_cache import CapabilityCache
+from app.services.preferences import PreferencesService
+
+CAPS = {
+    "is_capture_device": True,
+    "identity": {"name": "Brio 100", "driver": "uvcvideo", "bus_info": "usb-xhci-1.2"},
+    "supported_formats": ["MJPG", "YUYV"],
+    "supported_resolutions": ["1920x1080", "1280x720"],
+    "device_path": "/dev/video0",
+}
+
+
+@pytest.fixture
+def preferences(tmp_path):
+    return PreferencesService(config_path=str(tmp_path / "preferences.json"))
+
+
+def _probe(caps=CAPS):
+    return MagicMock(side_effect=lambda source_id: {**caps, "device_path": source_id})
+
+
+class TestCapabilityCache:
+    """Test lookups, persistence and revalidation"""
+
+    def test_known_hardware_not_probed(self, preferences):
+        """Test the second lookup is served from the cache"""
+        cache = CapabilityCache(preferences)
+        probe = _probe()
+
+        first = cache.get_or_probe("v4l2|cam", "/dev/video0", probe)
+        second = cache.get_or_probe("v4l2|cam", "/dev/video0", probe)
+
+        assert probe.call_count == 1
+        assert first == second
+
+    def test_survives_restart(self, preferences, tmp_path):
+        """Test a new process loads capabilities from preferences.json without probing"""
+        CapabilityCache(preferences).get_or_probe("v4l2|cam", "/dev/video0", _probe())
+
+        restarted = CapabilityCache(PreferencesService(config_path=str(tmp_path / "preferences.json")))
+        probe = _probe()
+        caps = restarted.get_or_probe("v4l2|cam", "/dev/video2", probe)
+
+        probe.assert_not_called()
+        assert caps["supported_resolutions"] == CAPS["supported_resolutions"]
+        assert caps["device_path"] == "/dev/video2"  # renumbered after replug
+
+    def test_failed_probe_not_cached(self, preferences):
+        """Test a device that can't be probed is tried again next time"""
+        cache = CapabilityCache(preferences)
+
+        assert cache.get_or_probe("v4l2|cam", "/dev/video0", MagicMock(return_value=None)) is None
+        assert preferences.get_video_capabilities() == {}
+
+    @patch("app.services.capability_cache.REVALIDATE_DELAY_S", 0)
+    def test_revalidation_picks_up_new_firmware_modes(self, preferences):
+        """Test the background re-probe updates the entry and reports the change"""
+        cache = CapabilityCache(preferences)
+        cache.get_or_probe("v4l2|cam", "/dev/video0", _probe())
+        changed = threading.Event()
+
+        updated = {**CAPS, "supported_resolutions": ["3840x2160", *CAPS["supported_resolutions"]]}
+        cache.get_or_probe("v4l2|cam", "/dev/video0", _probe(updated), changed.set)
+
+        assert changed.wait(2)
+        stored = preferences.get_video_capabilities()["v4l2|cam"]["capabilities"]
+        assert stored["supported_resolutions"][0] == "3840x2160"
+
+    @patch("app.services.capability_cache.REVALIDATE_DELAY_S", 0)
+    def test_revalidation_once_per_run(self, preferences):
+        """Test each entry is re-probed once, however often it is looked up"""
+        cache = CapabilityCache(preferences)
+        cache.get_or_probe("v4l2|cam", "/dev/video0", _probe())
+        probe = _probe()
+        on_change = MagicMock()
+
+        for _ in range(5):
+            cache.get_or_probe("v4l2|cam", "/dev/video0", probe, on_change)
+        for _ in range(200):
+            if probe.called:
+                break
+            threading.Event().wait(0.01)
+
+        threading.Event().wait(0.05)
+        assert probe.call_count == 1
+        on_change.assert_not_called()  # same capabilities
+
+    @patch("app.services.capability_cache.MAX_ENTRIES", 2)
+    def test_oldest_entries_dropped(self, preferences):
+        """Test the cache doesn't grow without bound"""
+        cache = CapabilityCache(preferences)
+        for i in range(3):
+            cache.get_or_probe(f"v4l2|cam{i}", f"/dev/video{i}", _probe())
+
+        assert sorted(preferences.get_video_capabilities()) == ["v4l2|cam1", "v4l2|cam2"]
+
+
+class TestProviderCaching:
+    """Test providers going through the cache"""
+
+    def test_no_sysfs_entry_no_key(self):
+        """Test a node without sysfs entry is probed directly"""
+        assert v4l2_capability_key("/dev/video-does-not-exist") is None
+
+    def test_v4l2_discovery_uses_cache(self, preferences):
+        """Test a known camera is listed without enumerating its formats"""
+        provider = V4L2CameraSource()
+        cache = CapabilityCache(preferences)
+
+        with (
+            patch("app.services.capability_cache.get_capability_cache", return_value=cache),
+            patch.object(V4L2CameraSource, "get_capability_key", return_value="uvcvideo|1-1.2|Brio 100"),
+            patch.object(V4L2CameraSource, "get_source_capabilities", side_effect=_probe()) as probe,
+        ):
+            provider.discover_device("/dev/video0")
+            sources = provider.discover_device("/dev/video0")
+
+        assert probe.call_count == 1
+        assert sources[0]["capabilities"]["supported_formats"] == CAPS["supported_formats"]
+        assert "v4l2|uvcvideo|1-1.2|Brio 100" in preferences.get_video_capabilities()
+
+    def test_unkeyed_provider_always_probes(self):
+        """Test providers without a capability key keep probing every time"""
+        provider = V4L2CameraSource()
+
+        with (
+            patch.object(V4L2CameraSource, "get_capability_key", return_value=None),
+            patch.object(V4L2CameraSource, "get_source_capabilities", return_value=CAPS) as probe,
+        ):
+            provider.get_source_capabilities_cached("/dev/video0")
+            provider.get_source_capabilities_cached("/dev/video0")
+
+        assert probe.call_count == 2
@@ -0,0 +1,214 @@
+"""
+Encoder Benchmark Tests
+
+Tests for the per-board encoder profile: measurement summaries,
+capacity lookup, persistence and benchmark-aware encoder ranking.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.encoder_benchmark import EncoderBenchmark
+
+
+def _profile(results):
+    return {"board_key": "test", "timestamp": 0, "duration_s": 2.0, "results": results}
+
+
+def _entry(width, height, fps, achieved, error=None):
+    return {"width": width, "height": height, "framerate": fps, "achieved_fps": achieved, "error": error}
+
+
+@pytest.fixture
+def preferences():
+    prefs = MagicMock()
+    prefs.get_encoder_benchmark.return_value = _profile(
+        {
+            "h264": [_entry(1280, 720, 30, 45.0), _entry(1920, 1080, 30, 18.0)],
+            "h264_hardware": [_entry(1920, 1080, 30, 62.0), _entry(640, 480, 30, 0.0, error="timeout")],
+        }
+    )
+    return prefs
+
+
+@pytest.fixture
+def benchmark(preferences):
+    return EncoderBenchmark(registry=MagicMock(), preferences=preferences)
+
+
+class TestEncoderBenchmarkSummary:
+    """Test reduction of raw measurements"""
+
+    def test_summarize_fps_and_cpu(self):
+        """Test achieved fps and CPU% (100 = one core)"""
+        summary = EncoderBenchmark._summarize(frames=60, wall_s=1.0, cpu_s=0.5, latencies=[10.0] * 60, fps=30)
+
+        assert summary["achieved_fps"] == 60.0
+        assert summary["cpu_percent"] == 50.0
+        assert summary["latency_ms_avg"] == 10.0
+        assert summary["sustainable"] is True
+
+    def test_summarize_latency_p95(self):
+        """Test p95 latency picks the tail"""
+        latencies = [1.0] * 95 + [50.0] * 5
+        summary = EncoderBenchmark._summarize(frames=100, wall_s=2.0, cpu_s=1.0, latencies=latencies, fps=30)
+
+        assert summary["latency_ms_p95"] == 50.0
+
+    def test_summarize_too_slow(self):
+        """Test a mode below target fps is not sustainable"""
+        summary = EncoderBenchmark._summarize(frames=20, wall_s=1.0, cpu_s=1.0, latencies=[], fps=30)
+
+        assert summary["sustainable"] is False
+        assert summary["latency_ms_avg"] == 0.0
+
+    def test_summarize_empty_run(self):
+        """Test a failed run doesn't divide by zero"""
+        summary = EncoderBenchmark._summarize(frames=0, wall_s=0.0, cpu_s=0.0, latencies=[], fps=30)
+
+        assert summary["achieved_fps"] == 0.0
+        assert summary["cpu_percent"] == 0.0
+
+
+class TestEncoderBenchmarkProfile:
+    """Test stored profile queries"""
+
+    def test_capacity_per_resolution(self, benchmark):
+        """Test capacity maps resolutions to measured fps"""
+        assert benchmark.get_capacity("h264") == {"1280x720": 45.0, "1920x1080": 18.0}
+
+    def test_capacity_skips_errors(self, benchmark):
+        """Test failed modes are not reported as capacity"""
+        assert benchmark.get_capacity("h264_hardware") == {"1920x1080": 62.0}
+
+    def test_can_sustain(self, benchmark):
+        """Test sustain check uses measured fps with margin"""
+        assert benchmark.can_sustain("h264", 1280, 720, 30) is True
+        assert benchmark.can_sustain("h264", 1920, 1080, 30) is False
+        assert benchmark.can_sustain("h264", 640, 480, 30) is None
+        assert benchmark.can_sustain("mjpeg", 1280, 720, 30) is None
+
+    def test_no_profile(self):
+        """Test boards without a benchmark report no data"""
+        prefs = MagicMock()
+        prefs.get_encoder_benchmark.return_value = None
+        benchmark = EncoderBenchmark(registry=MagicMock(), preferences=prefs)
+
+        assert benchmark.get_profile() is None
+        assert benchmark.get_capacity("h264") == {}
+        assert benchmark.can_sustain("h264", 1280, 720, 30) is None
+
+    def test_profile_loaded_once(self, benchmark, preferences):
+        """Test the profile is cached after first load"""
+        benchmark.get_capacity("h264")
+        benchmark.get_capacity("h264_hardware")
+
+        assert preferences.get_encoder_benchmark.call_count == 1
+
+
+class TestEncoderBenchmarkRun:
+    """Test benchmark run orchestration"""
+
+    @patch("app.services.encoder_benchmark.GSTREAMER_AVAILABLE", False)
+    def test_run_without_gstreamer(self, benchmark):
+        """Test run fails cleanly without GStreamer"""
+        result = benchmark.run()
+
+        assert result["success"] is False
+
+    @patch("app.services.encoder_benchmark.GSTREAMER_AVAILABLE", True)
+    def test_run_persists_profile(self, benchmark, preferences):
+        """Test results are stored per board and replace the cached profile"""
+        provider = MagicMock()
+        provider.is_available.return_value = True
+        benchmark._registry.get_video_encoder.return_value = provider
+
+        with patch.object(benchmark, "_benchmark_mode", return_value=_entry(640, 480, 30, 90.0)) as mode:
+            result = benchmark.run(codecs=["h264"], resolutions=[(640, 480)], framerates=[15, 30])
+
+        assert result["success"] is True
+        assert mode.call_count == 2
+        preferences.set_encoder_benchmark.assert_called_once()
+        board_key, profile = preferences.set_encoder_benchmark.call_args[0]
+        assert profile["results"]["h264"][0]["achieved_fps"] == 90.0
+        assert benchmark.get_capacity("h264") == {"640x480": 90.0}
+        assert benchmark.is_running() is False
+
+
+class TestBenchmarkEncoderRanking:
+    """Test registry ranking with a benchmark profile"""
+
+    def test_best_encoder_prefers_sustainable(self):
+        """Test an encoder measured too slow loses to one that keeps up"""
+        from app.providers.registry import ProviderRegistry
+
+        registry = ProviderRegistry()
+        encoders = [
+            {"codec_id": "h264_hardware", "codec_family": "h264", "available": True},
+            {"codec_id": "h264", "codec_family": "h264", "available": True},
+        ]
+        fake_benchmark = MagicMock()
+        fake_benchmark.can_sustain.side_effect = lambda codec, w, h, fps: codec == "h264"
+
+        with (
+            patch.object(registry, "get_available_video_encoders", return_value=encoders),
+            patch.object(registry, "get_video_encoder", side_effect=lambda codec_id: codec_id),
+            patch("app.services.encoder_benchmark.get_encoder_benchmark", return_value=fake_benchmark),
+        ):
+            assert registry.get_best_video_encoder("h264") == "h264_hardware"
+            assert registry.get_best_video_encoder("h264", 1920, 1080, 30) == "h264"
+
+    @pytest.mark.parametrize(
+        "best, hw_sustains, expected",
+        [
+            ("h264", None, "h264"),
+            ("h264_openh264", None, "h264_openh264"),
+            ("h264_hardware", None, "h264_hardware"),
+            ("h264_hardware", True, "h264_hardware"),
+            ("h264_hardware", False, "h264"),  # every encoder too slow: hardware still isn't picked
+            ("h264_passthrough", None, "h264"),  # needs an H.264 camera
+        ],
+    )
+    def test_auto_upgrade_follows_ranking(self, best, hw_sustains, expected):
+        """Test a generic h264 request resolves to the best-ranked encoder the benchmark allows"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        registry = MagicMock()
+        registry.get_best_video_encoder.return_value = MagicMock(codec_id=best)
+        fake_benchmark = MagicMock()
+        fake_benchmark.can_sustain.return_value = hw_sustains
+
+        with (
+            patch("app.providers.registry.get_provider_registry", return_value=registry),
+            patch("app.services.encoder_benchmark.get_encoder_benchmark", return_value=fake_benchmark),
+        ):
+            assert service._adapt_codec_to_board("h264") == expected
+
+        width, height, fps = service.video_config.width, service.video_config.height, service.video_config.framerate
+        registry.get_best_video_encoder.assert_called_once_with("h264", width, height, fps)
+
+    def test_api_runs_in_background(self):
+        """Test POST /benchmark schedules the run and returns without waiting for it"""
+        import asyncio
+
+        from fastapi import BackgroundTasks
+
+        from app.api.routes import video
+        from app.api.routes.video import BenchmarkRequest, run_benchmark
+
+        fake_benchmark = MagicMock()
+        fake_benchmark.get_status.return_value = {"available": True}
+        fake_benchmark.is_running.return_value = False
+        tasks = BackgroundTasks()
+
+        with (
+            patch.object(video, "_video_service", MagicMock(is_streaming=False)),
+            patch("app.services.encoder_benchmark.get_encoder_benchmark", return_value=fake_benchmark),
+        ):
+            result = asyncio.run(run_benchmark(BenchmarkRequest(resolutions=["1280x720"]), MagicMock(), tasks))
+
+        assert result["success"] is True
+        fake_benchmark.run.assert_not_called()
+        assert tasks.tasks[0].func == fake_benchmark.run
+        assert tasks.tasks[0].args == (None, [(1280, 720)], None, 2.0)
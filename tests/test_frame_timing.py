@@ -0,0 +1,244 @@
+"""
+Glass-to-Glass Latency Tests
+
+Tests for the timing SEI, per-stage statistics, the encoder-side
+stamper relay, the GStreamer service wiring, and a videotestsrc →
+loopback receiver measurement.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.frame_timing import (
+    LatencyStages,
+    build_timing_sei,
+    read_timing_sei,
+    stamp_access_unit,
+)
+from app.services.h264_bitstream import index_nals
+
+AUD = b"\x00\x00\x00\x01\x09\xf0"
+SPS = b"\x00\x00\x00\x01\x67\x42\xc0\x1f\x8c\x8d"
+IDR = b"\x00\x00\x00\x01\x65\x88\x84\x00\x33\xff"
+
+
+class TestTimingSei:
+    """Test writing and reading the timing SEI"""
+
+    def test_round_trip(self):
+        """Test both timestamps survive, including zero runs that need escaping"""
+        capture_us, encoded_us = 0x0000000100000002, 0x0000000100000003
+        sei = build_timing_sei(capture_us, encoded_us)
+
+        assert b"\x00\x00\x00" not in sei[4:]  # emulation prevention applied
+        assert read_timing_sei(SPS + sei + IDR) == (capture_us, encoded_us)
+
+    def test_inserted_after_aud(self):
+        """Test the SEI follows the access unit delimiter, before SPS/slices"""
+        stamped = stamp_access_unit(AUD + SPS + IDR, 1_000, 2_000)
+
+        assert [nal_type for _, _, nal_type in index_nals(stamped)] == [9, 6, 7, 5]
+        assert read_timing_sei(stamped) == (1_000, 2_000)
+
+    def test_inserted_first_without_aud(self):
+        """Test the SEI leads an access unit that has no AUD"""
+        stamped = stamp_access_unit(SPS + IDR, 1_000, 2_000)
+
+        assert [nal_type for _, _, nal_type in index_nals(stamped)] == [6, 7, 5]
+
+    def test_other_sei_ignored(self):
+        """Test x264's own user_data_unregistered SEI isn't mistaken for ours"""
+        x264_sei = b"\x00\x00\x00\x01\x06\x05\x20" + bytes(range(16)) + b"x264 - core 164" + b"\x00" * 17 + b"\x80"
+
+        assert read_timing_sei(x264_sei + IDR) is None
+
+
+class TestLatencyStages:
+    """Test per-stage percentiles"""
+
+    def test_percentiles(self):
+        """Test p50/p95/max over the window"""
+        stages = LatencyStages()
+        for ms in range(1, 101):
+            stages.record("capture_to_encode", float(ms))
+
+        stats = stages.get_stats()["capture_to_encode"]
+
+        assert stats["samples"] == 100
+        assert stats["p50_ms"] == 51.0
+        assert stats["p95_ms"] == 96.0
+        assert stats["max_ms"] == 100.0
+
+    def test_network_excludes_send_stage(self):
+        """Test an in-process receiver subtracts the frame's encode → send time"""
+        stages = LatencyStages()
+        stages.record_send(encoded_us=10_000, ms=3.0)
+
+        stages.record_arrival(capture_us=0, encoded_us=10_000, arrival_us=18_000)
+
+        stats = stages.get_stats()
+        assert stats["network"]["p50_ms"] == 5.0
+        assert stats["capture_to_receive"]["p50_ms"] == 18.0
+
+    def test_reset(self):
+        """Test a restart starts from empty samples"""
+        stages = LatencyStages()
+        stages.record("network", 4.0)
+        stages.reset()
+
+        assert stages.get_stats()["network"]["samples"] == 0
+
+
+class TestFrameStamper:
+    """Test the appsink → appsrc relay"""
+
+    @patch("app.services.frame_timing.time.time_ns", return_value=5_000_000_000)
+    @patch("app.services.frame_timing.Gst")
+    def test_stamps_capture_time_from_pts(self, mock_gst, _time):
+        """Test capture → encode comes from base_time + PTS and both times land in the SEI"""
+        from app.services.frame_timing import FrameStamper
+
+        mock_gst.CLOCK_TIME_NONE = -1
+        pipeline = MagicMock()
+        pipeline.get_clock.return_value.get_time.return_value = 1_030_000_000
+        pipeline.get_base_time.return_value = 1_000_000_000
+        stages = LatencyStages()
+        stamper = FrameStamper(pipeline, stages)
+        stamper._appsrc = MagicMock()
+
+        buf = MagicMock(pts=12_000_000)
+        buf.map.return_value = (True, MagicMock(data=SPS + IDR))
+        buf.has_flags.return_value = False
+        appsink = MagicMock()
+        appsink.emit.return_value.get_buffer.return_value = buf
+
+        stamper._on_sample(appsink)
+
+        assert stages.get_stats()["capture_to_encode"]["p50_ms"] == 18.0
+        stamped = mock_gst.Buffer.new_wrapped.call_args[0][0]
+        assert read_timing_sei(stamped) == (5_000_000 - 18_000, 5_000_000)
+        stamper._appsrc.emit.assert_called_once_with("push-buffer", mock_gst.Buffer.new_wrapped.return_value)
+
+
+class TestServiceWiring:
+    """Test the GStreamer service's instrumentation hooks"""
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_stamper_off_by_default(self, mock_gst):
+        """Test no relay is inserted unless latency_probe is on"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        elements = []
+
+        assert service._insert_frame_stamper(MagicMock(), elements, "rtph264pay") == -1
+        assert elements == []
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    @patch("app.services.frame_timing.Gst")
+    def test_stamper_inserted_for_h264(self, frame_gst, mock_gst):
+        """Test the relay goes in before the tee and its appsink → appsrc link is skipped"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service.streaming_config.latency_probe = True
+        elements = [MagicMock(), MagicMock()]
+
+        skip = service._insert_frame_stamper(MagicMock(), elements, "rtph264pay")
+
+        assert len(elements) == 5
+        assert skip == 3  # latency_tap → latency_src
+        frame_gst.ElementFactory.make.assert_any_call("appsrc", "latency_src")
+        assert service.get_latency_stats()["stamping"] is True
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_mjpeg_not_stamped(self, mock_gst):
+        """Test MJPEG streams are left alone"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service.streaming_config.latency_probe = True
+
+        assert service._insert_frame_stamper(MagicMock(), [], "rtpjpegpay") == -1
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_remote_report_in_stats(self, mock_gst):
+        """Test a remote receiver's report appears in the latency stats"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service.record_remote_latency({"receiver": "udpsrc port=5600", "stages": {"network": {"p50_ms": 12.0}}})
+
+        assert service.get_latency_stats()["remote"]["stages"]["network"]["p50_ms"] == 12.0
+
+
+# ── videotestsrc → loopback receiver ────────────────────────────────────────
+
+LOOPBACK_ELEMENTS = ("videotestsrc", "x264enc", "appsink", "appsrc", "rtph264pay", "udpsrc", "rtph264depay")
+
+
+def _measure(port: int = 5610, frames: int = 150) -> dict:
+    """Stream a stamped videotestsrc over loopback RTP and return the stage stats"""
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    from app.services.frame_timing import FrameStamper, LatencyReceiver, udp_source
+
+    Gst.init(None)
+    stages = LatencyStages()
+    receiver = LatencyReceiver(stages, udp_source(port))
+    receiver.start()
+
+    pipeline = Gst.parse_launch(
+        f"videotestsrc is-live=true num-buffers={frames} ! video/x-raw,width=640,height=360,framerate=30/1 ! "
+        "x264enc tune=zerolatency speed-preset=ultrafast key-int-max=30 bitrate=2000 name=enc"
+    )
+    stamper = FrameStamper(pipeline, stages)
+    relay = stamper.create_elements()
+    pay = Gst.ElementFactory.make("rtph264pay")
+    pay.set_property("config-interval", -1)
+    sink = Gst.ElementFactory.make("udpsink")
+    sink.set_property("host", "127.0.0.1")
+    sink.set_property("port", port)
+    sink.set_property("sync", False)
+    for element in relay + [pay, sink]:
+        pipeline.add(element)
+    pipeline.get_by_name("enc").link(relay[0])
+    relay[0].link(relay[1])
+    relay[2].link(pay)
+    pay.link(sink)
+    stamper.watch_sent(sink)
+
+    pipeline.set_state(Gst.State.PLAYING)
+    pipeline.get_bus().timed_pop_filtered(10 * Gst.SECOND, Gst.MessageType.ERROR)
+    pipeline.set_state(Gst.State.NULL)
+    receiver.stop()
+    return {"frames_received": receiver.frames, "stages": stages.get_stats()}
+
+
+@pytest.mark.slow
+@pytest.mark.requires_gst(*LOOPBACK_ELEMENTS)
+def test_loopback_latency_stages():
+    """Measure every stage for videotestsrc → x264 → RTP → loopback receiver"""
+    child = subprocess.run([sys.executable, __file__], capture_output=True, text=True, timeout=60, check=True)
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print()
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<20} p50 {stats['p50_ms']:7.2f}ms  p95 {stats['p95_ms']:7.2f}ms  n={stats['samples']}")
+    assert result["frames_received"] > 0
+    assert all(stats["samples"] > 0 for stats in result["stages"].values())
+
+
+if __name__ == "__main__":
+    print(json.dumps(_measure()))
@@ -239,6 +239,97 @@ class TestGStreamerServiceOpenCV:
         # Should handle missing numpy gracefully
         assert service._is_opencv_enabled() is False
 
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    def test_opencv_pixel_format_follows_encoder(self, mock_gstreamer):
+        """Test native YUV mode negotiates the encoder's raw format"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        assert service._get_opencv_pixel_format() == "BGR"
+
+        opencv_service = MagicMock()
+        opencv_service.uses_yuv.return_value = False
+        service._opencv_service = opencv_service
+        assert service._get_opencv_pixel_format() == "BGR"
+
+        opencv_service.uses_yuv.return_value = True
+        assert service._get_opencv_pixel_format() == "I420"
+
+        nv12_config = {
+            "elements": [
+                {"name": "encoder_caps", "properties": {"caps": "video/x-raw,format=NV12,width=1280,height=720"}}
+            ]
+        }
+        assert service._get_opencv_pixel_format(nv12_config) == "NV12"
+
+    @staticmethod
+    def _yuv_sample(data, width, height, fmt="I420"):
+        map_info = MagicMock(data=data, size=len(data))
+        buf = MagicMock(pts=0, duration=0)
+        buf.map.return_value = (True, map_info)
+        fields = {"width": width, "height": height, "format": fmt}
+        appsink = MagicMock()
+        sample = appsink.emit.return_value
+        sample.get_buffer.return_value = buf
+        sample.get_caps.return_value.get_structure.return_value.get_value.side_effect = fields.get
+        return appsink
+
+    @pytest.mark.parametrize("fmt", ["I420", "NV12"])
+    @patch("app.utils.gstreamer.GstVideo", None)
+    def test_yuv_frame_with_padded_strides(self, mock_gstreamer, fmt):
+        """Test a width that isn't a multiple of 4 keeps GStreamer's padded planes intact"""
+        import queue
+
+        import numpy as np
+
+        from app.services.gstreamer_service import GStreamerService
+        from app.services.opencv_service import OpenCVService
+        from app.utils.gstreamer import yuv420_layout
+
+        width, height = 854, 480
+        offsets, strides, size = yuv420_layout(fmt, width, height)
+        assert strides[0] == 856  # rows padded to 4 bytes
+        data = np.full(size, 7, dtype=np.uint8)  # 7 = row padding
+        data[: offsets[1]].reshape(height, strides[0])[:, :width] = 200
+        chroma_bytes = width if fmt == "NV12" else width // 2
+        for offset, stride in zip(offsets[1:], strides[1:]):
+            data[offset : offset + stride * height // 2].reshape(height // 2, stride)[:, :chroma_bytes] = 90
+
+        service = GStreamerService()
+        service._opencv_queue = queue.Queue()
+        service._on_opencv_new_sample(self._yuv_sample(data.tobytes(), width, height, fmt))
+        item = service._opencv_queue.get_nowait()
+        assert item["layout"] == (offsets, strides, size)
+
+        opencv = OpenCVService()
+        if not opencv.is_available():
+            pytest.skip("OpenCV not available")
+        opencv.set_enabled(True)
+        opencv.update_config({"filter": "grayscale", "pixel_format": "yuv"})
+        result = opencv.process_frame_yuv(item["frame"], fmt, width, height, item["layout"])
+
+        y, chroma = opencv._split_yuv_planes(result, fmt, width, height, item["layout"])
+        assert np.all(y == 200)
+        for plane in chroma if isinstance(chroma, tuple) else (chroma,):
+            assert np.all(plane == 128)
+        assert np.count_nonzero(result == 7) == np.count_nonzero(data == 7)  # padding untouched
+
+    @patch("app.utils.gstreamer.GstVideo", None)
+    def test_short_yuv_buffer_dropped(self, mock_gstreamer):
+        """Test a buffer smaller than its caps' layout is dropped instead of raising"""
+        import queue
+
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service._opencv_queue = queue.Queue()
+
+        result = service._on_opencv_new_sample(self._yuv_sample(bytes(854 * 480 * 3 // 2), 854, 480))
+
+        assert result == mock_gstreamer[0].FlowReturn.OK
+        assert service._opencv_queue.empty()
+        assert service._opencv_frames_dropped == 1
+
 
 class TestGStreamerServiceRTSP:
     """Test GStreamer service RTSP functionality"""
@@ -251,8 +342,7 @@ class TestGStreamerServiceRTSP:
         service = GStreamerService()
 
         assert service.rtsp_server is None
-        assert service._rtsp_stats_thread is None
-        assert service._rtsp_stats_running is False
+        assert service._output_fanout is None
 
     @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
     def test_stop_rtsp_when_no_server(self, mock_gstreamer):
@@ -383,6 +473,92 @@ class TestGStreamerServiceWebRTC:
         assert service._webrtc_opencv_appsink_idx == -1
 
 
+class TestGStreamerServiceLiveRenegotiation:
+    """Test resolution/framerate changes without pipeline restart"""
+
+    def _streaming_service(self, live_capable=True):
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service.is_streaming = True
+        service.video_config.codec = "h264"
+        service.video_config.width = 1280
+        service.video_config.height = 720
+        service.video_config.framerate = 30
+        service._source_output = (1280, 720, 30)
+
+        elements = {"encoder_caps": MagicMock(), "encoder": MagicMock(), "videorate": MagicMock()}
+        elements["encoder_caps"].get_property.return_value.get_structure.return_value.get_value.return_value = "I420"
+        service.pipeline = MagicMock()
+        service.pipeline.get_by_name.side_effect = lambda name: elements.get(name)
+
+        provider = MagicMock()
+        provider.get_capabilities.return_value = {"live_renegotiation": live_capable}
+        registry = MagicMock()
+        registry.get_video_encoder.return_value = provider
+        return service, elements, registry
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    def test_renegotiate_when_not_streaming(self, mock_gstreamer):
+        """Test renegotiation is refused when no pipeline is running"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        result = service.renegotiate_output(640, 360, 20)
+
+        assert result["success"] is False
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    def test_renegotiate_unsupported_encoder(self, mock_gstreamer):
+        """Test encoders without live_renegotiation fall back"""
+        service, elements, registry = self._streaming_service(live_capable=False)
+
+        with patch("app.providers.registry.get_provider_registry", return_value=registry):
+            result = service.renegotiate_output(640, 360, 20)
+
+        assert result["success"] is False
+        elements["encoder_caps"].set_property.assert_not_called()
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    def test_renegotiate_above_source_output(self, mock_gstreamer):
+        """Test upscaling beyond what the source delivers needs a restart"""
+        service, elements, registry = self._streaming_service()
+
+        with patch("app.providers.registry.get_provider_registry", return_value=registry):
+            result = service.renegotiate_output(1920, 1080, 30)
+
+        assert result["success"] is False
+        elements["encoder_caps"].set_property.assert_not_called()
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    def test_renegotiate_updates_caps_and_reports_gap(self, mock_gstreamer):
+        """Test capsfilter update, keyframe request and measured gap"""
+        mock_gst, _ = mock_gstreamer
+        service, elements, registry = self._streaming_service()
+        srcpad = elements["encoder"].get_static_pad.return_value
+
+        def fire_probe(probe_type, callback):
+            info = MagicMock()
+            info.get_buffer.return_value.has_flags.return_value = False  # keyframe
+            callback(srcpad, info)
+            return 1
+
+        srcpad.add_probe.side_effect = fire_probe
+
+        with patch("app.providers.registry.get_provider_registry", return_value=registry):
+            result = service.renegotiate_output(640, 360, 20, timeout=0.5)
+
+        assert result["success"] is True
+        assert result["method"] == "live"
+        assert result["gap_ms"] is not None
+        mock_gst.Caps.from_string.assert_called_with("video/x-raw,format=I420,width=640,height=360,framerate=20/1")
+        elements["encoder_caps"].set_property.assert_called_once()
+        srcpad.send_event.assert_called_once()
+        assert (service.video_config.width, service.video_config.height) == (640, 360)
+        assert service.video_config.framerate == 20
+        assert service.last_renegotiation["old"] == "1280x720@30"
+
+
 class TestGStreamerServiceCleanup:
     """Test GStreamer service cleanup operations"""
 
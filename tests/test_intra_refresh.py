@@ -0,0 +1,209 @@
+"""
+Intra Refresh Tests
+
+Tests for the intra-refresh option in the H.264 providers, keyframe
+requests answered by a refresh wave, and a libx264 measurement of
+frame-size variance with and without it.
+"""
+
+import statistics
+from fractions import Fraction
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.providers.video.hardware_h264_encoder import HardwareH264Encoder
+from app.providers.video.openh264_encoder import OpenH264Encoder
+from app.providers.video.x264_encoder import X264Encoder
+from app.services.keyframe_manager import KeyframeManager
+
+CONFIG = {"width": 1280, "height": 720, "framerate": 30, "bitrate": 2000, "gop_size": 30}
+
+LIST_CTRLS = """
+Codec Controls
+
+                  video_bitrate 0x009909cf (int)    : min=10000 max=20000000 step=1 default=2000000 value=2000000
+                 video_gop_size 0x009909cb (int)    : min=0 max=2048 step=1 default=12 value=12
+           intra_refresh_period 0x00990a16 (int)    : min=0 max=1024 step=1 default=0 value=0
+      slice_partitioning_method 0x009909db (menu)   : min=0 max=2 default=0 value=0 (Single)
+       number_of_mbs_in_a_slice 0x009909dc (int)    : min=1 max=8160 step=1 default=1 value=1
+"""
+
+
+def _encoder_props(result):
+    return next(e for e in result["elements"] if e["name"] == "encoder")["properties"]
+
+
+def _hardware_encoder(list_ctrls):
+    with (
+        patch.object(HardwareH264Encoder, "_detect_encoder_element", return_value="v4l2h264enc"),
+        patch.object(HardwareH264Encoder, "_detect_encoder_device", return_value="/dev/video11"),
+        patch.object(HardwareH264Encoder, "_check_hw_jpegdec", return_value=False),
+    ):
+        encoder = HardwareH264Encoder()
+    with patch("app.providers.video.hardware_h264_encoder.subprocess.run") as mock_run:
+        mock_run.return_value = MagicMock(returncode=0, stdout=list_ctrls)
+        encoder._query_driver_controls()
+    return encoder
+
+
+class TestProviders:
+    """Test each provider's handling of intra_refresh"""
+
+    @patch("app.providers.video.x264_encoder._check_v4l2jpegdec", return_value=False)
+    def test_x264_off_by_default(self, _check):
+        """Test x264 keeps IDR GOPs unless asked"""
+        result = X264Encoder().build_pipeline_elements(CONFIG)
+
+        assert "intra-refresh" not in _encoder_props(result)
+        assert result["intra_refresh"] is False
+
+    @patch("app.providers.video.x264_encoder._check_v4l2jpegdec", return_value=False)
+    def test_x264_refresh_over_gop(self, _check):
+        """Test x264 refreshes over key-int-max frames with sliced threads"""
+        result = X264Encoder().build_pipeline_elements({**CONFIG, "intra_refresh": True})
+        props = _encoder_props(result)
+
+        assert props["intra-refresh"] is True
+        assert props["key-int-max"] == 30
+        assert props["sliced-threads"] is True
+        assert result["intra_refresh"] is True
+
+    @patch("app.providers.video.openh264_encoder.is_gst_element_available", return_value=False)
+    def test_openh264_slices_only(self, _available):
+        """Test openh264enc gets slices but reports no intra refresh"""
+        result = OpenH264Encoder().build_pipeline_elements({**CONFIG, "intra_refresh": True})
+        props = _encoder_props(result)
+
+        assert props["num-slices"] == 4
+        assert props["gop-size"] == 30
+        assert not result.get("intra_refresh")
+
+    def test_hardware_refresh_period(self):
+        """Test a driver with intra_refresh_period gets the wave, slices and a long GOP"""
+        encoder = _hardware_encoder(LIST_CTRLS)
+
+        result = encoder.build_pipeline_elements({**CONFIG, "intra_refresh": True})
+        controls = _encoder_props(result)["extra-controls"]
+
+        assert "intra_refresh_period=30" in controls
+        assert "slice_partitioning_method=1" in controls
+        assert "number_of_mbs_in_a_slice=900" in controls  # 80x45 MBs / 4
+        assert "video_gop_size=2048" in controls
+        assert result["intra_refresh"] is True
+        assert encoder.get_capabilities()["intra_refresh"] is True
+
+    def test_hardware_cyclic_mbs(self):
+        """Test older drivers get intra macroblocks per frame"""
+        encoder = _hardware_encoder("   cyclic_intra_refresh_mbs 0x009909d6 (int)    : min=0 max=8160 step=1\n")
+
+        controls = _encoder_props(encoder.build_pipeline_elements({**CONFIG, "intra_refresh": True}))["extra-controls"]
+
+        assert "cyclic_intra_refresh_mbs=120" in controls  # 3600 MBs / 30 frames
+
+    def test_hardware_unsupported_keeps_gop(self):
+        """Test a driver without refresh controls keeps its IDR GOP"""
+        encoder = _hardware_encoder("     video_bitrate 0x009909cf (int)    : min=1 max=2 step=1\n")
+
+        result = encoder.build_pipeline_elements({**CONFIG, "intra_refresh": True})
+
+        assert "video_gop_size=30" in _encoder_props(result)["extra-controls"]
+        assert result["intra_refresh"] is False
+        assert encoder.get_capabilities()["intra_refresh"] is False
+
+
+class TestRefreshWaveRequests:
+    """Test which keyframe requests still cost an IDR"""
+
+    def test_recovery_requests_use_wave(self):
+        """Test network events and the adaptive GOP don't issue IDRs"""
+        issue = MagicMock(return_value=True)
+        manager = KeyframeManager(issue, lambda: 0, lambda: True)
+
+        for reason in ("cell_change", "band_change", "reconnection", "gop"):
+            assert manager.request(reason)["refresh_wave"] is True
+
+        issue.assert_not_called()
+        assert manager.get_stats()["refresh_waves"] == 4
+
+    def test_new_receivers_still_get_idr(self):
+        """Test PLI and joining receivers get an IDR they can start from"""
+        issue = MagicMock(return_value=True)
+        manager = KeyframeManager(issue, lambda: 0, lambda: True)
+
+        for reason in ("pli", "webrtc_peer", "rtsp_client", "udp_output"):
+            manager.request(reason)
+
+        assert issue.call_count == 4
+
+    def test_without_refresh_all_issue(self):
+        """Test recovery requests are IDRs when the encoder has no intra refresh"""
+        issue = MagicMock(return_value=True)
+        manager = KeyframeManager(issue, lambda: 0, lambda: False)
+
+        manager.request("cell_change")
+
+        issue.assert_called_once()
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_service_follows_active_encoder(self, mock_gst):
+        """Test the service's manager sees whether the built pipeline refreshes"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service.pipeline = MagicMock()
+        service._intra_refresh_active = True
+
+        assert service.force_keyframe("cell_change") is True
+        service.pipeline.get_by_name.assert_not_called()
+        assert service.get_keyframe_stats()["intra_refresh"] is True
+
+
+# ── libx264 frame-size variance ─────────────────────────────────────────────
+
+
+def _frame_sizes(intra_refresh: bool, frames: int = 300, gop: int = 30) -> list:
+    """Encode a panning test pattern with the provider's x264 settings"""
+    av = pytest.importorskip("av")
+    np = pytest.importorskip("numpy")
+    try:
+        codec = av.CodecContext.create("libx264", "w")
+    except Exception:
+        pytest.skip("PyAV built without libx264")
+
+    codec.width, codec.height, codec.pix_fmt = 640, 360, "yuv420p"
+    codec.time_base = Fraction(1, 30)
+    codec.bit_rate = 2_000_000
+    params = f"keyint={gop}:bframes=0:rc-lookahead=0:sync-lookahead=0:sliced-threads=1:threads=4"
+    params += ":vbv-maxrate=2000:vbv-bufsize=300"
+    if intra_refresh:
+        params += ":intra-refresh=1"
+    codec.options = {"preset": "ultrafast", "tune": "zerolatency", "x264-params": params}
+
+    yy, xx = np.mgrid[0:360, 0:1280]
+    pattern = ((np.sin(xx / 7.0) * np.cos(yy / 5.0) + 1) * 100 + (xx * yy) % 37).astype(np.uint8)
+    sizes = []
+    for i in range(frames):
+        image = np.full((540, 640), 128, np.uint8)
+        image[:360] = pattern[:, i * 2 % 640 : i * 2 % 640 + 640]
+        frame = av.VideoFrame.from_ndarray(image, format="yuv420p")
+        frame.pts = i
+        sizes.extend(packet.size for packet in codec.encode(frame))
+    sizes.extend(packet.size for packet in codec.encode(None))
+    return sizes[gop:]  # skip the stream's first IDR, which both modes send
+
+
+def test_frame_size_variance():
+    """Measure how much intra refresh flattens frame sizes at the same bitrate"""
+    report = {}
+    for label, intra_refresh in (("idr_gop", False), ("intra_refresh", True)):
+        sizes = _frame_sizes(intra_refresh)
+        mean = statistics.mean(sizes)
+        report[label] = {"cv": statistics.pstdev(sizes) / mean, "peak_to_mean": max(sizes) / mean}
+
+    print()
+    for label, stats in report.items():
+        print(f"{label:<14} cv {stats['cv']:.2f}  peak/mean {stats['peak_to_mean']:.2f}")
+    assert report["intra_refresh"]["cv"] < report["idr_gop"]["cv"]
+    assert report["intra_refresh"]["peak_to_mean"] < report["idr_gop"]["peak_to_mean"]
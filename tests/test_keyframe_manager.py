@@ -0,0 +1,144 @@
+"""
+Keyframe Manager Tests
+
+Tests for coalescing IDR requests and for the GStreamer service sending
+them to whichever encoder is active.
+"""
+
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.keyframe_manager import KeyframeManager
+
+
+@pytest.fixture
+def issue():
+    return MagicMock(return_value=True)
+
+
+def _manager(issue, interval=0.05):
+    return KeyframeManager(issue, lambda: interval)
+
+
+class TestKeyframeCoalescing:
+    """Test merging bursts of requests"""
+
+    def test_first_request_issued_immediately(self, issue):
+        """Test an idle manager sends the IDR at once"""
+        result = _manager(issue).request("webrtc_peer")
+
+        assert result["issued"] is True
+        issue.assert_called_once()
+
+    def test_burst_costs_two_idrs(self, issue):
+        """Test a burst gives one IDR now and one merged follow-up"""
+        manager = _manager(issue)
+        results = [manager.request(reason) for reason in ("pli", "pli", "rtsp_client", "cell_change")]
+
+        assert [r["coalesced"] for r in results] == [False, True, True, True]
+        assert issue.call_count == 1
+        time.sleep(0.1)
+        assert issue.call_count == 2
+
+        stats = manager.get_stats()
+        assert stats["requests"] == 4
+        assert stats["issued"] == 2
+        assert stats["coalesced"] == 3
+        assert stats["by_reason"] == {"pli": 2, "rtsp_client": 1, "cell_change": 1}
+
+    def test_spaced_requests_not_merged(self, issue):
+        """Test requests further apart than the interval each get an IDR"""
+        manager = _manager(issue, interval=0.01)
+        manager.request()
+        time.sleep(0.03)
+        manager.request()
+
+        assert issue.call_count == 2
+        assert manager.get_stats()["coalesced"] == 0
+
+    def test_zero_interval_disables_coalescing(self, issue):
+        """Test keyframe_min_interval_ms=0 passes every request through"""
+        manager = _manager(issue, interval=0)
+        for _ in range(3):
+            manager.request()
+
+        assert issue.call_count == 3
+
+    def test_failed_request_does_not_block_next(self):
+        """Test a request with no encoder doesn't open a coalescing window"""
+        issue = MagicMock(side_effect=[False, True])
+        manager = _manager(issue, interval=10)
+
+        assert manager.request()["success"] is False
+        assert manager.request()["issued"] is True
+        assert manager.get_stats()["failed"] == 1
+
+    def test_cancel_drops_follow_up(self, issue):
+        """Test stopping the pipeline cancels the pending IDR"""
+        manager = _manager(issue)
+        manager.request()
+        manager.request()
+
+        manager.cancel()
+        time.sleep(0.1)
+
+        assert issue.call_count == 1
+        assert manager.get_stats()["pending"] is False
+
+
+class TestServiceKeyframes:
+    """Test the GStreamer service's keyframe path"""
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_udp_mode_uses_provider_encoder(self, mock_gst):
+        """Test the provider pipeline's "encoder" gets the event outside WebRTC mode"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        encoder = MagicMock()
+        service.pipeline = MagicMock()
+        service.pipeline.get_by_name.side_effect = lambda name: encoder if name == "encoder" else None
+
+        assert service.force_keyframe("udp_output") is True
+        encoder.get_static_pad.return_value.send_event.assert_called_once()
+        assert service.get_keyframe_stats()["by_reason"] == {"udp_output": 1}
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_mjpeg_needs_no_event(self, mock_gst):
+        """Test MJPEG reports success without touching the encoder"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service.pipeline = MagicMock()
+        service._output_payloader = {"element": "rtpjpegpay", "properties": {}}
+
+        assert service.force_keyframe() is True
+        service.pipeline.get_by_name.assert_not_called()
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_no_pipeline(self, mock_gst):
+        """Test requests without a pipeline fail and are counted"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+
+        assert service.force_keyframe() is False
+        assert service.get_keyframe_stats()["failed"] == 1
+
+    def test_bridge_passes_event_reason(self):
+        """Test network events reach the manager with their reason, unthrottled"""
+        from app.services.network_event_bridge import NetworkEventBridge
+
+        bridge = NetworkEventBridge()
+        bridge._gstreamer_service = MagicMock(is_streaming=True)
+
+        bridge._force_keyframe("cell_change")
+        bridge._force_keyframe("band_change")
+
+        assert bridge._gstreamer_service.force_keyframe.call_count == 2
+        bridge._gstreamer_service.force_keyframe.assert_called_with("band_change")
@@ -636,3 +636,209 @@ class TestOpenCVServiceAdvancedFeatures:
 
         # Verify it's stored
         assert opencv_service._telemetry_service is mock_telemetry_service
+
+
+@pytest.mark.skipif(not OpenCVService().is_available(), reason="OpenCV not available")
+class TestOpenCVYUVProcessing:
+    """Test native I420/NV12 processing path"""
+
+    WIDTH = 64
+    HEIGHT = 48
+
+    def _frame(self, y_value=200, chroma_value=90):
+        frame = np.full((self.HEIGHT * 3 // 2, self.WIDTH), chroma_value, dtype=np.uint8)
+        frame[: self.HEIGHT] = y_value
+        return frame
+
+    def test_default_pixel_format_is_bgr(self, opencv_service):
+        """Test BGR remains the default processing format"""
+        assert opencv_service.config["pixel_format"] == "bgr"
+        assert opencv_service.uses_yuv() is False
+
+    def test_invalid_pixel_format_falls_back(self, opencv_service):
+        """Test unknown pixel formats are rejected"""
+        result = opencv_service.update_config({"pixel_format": "rgb565"})
+        assert result["pixel_format"] == "bgr"
+
+    def test_build_gstreamer_element_yuv(self, opencv_service):
+        """Test YUV mode needs no videoconvert"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"pixel_format": "yuv"})
+        element = opencv_service.build_gstreamer_element()
+        assert "videoconvert" not in element
+        assert "I420" in element
+
+    @pytest.mark.parametrize("fmt", ["I420", "NV12"])
+    def test_grayscale_only_touches_chroma(self, opencv_service, fmt):
+        """Test grayscale neutralises chroma and leaves luma untouched"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "grayscale", "pixel_format": "yuv"})
+        frame = self._frame()
+
+        result = opencv_service.process_frame_yuv(frame, fmt, self.WIDTH, self.HEIGHT)
+
+        assert result.shape == frame.shape
+        assert np.all(result[: self.HEIGHT] == 200)
+        assert np.all(result[self.HEIGHT :] == 128)
+
+    @pytest.mark.parametrize("fmt", ["I420", "NV12"])
+    def test_threshold_on_luma(self, opencv_service, fmt):
+        """Test threshold is applied to the Y plane only"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "threshold", "thresholdValue": 100})
+        frame = self._frame(y_value=50)
+        frame[: self.HEIGHT // 2, :] = 150
+
+        result = opencv_service.process_frame_yuv(frame, fmt, self.WIDTH, self.HEIGHT)
+
+        assert np.all(result[: self.HEIGHT // 2] == 255)
+        assert np.all(result[self.HEIGHT // 2 : self.HEIGHT] == 0)
+
+    @pytest.mark.parametrize("fmt", ["I420", "NV12"])
+    def test_processes_in_place(self, opencv_service, fmt):
+        """Test frames are processed without reallocating"""
+        opencv_service.set_enabled(True)
+        for filter_type in ["edges", "blur", "contours"]:
+            opencv_service.update_config({"filter": filter_type})
+            frame = self._frame()
+            result = opencv_service.process_frame_yuv(frame, fmt, self.WIDTH, self.HEIGHT)
+            assert result is frame
+
+    def test_contours_drawn_into_chroma(self, opencv_service):
+        """Test contour colour reaches the subsampled chroma planes"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "contours"})
+        frame = self._frame(y_value=0, chroma_value=128)
+        frame[10:30, 10:40] = 255
+
+        result = opencv_service.process_frame_yuv(frame, "I420", self.WIDTH, self.HEIGHT)
+
+        u_plane = result[self.HEIGHT : self.HEIGHT + self.HEIGHT // 4].reshape(self.HEIGHT // 2, self.WIDTH // 2)
+        assert np.any(u_plane == OpenCVService.CONTOUR_COLOR_YUV[1])
+
+    def test_osd_blended_into_luma(self, opencv_service, mock_telemetry_service):
+        """Test OSD text is drawn into the Y plane"""
+        opencv_service.set_enabled(True)
+        opencv_service.set_telemetry_service(mock_telemetry_service)
+        opencv_service.update_config({"filter": "none", "osd_enabled": True})
+        width, height = 320, 240
+        frame = np.full((height * 3 // 2, width), 128, dtype=np.uint8)
+
+        result = opencv_service.process_frame_yuv(frame, "NV12", width, height)
+
+        assert result[:height].max() > 128
+        assert opencv_service._osd_cache_yuv is not None
+
+    def test_gstreamer_plane_layout(self):
+        """Test rows are padded to 4 bytes the way GStreamer lays out I420/NV12"""
+        from app.utils.gstreamer import yuv420_layout
+
+        assert yuv420_layout("I420", 426, 240) == ((0, 102720, 128640), (428, 216, 216), 154560)
+        assert yuv420_layout("NV12", 426, 240) == ((0, 102720), (428, 428), 154080)
+        assert yuv420_layout("I420", 640, 480)[2] == 640 * 480 * 3 // 2  # tightly packed when aligned
+
+    @pytest.mark.parametrize("fmt", ["I420", "NV12"])
+    def test_padded_rows_skipped(self, opencv_service, fmt):
+        """Test a 426-wide frame's planes are read at their padded strides"""
+        from app.utils.gstreamer import yuv420_layout
+
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "grayscale", "pixel_format": "yuv"})
+        width, height = 426, 240
+        offsets, strides, size = yuv420_layout(fmt, width, height)
+        frame = np.full(size, 90, dtype=np.uint8)
+        frame[: offsets[1]] = 200
+
+        result = opencv_service.process_frame_yuv(frame, fmt, width, height)
+
+        assert np.all(result[: offsets[1]] == 200)
+        chroma = result[offsets[1] :].reshape(-1, strides[1])
+        chroma_bytes = width if fmt == "NV12" else width // 2
+        assert np.all(chroma[:, :chroma_bytes] == 128)
+        assert np.all(chroma[:, chroma_bytes:] == 90)  # padding isn't image data
+
+    def test_unsupported_format_passthrough(self, opencv_service):
+        """Test unknown YUV formats are returned unchanged"""
+        opencv_service.set_enabled(True)
+        frame = self._frame()
+        result = opencv_service.process_frame_yuv(frame, "YUY2", self.WIDTH, self.HEIGHT)
+        assert result is frame
+
+
+@pytest.mark.skipif(not OpenCVService().is_available(), reason="OpenCV not available")
+class TestOpenCVReducedResolutionAnalysis:
+    """Test downscaled analysis with full-resolution overlay"""
+
+    def _frame(self):
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+        frame[100:300, 200:500] = 255
+        return frame
+
+    def test_analysis_scale_clamped(self, opencv_service):
+        """Test analysis_scale is clamped to a sane range"""
+        assert opencv_service.update_config({"analysis_scale": 5})["analysis_scale"] == 1.0
+        assert opencv_service.update_config({"analysis_scale": 0})["analysis_scale"] == 0.1
+
+    def test_contours_overlay_keeps_full_frame(self, opencv_service):
+        """Test contours from the downscaled copy are drawn at full resolution"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "contours", "analysis_overlay": True, "analysis_scale": 0.5})
+
+        result = opencv_service.process_frame(self._frame())
+
+        assert result.shape == (480, 640, 3)
+        contours = opencv_service._analysis_cache["contours"]
+        assert len(contours) == 1
+        xs, ys = contours[0][:, 0, 0], contours[0][:, 0, 1]
+        assert abs(int(xs.min()) - 200) <= 2 and abs(int(xs.max()) - 499) <= 2
+        assert abs(int(ys.min()) - 100) <= 2 and abs(int(ys.max()) - 299) <= 2
+        # Original pixels outside the polyline are preserved
+        assert np.all(result[200, 350] == 255)
+
+    def test_analysis_result_reused_between_runs(self, opencv_service):
+        """Test analysis rate is decoupled from the frame rate"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "edges", "analysis_overlay": True, "analysis_rate_hz": 1})
+
+        for _ in range(5):
+            opencv_service.process_frame(self._frame())
+
+        stats = opencv_service.get_status()["analysis"]
+        assert stats["runs"] == 1
+        assert stats["reused_frames"] == 4
+
+    def test_zero_rate_analyses_every_frame(self, opencv_service):
+        """Test analysis_rate_hz=0 runs analysis on every frame"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "threshold", "analysis_overlay": True, "analysis_rate_hz": 0})
+
+        for _ in range(3):
+            opencv_service.process_frame(self._frame())
+
+        assert opencv_service.get_status()["analysis"]["runs"] == 3
+
+    def test_edges_overlay_full_resolution_mask(self, opencv_service):
+        """Test edge mask is upscaled and painted onto the original frame"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "edges", "analysis_overlay": True, "analysis_scale": 0.25})
+
+        result = opencv_service.process_frame(self._frame())
+
+        assert opencv_service._analysis_cache["mask"].shape == (480, 640)
+        assert np.any(np.all(result == (0, 255, 0), axis=2))
+        assert np.all(result[200, 350] == 255)
+
+    @pytest.mark.parametrize("fmt", ["I420", "NV12"])
+    def test_yuv_overlay(self, opencv_service, fmt):
+        """Test analysis overlay works on native YUV planes"""
+        opencv_service.set_enabled(True)
+        opencv_service.update_config({"filter": "edges", "analysis_overlay": True, "pixel_format": "yuv"})
+        frame = np.full((480 * 3 // 2, 640), 128, dtype=np.uint8)
+        frame[:480] = 0
+        frame[100:300, 200:500] = 255
+
+        result = opencv_service.process_frame_yuv(frame, fmt, 640, 480)
+
+        assert result is frame
+        assert np.any(result[:480] == OpenCVService.ANALYSIS_COLORS["edges"][1][0])
+        assert result[200, 350] == 255
@@ -0,0 +1,233 @@
+"""
+Output Fan-out Tests
+
+Tests for attaching and detaching output branches on the shared
+encoder tee, and the GStreamer service's output API on top of it.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def mock_gst():
+    with patch("app.services.output_fanout.Gst") as gst:
+        gst.PadLinkReturn.OK = 0
+        gst.State.PLAYING = 4
+        gst.State.NULL = 1
+        gst.PadProbeReturn.REMOVE = 1
+        gst.ElementFactory.make.side_effect = lambda factory, name: MagicMock(name=name)
+        yield gst
+
+
+@pytest.fixture
+def fanout(mock_gst):
+    from app.services.output_fanout import OutputFanout
+
+    pipeline = MagicMock()
+    pipeline.get_state.return_value = (1, 1, 0)  # not playing
+    tee = MagicMock()
+    tee.request_pad_simple.return_value.link.return_value = 0
+    return OutputFanout(pipeline, tee)
+
+
+def _element():
+    element = MagicMock()
+    element.link.return_value = True
+    return element
+
+
+class TestOutputFanoutAttach:
+    """Test adding branches to the tee"""
+
+    def test_attach_adds_leaky_queue_and_links_tee(self, fanout, mock_gst):
+        """Test a branch gets its own leaky queue and a tee request pad"""
+        sink = _element()
+        result = fanout.attach("udp", [_element(), sink], {"port": 5600})
+
+        assert result["success"] is True
+        queue = fanout._branches["udp"]["elements"][0]
+        queue.set_property.assert_any_call("leaky", 2)
+        fanout.tee.request_pad_simple.assert_called_once_with("src_%u")
+        sink.sync_state_with_parent.assert_called_once()
+        assert fanout.list_outputs()["udp"]["port"] == 5600
+
+    def test_attach_before_gstreamer_1_20(self, fanout):
+        """Test the tee pad comes from get_request_pad where request_pad_simple doesn't exist"""
+        fanout._tee = MagicMock(spec=["get_request_pad", "release_request_pad"])
+        fanout._tee.get_request_pad.return_value.link.return_value = 0
+
+        assert fanout.attach("udp", [_element()])["success"] is True
+        fanout.tee.get_request_pad.assert_called_once_with("src_%u")
+
+    def test_attach_same_output_twice(self, fanout):
+        """Test an output id can only be attached once"""
+        fanout.attach("udp", [_element()])
+        result = fanout.attach("udp", [_element()])
+
+        assert result["success"] is False
+        assert "already attached" in result["error"]
+
+    def test_attach_link_failure_cleans_up(self, fanout):
+        """Test a branch that fails to link is removed from the pipeline"""
+        element = _element()
+        broken = _element()
+        broken.link.return_value = False
+        result = fanout.attach("rtsp", [broken, element])
+
+        assert result["success"] is False
+        assert not fanout.has("rtsp")
+        assert fanout._pipeline.remove.call_count == 3
+
+    def test_attach_tee_link_failure_releases_pad(self, fanout):
+        """Test a refused tee link releases the request pad"""
+        fanout.tee.request_pad_simple.return_value.link.return_value = 3
+        result = fanout.attach("udp", [_element()])
+
+        assert result["success"] is False
+        fanout.tee.release_request_pad.assert_called_once()
+
+
+class TestOutputFanoutDetach:
+    """Test removing branches from the tee"""
+
+    def test_detach_unknown_output(self, fanout):
+        """Test detaching an output that isn't attached"""
+        assert fanout.detach("rtsp")["success"] is False
+
+    def test_detach_when_stopped_releases_immediately(self, fanout, mock_gst):
+        """Test a stopped pipeline releases the branch synchronously"""
+        fanout.attach("udp", [_element()])
+        pad = fanout._branches["udp"]["pad"]
+
+        result = fanout.detach("udp")
+
+        assert result["success"] is True
+        assert not fanout.has("udp")
+        pad.unlink.assert_called_once()
+        fanout.tee.release_request_pad.assert_called_once_with(pad)
+        pad.add_probe.assert_not_called()
+
+    def test_detach_when_playing_waits_for_idle_pad(self, fanout, mock_gst):
+        """Test a playing pipeline unlinks from an IDLE probe, not mid-buffer"""
+        fanout.attach("udp", [_element()])
+        pad = fanout._branches["udp"]["pad"]
+        fanout._pipeline.get_state.return_value = (1, mock_gst.State.PLAYING, 0)
+
+        fanout.detach("udp")
+
+        pad.add_probe.assert_called_once()
+        pad.unlink.assert_not_called()
+        probe_callback, branch = pad.add_probe.call_args[0][1:]
+        assert probe_callback(pad, None, branch) == mock_gst.PadProbeReturn.REMOVE
+        pad.unlink.assert_called_once()
+
+    def test_detach_with_drain_sends_eos_first(self, fanout, mock_gst):
+        """Test a draining branch gets EOS and is removed only once drained"""
+        import threading
+
+        fanout.attach("record", [_element()])
+        pad = fanout._branches["record"]["pad"]
+        queue = fanout._branches["record"]["elements"][0]
+        fanout._pipeline.get_state.return_value = (1, mock_gst.State.PLAYING, 0)
+        drained = threading.Event()
+
+        assert fanout.detach("record", drained=drained)["draining"] is True
+        probe_callback, branch = pad.add_probe.call_args[0][1:]
+        probe_callback(pad, None, branch)
+
+        queue.get_static_pad.return_value.send_event.assert_called_once_with(mock_gst.Event.new_eos.return_value)
+        pad.unlink.assert_called_once()
+        fanout._pipeline.remove.assert_not_called()
+        drained.set()
+        for _ in range(100):
+            if fanout._pipeline.remove.called:
+                break
+            threading.Event().wait(0.01)
+        assert fanout._pipeline.remove.call_count == 2
+
+    def test_other_outputs_survive_detach(self, fanout):
+        """Test detaching one output leaves the others attached"""
+        fanout.attach("udp", [_element()])
+        fanout.attach("rtsp", [_element()])
+
+        fanout.detach("udp")
+
+        assert list(fanout.list_outputs()) == ["rtsp"]
+
+
+class TestGStreamerServiceOutputs:
+    """Test the service-level output API"""
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_attach_requires_streaming(self, mock_gst):
+        """Test outputs can't be attached without a running pipeline"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        result = service.attach_output("rtsp")
+
+        assert result["success"] is False
+        assert service.get_outputs() == {}
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_attach_unknown_kind(self, mock_gst):
+        """Test unknown output kinds are rejected"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service.is_streaming = True
+        service._output_fanout = MagicMock()
+
+        assert service.attach_output("hls")["success"] is False
+        service._output_fanout.attach.assert_not_called()
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_webrtc_output_needs_h264(self, mock_gst):
+        """Test WebRTC can't be attached to an MJPEG stream"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService(webrtc_service=MagicMock())
+        service._output_payloader = {"element": "rtpjpegpay", "properties": {}}
+
+        branch = service._build_output_branch("webrtc")
+
+        assert branch["success"] is False
+        service.webrtc_service.activate.assert_not_called()
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_extra_udp_output_uses_own_names(self, mock_gst):
+        """Test a secondary UDP output doesn't clash with the primary sink"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service._output_payloader = {"element": "rtph264pay", "properties": {"pt": 96}}
+
+        branch = service._build_output_branch("udp", {"host": "10.0.0.2", "port": 5700})
+
+        assert branch["success"] is True
+        assert branch["info"] == {"host": "10.0.0.2", "port": 5700}
+        mock_gst.ElementFactory.make.assert_any_call("rtph264pay", "udp_rtppay")
+        mock_gst.ElementFactory.make.assert_any_call("udpsink", "udp_sink")
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_detach_rtsp_stops_server(self, mock_gst):
+        """Test detaching RTSP shuts the RTSP server down"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service._output_fanout = MagicMock()
+        service._output_fanout.detach.return_value = {"success": True, "output": "rtsp"}
+        rtsp_server = MagicMock()
+        service.rtsp_server = rtsp_server
+
+        result = service.detach_output("rtsp")
+
+        assert result["success"] is True
+        rtsp_server.stop.assert_called_once()
+        assert service.rtsp_server is None
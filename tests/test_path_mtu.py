@@ -0,0 +1,143 @@
+"""
+Path MTU Tests
+
+Tests for sizing RTP packets to the path: kernel PMTU discovery with DF
+probes, the payloader mtu derived from it, the live update of running
+UDP outputs, the status entry, and the event bridge re-check on a route
+change.
+"""
+
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.path_mtu import discover_path_mtu, rtp_mtu_for_path
+
+
+def _socket(mtus):
+    """UDP socket whose IP_MTU answers walk through ``mtus`` (ICMP frag-needed arriving)"""
+    sock = MagicMock()
+    sock.getsockopt.side_effect = list(mtus) + [mtus[-1]] * 10
+    return sock
+
+
+class TestDiscovery:
+    """Test the kernel-assisted discovery"""
+
+    def test_loopback(self):
+        """Test a real socket: loopback's 64k MTU is capped at Ethernet size"""
+        result = discover_path_mtu("127.0.0.1", probe_wait=0)
+
+        assert result["success"] is True
+        assert result["mtu"] == 1500
+        assert result["source"] == "route"
+
+    def test_icmp_lowers_mtu(self):
+        """Test a router's "fragmentation needed" answer lowers the result"""
+        sock = _socket([1500, 1280])
+        with patch("app.services.path_mtu.socket.socket", return_value=sock):
+            result = discover_path_mtu("10.0.0.2", probe_wait=0)
+
+        assert result["mtu"] == 1280
+        assert result["route_mtu"] == 1500
+        assert result["source"] == "icmp"
+        assert len(sock.send.call_args_list[0][0][0]) == 1472  # full-size probe with DF set
+
+    def test_tunnel_interface_mtu(self):
+        """Test a WireGuard route reports the tunnel MTU without any ICMP"""
+        with patch("app.services.path_mtu.socket.socket", return_value=_socket([1280])):
+            result = discover_path_mtu("100.64.0.2", probe_wait=0)
+
+        assert result["mtu"] == 1280
+        assert result["source"] == "route"
+
+    def test_multicast_not_probed(self):
+        """Test multicast groups only get the interface MTU"""
+        sock = _socket([1500])
+        with patch("app.services.path_mtu.socket.socket", return_value=sock):
+            result = discover_path_mtu("239.1.1.1", probe_wait=0)
+
+        assert result["probes"] == 0
+        sock.send.assert_not_called()
+
+    def test_rtp_mtu_for_path(self):
+        """Test IP/UDP headers and FEC overhead come off, the provider mtu caps it"""
+        assert rtp_mtu_for_path(1280, 1400) == 1252
+        assert rtp_mtu_for_path(1280, 1400, overhead=18) == 1234
+        assert rtp_mtu_for_path(1500, 1400) == 1400
+
+
+@pytest.fixture
+def service(gstreamer_service):
+    with patch("app.services.gstreamer_service.discover_path_mtu") as discover:
+        discover.side_effect = lambda host: {"success": True, "host": host, "mtu": 1280, "source": "route"}
+        gstreamer_service.streaming_config.rtcp_feedback = False
+        gstreamer_service.streaming_config.udp_host = "100.64.0.2"
+        gstreamer_service._output_payloader["properties"]["mtu"] = 1400
+        gstreamer_service.discover = discover
+        yield gstreamer_service
+
+
+def _wait_for_check(service):
+    for _ in range(200):
+        if not service._path_mtu_checking:
+            return
+        threading.Event().wait(0.01)
+
+
+class TestServiceIntegration:
+    """Test the payloader mtu of the UDP outputs"""
+
+    def test_payloader_follows_path(self, service):
+        """Test the background check shrinks the payloader to the tunnel's MTU"""
+        branch = service._build_output_branch("udp", primary=True)
+        _wait_for_check(service)
+
+        branch["elements"][0].set_property.assert_any_call("mtu", 1252)
+        status = service.get_path_mtu_status()["udp"]
+        assert status["path_mtu"] == 1280
+        assert status["payload_mtu"] == 1252
+
+    def test_known_path_applied_at_build(self, service):
+        """Test a destination checked before gets its size before the first packet"""
+        service._path_mtu["100.64.0.2"] = {"success": True, "mtu": 1400}
+        service.discover.side_effect = lambda host: threading.Event().wait(1) or {"success": False}
+
+        branch = service._build_output_branch("udp", primary=True)
+
+        branch["elements"][0].set_property.assert_any_call("mtu", 1372)
+
+    def test_fec_packets_fit(self, service):
+        """Test FEC packets, larger than the media they protect, are accounted for"""
+        service.streaming_config.fec_enabled = True
+
+        branch = service._build_output_branch("udp", primary=True)
+        _wait_for_check(service)
+
+        branch["elements"][0].set_property.assert_any_call("mtu", 1234)
+
+    def test_disabled(self, service):
+        """Test path_mtu_discovery=False leaves the provider's mtu alone"""
+        service.streaming_config.path_mtu_discovery = False
+
+        service._build_output_branch("udp", primary=True)
+
+        service.discover.assert_not_called()
+        assert service.get_path_mtu_status() is None
+
+
+class TestEventBridge:
+    """Test the re-check on a primary interface change"""
+
+    def test_recheck_forwarded(self):
+        """Test the bridge asks the video service to re-discover"""
+        from app.services.network_event_bridge import NetworkEventBridge
+
+        gst = MagicMock()
+        bridge = NetworkEventBridge()
+        bridge._gstreamer_service = gst
+
+        bridge._recheck_path_mtu()
+
+        gst.recheck_path_mtu.assert_called_once()
@@ -0,0 +1,272 @@
+"""
+RTCP Feedback Tests
+
+Tests for RTCP receiver reports on the RTP outputs: parsing rtpbin's
+source stats, dropping reports that stopped arriving, the rtpbin session
+in the UDP branch, the service metrics and client pipeline strings, the
+event bridge using them, and a loopback sender → receiver exchange.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.rtcp_feedback import ReceiverReports, report_from_source_stats
+
+# rtpsession's layout: our sender is an internal source; a receiver report
+# block lives on the remote source that sent it, pointing at us via rb-ssrc
+SENDER = {"internal": True, "is-sender": True, "ssrc": 1234}
+RECEIVER = {"internal": False, "is-sender": False, "ssrc": 99}
+
+
+def _receiver(ssrc=99, **fields):
+    block = {
+        "have-rb": True,
+        "rb-ssrc": SENDER["ssrc"],
+        "rb-fractionlost": 13,  # 13/256 ≈ 5 %
+        "rb-packetslost": 40,
+        "rb-jitter": 900,  # 10 ms at 90 kHz
+        "rb-round-trip": 3277,  # ≈ 50 ms in 1/65536 s
+        "rb-exthighestseq": 5000,
+    }
+    return {**RECEIVER, "ssrc": ssrc, **block, **fields}
+
+
+def _source_stats(**fields):
+    return [SENDER, _receiver(**fields)]
+
+
+class TestReportParsing:
+    """Test turning rtpbin source stats into a receiver report"""
+
+    def test_units_converted(self):
+        """Test fraction lost, jitter and RTT come out as percent and ms"""
+        report = report_from_source_stats(_source_stats())
+
+        assert report["fraction_lost_percent"] == 5.08
+        assert report["jitter_ms"] == 10.0
+        assert report["rtt_ms"] == 50.0
+        assert report["packets_lost"] == 40
+        assert report["receivers"] == 1
+
+    def test_no_report_yet(self):
+        """Test a session without a report block yields nothing"""
+        assert report_from_source_stats([SENDER, RECEIVER]) is None
+
+    def test_report_about_other_sender_ignored(self):
+        """Test a block describing someone else's stream isn't taken for ours"""
+        assert report_from_source_stats([SENDER, _receiver(**{"rb-ssrc": 4321})]) is None
+
+    def test_worst_receiver(self):
+        """Test with several receivers the lossiest one is reported"""
+        report = report_from_source_stats(
+            [SENDER, _receiver(ssrc=98, **{"rb-fractionlost": 0}), _receiver(ssrc=99), RECEIVER]
+        )
+
+        assert report["ssrc"] == 99
+        assert report["receivers"] == 2
+
+
+class TestReceiverReports:
+    """Test the per-session freshness tracking"""
+
+    def test_worst_session_wins(self):
+        """Test the lossiest receiver is the one adapted to"""
+        reports = ReceiverReports()
+        reports.update(
+            {
+                "udp": report_from_source_stats(_source_stats(**{"rb-fractionlost": 0})),
+                "multicast": report_from_source_stats(_source_stats()),
+            }
+        )
+
+        assert reports.worst()["session"] == "multicast"
+
+    def test_repeated_report_goes_stale(self):
+        """Test a report that stops changing expires (receiver gone)"""
+        reports = ReceiverReports()
+        with patch("app.services.rtcp_feedback.time.time", return_value=1000.0):
+            reports.update({"udp": report_from_source_stats(_source_stats())})
+        with patch("app.services.rtcp_feedback.time.time", return_value=1030.0):
+            reports.update({"udp": report_from_source_stats(_source_stats())})
+            assert reports.worst() is None
+
+            reports.update({"udp": report_from_source_stats(_source_stats(**{"rb-exthighestseq": 5100}))})
+            assert reports.worst()["session"] == "udp"
+
+    def test_closed_sessions_dropped(self):
+        """Test sessions missing from a poll are forgotten"""
+        reports = ReceiverReports()
+        reports.update({"rtsp:1": report_from_source_stats(_source_stats())})
+        reports.update({})
+
+        assert reports.worst() is None
+
+
+@pytest.fixture
+def service(gstreamer_service):
+    with (
+        patch("app.services.rtcp_feedback.GSTREAMER_AVAILABLE", True),
+        patch("app.services.rtcp_feedback.Gst") as gst,
+    ):
+        gst.PadLinkReturn.OK = 0
+        gst.ElementFactory.make.return_value.request_pad_simple.return_value.link.return_value = 0
+        gst.ElementFactory.make.return_value.get_static_pad.return_value.link.return_value = 0
+        gstreamer_service.streaming_config.udp_host = "10.0.0.2"
+        yield gstreamer_service
+
+
+class TestServiceIntegration:
+    """Test the rtpbin session in the UDP branch and the service metrics"""
+
+    def test_session_before_udpsink(self, service):
+        """Test the RTCP bin sits between payloader and sink"""
+        branch = service._build_output_branch("udp", primary=True)
+
+        assert len(branch["elements"]) == 3
+        assert "udp" in service._rtcp_sessions
+        assert branch["info"]["rtcp"] == {"sender_reports_port": 5601, "receiver_reports_port": 5605}
+
+    def test_disabled(self, service):
+        """Test rtcp_feedback=False keeps the plain payloader → sink branch"""
+        service.streaming_config.rtcp_feedback = False
+
+        branch = service._build_output_branch("udp", primary=True)
+
+        assert len(branch["elements"]) == 2
+        assert service._rtcp_sessions == {}
+
+    def test_poll_exposes_worst_report(self, service):
+        """Test polled reports land in stats and the event bridge metrics"""
+        session = MagicMock()
+        session.read_report.return_value = report_from_source_stats(_source_stats())
+        service._rtcp_sessions["udp"] = session
+        service.is_streaming = True
+
+        service._poll_rtcp_stats()
+
+        assert service.stats["rtcp"]["session"] == "udp"
+        assert service.get_rtcp_metrics() == {
+            "avg_rtt": 50.0,
+            "jitter": 10.0,
+            "packet_loss": 5.08,
+            "available": True,
+            "source": "rtcp",
+        }
+
+    def test_no_rtt_without_sender_report_echo(self, service):
+        """Test an RTT of 0 (receiver not echoing SRs) isn't passed on as a perfect link"""
+        service.is_streaming = True
+        service.stats["rtcp"] = report_from_source_stats(_source_stats(**{"rb-round-trip": 0}))
+
+        assert "avg_rtt" not in service.get_rtcp_metrics()
+
+    def test_client_pipeline_sends_reports(self, service):
+        """Test the rtpbin receive strings send RTCP back to port + 5"""
+        service.video_config.codec = "h264"
+        with patch.object(service, "_get_streaming_ip", return_value="10.0.0.1"):
+            pipelines = service.get_client_pipeline_strings()["pipelines"]
+
+        udp = pipelines["udp_rtcp"]["pipeline"]
+        assert "udpsrc port=5601 ! rtpbin.recv_rtcp_sink_0" in udp
+        assert udp.endswith("udpsink host=10.0.0.1 sync=false async=false port=5605")
+        assert "multicast-group=239.1.1.1 port=5601" in pipelines["multicast_rtcp"]["pipeline"]
+
+
+class TestEventBridge:
+    """Test the event bridge using RTCP receiver reports"""
+
+    def test_rtcp_metrics_exposed(self):
+        """Test RTCP metrics are picked up as transport metrics"""
+        from app.services.network_event_bridge import NetworkEventBridge
+
+        gst = MagicMock()
+        gst.get_rtcp_metrics.return_value = {"packet_loss": 5.0, "jitter": 10.0, "available": True}
+        bridge = NetworkEventBridge()
+        bridge._gstreamer_service = gst
+
+        assert bridge._get_rtcp_transport_metrics()["packet_loss"] == 5.0
+
+    def test_loss_lowers_score(self):
+        """Test receiver-reported loss pulls the quality score down"""
+        from app.services.network_event_bridge import NetworkEventBridge
+
+        clean, lossy = NetworkEventBridge(), NetworkEventBridge()
+        clean._update_quality_score(None, {"avg_rtt": 30, "jitter": 5, "packet_loss": 0})
+        lossy._update_quality_score(None, {"avg_rtt": 30, "jitter": 5, "packet_loss": 8})
+
+        assert lossy._quality_score.score < clean._quality_score.score
+
+
+# ── loopback sender → rtpbin receiver ───────────────────────────────────────
+
+LOOPBACK_ELEMENTS = ("rtpbin", "videotestsrc", "x264enc", "rtph264pay", "avdec_h264", "udpsrc", "udpsink")
+LOOPBACK_PORT = 15600
+
+
+def _loopback() -> dict:
+    """Stream to our own client pipeline string and wait for its receiver reports"""
+    import time
+
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    from app.services.gstreamer_service import GStreamerService
+    from app.services.rtcp_feedback import RtcpSession
+
+    Gst.init(None)
+    service = GStreamerService()
+    service.video_config.codec = "h264"
+    service.streaming_config.udp_port = LOOPBACK_PORT
+    with patch.object(service, "_get_streaming_ip", return_value="127.0.0.1"):
+        receive = service.get_client_pipeline_strings()["pipelines"]["udp_rtcp"]["pipeline"]
+    receiver = Gst.parse_launch(receive.replace("appsink name=outsink", "fakesink"))
+
+    sender = Gst.parse_launch(
+        "videotestsrc is-live=true ! video/x-raw,width=320,height=240,framerate=30/1 ! "
+        "x264enc tune=zerolatency speed-preset=ultrafast ! rtph264pay pt=96 config-interval=-1 name=pay"
+    )
+    session = RtcpSession("rtcp", "127.0.0.1", LOOPBACK_PORT)
+    rtcp = session.create_element()
+    sink = Gst.ElementFactory.make("udpsink", "sink")
+    sink.set_property("host", "127.0.0.1")
+    sink.set_property("port", LOOPBACK_PORT)
+    sender.add(rtcp)
+    sender.add(sink)
+    sender.get_by_name("pay").link(rtcp)
+    rtcp.link(sink)
+
+    receiver.set_state(Gst.State.PLAYING)
+    sender.set_state(Gst.State.PLAYING)
+    report = None
+    deadline = time.monotonic() + 20
+    while time.monotonic() < deadline:
+        report = session.read_report()
+        if report and report["rtt_ms"] > 0:
+            break
+        time.sleep(0.5)
+    sender.set_state(Gst.State.NULL)
+    receiver.set_state(Gst.State.NULL)
+    return {"report": report}
+
+
+@pytest.mark.slow
+@pytest.mark.requires_gst(*LOOPBACK_ELEMENTS)
+def test_receiver_reports_reach_sender():
+    """Loop the stream through the udp_rtcp client string: the sender reads loss, jitter and RTT"""
+    child = subprocess.run([sys.executable, __file__], capture_output=True, text=True, timeout=60, check=True)
+    report = json.loads(child.stdout.strip().splitlines()[-1])["report"]
+
+    print(f"\n{report}")
+    assert report is not None
+    assert report["fraction_lost_percent"] == 0
+    assert 0 < report["rtt_ms"] < 100  # loopback
+
+
+if __name__ == "__main__":
+    print(json.dumps(_loopback()))
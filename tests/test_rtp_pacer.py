@@ -0,0 +1,273 @@
+"""
+RTP Pacer Tests
+
+Tests for sender-side pacing of the UDP outputs: packet spacing at the
+configured multiple of the bitrate, the cap from max_delay_ms, the
+measured rate without a target bitrate, pacing statistics, the pacer in
+the UDP branch, and an IDR-heavy stream through a netem-shaped veth pair
+with and without pacing.
+"""
+
+import json
+import subprocess
+import sys
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.rtp_pacer import RtpPacer
+
+PACKET_BYTES = 1200
+
+
+def _pacer(target=1000, **kwargs):
+    kwargs.setdefault("packet_bytes", PACKET_BYTES)
+    pacer = RtpPacer("pacer", lambda: target, **kwargs)
+    with patch("app.services.rtp_pacer.GSTREAMER_AVAILABLE", True), patch("app.services.rtp_pacer.Gst"):
+        pacer.create_element(MagicMock())
+    return pacer
+
+
+class TestSpacing:
+    """Test the packet spacing handed to identity"""
+
+    def test_spacing_at_multiple_of_packet_rate(self):
+        """Test packets are spaced at multiplier × the stream's packet rate"""
+        # 1000 kbps in 1200 B packets ≈ 104 pkt/s, plus 30 short frame tails; × 1.2 → ~6.2 ms apart
+        pacer = _pacer(1000, multiplier=1.2, max_delay_ms=500)
+
+        stats = pacer.get_stats()
+        assert stats["rate_kbps"] == 1200
+        assert 6000 < stats["packet_spacing_us"] < 6400
+        pacer._element.set_property.assert_any_call("sleep-time", stats["packet_spacing_us"])
+
+    def test_stream_keeps_up(self):
+        """Test a second of packets takes less than a second to pace, down to low bitrates"""
+        for target in (300, 1000, 4000, 12000):
+            pacer = _pacer(target, multiplier=1.2, max_delay_ms=500)
+            packets_per_s = target * 1000 / 8 / PACKET_BYTES + 30
+
+            assert packets_per_s * pacer.stats["packet_spacing_us"] / 1e6 < 1 / 1.19
+
+    def test_max_delay_caps_spacing(self):
+        """Test the spacing is tightened so an average frame leaves within max_delay_ms"""
+        pacer = _pacer(1000, multiplier=1.2, max_delay_ms=10)
+
+        stats = pacer.get_stats()
+        assert stats["packet_spacing_us"] < 2500
+        assert stats["frame_spread_ms_avg"] <= 10
+
+    def test_refresh_follows_bitrate(self):
+        """Test a bitrate change re-sets sleep-time, an unchanged one doesn't"""
+        bitrate = {"kbps": 1000}
+        pacer = RtpPacer("pacer", lambda: bitrate["kbps"], packet_bytes=PACKET_BYTES)
+        with patch("app.services.rtp_pacer.GSTREAMER_AVAILABLE", True), patch("app.services.rtp_pacer.Gst"):
+            element = pacer.create_element()
+        before = pacer.stats["packet_spacing_us"]
+
+        pacer.refresh()
+        assert element.set_property.call_count == 4  # silent, sync, signal-handoffs, sleep-time
+        bitrate["kbps"] = 4000
+        pacer.refresh()
+
+        assert pacer.stats["packet_spacing_us"] < before
+        element.set_property.assert_called_with("sleep-time", pacer.stats["packet_spacing_us"])
+
+    def test_measured_rate_without_target(self):
+        """Test MJPEG (no bitrate) paces on the rate measured from udpsink's byte counter"""
+        pacer = _pacer(None, multiplier=2.0)
+        assert pacer.stats["packet_spacing_us"] == 0  # nothing measured yet: unpaced
+        pacer._served = (time.monotonic() - 1.0, 0)
+        pacer._sink.get_property.return_value = 125_000  # 1000 kbps over the last second
+
+        pacer.refresh()
+
+        assert pacer.stats["rate_source"] == "measured"
+        assert 1900 <= pacer.stats["rate_kbps"] <= 2000
+        assert pacer.stats["packet_spacing_us"] > 0
+
+
+class TestStats:
+    """Test burst and delay statistics"""
+
+    def test_burst_and_spread(self):
+        """Test the average frame's packets and how long they take to leave"""
+        pacer = _pacer(2000, max_delay_ms=500)  # 2000 kbps / 30 fps ≈ 6.9 full packets + the tail
+
+        stats = pacer.get_stats()
+
+        assert stats["burst_packets_avg"] == 7.9
+        assert stats["frame_spread_ms_avg"] == pytest.approx(7.944 * stats["packet_spacing_us"] / 1000, abs=0.01)
+
+    def test_pacing_delay_from_branch_queue(self):
+        """Test the branch queue's level is reported as the pacing delay, with its maximum"""
+        pacer = _pacer(2000)
+        queue = MagicMock()
+
+        queue.get_property.return_value = 45_000_000
+        assert pacer.get_stats(queue)["pacing_delay_ms"] == 45.0
+        queue.get_property.return_value = 5_000_000
+        stats = pacer.get_stats(queue)
+
+        queue.get_property.assert_called_with("current-level-time")
+        assert stats["pacing_delay_ms"] == 5.0
+        assert stats["pacing_delay_ms_max"] == 45.0
+
+
+class TestServiceIntegration:
+    """Test the pacer in the UDP output branch"""
+
+    @pytest.fixture
+    def service(self):
+        with (
+            patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True),
+            patch("app.services.gstreamer_service.Gst"),
+            patch("app.services.rtp_pacer.GSTREAMER_AVAILABLE", True),
+            patch("app.services.rtp_pacer.Gst"),
+        ):
+            from app.services.gstreamer_service import GStreamerService
+
+            service = GStreamerService()
+            service.streaming_config.rtcp_feedback = False
+            service.streaming_config.rtp_pacing = True
+            service._output_payloader = {"element": "rtph264pay", "properties": {"pt": 96, "mtu": 1200}}
+            yield service
+            service.stop()
+
+    def test_pacer_before_sink(self, service):
+        """Test the pacing element sits right before udpsink and reports stats"""
+        branch = service._build_output_branch("udp", primary=True)
+
+        assert len(branch["elements"]) == 3
+        assert branch["info"]["pacing"] == {"multiplier": 1.5, "max_delay_ms": 30}
+        assert service._pacers["udp"].packet_bytes == 1200
+        assert service.get_pacing_stats()["udp"]["packet_spacing_us"] > 0
+
+    def test_path_mtu_resizes_pacing(self, service):
+        """Test a smaller path MTU shrinks the packets the pacer spaces"""
+        service._build_output_branch("udp", primary=True)
+        service._mtu_targets["udp"] = {"host": "10.0.0.2", "rtppay": MagicMock(), "ceiling": 1200}
+        service._path_mtu["10.0.0.2"] = {"success": True, "mtu": 1000}
+
+        service._apply_path_mtu("udp")
+
+        assert service._pacers["udp"].packet_bytes < 1000
+
+    def test_released_with_output(self, service):
+        """Test detaching the output drops its pacer"""
+        service._build_output_branch("udp", primary=True)
+        pacer = service._pacers["udp"]
+
+        service._release_output_resources("udp")
+
+        assert pacer._element is None
+        assert service.get_pacing_stats() is None
+
+    def test_mjpeg_uses_measured_rate(self, service):
+        """Test MJPEG outputs pace on the measured rate, not h264_bitrate"""
+        service._output_payloader = {"element": "rtpjpegpay", "properties": {}}
+
+        assert service._pacing_target_kbps() is None
+
+
+# ── netem-shaped veth pair ──────────────────────────────────────────────────
+
+NETNS = "fpv-pacing-test"
+VETH_SENDER, VETH_RECEIVER = "fpvpace0", "fpvpace1"
+SENDER_IP, RECEIVER_IP = "10.203.0.1", "10.203.0.2"
+NETEM_RATE = "6mbit"
+NETEM_LIMIT = 12  # packets: a modem-sized buffer an IDR burst overflows
+STREAM_S = 6
+PORT = 15700
+PACING_ELEMENTS = ("videotestsrc", "x264enc", "rtph264pay", "identity", "udpsink")
+
+
+def _sh(*commands):
+    for command in commands:
+        subprocess.run(command.split(), check=True, capture_output=True)
+
+
+def _received(paced: bool) -> dict:
+    """Stream ~4 Mbit/s with an IDR every 10 frames through the shaped link; count what arrives"""
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    Gst.init(None)
+    counter = (
+        "import socket, time; s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM); "
+        f"s.bind(('{RECEIVER_IP}', {PORT})); s.settimeout(1); n = 0; end = time.time() + {STREAM_S + 2}\n"
+        "while time.time() < end:\n"
+        "    try: s.recv(2048); n += 1\n"
+        "    except socket.timeout: pass\n"
+        "print(n)"
+    )
+    receiver = subprocess.Popen(
+        ["ip", "netns", "exec", NETNS, sys.executable, "-c", counter], stdout=subprocess.PIPE, text=True
+    )
+    time.sleep(0.5)
+
+    pipeline = Gst.parse_launch(
+        "videotestsrc is-live=true pattern=snow ! video/x-raw,width=1280,height=720,framerate=30/1 ! "
+        "x264enc tune=zerolatency speed-preset=ultrafast bitrate=4000 key-int-max=10 ! "
+        "rtph264pay pt=96 mtu=1200 name=pay"
+    )
+    sink = Gst.ElementFactory.make("udpsink", "sink")
+    sink.set_property("host", RECEIVER_IP)
+    sink.set_property("port", PORT)
+    pipeline.add(sink)
+    pacer = RtpPacer("pacer", lambda: 4000, multiplier=1.4, max_delay_ms=40)
+    if paced:
+        element = pacer.create_element(sink)
+        pipeline.add(element)
+        pipeline.get_by_name("pay").link(element)
+        element.link(sink)
+    else:
+        pipeline.get_by_name("pay").link(sink)
+
+    pipeline.set_state(Gst.State.PLAYING)
+    time.sleep(STREAM_S)
+    pipeline.set_state(Gst.State.NULL)
+    pacer.stop()
+    received = int(receiver.communicate(timeout=10)[0].strip())
+    return {"received": received, "pacing": pacer.get_stats() if paced else None}
+
+
+@pytest.mark.slow
+@pytest.mark.requires_gst(*PACING_ELEMENTS, netem=True)
+def test_pacing_survives_shallow_modem_buffer():
+    """A shallow netem queue drops IDR bursts; the paced stream loses far fewer packets"""
+    _sh(
+        f"ip netns add {NETNS}",
+        f"ip link add {VETH_SENDER} type veth peer name {VETH_RECEIVER}",
+        f"ip link set {VETH_RECEIVER} netns {NETNS}",
+        f"ip addr add {SENDER_IP}/30 dev {VETH_SENDER}",
+        f"ip link set {VETH_SENDER} up",
+        f"ip netns exec {NETNS} ip addr add {RECEIVER_IP}/30 dev {VETH_RECEIVER}",
+        f"ip netns exec {NETNS} ip link set {VETH_RECEIVER} up",
+        f"tc qdisc add dev {VETH_SENDER} root netem rate {NETEM_RATE} limit {NETEM_LIMIT}",
+    )
+    try:
+        runs = {}
+        for paced in (False, True):
+            child = subprocess.run(
+                [sys.executable, __file__, "paced" if paced else "unpaced"],
+                capture_output=True,
+                text=True,
+                timeout=60,
+                check=True,
+            )
+            runs[paced] = json.loads(child.stdout.strip().splitlines()[-1])
+    finally:
+        subprocess.run(["ip", "link", "del", VETH_SENDER], capture_output=True)
+        subprocess.run(["ip", "netns", "del", NETNS], capture_output=True)
+
+    print(f"\nunpaced: {runs[False]}\npaced: {runs[True]}")
+    assert runs[True]["received"] > runs[False]["received"] * 1.1
+    assert runs[True]["pacing"]["packet_spacing_us"] > 0
+
+
+if __name__ == "__main__":
+    print(json.dumps(_received(sys.argv[1] == "paced")))
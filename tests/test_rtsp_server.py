@@ -0,0 +1,73 @@
+"""
+RTSP Server Tests
+
+Tests for the shared mode's appsrc bound: leaky where GStreamer supports
+it, dropping in push_sample() where it doesn't.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.rtsp_server import RTSPServer, SHARED_SRC_MAX_BYTES
+
+
+@pytest.fixture
+def server():
+    server = RTSPServer()
+    server._serve = MagicMock()
+    return server
+
+
+def _media(appsrc):
+    media = MagicMock()
+    media.get_element.return_value.get_child_by_name.return_value = appsrc
+    return media
+
+
+def _appsrc(level=0, leaky=True):
+    appsrc = MagicMock()
+    props = {"caps": "caps", "current-level-bytes": level, "dropped": 3}
+
+    def set_property(name, value):
+        if name == "leaky-type" and not leaky:
+            raise TypeError("object of type `GstAppSrc' does not have property `leaky-type'")
+
+    appsrc.get_property.side_effect = props.get
+    appsrc.set_property.side_effect = set_property
+    return appsrc
+
+
+class TestSharedSource:
+    """Test the bound on data queued for a shared-mode client"""
+
+    def test_launch_string_bounded(self, server):
+        """Test the shared appsrc never blocks and is capped in bytes"""
+        server.start_shared()
+
+        pipeline = server._serve.call_args[0][0]
+        assert "block=false" in pipeline
+        assert f"max-bytes={SHARED_SRC_MAX_BYTES}" in pipeline
+
+    def test_appsrc_leaks_downstream(self, server):
+        """Test a prepared media's appsrc drops its oldest data, and its drops are reported"""
+        appsrc = _appsrc()
+        server._on_media_configure(None, _media(appsrc))
+
+        appsrc.set_property.assert_any_call("leaky-type", 2)
+        with patch("app.services.rtsp_server.Gst"):
+            server.push_sample(MagicMock())
+        appsrc.emit.assert_called_once()
+        assert server.get_stats()["frames_dropped"] == 3
+
+    def test_full_appsrc_dropped_without_leaky_type(self, server):
+        """Test GStreamer < 1.20: a full appsrc gets nothing more until it drains"""
+        full, draining = _appsrc(SHARED_SRC_MAX_BYTES, leaky=False), _appsrc(0, leaky=False)
+        server._on_media_configure(None, _media(full))
+        server._on_media_configure(None, _media(draining))
+
+        with patch("app.services.rtsp_server.Gst"):
+            server.push_sample(MagicMock())
+
+        full.emit.assert_not_called()
+        draining.emit.assert_called_once()
+        assert server.get_stats()["frames_dropped"] == 1
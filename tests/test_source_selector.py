@@ -0,0 +1,265 @@
+"""
+Source Selector Tests
+
+Tests for the camera hot-swap and no-signal slate: the input-selector
+and slate, losing and re-attaching the camera, the GStreamer service
+falling back to the slate instead of stopping, restart() swapping only
+the camera, and a videotestsrc camera swap under a running encoder.
+"""
+
+import json
+import subprocess
+import sys
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.source_selector import SourceSelector
+
+
+@pytest.fixture
+def mock_gst():
+    with patch("app.services.source_selector.Gst") as gst:
+        gst.PadLinkReturn.OK = 0
+        gst.ElementFactory.make.side_effect = lambda factory, name: _element(name)
+        yield gst
+
+
+def _element(name="element"):
+    element = MagicMock(name=name)
+    element.get_name.return_value = name
+    element.link.return_value = True
+    element.get_static_pad.return_value.link.return_value = 0
+    return element
+
+
+@pytest.fixture
+def selector(mock_gst):
+    on_switch = threading.Event()
+    selector = SourceSelector(MagicMock(), on_switch=on_switch.set)
+    assert selector.create(1280, 720, 30) is True
+    camera = [_element("v4l2src"), _element("decoder")]
+    selector.adopt_camera(camera)
+    selector.camera = camera
+    selector.switched = on_switch
+    return selector
+
+
+class TestSelector:
+    """Test the selector, slate and camera segment handling"""
+
+    def test_slate_idle_while_camera_on_air(self, selector, mock_gst):
+        """Test the slate is created locked so it doesn't run behind the camera"""
+        slate_src = selector._slate[0]
+        slate_src.set_property.assert_any_call("is-live", True)
+        slate_src.set_locked_state.assert_called_once_with(True)
+        selector.element.set_property.assert_any_call("sync-streams", False)
+        assert selector.get_stats()["active"] == "camera"
+
+    def test_camera_lost_shows_slate(self, selector, mock_gst):
+        """Test a lost camera is removed and the slate goes on air"""
+        camera_pad = selector._camera_pad
+
+        selector.camera_lost("Could not read from resource")
+
+        selector.element.set_property.assert_called_with("active-pad", selector._slate_pad)
+        selector._slate[0].sync_state_with_parent.assert_called_once()
+        for element in selector.camera:
+            element.set_state.assert_called_with(mock_gst.State.NULL)
+            selector._pipeline.remove.assert_any_call(element)
+        selector.element.release_request_pad.assert_called_once_with(camera_pad)
+        stats = selector.get_stats()
+        assert stats["active"] == "slate"
+        assert stats["camera_losses"] == 1
+
+    def test_owns_camera_elements_only(self, selector):
+        """Test errors are attributed to the camera segment by element"""
+        assert selector.owns(_element("v4l2src")) is True
+        assert selector.owns(_element("encoder")) is False
+
+    def test_failed_camera_eos_dropped(self, selector, mock_gst):
+        """Test the EOS a failing source sends never reaches the encoder"""
+        probe = selector._camera_pad.add_probe.call_args[0][1]
+        eos = MagicMock()
+        eos.get_event.return_value.type = mock_gst.EventType.EOS
+
+        assert probe(selector._camera_pad, eos) == mock_gst.PadProbeReturn.DROP
+
+    def test_new_camera_on_air_at_first_frame(self, selector, mock_gst):
+        """Test the slate stays until the new camera delivers, then one keyframe is requested"""
+        selector.camera_lost("unplugged")
+        new_camera = [_element("v4l2src"), _element("decoder")]
+
+        result = selector.attach_camera(new_camera, timeout=0.01)
+        assert result["attached"] is True
+        assert selector.on_slate is True
+
+        pad = selector._camera_pad
+        on_buffer, data = pad.add_probe.call_args[0][1:]
+        assert on_buffer(pad, MagicMock(), data) == mock_gst.PadProbeReturn.REMOVE
+
+        assert selector.switched.wait(1)
+        selector.element.set_property.assert_called_with("active-pad", pad)
+        stats = selector.get_stats()
+        assert stats["active"] == "camera"
+        assert stats["switches"] == 1
+        assert stats["last_switch_ms"] >= 0
+
+
+class TestServiceFallback:
+    """Test the GStreamer service with a source selector"""
+
+    @pytest.fixture
+    def service(self):
+        with (
+            patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True),
+            patch("app.services.gstreamer_service.Gst") as gst,
+        ):
+            from app.services.gstreamer_service import GStreamerService
+
+            svc = GStreamerService()
+            svc.is_streaming = True
+            svc.pipeline = MagicMock()
+            svc._source_selector = MagicMock()
+            svc._source_device = svc.video_config.device
+            svc._running_signature = svc._config_signature(ignore_source=True)
+            svc.gst = gst
+            yield svc
+
+    def test_camera_error_falls_back_to_slate(self, service):
+        """Test a camera error keeps the pipeline running on the slate"""
+        message = MagicMock(type=service.gst.MessageType.ERROR)
+        message.parse_error.return_value = ("Could not read from resource", None)
+        service._source_selector.owns.return_value = True
+
+        with patch.object(service, "stop") as stop, patch.object(service, "_broadcast_status"):
+            service._on_bus_message(None, message)
+
+        service._source_selector.camera_lost.assert_called_once()
+        stop.assert_not_called()
+
+    def test_restart_swaps_only_camera(self, service):
+        """Test a restart after a device change switches the source in place"""
+        service.video_config.device = "/dev/video2"
+
+        with (
+            patch.object(service, "switch_source", return_value={"success": True}) as switch,
+            patch.object(service, "stop") as stop,
+        ):
+            service.restart()
+
+        switch.assert_called_once_with("/dev/video2")
+        stop.assert_not_called()
+
+    def test_restart_rebuilds_for_other_changes(self, service):
+        """Test any other config change still rebuilds the pipeline"""
+        service.video_config.device = "/dev/video2"
+        service.video_config.width = 640
+
+        with (
+            patch.object(service, "switch_source") as switch,
+            patch.object(service, "stop"),
+            patch.object(service, "start", return_value={"success": True}),
+            patch("time.sleep"),
+        ):
+            service.restart()
+
+        switch.assert_not_called()
+
+    def test_reattach_finds_camera_by_identity(self, service):
+        """Test a lost camera that came back on another node is reattached there"""
+        service._source_selector.has_camera = False
+        service.video_config.device = "/dev/video0"
+        prefs = {"device": "/dev/video0", "device_name": "Brio 100", "device_bus_info": "usb-1.2"}
+
+        with (
+            patch("app.services.preferences.get_preferences") as get_preferences,
+            patch("app.providers.registry.get_provider_registry") as get_registry,
+            patch("app.services.gstreamer_service.os.path.exists", return_value=True),
+            patch("app.services.gstreamer_service.threading.Thread") as thread,
+        ):
+            get_preferences.return_value.get_video_config.return_value = prefs
+            registry = get_registry.return_value
+            registry.find_video_source_by_identity.return_value = {"source_id": "/dev/video3", "device": "/dev/video3"}
+            service.reattach_source()
+
+        registry.find_video_source_by_identity.assert_called_once_with("Brio 100", "usb-1.2")
+        assert thread.call_args.kwargs["args"] == ("/dev/video3",)
+
+
+# ── videotestsrc camera swap ────────────────────────────────────────────────
+
+SWAP_ELEMENTS = ("videotestsrc", "input-selector", "videoconvert", "x264enc", "fakesink")
+
+
+def _swap() -> dict:
+    """Lose a test-pattern 'camera', attach another, and count encoded frames throughout"""
+    import time
+
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    Gst.init(None)
+    pipeline = Gst.parse_launch(
+        "videoconvert name=videoconvert ! x264enc tune=zerolatency speed-preset=ultrafast key-int-max=60 name=encoder"
+        " ! fakesink name=sink sync=false"
+    )
+    encoded = []
+    pipeline.get_by_name("encoder").get_static_pad("src").add_probe(
+        Gst.PadProbeType.BUFFER, lambda pad, info: encoded.append(time.monotonic()) or Gst.PadProbeReturn.OK
+    )
+
+    def camera(pattern):
+        src = Gst.ElementFactory.make("videotestsrc", None)
+        src.set_property("is-live", True)
+        src.set_property("pattern", pattern)
+        caps = Gst.ElementFactory.make("capsfilter", None)
+        caps.set_property("caps", Gst.Caps.from_string("video/x-raw,width=640,height=360,framerate=30/1"))
+        return [src, caps]
+
+    def request_keyframe():
+        structure = Gst.Structure.new_from_string("GstForceKeyUnit, all-headers=(boolean)true")
+        event = Gst.Event.new_custom(Gst.EventType.CUSTOM_UPSTREAM, structure)
+        pipeline.get_by_name("encoder").get_static_pad("src").send_event(event)
+
+    selector = SourceSelector(pipeline, on_switch=request_keyframe)
+    selector.create(640, 360, 30)
+    selector.element.link(pipeline.get_by_name("videoconvert"))
+    first = camera("ball")
+    for element in first:
+        pipeline.add(element)
+    first[0].link(first[1])
+    first[1].link(selector.element)
+    selector.adopt_camera(first)
+    pipeline.set_state(Gst.State.PLAYING)
+    time.sleep(1)
+
+    selector.camera_lost("test")
+    lost_at = time.monotonic()
+    time.sleep(0.5)
+    result = selector.attach_camera(camera("snow"))
+    time.sleep(0.5)
+    pipeline.set_state(Gst.State.NULL)
+
+    gaps = [b - a for a, b in zip(encoded, encoded[1:]) if a >= lost_at - 0.1]
+    return {"result": result, "frames": len(encoded), "max_gap_ms": round(max(gaps) * 1000, 1)}
+
+
+@pytest.mark.slow
+@pytest.mark.requires_gst(*SWAP_ELEMENTS)
+def test_camera_swap_keeps_encoder_running():
+    """Swap cameras under a running encoder: frames never stop and the switch is within one GOP"""
+    child = subprocess.run([sys.executable, __file__], capture_output=True, text=True, timeout=60, check=True)
+    swap = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"\n{swap}")
+    assert swap["result"]["success"] is True
+    assert swap["result"]["switch_ms"] < 2000  # one GOP at key-int-max=60, 30 fps
+    assert swap["max_gap_ms"] < 200  # slate covered the gap
+
+
+if __name__ == "__main__":
+    print(json.dumps(_swap()))
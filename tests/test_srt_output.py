@@ -0,0 +1,331 @@
+"""
+SRT Output Tests
+
+Tests for the SRT streaming mode: branch construction, caller/listener
+URIs, the RTT-derived latency budget, srtsink statistics, client
+pipeline strings, the event bridge hooks, and a loopback srtsink →
+srtsrc run under netem loss.
+"""
+
+import subprocess
+import sys
+import uuid
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _sink(latency=120):
+    sink = MagicMock()
+    properties = {"latency": latency, "uri": None}
+    sink.set_property.side_effect = properties.__setitem__
+    sink.get_property.side_effect = properties.get
+    return sink
+
+
+class _Structure:
+    """Minimal Gst.Structure stand-in for srtsink's "stats" property"""
+
+    def __init__(self, fields):
+        self._names = list(fields)
+        self._fields = fields
+
+    def n_fields(self):
+        return len(self._names)
+
+    def nth_field_name(self, index):
+        return self._names[index]
+
+    def get_value(self, name):
+        return self._fields[name]
+
+
+@pytest.fixture
+def service(gstreamer_service):
+    gstreamer_service.gst.ElementFactory.make.side_effect = lambda factory, name: (
+        _sink() if factory == "srtsink" else MagicMock()
+    )
+    gstreamer_service.streaming_config.mode = "srt"
+    gstreamer_service.streaming_config.srt_host = "10.0.0.2"
+    return gstreamer_service
+
+
+class TestSrtBranch:
+    """Test the SRT output branch"""
+
+    def test_branch_muxes_ts_into_srtsink(self, service):
+        """Test parse → mpegtsmux → srtsink with the caller URI"""
+        branch = service._build_output_branch("srt", {"host": "10.0.0.9", "port": 9000})
+
+        assert branch["success"] is True
+        parser, mux, sink = branch["elements"]
+        service.gst.ElementFactory.make.assert_any_call("h264parse", "srt_parse")
+        service.gst.ElementFactory.make.assert_any_call("srtsink", "srt_sink")
+        mux.set_property.assert_any_call("alignment", 7)
+        assert branch["info"]["uri"] == "srt://10.0.0.9:9000?mode=caller"
+        assert sink.get_property("wait-for-connection") is False
+
+    def test_listener_uri(self, service):
+        """Test listener mode binds the port instead of dialing"""
+        service.streaming_config.srt_mode = "listener"
+
+        assert service._srt_uri() == "srt://:8890?mode=listener"
+
+    def test_requires_h264_or_h265(self, service):
+        """Test MJPEG can't be carried over the SRT output"""
+        service._output_payloader = {"element": "rtpjpegpay", "properties": {}}
+
+        assert service._build_output_branch("srt")["success"] is False
+
+    def test_missing_srt_plugin(self, service):
+        """Test a missing srtsink is reported instead of crashing"""
+        service.gst.ElementFactory.make.side_effect = lambda factory, name: (
+            None if factory == "srtsink" else MagicMock()
+        )
+
+        branch = service._build_output_branch("srt", {"host": "10.0.0.9"})
+
+        assert branch["success"] is False
+        assert "srtsink" in branch["error"]
+
+    def test_caller_needs_host(self, service):
+        """Test start() refuses caller mode without a receiver address"""
+        service.streaming_config.srt_host = ""
+
+        with patch("app.services.gstreamer_service.os.path.exists", return_value=True):
+            result = service.start()
+
+        assert result["success"] is False
+        assert "SRT" in result["message"]
+
+
+class TestSrtLatency:
+    """Test the latency budget following RTT"""
+
+    def test_default_until_rtt_known(self, service):
+        """Test libsrt's default latency before any measurement"""
+        assert service._srt_latency_ms() == 120
+
+    def test_latency_is_multiple_of_rtt(self, service):
+        """Test latency = SRT_RTT_FACTOR × RTT, clamped"""
+        service._srt_rtt_ms = 60
+        assert service._srt_latency_ms() == 240
+
+        service._srt_rtt_ms = 5
+        assert service._srt_latency_ms() == 80
+
+        service._srt_rtt_ms = 900
+        assert service._srt_latency_ms() == 2000
+
+    def test_configured_latency_wins(self, service):
+        """Test a fixed srt_latency_ms isn't overridden by RTT"""
+        service.streaming_config.srt_latency_ms = 500
+
+        assert service.update_srt_latency(200) is None
+        assert service._srt_latency_ms() == 500
+
+    def test_update_sets_running_sink(self, service):
+        """Test a new RTT reaches the srtsink for the next handshake"""
+        sink = _sink(latency=120)
+        service.pipeline = MagicMock()
+        service.pipeline.get_by_name.side_effect = lambda name: sink if name == "sink" else None
+
+        result = service.update_srt_latency(100)
+
+        assert result["applied"] == 1
+        assert sink.get_property("latency") == 400
+
+    def test_small_rtt_change_ignored(self, service):
+        """Test changes inside the deadband leave the sink alone"""
+        sink = _sink(latency=400)
+        service.pipeline = MagicMock()
+        service.pipeline.get_by_name.side_effect = lambda name: sink if name == "sink" else None
+
+        assert service.update_srt_latency(110)["applied"] == 0
+
+
+class TestSrtStats:
+    """Test srtsink statistics polling"""
+
+    def _poll(self, service, fields):
+        sink = _sink(latency=240)
+        sink.get_property.side_effect = lambda name: _Structure(fields) if name == "stats" else 240
+        service.pipeline = MagicMock()
+        service.pipeline.get_by_name.side_effect = lambda name: sink if name == "sink" else None
+        service._poll_srt_stats()
+        return service.stats["srt"]
+
+    def test_loss_and_retransmit_from_deltas(self, service):
+        """Test per-poll loss and retransmit rates"""
+        base = {"rtt-ms": 42.0, "bandwidth-mbps": 6.5, "send-rate-mbps": 2.0, "negotiated-latency-ms": 240}
+        self._poll(service, {**base, "packets-sent": 1000, "packets-sent-lost": 10, "packets-retransmitted": 12})
+        srt = self._poll(service, {**base, "packets-sent": 2000, "packets-sent-lost": 30, "packets-retransmitted": 52})
+
+        assert srt["connected"] is True
+        assert srt["rtt_ms"] == 42.0
+        assert srt["bandwidth_kbps"] == 6500
+        assert srt["loss_percent"] == 2.0
+        assert srt["retransmit_percent"] == 4.0
+
+    def test_listener_reports_worst_caller(self, service):
+        """Test a listener's callers array folds to the highest-RTT caller"""
+        callers = [
+            _Structure({"rtt-ms": 20.0, "packets-sent": 100}),
+            _Structure({"rtt-ms": 80.0, "packets-sent": 100}),
+        ]
+        srt = self._poll(service, {"callers": callers})
+
+        assert srt["callers"] == 2
+        assert srt["rtt_ms"] == 80.0
+
+    def test_not_connected(self, service):
+        """Test a sink without a peer reports disconnected"""
+        srt = self._poll(service, {})
+
+        assert srt == {"connected": False, "latency_ms": 240}
+        assert service.get_srt_metrics() is None
+
+    def test_metrics_for_event_bridge(self, service):
+        """Test get_srt_metrics maps stats to latency_data"""
+        service.is_streaming = True
+        service.stats["srt"] = {"connected": True, "rtt_ms": 35.0, "loss_percent": 1.5, "bandwidth_kbps": 4000}
+
+        metrics = service.get_srt_metrics()
+
+        assert metrics["avg_rtt"] == 35.0
+        assert metrics["packet_loss"] == 1.5
+        assert metrics["source"] == "srt"
+
+
+class TestSrtClientPipeline:
+    """Test the receiver pipeline string"""
+
+    def test_receiver_takes_opposite_role(self, service):
+        """Test a caller sender gets a listener receive string and vice versa"""
+        service.video_config.codec = "h264"
+        with patch.object(service, "_get_streaming_ip", return_value="10.0.0.1"):
+            caller = service.get_client_pipeline_strings()["pipelines"]["srt"]["pipeline"]
+            service.streaming_config.srt_mode = "listener"
+            listener = service.get_client_pipeline_strings()["pipelines"]["srt"]["pipeline"]
+
+        assert caller.startswith("srtsrc uri=srt://:8890?mode=listener")
+        assert listener.startswith("srtsrc uri=srt://10.0.0.1:8890?mode=caller")
+        assert "tsdemux" in caller and "h264parse" in caller
+
+
+class TestSrtEventBridge:
+    """Test the event bridge using SRT link metrics"""
+
+    def _bridge(self, gst):
+        from app.services.network_event_bridge import NetworkEventBridge
+
+        bridge = NetworkEventBridge()
+        bridge._gstreamer_service = gst
+        return bridge
+
+    def test_rtt_reaches_latency_tuning(self):
+        """Test the measured RTT is forwarded to update_srt_latency"""
+        gst = MagicMock(is_streaming=True)
+        bridge = self._bridge(gst)
+
+        bridge._apply_srt_latency({"avg_rtt": 55.0, "available": True})
+
+        gst.update_srt_latency.assert_called_once_with(55.0)
+
+    def test_srt_metrics_exposed(self):
+        """Test SRT metrics are picked up as transport metrics"""
+        gst = MagicMock()
+        gst.get_srt_metrics.return_value = {"avg_rtt": 40, "packet_loss": 0.5, "available": True}
+        bridge = self._bridge(gst)
+
+        assert bridge._get_srt_transport_metrics()["avg_rtt"] == 40
+
+    @pytest.mark.asyncio
+    async def test_bitrate_capped_by_srt_bandwidth(self):
+        """Test the encoder target stays under SRT's bandwidth estimate"""
+        gst = MagicMock(is_streaming=True)
+        gst.get_srt_metrics.return_value = {"bandwidth_kbps": 1000, "available": True}
+        gst.video_config.codec = "h264"
+        gst.video_config.h264_bitrate = 1000
+        gst.update_live_property.return_value = {"success": True}
+        bridge = self._bridge(gst)
+        bridge._quality_score.recommended_bitrate_kbps = 6000
+        bridge._last_bitrate_change_time = 0
+
+        with patch("app.services.network_event_bridge.get_preferences") as prefs:
+            prefs.return_value.get_auto_adaptive_bitrate.return_value = True
+            await bridge._apply_adaptive_bitrate()
+
+        gst.update_live_property.assert_called_once_with("bitrate", 800)
+
+
+# ── loopback srtsink → srtsrc under netem loss ──────────────────────────────
+
+SRT_ELEMENTS = ("x264enc", "h264parse", "mpegtsmux", "srtsink", "srtsrc", "tsdemux", "avdec_h264")
+LOOPBACK_FRAMES = 300
+
+
+def _run(latency_ms: int, frames: int = LOOPBACK_FRAMES) -> int:
+    """Stream over SRT on loopback and return the number of decoded frames"""
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    Gst.init(None)
+    receiver = Gst.parse_launch(
+        f"srtsrc uri=srt://:7001?mode=listener latency={latency_ms} ! tsdemux latency=0 ! "
+        "h264parse ! avdec_h264 ! fakesink name=out sync=false"
+    )
+    sender = Gst.parse_launch(
+        f"videotestsrc is-live=true pattern=ball num-buffers={frames} ! "
+        "video/x-raw,width=640,height=360,framerate=30/1 ! "
+        "x264enc tune=zerolatency speed-preset=ultrafast key-int-max=60 bitrate=1500 ! "
+        "h264parse config-interval=-1 ! mpegtsmux alignment=7 ! "
+        f"srtsink uri=srt://127.0.0.1:7001?mode=caller latency={latency_ms} sync=false"
+    )
+    decoded = [0]
+
+    def count(pad, info):
+        decoded[0] += 1
+        return Gst.PadProbeReturn.OK
+
+    receiver.get_by_name("out").get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, count)
+    receiver.set_state(Gst.State.PLAYING)
+    sender.set_state(Gst.State.PLAYING)
+    sender.get_bus().timed_pop_filtered(Gst.CLOCK_TIME_NONE, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    receiver.get_bus().timed_pop_filtered(2 * Gst.SECOND, Gst.MessageType.ERROR)
+    sender.set_state(Gst.State.NULL)
+    receiver.set_state(Gst.State.NULL)
+    return decoded[0]
+
+
+@pytest.mark.slow
+@pytest.mark.requires_gst(*SRT_ELEMENTS, netem=True)
+def test_srt_recovers_netem_loss():
+    """ARQ inside the latency budget should deliver nearly every frame at 5% loss, 40 ms RTT"""
+    namespace = f"fpvsrt{uuid.uuid4().hex[:6]}"
+    subprocess.run(["ip", "netns", "add", namespace], check=True)
+    try:
+        subprocess.run(["ip", "-n", namespace, "link", "set", "lo", "up"], check=True)
+        subprocess.run(
+            ["tc", "-n", namespace, "qdisc", "replace", "dev", "lo", "root", "netem", "delay", "20ms", "loss", "5%"],
+            check=True,
+        )
+        child = subprocess.run(
+            ["ip", "netns", "exec", namespace, sys.executable, __file__, "160"],
+            capture_output=True,
+            text=True,
+            timeout=60,
+            check=True,
+        )
+        decoded = int(child.stdout.strip().splitlines()[-1])
+    finally:
+        subprocess.run(["ip", "netns", "delete", namespace])
+
+    print(f"\nSRT latency 160 ms, 5% loss: {decoded}/{LOOPBACK_FRAMES} frames decoded")
+    assert decoded >= LOOPBACK_FRAMES * 0.95
+
+
+if __name__ == "__main__":
+    print(_run(int(sys.argv[1])))
@@ -0,0 +1,293 @@
+"""
+Stream Recorder Tests
+
+Tests for the on-board recording branch: segment naming and the disk
+quota ring, finishing the last segment, dropped-frame and throughput
+stats, the GStreamer service and flight-session wiring, and a
+videotestsrc → splitmuxsink recording.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.services.stream_recorder import StreamRecorder
+
+
+@pytest.fixture
+def mock_gst():
+    with (
+        patch("app.services.stream_recorder.Gst") as gst,
+        patch("app.services.stream_recorder.GSTREAMER_AVAILABLE", True),
+    ):
+        gst.SECOND = 1_000_000_000
+        gst.CLOCK_TIME_NONE = -1
+        gst.ElementFactory.make.side_effect = lambda factory, name: MagicMock(name=name, factory=factory)
+        yield gst
+
+
+def _segment(directory, name, size, mtime):
+    path = directory / name
+    path.write_bytes(b"\0" * size)
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+class TestElements:
+    """Test the branch built for each stream type"""
+
+    def test_h264_mp4(self, mock_gst, tmp_path):
+        """Test H.264 goes through h264parse into fragmented MP4 segments"""
+        recorder = StreamRecorder(str(tmp_path / "video"), segment_s=30)
+
+        result = recorder.create_elements("rtph264pay")
+
+        assert result["success"] is True
+        parser, splitmux = result["elements"]
+        mock_gst.ElementFactory.make.assert_any_call("h264parse", "record_parse")
+        mock_gst.ElementFactory.make.assert_any_call("mp4mux", "record_mux")
+        splitmux.set_property.assert_any_call("max-size-time", 30 * mock_gst.SECOND)
+        assert (tmp_path / "video").is_dir()
+        assert recorder.active is True
+
+    def test_ts_cannot_carry_mjpeg(self, mock_gst, tmp_path):
+        """Test MJPEG into MPEG-TS is refused up front"""
+        result = StreamRecorder(str(tmp_path), fmt="ts").create_elements("rtpjpegpay")
+
+        assert result["success"] is False
+
+    def test_unknown_stream(self, mock_gst, tmp_path):
+        """Test a stream without a known payloader can't be recorded"""
+        assert StreamRecorder(str(tmp_path)).create_elements(None)["success"] is False
+
+
+class TestSegments:
+    """Test segment naming, the quota ring and finishing"""
+
+    def test_quota_deletes_oldest_first(self, tmp_path):
+        """Test old segments go, oldest first, until the next one fits"""
+        recorder = StreamRecorder(str(tmp_path), prefix="flight-a", quota_mb=1)
+        oldest = _segment(tmp_path, "flight-old_00000.mp4", 400_000, 1000)
+        older = _segment(tmp_path, "flight-old_00001.mp4", 400_000, 2000)
+        newer = _segment(tmp_path, "flight-old_00002.mp4", 400_000, 3000)
+        unrelated = _segment(tmp_path, "notes.txt", 900_000, 500)
+        recorder._largest_segment = 300_000
+
+        location = recorder._on_format_location(None, 3)
+
+        assert location == str(tmp_path / "flight-a_00003.mp4")
+        assert not oldest.exists() and not older.exists()
+        assert newer.exists() and unrelated.exists()
+        assert recorder.get_stats()["deleted_segments"] == 2
+
+    def test_finalize_waits_for_last_segment(self, mock_gst, tmp_path):
+        """Test the finalized event is set only when the open segment is closed"""
+        recorder = StreamRecorder(str(tmp_path))
+        recorder.create_elements("rtph264pay")
+        location = recorder._on_format_location(None, 0)
+        with open(location, "wb") as f:
+            f.write(b"\0" * 1000)
+
+        finalized = recorder.begin_finalize()
+        assert not finalized.is_set()
+
+        eos = MagicMock(type=mock_gst.EventType.EOS)
+        recorder._on_filesink_event(None, MagicMock(get_event=MagicMock(return_value=eos)))
+
+        assert finalized.is_set()
+        stats = recorder.get_stats()
+        assert stats["recording"] is False
+        assert stats["bytes_written"] == 1000
+        assert stats["segments"] == 1
+
+    def test_dropped_frames_counted(self, mock_gst, tmp_path):
+        """Test each queue overrun counts as a dropped recorded frame"""
+        recorder = StreamRecorder(str(tmp_path))
+        queue = MagicMock()
+        recorder.watch_queue(queue)
+
+        overrun = queue.connect.call_args[0][1]
+        overrun(queue)
+        overrun(queue)
+
+        assert recorder.get_stats()["dropped_frames"] == 2
+
+    def test_split_keyframe_goes_through_manager(self, mock_gst, tmp_path):
+        """Test splitmuxsink's keyframe request is replaced by a timed manager request"""
+        requested = threading.Event()
+        recorder = StreamRecorder(str(tmp_path), request_keyframe=requested.set)
+        structure = MagicMock()
+        structure.get_name.return_value = "GstForceKeyUnit"
+        structure.get_uint64.return_value = (True, 5_000_000_000)
+        event = MagicMock(type=mock_gst.EventType.CUSTOM_UPSTREAM)
+        event.get_structure.return_value = structure
+        pad = MagicMock()
+        pad.get_parent_element.return_value.get_clock.return_value.get_time.return_value = 5_010_000_000
+        pad.get_parent_element.return_value.get_base_time.return_value = 0
+
+        result = recorder._on_upstream_event(pad, MagicMock(get_event=MagicMock(return_value=event)))
+
+        assert result == mock_gst.PadProbeReturn.DROP
+        assert requested.wait(1)
+
+
+class TestServiceRecording:
+    """Test the GStreamer service's recording API"""
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_pending_until_streaming(self, mock_gst):
+        """Test a recording requested before the stream starts waits for it"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+
+        result = service.start_recording(prefix="flight-x")
+
+        assert result["pending"] is True
+        assert service.get_recording_stats()["requested"] is True
+        assert service.stop_recording()["success"] is True
+        assert service.get_recording_stats() is None
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_branch_uses_deep_leaky_queue(self, mock_service_gst, mock_gst, tmp_path):
+        """Test the record branch asks for a time-bounded queue and the configured format"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service.streaming_config.recording_format = "mkv"
+        service.streaming_config.recording_directory = str(tmp_path)
+        service._output_payloader = {"element": "rtph264pay", "properties": {}}
+
+        branch = service._build_output_branch("record")
+
+        assert branch["success"] is True
+        assert branch["queue_properties"]["max-size-buffers"] == 0
+        assert branch["info"] == {"directory": str(tmp_path), "format": "mkv"}
+
+    @patch("app.services.gstreamer_service.GSTREAMER_AVAILABLE", True)
+    @patch("app.services.gstreamer_service.Gst")
+    def test_detach_drains_branch(self, mock_gst):
+        """Test stopping a recording sends EOS through the branch instead of cutting it"""
+        from app.services.gstreamer_service import GStreamerService
+
+        service = GStreamerService()
+        service._recorder = MagicMock()
+        service._output_fanout = MagicMock()
+        service._output_fanout.has.return_value = True
+        service._output_fanout.detach.return_value = {"success": True, "output": "record", "draining": True}
+
+        result = service.stop_recording()
+
+        assert result["success"] is True
+        assert result["finalizing"] is True
+        service._output_fanout.detach.assert_called_once_with(
+            "record", drained=service._recorder.begin_finalize.return_value
+        )
+        service._recorder.begin_finalize.return_value.wait.assert_not_called()  # finished in the background
+        service._recorder.abort.assert_not_called()
+
+
+class TestFlightSessionRecording:
+    """Test recordings following FlightDataLogger sessions"""
+
+    def test_session_starts_and_stops_recording(self, tmp_path):
+        """Test video segments are named after the session's CSV"""
+        from app.services.flight_data_logger import FlightDataLogger
+
+        logger = FlightDataLogger(MagicMock(), str(tmp_path))
+        video = MagicMock()
+        video.streaming_config.record_flight_sessions = True
+        logger.set_video_service(video)
+
+        start = logger.start_session()
+        stop = logger.stop_session()
+
+        prefix = video.start_recording.call_args.kwargs["prefix"]
+        assert prefix == os.path.basename(start["file_path"])[: -len(".csv")]
+        assert stop["video_recording"] == video.stop_recording.return_value
+
+    def test_recording_off_by_default(self, tmp_path):
+        """Test sessions don't record video unless enabled"""
+        from app.services.flight_data_logger import FlightDataLogger
+
+        logger = FlightDataLogger(MagicMock(), str(tmp_path))
+        video = MagicMock()
+        video.streaming_config.record_flight_sessions = False
+        logger.set_video_service(video)
+
+        assert "video_recording" not in logger.start_session()
+        video.start_recording.assert_not_called()
+
+
+# ── videotestsrc → splitmuxsink ─────────────────────────────────────────────
+
+RECORD_ELEMENTS = ("videotestsrc", "x264enc", "h264parse", "tee", "splitmuxsink", "mp4mux", "filesink")
+
+
+def _record(directory: str) -> dict:
+    """Record ~3.5 s of test pattern in 1 s segments through the fan-out, then drain"""
+    import time
+
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    from app.services.output_fanout import OutputFanout
+    from app.services.stream_recorder import RECORD_QUEUE_TIME_NS
+
+    Gst.init(None)
+    pipeline = Gst.parse_launch(
+        "videotestsrc is-live=true ! video/x-raw,width=640,height=360,framerate=30/1 ! "
+        "x264enc tune=zerolatency speed-preset=ultrafast key-int-max=30 name=enc ! h264parse ! tee name=tee"
+    )
+    encoder = pipeline.get_by_name("enc")
+
+    def request_keyframe():
+        structure = Gst.Structure.new_from_string("GstForceKeyUnit, all-headers=(boolean)true")
+        encoder.get_static_pad("src").send_event(Gst.Event.new_custom(Gst.EventType.CUSTOM_UPSTREAM, structure))
+
+    recorder = StreamRecorder(directory, prefix="test", segment_s=1, request_keyframe=request_keyframe)
+    fanout = OutputFanout(pipeline, pipeline.get_by_name("tee"))
+    pipeline.set_state(Gst.State.PLAYING)
+    pipeline.get_state(5 * Gst.SECOND)
+
+    elements = recorder.create_elements("rtph264pay")["elements"]
+    fanout.attach("record", elements, queue_properties={"max-size-buffers": 0, "max-size-time": RECORD_QUEUE_TIME_NS})
+    recorder.watch_queue(pipeline.get_by_name("record_out_queue"))
+    time.sleep(3.5)
+
+    drained = recorder.begin_finalize()
+    fanout.detach("record", drained=drained)
+    finished = drained.wait(5)
+    pipeline.set_state(Gst.State.NULL)
+    return {"finished": finished, "stats": recorder.get_stats(), "files": sorted(os.listdir(directory))}
+
+
+@pytest.mark.slow
+@pytest.mark.requires_gst(*RECORD_ELEMENTS)
+def test_segmented_recording(tmp_path):
+    """Record through the tee and check the segments are complete and playable"""
+    child = subprocess.run(
+        [sys.executable, __file__, str(tmp_path)], capture_output=True, text=True, timeout=60, check=True
+    )
+    result = json.loads(child.stdout.strip().splitlines()[-1])
+
+    print(f"\n{result['stats']}")
+    assert result["finished"] is True
+    assert len(result["files"]) >= 3
+    assert result["stats"]["dropped_frames"] == 0
+    av = pytest.importorskip("av")
+    with av.open(str(tmp_path / result["files"][-1])) as container:
+        assert sum(1 for _ in container.decode(video=0)) > 0  # last segment was finished
+
+
+if __name__ == "__main__":
+    print(json.dumps(_record(sys.argv[1])))
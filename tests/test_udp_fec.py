@@ -0,0 +1,302 @@
+"""
+UDP Forward Error Correction Tests
+
+Tests for ULPFEC on the UDP/multicast outputs: branch construction,
+loss-driven redundancy, client pipeline strings, the event bridge hook,
+and a netem loopback measurement of recovery rate against FEC overhead.
+"""
+
+import json
+import subprocess
+import sys
+import uuid
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def service(gstreamer_service):
+    gstreamer_service.gst.ElementFactory.make.side_effect = lambda factory, name: MagicMock(name=name)
+    gstreamer_service.streaming_config.fec_enabled = True
+    gstreamer_service.streaming_config.fec_max_percentage = 50
+    return gstreamer_service
+
+
+class TestFecBranch:
+    """Test the FEC encoder in UDP/multicast output branches"""
+
+    def test_fec_between_payloader_and_sink(self, service):
+        """Test rtpulpfecenc sits between rtppay and udpsink"""
+        branch = service._build_output_branch("udp", {"host": "10.0.0.2", "port": 5700})
+
+        assert branch["success"] is True
+        rtppay, fec, sink = branch["elements"]
+        service.gst.ElementFactory.make.assert_any_call("rtpulpfecenc", "udp_fec")
+        fec.set_property.assert_any_call("pt", 122)
+        fec.set_property.assert_any_call("multipacket", True)
+        assert branch["info"]["fec_pt"] == 122
+
+    def test_no_fec_when_disabled(self, service):
+        """Test the branch is unchanged with FEC off"""
+        service.streaming_config.fec_enabled = False
+        branch = service._build_output_branch("udp", {"host": "10.0.0.2", "port": 5700})
+
+        assert len(branch["elements"]) == 2
+        assert "fec_pt" not in branch["info"]
+
+    def test_missing_plugin_streams_unprotected(self, service):
+        """Test a missing rtpulpfecenc doesn't fail the output"""
+        service.gst.ElementFactory.make.side_effect = lambda factory, name: (
+            None if factory == "rtpulpfecenc" else MagicMock(name=name)
+        )
+        branch = service._build_output_branch("multicast", {"host": "239.1.1.1", "port": 5600})
+
+        assert branch["success"] is True
+        assert len(branch["elements"]) == 2
+
+
+class TestFecAdaptation:
+    """Test FEC redundancy following packet loss"""
+
+    def test_loss_raises_fec_immediately(self, service):
+        """Test redundancy jumps to FEC_LOSS_FACTOR × loss"""
+        result = service.update_fec_for_loss(5.0)
+
+        assert result["fec_percentage"] == 15
+
+    def test_fec_capped_at_max(self, service):
+        """Test redundancy never exceeds fec_max_percentage"""
+        assert service.update_fec_for_loss(40.0)["fec_percentage"] == 50
+
+    def test_fec_decays_gradually(self, service):
+        """Test redundancy backs off in FEC_DECAY_STEP steps once loss drops"""
+        service.update_fec_for_loss(10.0)
+
+        assert service.update_fec_for_loss(0.0)["fec_percentage"] == 25
+        assert service.update_fec_for_loss(0.0)["fec_percentage"] == 20
+
+    def test_small_changes_ignored(self, service):
+        """Test changes inside the deadband don't touch the encoder"""
+        service.update_fec_for_loss(5.0)
+
+        assert service.update_fec_for_loss(5.3) is None
+
+    def test_disabled_fec_ignores_loss(self, service):
+        """Test nothing happens with FEC disabled"""
+        service.streaming_config.fec_enabled = False
+
+        assert service.update_fec_for_loss(10.0) is None
+
+    def test_live_update_sets_all_fec_elements(self, service):
+        """Test the new percentage reaches the running encoders"""
+        fec = MagicMock()
+        service.pipeline = MagicMock()
+        service.pipeline.get_by_name.side_effect = lambda name: fec if name == "fec" else None
+
+        result = service.set_fec_percentage(20)
+
+        assert result["applied"] == 1
+        fec.set_property.assert_any_call("percentage", 20)
+        fec.set_property.assert_any_call("percentage-important", 40)
+
+
+class TestFecBitrateBudget:
+    """Test the encoder bitrate leaves room for the FEC overhead"""
+
+    def test_encoder_gets_budget_less_fec(self, service):
+        """Test 25% FEC on a 2000 kbps budget leaves the encoder 1600 kbps"""
+        service.video_config.h264_bitrate = 2000
+        service._fec_percentage = 25
+
+        assert service._encoder_config()["bitrate"] == 1600
+        service.streaming_config.fec_enabled = False
+        assert service._encoder_config()["bitrate"] == 2000
+
+    def test_fec_change_resplits_budget(self, service):
+        """Test a new FEC percentage re-sets the running encoder's bitrate"""
+        service.video_config.h264_bitrate = 2000
+        service.is_streaming = True
+        fec, encoder = MagicMock(), MagicMock()
+        service.pipeline = MagicMock()
+        service.pipeline.get_by_name.side_effect = {"fec": fec, "encoder": encoder}.get
+        provider = MagicMock()
+        provider.get_live_adjustable_properties.return_value = {
+            "bitrate": {"property": "bitrate", "min": 100, "max": 10000, "description": "Bitrate"}
+        }
+        with (
+            patch("app.providers.registry.get_provider_registry") as registry,
+            patch.object(service, "_broadcast_status"),
+        ):
+            registry.return_value.get_video_encoder.return_value = provider
+            service.set_fec_percentage(25)
+
+        encoder.set_property.assert_called_once_with("bitrate", 1600)
+        assert service.video_config.h264_bitrate == 2000  # the budget is unchanged
+
+
+class TestFecClientPipelines:
+    """Test receive pipelines match the sender's FEC setting"""
+
+    def test_fec_receive_pipeline(self, service):
+        """Test UDP and multicast strings decode ULPFEC when enabled"""
+        service.video_config.codec = "h264"
+        with patch.object(service, "_get_streaming_ip", return_value="10.0.0.1"):
+            result = service.get_client_pipeline_strings()
+
+        for mode in ("udp", "multicast"):
+            pipeline = result["pipelines"][mode]["pipeline"]
+            assert "rtpstorage" in pipeline
+            assert "rtpulpfecdec pt=122" in pipeline
+            assert pipeline.index("rtpulpfecdec") < pipeline.index("rtph264depay")
+        assert result["fec"]["enabled"] is True
+
+    def test_plain_receive_pipeline_without_fec(self, service):
+        """Test receive strings stay plain RTP with FEC off"""
+        service.streaming_config.fec_enabled = False
+        service.video_config.codec = "h264"
+        with patch.object(service, "_get_streaming_ip", return_value="10.0.0.1"):
+            result = service.get_client_pipeline_strings()
+
+        assert "rtpulpfecdec" not in result["pipelines"]["udp"]["pipeline"]
+
+
+class TestFecEventBridge:
+    """Test the event bridge feeding loss to the FEC encoder"""
+
+    def test_bridge_forwards_loss_in_udp_mode(self):
+        """Test measured loss reaches update_fec_for_loss"""
+        from app.services.network_event_bridge import NetworkEventBridge
+
+        bridge = NetworkEventBridge()
+        gst = MagicMock(is_streaming=True)
+        gst.streaming_config.mode = "udp"
+        bridge._gstreamer_service = gst
+
+        bridge._apply_adaptive_fec({"packet_loss": 4.0, "available": True})
+
+        gst.update_fec_for_loss.assert_called_once_with(4.0)
+
+    def test_bridge_skips_other_modes(self):
+        """Test WebRTC/RTSP streams aren't touched"""
+        from app.services.network_event_bridge import NetworkEventBridge
+
+        bridge = NetworkEventBridge()
+        gst = MagicMock(is_streaming=True)
+        gst.streaming_config.mode = "webrtc"
+        bridge._gstreamer_service = gst
+
+        bridge._apply_adaptive_fec({"packet_loss": 4.0})
+
+        gst.update_fec_for_loss.assert_not_called()
+
+
+# ── netem loopback measurement ──────────────────────────────────────────────
+
+FEC_ELEMENTS = ("x264enc", "rtph264pay", "rtpulpfecenc", "rtpstorage", "rtpulpfecdec", "avdec_h264")
+LOOPBACK_FRAMES = 300
+
+
+def _measure(percentage: int, port: int, frames: int = LOOPBACK_FRAMES) -> dict:
+    """
+    Send one x264 stream with ULPFEC over loopback and count what arrives.
+
+    Runs in a child process inside the netem network namespace, with the
+    real GStreamer bindings.
+    """
+    import gi
+
+    gi.require_version("Gst", "1.0")
+    from gi.repository import Gst
+
+    Gst.init(None)
+    receiver = Gst.parse_launch(
+        f'udpsrc port={port} caps="application/x-rtp, payload=(int)96, clock-rate=(int)90000" ! '
+        "rtpstorage size-time=220000000 ! rtpssrcdemux ! "
+        "application/x-rtp, payload=(int)96, clock-rate=(int)90000, media=(string)video, "
+        "encoding-name=(string)H264 ! rtpjitterbuffer do-lost=true latency=100 ! "
+        "rtpulpfecdec pt=122 name=dec ! rtph264depay ! h264parse ! avdec_h264 ! fakesink name=out sync=false"
+    )
+    sender = Gst.parse_launch(
+        f"videotestsrc is-live=true pattern=ball num-buffers={frames} ! "
+        "video/x-raw,width=640,height=360,framerate=30/1 ! "
+        "x264enc tune=zerolatency speed-preset=ultrafast key-int-max=60 bitrate=1500 name=enc ! "
+        "rtph264pay pt=96 mtu=1200 config-interval=-1 name=pay ! "
+        f"rtpulpfecenc pt=122 multipacket=true percentage={percentage} "
+        f"percentage-important={min(100, percentage * 2)} name=fec ! "
+        f"udpsink host=127.0.0.1 port={port} sync=false"
+    )
+    counts = {"media_bytes": 0, "sent_bytes": 0, "decoded": 0}
+
+    def _count(key, size):
+        def probe(pad, info):
+            counts[key] += info.get_buffer().get_size() if size else 1
+            return Gst.PadProbeReturn.OK
+
+        return probe
+
+    sender.get_by_name("pay").get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, _count("media_bytes", True))
+    sender.get_by_name("fec").get_static_pad("src").add_probe(Gst.PadProbeType.BUFFER, _count("sent_bytes", True))
+    receiver.get_by_name("out").get_static_pad("sink").add_probe(Gst.PadProbeType.BUFFER, _count("decoded", False))
+
+    receiver.set_state(Gst.State.PLAYING)
+    sender.set_state(Gst.State.PLAYING)
+    sender.get_bus().timed_pop_filtered(Gst.CLOCK_TIME_NONE, Gst.MessageType.EOS | Gst.MessageType.ERROR)
+    receiver.get_bus().timed_pop_filtered(Gst.SECOND, Gst.MessageType.ERROR)
+
+    decoder = receiver.get_by_name("dec")
+    recovered, unrecovered = decoder.get_property("recovered"), decoder.get_property("unrecovered")
+    sender.set_state(Gst.State.NULL)
+    receiver.set_state(Gst.State.NULL)
+
+    return {
+        "fec_percentage": percentage,
+        "overhead_percent": round((counts["sent_bytes"] / max(1, counts["media_bytes"]) - 1) * 100, 1),
+        "packets_recovered": recovered,
+        "packets_unrecovered": unrecovered,
+        "recovery_rate": round(recovered / max(1, recovered + unrecovered), 3),
+        "frames_decoded": counts["decoded"],
+        "frames_sent": frames,
+    }
+
+
+@pytest.mark.slow
+@pytest.mark.requires_gst(*FEC_ELEMENTS, netem=True)
+def test_fec_recovery_vs_overhead_under_netem():
+    """Measure packet recovery and frame delivery against FEC overhead at fixed netem loss"""
+    namespace = f"fpvfec{uuid.uuid4().hex[:6]}"
+    subprocess.run(["ip", "netns", "add", namespace], check=True)
+    results = []
+    try:
+        subprocess.run(["ip", "-n", namespace, "link", "set", "lo", "up"], check=True)
+        for loss in (2, 5):
+            subprocess.run(
+                ["tc", "-n", namespace, "qdisc", "replace", "dev", "lo", "root", "netem", "loss", f"{loss}%"],
+                check=True,
+            )
+            for percentage in (0, 10, 25, 50):
+                child = subprocess.run(
+                    ["ip", "netns", "exec", namespace, sys.executable, __file__, str(percentage)],
+                    capture_output=True,
+                    text=True,
+                    timeout=60,
+                    check=True,
+                )
+                results.append((loss, json.loads(child.stdout.strip().splitlines()[-1])))
+    finally:
+        subprocess.run(["ip", "netns", "delete", namespace])
+
+    print()
+    for loss, result in results:
+        print(
+            f"loss {loss}%  FEC {result['fec_percentage']:>3}%  overhead {result['overhead_percent']:>5}%  "
+            f"recovered {result['recovery_rate']:.0%}  frames {result['frames_decoded']}/{result['frames_sent']}"
+        )
+    for loss in (2, 5):
+        runs = [result for run_loss, result in results if run_loss == loss]
+        assert runs[0]["packets_recovered"] == 0
+        assert runs[-1]["recovery_rate"] > runs[1]["recovery_rate"] > 0
+
+
+if __name__ == "__main__":
+    print(json.dumps(_measure(int(sys.argv[1]), port=5600)))
@@ -0,0 +1,180 @@
+"""
+Video Hotplug Tests
+
+Tests for the netlink uevent monitor, per-device re-probing of the
+source cache, and the device inventory following hotplug events.
+"""
+
+import socket
+import threading
+import time
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.providers.registry import ProviderRegistry
+from app.services.video_device_service import VideoDeviceService
+from app.services.video_hotplug import VideoHotplugMonitor, parse_uevent
+
+
+def _uevent(action, devname, subsystem="video4linux"):
+    devpath = f"/devices/platform/usb/1-1/1-1:1.0/{subsystem}/{devname}"
+    fields = [f"{action}@{devpath}", f"ACTION={action}", f"DEVPATH={devpath}", f"SUBSYSTEM={subsystem}"]
+    fields += [f"DEVNAME={devname}", "SEQNUM=4242"]
+    return "\0".join(fields).encode() + b"\0"
+
+
+def _source(device, bus_info):
+    return {"device": device, "source_id": device, "capabilities": {"identity": {"bus_info": bus_info}}}
+
+
+class TestParseUevent:
+    """Test kernel uevent parsing"""
+
+    def test_kernel_event(self):
+        """Test the header is skipped and KEY=VALUE fields are returned"""
+        event = parse_uevent(_uevent("add", "video0"))
+
+        assert event["ACTION"] == "add"
+        assert event["SUBSYSTEM"] == "video4linux"
+        assert event["DEVNAME"] == "video0"
+
+    def test_libudev_message_ignored(self):
+        """Test udev's binary re-broadcasts aren't mistaken for kernel events"""
+        assert parse_uevent(b"libudev\0\xfe\xed\xca\xfe" + b"\0" * 32) is None
+
+
+class TestMonitor:
+    """Test the monitor thread against a datagram socket pair"""
+
+    @pytest.fixture
+    def monitor(self):
+        received = []
+        changed = threading.Event()
+
+        def on_change(changes):
+            received.append(changes)
+            changed.set()
+
+        monitor = VideoHotplugMonitor(on_change)
+        kernel, monitor._sock = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        monitor._running = True
+        monitor._thread = threading.Thread(target=monitor._monitor_loop, daemon=True)
+        monitor._thread.start()
+        yield monitor, kernel, received, changed
+        monitor.stop()
+        kernel.close()
+
+    def test_camera_nodes_settle_into_one_change(self, monitor):
+        """Test a camera's capture and metadata nodes are handled together"""
+        monitor, kernel, received, changed = monitor
+
+        kernel.send(_uevent("add", "video0"))
+        kernel.send(_uevent("add", "1-1", subsystem="usb"))
+        kernel.send(_uevent("add", "video1"))
+
+        assert changed.wait(2)
+        assert received == [[("add", "/dev/video0"), ("add", "/dev/video1")]]
+        assert monitor.get_stats()["events"] == 3
+
+    def test_unplug_detected_within_milliseconds(self, monitor):
+        """Test removal is reported within the settle window, not a poll period"""
+        monitor, kernel, received, changed = monitor
+
+        sent = time.monotonic()
+        kernel.send(_uevent("remove", "video0"))
+
+        assert changed.wait(2)
+        assert received == [[("remove", "/dev/video0")]]
+        print(f"\nhotplug reported after {(time.monotonic() - sent) * 1000:.1f} ms")
+        assert time.monotonic() - sent < 0.5
+
+    def test_netlink_socket(self):
+        """Test the monitor binds the kernel uevent group and stops cleanly"""
+        monitor = VideoHotplugMonitor(MagicMock())
+        if not monitor.start():
+            pytest.skip("NETLINK_KOBJECT_UEVENT not available")
+
+        assert monitor.running is True
+        monitor.stop()
+        assert monitor.running is False
+        assert monitor._sock is None
+
+    def test_start_without_netlink(self):
+        """Test start() reports failure so the caller keeps polling"""
+        with patch("app.services.video_hotplug.socket.socket", side_effect=OSError("not permitted")):
+            monitor = VideoHotplugMonitor(MagicMock())
+
+            assert monitor.start() is False
+            assert monitor.running is False
+
+
+class TestSourceCache:
+    """Test patching one node in the registry's discovery cache"""
+
+    def test_add_and_remove_node(self):
+        """Test a hotplugged node is added and removed without touching the rest"""
+        registry = ProviderRegistry()
+        registry._source_discovery_cache["v4l2"] = (0.0, [_source("/dev/video0", "usb-1")])
+
+        registry.update_source_cache("v4l2", "/dev/video2", [_source("/dev/video2", "usb-2")])
+        assert [s["device"] for s in registry.discover_sources_cached("v4l2", ttl=float("inf"))] == [
+            "/dev/video0",
+            "/dev/video2",
+        ]
+
+        registry.update_source_cache("v4l2", "/dev/video0", [])
+        assert [s["device"] for s in registry.discover_sources_cached("v4l2", ttl=float("inf"))] == ["/dev/video2"]
+
+    def test_second_node_of_listed_camera_skipped(self):
+        """Test a camera's extra node doesn't show up as another camera"""
+        registry = ProviderRegistry()
+        registry._source_discovery_cache["v4l2"] = (0.0, [_source("/dev/video0", "usb-1")])
+
+        registry.update_source_cache("v4l2", "/dev/video1", [_source("/dev/video1", "usb-1")])
+
+        assert len(registry._source_discovery_cache["v4l2"][1]) == 1
+
+    def test_uncached_provider_left_alone(self):
+        """Test a provider never discovered still gets a full discovery later"""
+        registry = ProviderRegistry()
+
+        registry.update_source_cache("v4l2", "/dev/video0", [_source("/dev/video0", "usb-1")])
+
+        assert "v4l2" not in registry._source_discovery_cache
+
+
+class TestDeviceServiceHotplug:
+    """Test the inventory following hotplug changes"""
+
+    @patch("app.providers.registry.get_provider_registry")
+    def test_only_changed_node_probed(self, mock_get_registry):
+        """Test an add probes that node and a remove probes nothing"""
+        hotplug_provider = MagicMock(hotplug=True)
+        hotplug_provider.discover_device.return_value = [_source("/dev/video2", "usb-2")]
+        network_provider = MagicMock(hotplug=False)
+        registry = mock_get_registry.return_value
+        registry.list_video_source_providers.return_value = ["v4l2", "network"]
+        registry.get_video_source.side_effect = {"v4l2": hotplug_provider, "network": network_provider}.get
+        service = VideoDeviceService()
+        service._scan_timestamp = time.time()
+
+        with patch.object(service, "scan_devices") as scan:
+            service.apply_hotplug([("add", "/dev/video2"), ("remove", "/dev/video0")])
+
+        hotplug_provider.discover_device.assert_called_once_with("/dev/video2")
+        network_provider.discover_device.assert_not_called()
+        registry.update_source_cache.assert_any_call("v4l2", "/dev/video0", [])
+        scan.assert_called_once()
+
+    def test_push_after_change(self):
+        """Test the update callback receives the new inventory"""
+        service = VideoDeviceService()
+        pushed = MagicMock()
+        service._on_hotplug_update = pushed
+
+        with patch.object(service, "apply_hotplug", return_value={"count": 1}) as apply:
+            service._handle_hotplug([("add", "/dev/video0")])
+
+        apply.assert_called_once_with([("add", "/dev/video0")])
+        pushed.assert_called_once_with({"count": 1})
@@ -0,0 +1,142 @@
+"""
+Warm Standby Tests
+
+Tests for pre-rolling the pipeline in PAUSED so start() is only a state
+change: reuse on start, discarding a standby that no longer matches the
+configuration, re-arming after a stop, and the first-packet timing.
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture
+def service(gstreamer_service):
+    svc = gstreamer_service
+    svc.streaming_config.mode = "udp"
+    svc.streaming_config.udp_host = "192.168.1.100"
+
+    def build():
+        svc.pipeline = MagicMock()
+        svc.pipeline.get_state.return_value = (svc.gst.StateChangeReturn.NO_PREROLL, None, None)
+        svc._output_fanout = MagicMock()
+        return True
+
+    with (
+        patch.object(svc, "_check_start_config", return_value=None),
+        patch.object(svc, "build_pipeline", side_effect=build) as build_pipeline,
+        patch.object(svc, "_setup_stats_probes"),
+        patch.object(svc, "_optimize_for_streaming"),
+        patch.object(svc, "_start_stats_broadcast"),
+        patch.object(svc, "_broadcast_status"),
+    ):
+        svc.build_mock = build_pipeline
+        yield svc
+
+
+class TestPrepare:
+    """Test pre-rolling the pipeline"""
+
+    def test_pipeline_held_paused(self, service):
+        """Test prepare() builds the pipeline and stops at PAUSED"""
+        result = service.prepare()
+
+        assert result["success"] is True
+        service.pipeline.set_state.assert_called_once_with(service.gst.State.PAUSED)
+        assert service.is_streaming is False
+        assert service.get_startup_stats()["standby_ready"] is True
+
+    def test_prepare_is_idempotent(self, service):
+        """Test a second prepare() with the same config keeps the pipeline"""
+        service.prepare()
+        service.prepare()
+
+        assert service.build_mock.call_count == 1
+
+    def test_webrtc_not_supported(self, service):
+        """Test WebRTC, which builds per peer, is not pre-rolled"""
+        service.streaming_config.mode = "webrtc"
+
+        assert service.prepare()["success"] is False
+        service.build_mock.assert_not_called()
+
+
+class TestStartFromStandby:
+    """Test start() picking up the pre-rolled pipeline"""
+
+    def test_start_skips_build(self, service):
+        """Test starting from standby is a state change, not a rebuild"""
+        service.prepare()
+        pipeline = service.pipeline
+
+        result = service.start()
+
+        assert result["success"] is True
+        assert result["prerolled"] is True
+        assert service.build_mock.call_count == 1
+        pipeline.set_state.assert_called_with(service.gst.State.PLAYING)
+        assert service.get_startup_stats()["standby_ready"] is False
+
+    def test_config_change_discards_standby(self, service):
+        """Test a standby built for old settings is torn down, not started"""
+        service.prepare()
+        stale = service.pipeline
+        service.video_config.width = 1280
+
+        result = service.start()
+
+        assert result["prerolled"] is False
+        stale.set_state.assert_any_call(service.gst.State.NULL)
+        assert service.build_mock.call_count == 2
+
+    def test_first_packet_time_recorded(self, service):
+        """Test the one-shot tee probe records time to first packet"""
+        service.prepare()
+        service.start()
+
+        pad = service._output_fanout.tee.get_static_pad.return_value
+        on_first_buffer = pad.add_probe.call_args[0][1]
+        assert on_first_buffer(pad, MagicMock()) == service.gst.PadProbeReturn.REMOVE
+
+        stats = service.get_startup_stats()
+        assert stats["prerolled"] is True
+        assert stats["time_to_first_packet_ms"] == stats["last_warm_ms"]
+        assert stats["last_warm_ms"] >= 0
+
+
+class TestRearm:
+    """Test keeping a standby ready while stopped"""
+
+    def test_stop_rearms_when_enabled(self, service):
+        """Test stopping a stream pre-rolls the next one"""
+        service.streaming_config.warm_standby = True
+        service.start()
+
+        with patch.object(service, "_prepare_in_background") as rearm:
+            service.stop()
+
+        rearm.assert_called_once()
+
+    def test_no_rearm_on_shutdown(self, service):
+        """Test shutdown releases the camera instead of pre-rolling again"""
+        service.streaming_config.warm_standby = True
+        service.start()
+
+        with (
+            patch.object(service, "_prepare_in_background") as rearm,
+            patch.object(service, "stop_latency_receiver"),
+        ):
+            service.shutdown()
+
+        rearm.assert_not_called()
+
+    def test_disabling_releases_standby(self, service):
+        """Test turning warm standby off tears the paused pipeline down"""
+        service.streaming_config.warm_standby = True
+        service.prepare()
+        pipeline = service.pipeline
+
+        service.configure(streaming_config={"warm_standby": False})
+
+        pipeline.set_state.assert_called_with(service.gst.State.NULL)
+        assert service.pipeline is None
@@ -13,7 +13,7 @@ Tests for WebRTC signaling API endpoints including:
 """
 
 import pytest
-from unittest.mock import Mock, AsyncMock, patch
+from unittest.mock import ANY, Mock, AsyncMock, patch
 from fastapi.testclient import TestClient
 from app.main import app
 
@@ -139,7 +139,7 @@ class TestWebRTCSessionEndpoint:
     def test_create_session_with_peer_id(self, client, mock_webrtc_service):
         response = client.post("/api/webrtc/session", json={"peer_id": "custom-id"})
         assert response.status_code == 200
-        mock_webrtc_service.create_peer_connection.assert_called_with("custom-id")
+        mock_webrtc_service.create_peer_connection.assert_called_with("custom-id", client_host=ANY)
 
     def test_create_session_failure(self, client, mock_webrtc_service):
         mock_webrtc_service.create_peer_connection = AsyncMock(
@@ -12,6 +12,7 @@ Tests for the WebRTC signaling service including:
 - Stale peer cleanup
 """
 
+import asyncio
 import pytest
 import time
 from unittest.mock import MagicMock, patch, AsyncMock
@@ -58,14 +59,7 @@ def mock_aiortc():
             with patch("app.services.webrtc_service.RTCSessionDescription", mock_rts):
                 # Mock MediaStreamTrack
                 with patch("app.services.webrtc_service.MediaStreamTrack", MagicMock()):
-                    # Mock av (PyAV) - use create=True since these may not be imported
-                    with patch(
-                        "app.services.webrtc_service.VideoFrame",
-                        MagicMock(),
-                        create=True,
-                    ):
-                        with patch("app.services.webrtc_service.np", MagicMock(), create=True):
-                            yield
+                    yield
 
 
 class TestWebRTCServiceInit:
@@ -278,6 +272,44 @@ class TestWebRTCStats:
         assert service.global_stats["avg_rtt_ms"] == 50.0
         assert service.global_stats["avg_bitrate_kbps"] == 1500
 
+    def test_peer_stats_update_does_not_deadlock(self):
+        """Test the locked update_peer_stats path recalculates the global stats without deadlocking"""
+        import threading
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service.create_offer(peer_id="p1")
+        service.set_peer_connected("p1")
+
+        thread = threading.Thread(target=service.update_peer_stats, args=("p1", {"rtt_ms": 70}), daemon=True)
+        thread.start()
+        thread.join(timeout=2)
+
+        assert not thread.is_alive()
+        assert service.global_stats["avg_rtt_ms"] == 70.0
+        assert service._lock.acquire(blocking=False)
+        service._lock.release()
+
+    def test_global_stats_recalculated_under_lock(self):
+        """Test the recalculation waits for a thread holding the lock (peers can't change under it)"""
+        import threading
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service.create_offer(peer_id="p1")
+        service.set_peer_connected("p1")
+        service.peers["p1"].stats = {"rtt_ms": 30}
+
+        with service._lock:
+            thread = threading.Thread(target=service._recalculate_global_stats, daemon=True)
+            thread.start()
+            thread.join(timeout=0.1)
+            assert thread.is_alive()
+        thread.join(timeout=2)
+
+        assert not thread.is_alive()
+        assert service.global_stats["avg_rtt_ms"] == 30.0
+
     def test_get_status(self):
         """Test comprehensive status report"""
         from app.services.webrtc_service import WebRTCService
@@ -367,6 +399,483 @@ class TestWebRTC4GOptimization:
         assert "unknown_key" not in service.adaptive_config
 
 
+class TestWebRTCCongestionFeedback:
+    """Test REMB/PLI forwarding from peers to the GStreamer encoder"""
+
+    @pytest.fixture
+    def service(self):
+        from app.services.webrtc_service import WebRTCService, WebRTCPeer
+
+        service = WebRTCService()
+        gst = MagicMock()
+        gst.video_config.h264_bitrate = 2000
+        gst.update_live_property.return_value = {"success": True}
+        service._gstreamer_service = gst
+        service.peers["a"] = WebRTCPeer(peer_id="a", state="connected", created_at=1.0)
+        service.peers["b"] = WebRTCPeer(peer_id="b", state="connected", created_at=2.0)
+        return service
+
+    def test_encoder_forwards_target_bitrate(self):
+        """Test aiortc's target_bitrate is clamped and forwarded"""
+        from app.services.webrtc_service import H264PassthroughEncoder
+
+        forwarded = []
+        encoder = H264PassthroughEncoder(on_target_bitrate=forwarded.append)
+        encoder.target_bitrate = 50_000_000
+
+        assert forwarded == [10_000_000]
+
+    def test_slowest_peer_drives_drop(self, service):
+        """Test the slowest estimate is applied immediately on a drop"""
+        service._on_peer_bitrate_estimate("a", 1_800_000)
+        service._on_peer_bitrate_estimate("b", 700_000)
+
+        service._gstreamer_service.update_live_property.assert_called_with("bitrate", 700)
+        assert service.adaptive_config["target_bitrate"] == 700
+
+    def test_primary_peer_policy(self, service):
+        """Test the primary policy follows primary_peer_id, not the slowest"""
+        service.adaptive_config["bitrate_policy"] = "primary"
+        service.adaptive_config["primary_peer_id"] = "a"
+        service._on_peer_bitrate_estimate("a", 1_200_000)
+        service._on_peer_bitrate_estimate("b", 500_000)
+
+        service._gstreamer_service.update_live_property.assert_called_once_with("bitrate", 1200)
+
+    def test_primary_defaults_to_oldest_peer(self, service):
+        """Test the longest-connected peer is primary when none is set"""
+        service.adaptive_config["bitrate_policy"] = "primary"
+        service.peers["a"].estimated_bitrate_kbps = 1500
+        service.peers["b"].estimated_bitrate_kbps = 400
+
+        assert service._select_bitrate_estimate() == 1500
+
+    def test_estimate_clamped_to_min(self, service):
+        """Test a collapsed estimate never goes below min_bitrate"""
+        service._on_peer_bitrate_estimate("a", 50_000)
+
+        service._gstreamer_service.update_live_property.assert_called_with("bitrate", 300)
+
+    def test_rise_is_smoothed_and_rate_limited(self, service):
+        """Test increases move part way and not more than once per interval"""
+        gst = service._gstreamer_service
+        service._on_peer_bitrate_estimate("a", 1_000_000)
+        gst.update_live_property.reset_mock()
+
+        service._on_peer_bitrate_estimate("a", 2_000_000)
+        gst.update_live_property.assert_not_called()
+
+        service._last_bitrate_update = 0
+        service._on_peer_bitrate_estimate("a", 2_000_000)
+        gst.update_live_property.assert_called_once_with("bitrate", 1300)
+
+    def test_baseline_restored_when_feedback_ends(self, service):
+        """Test the configured bitrate comes back after the last peer leaves"""
+        service._on_peer_bitrate_estimate("a", 800_000)
+        del service.peers["b"]
+        service._disconnect_peer_async("a")
+
+        service._gstreamer_service.update_live_property.assert_called_with("bitrate", 2000)
+        assert service._baseline_bitrate_kbps is None
+
+    def test_congestion_control_disabled(self, service):
+        """Test estimates are ignored with congestion_control off"""
+        service.adaptive_config["congestion_control"] = False
+        service._on_peer_bitrate_estimate("a", 500_000)
+
+        service._gstreamer_service.update_live_property.assert_not_called()
+
+    def test_concurrent_estimates_serialised(self, service):
+        """Test estimates from several threads update the encoder one at a time"""
+        import threading
+
+        active, overlaps = [0], []
+
+        def update(prop, value):
+            active[0] += 1
+            overlaps.append(active[0] > 1)
+            time.sleep(0.002)
+            active[0] -= 1
+            return {"success": True}
+
+        service._gstreamer_service.update_live_property.side_effect = update
+        threads = [
+            threading.Thread(target=service._on_peer_bitrate_estimate, args=("a", bps))
+            for bps in range(1_900_000, 500_000, -100_000)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert overlaps and not any(overlaps)
+        assert service.global_stats["adaptation_events"] == len(overlaps)
+        assert service.adaptive_config["target_bitrate"] == int(service._applied_bitrate_kbps)
+
+    def test_encoder_updated_without_service_lock(self, service):
+        """Test the encoder update (which broadcasts status) runs with self._lock free"""
+        free = []
+
+        def update(prop, value):
+            free.append(service._lock.acquire(blocking=False))
+            if free[-1]:
+                service._lock.release()
+            return {"success": True}
+
+        service._gstreamer_service.update_live_property.side_effect = update
+        service._on_peer_bitrate_estimate("a", 700_000)
+
+        assert free == [True]
+
+    def test_keyframe_requests_forwarded(self, service):
+        """Test every PLI/FIR reaches the GStreamer keyframe manager, which coalesces them"""
+        service._on_peer_keyframe_request("a")
+        service._on_peer_keyframe_request("b")
+
+        assert service._gstreamer_service.force_keyframe.call_count == 2
+        service._gstreamer_service.force_keyframe.assert_called_with("pli")
+        assert service.peers["b"].keyframe_requests == 1
+
+    def test_sender_keyframe_hook(self, service):
+        """Test the sender's PLI/FIR handler is routed to GStreamer"""
+        sender = MagicMock(kind="video")
+        pc = MagicMock()
+        pc.getSenders.return_value = [sender]
+        service._install_passthrough_encoder(pc, "a")
+        service._gstreamer_service.force_keyframe.reset_mock()
+
+        sender._send_keyframe()
+
+        service._gstreamer_service.force_keyframe.assert_called_once()
+        assert service.peers["a"].keyframe_requests == 1
+
+    def test_invalid_policy_rejected(self, service):
+        """Test unknown bitrate policies are refused"""
+        result = service.update_adaptive_config({"bitrate_policy": "fastest"})
+
+        assert result["success"] is False
+        assert service.adaptive_config["bitrate_policy"] == "slowest"
+
+
+class TestWebRTCTransportStats:
+    """Test server-side stats from aiortc getStats()"""
+
+    @staticmethod
+    def _report(bytes_sent, rtt=0.08, fraction_lost=13, jitter=900):
+        from types import SimpleNamespace
+
+        return {
+            "out": SimpleNamespace(type="outbound-rtp", kind="video", bytesSent=bytes_sent, packetsSent=100),
+            "remote": SimpleNamespace(
+                type="remote-inbound-rtp",
+                kind="video",
+                roundTripTime=rtt,
+                fractionLost=fraction_lost,
+                jitter=jitter,
+                packetsLost=4,
+            ),
+        }
+
+    def test_summarize_report(self):
+        """Test RTCP units are converted to ms and percent"""
+        from app.services.webrtc_service import WebRTCService, WebRTCPeer
+
+        peer = WebRTCPeer(peer_id="p1", keyframe_requests=2, nack_count=7)
+        summary = WebRTCService._summarize_transport_stats(self._report(10_000), peer, now=100.0)
+
+        assert summary["rtt_ms"] == 80.0
+        assert summary["packet_loss_percent"] == 5.08
+        assert summary["jitter_ms"] == 10.0
+        assert summary["pli_count"] == 2
+        assert summary["nack_count"] == 7
+        assert summary["source"] == "rtcp"
+
+    def test_bitrate_from_bytes_delta(self):
+        """Test the send bitrate comes from bytesSent between samples"""
+        from app.services.webrtc_service import WebRTCService, WebRTCPeer
+
+        peer = WebRTCPeer(peer_id="p1")
+        peer.transport_stats = WebRTCService._summarize_transport_stats(self._report(10_000), peer, now=100.0)
+        summary = WebRTCService._summarize_transport_stats(self._report(510_000), peer, now=102.0)
+
+        assert summary["bitrate_kbps"] == 2000
+
+    def test_missing_remote_report_keeps_previous(self):
+        """Test a sample without a receiver report keeps the last RTT"""
+        from app.services.webrtc_service import WebRTCService, WebRTCPeer
+
+        peer = WebRTCPeer(peer_id="p1")
+        peer.transport_stats = WebRTCService._summarize_transport_stats(self._report(0), peer, now=100.0)
+        report = self._report(1000)
+        del report["remote"]
+
+        assert WebRTCService._summarize_transport_stats(report, peer, now=102.0)["rtt_ms"] == 80.0
+
+    def test_global_stats_prefer_transport_stats(self):
+        """Test server-measured stats win over client-posted ones"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service.create_offer(peer_id="p1")
+        service.set_peer_connected("p1")
+        service.peers["p1"].transport_stats = {"rtt_ms": 120, "bitrate_kbps": 900, "jitter_ms": 8.0}
+
+        service.update_peer_stats("p1", {"rtt_ms": 40, "bitrate_kbps": 1500})
+
+        assert service.global_stats["avg_rtt_ms"] == 120.0
+        assert service.global_stats["avg_jitter_ms"] == 8.0
+
+    def test_transport_metrics_worst_peer(self):
+        """Test NetworkEventBridge gets the worst fresh viewer path"""
+        from app.services.webrtc_service import WebRTCService, WebRTCPeer
+
+        service = WebRTCService()
+        now = time.monotonic()
+        for pid, rtt, loss in (("a", 50, 1.0), ("b", 150, 0.5)):
+            peer = WebRTCPeer(peer_id=pid, state="connected")
+            peer.transport_stats = {"sampled_at": now, "rtt_ms": rtt, "jitter_ms": 5.0, "packet_loss_percent": loss}
+            service.peers[pid] = peer
+
+        metrics = service.get_transport_metrics()
+
+        assert metrics["avg_rtt"] == 150
+        assert metrics["packet_loss"] == 1.0
+        assert metrics["peers"] == 2
+
+    def test_transport_metrics_stale(self):
+        """Test old samples are not reported"""
+        from app.services.webrtc_service import WebRTCService, WebRTCPeer
+
+        service = WebRTCService()
+        peer = WebRTCPeer(peer_id="a", state="connected")
+        peer.transport_stats = {"sampled_at": time.monotonic() - 60, "rtt_ms": 50}
+        service.peers["a"] = peer
+
+        assert service.get_transport_metrics() is None
+
+    @pytest.mark.asyncio
+    async def test_nacks_counted(self):
+        """Test NACK-driven retransmissions are counted per peer"""
+        from app.services.webrtc_service import WebRTCService, WebRTCPeer
+
+        service = WebRTCService()
+        service.peers["a"] = WebRTCPeer(peer_id="a")
+        retransmit = AsyncMock()
+
+        wrapped = service._count_nacks("a", retransmit)
+        await wrapped(17)
+        await wrapped(18)
+
+        assert service.peers["a"].nack_count == 2
+        retransmit.assert_awaited_with(18)
+
+
+class TestWebRTCSessionSetup:
+    """Test ICE mode selection and the pre-warmed connection pool"""
+
+    @pytest.mark.parametrize(
+        "host,local",
+        [
+            ("192.168.1.20", True),
+            ("10.0.0.5", True),
+            ("100.101.5.7", True),
+            ("127.0.0.1", True),
+            ("fe80::1", True),
+            ("8.8.8.8", False),
+            ("testclient", False),
+            (None, False),
+        ],
+    )
+    def test_is_local_address(self, host, local):
+        """Test LAN, Tailscale/CGNAT and loopback clients count as local"""
+        from app.services.webrtc_service import WebRTCService
+
+        assert WebRTCService._is_local_address(host) is local
+
+    def test_ice_mode_selection(self):
+        """Test auto follows the client address; host/stun force the mode"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        assert service._use_host_only_ice("192.168.1.20") is True
+        assert service._use_host_only_ice("8.8.8.8") is False
+
+        service.session_config["ice_mode"] = "host"
+        assert service._use_host_only_ice("8.8.8.8") is True
+        service.session_config["ice_mode"] = "stun"
+        assert service._use_host_only_ice("192.168.1.20") is False
+
+    def test_invalid_ice_mode_rejected(self):
+        """Test unknown ICE modes are refused"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        result = service.update_session_config({"ice_mode": "lite"})
+
+        assert result["success"] is False
+        assert service.session_config["ice_mode"] == "auto"
+
+    @pytest.mark.asyncio
+    async def test_host_only_session_has_no_ice_servers(self):
+        """Test a LAN client gets host-only ICE and no STUN servers"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service.is_active = True
+        result = await service.create_peer_connection("lan", client_host="192.168.1.20")
+
+        assert result["success"] is True
+        assert result["config"]["iceServers"] == []
+        assert result["prewarmed"] is False
+
+    @pytest.mark.asyncio
+    async def test_session_uses_prewarmed_connection(self):
+        """Test a pooled connection of the matching mode is handed out"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service.is_active = True
+        pooled = MagicMock()
+        service._prewarm_pool = [(time.monotonic(), False, pooled, None)]
+
+        result = await service.create_peer_connection("remote", client_host="8.8.8.8")
+
+        assert result["prewarmed"] is True
+        assert service.peers["remote"].pc is pooled
+        assert service._prewarm_pool == []
+
+    def test_take_prewarmed_skips_expired_and_other_mode(self):
+        """Test stale entries are closed and other-mode entries kept"""
+        from app.services.webrtc_service import WebRTCService, PREWARM_MAX_AGE
+
+        service = WebRTCService()
+        stale_track = MagicMock()
+        host_entry = (time.monotonic(), True, MagicMock(), None)
+        service._prewarm_pool = [(time.monotonic() - PREWARM_MAX_AGE - 1, False, MagicMock(), stale_track), host_entry]
+
+        assert service._take_prewarmed(host_only=False) is None
+        stale_track.stop.assert_called_once()
+        assert service._prewarm_pool == [host_entry]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "ice_mode, pooled", [("auto", [False, True]), ("host", [True]), ("stun", [False])], ids=str
+    )
+    async def test_pool_prewarms_each_ice_mode(self, ice_mode, pooled):
+        """Test the pool holds a connection for every ICE configuration the mode can hand out"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service.is_active = True
+        service.session_config["ice_mode"] = ice_mode
+
+        async def prewarm(host_only):
+            return (time.monotonic(), host_only, MagicMock(), None)
+
+        with patch.object(service, "_prewarm_one", side_effect=prewarm):
+            await service._refill_prewarm_pool()
+
+        assert sorted(entry[1] for entry in service._prewarm_pool) == pooled
+
+    @pytest.mark.asyncio
+    async def test_lan_viewer_uses_prewarmed_host_connection(self):
+        """Test auto mode hands a pooled host-only connection to a LAN viewer"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service.is_active = True
+        pooled = MagicMock()
+        service._prewarm_pool = [(time.monotonic(), False, MagicMock(), None), (time.monotonic(), True, pooled, None)]
+
+        result = await service.create_peer_connection("lan", client_host="192.168.1.20")
+
+        assert result["prewarmed"] is True
+        assert service.peers["lan"].pc is pooled
+
+    @pytest.mark.asyncio
+    async def test_keyframe_requested_on_connected(self):
+        """Test a new viewer gets an IDR as soon as ICE/DTLS connects"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service._gstreamer_service = MagicMock()
+        handlers = {}
+        from app.services import webrtc_service
+
+        pc = webrtc_service.RTCPeerConnection.return_value
+        pc.on.side_effect = lambda event: lambda callback: handlers.setdefault(event, callback)
+        await service.create_peer_connection("viewer")
+
+        pc.connectionState = "connected"
+        await handlers["connectionstatechange"]()
+
+        service._gstreamer_service.force_keyframe.assert_called_once()
+        assert service.peers["viewer"].connected_at is not None
+
+
+class TestWebRTCMediaLoop:
+    """Test peer connections running on the dedicated media event loop"""
+
+    @pytest.mark.asyncio
+    async def test_signaling_marshalled_to_media_thread(self):
+        """Test the RTCPeerConnection is created and used on the WebRTCMedia thread"""
+        import threading
+        from app.services import webrtc_service
+
+        service = webrtc_service.WebRTCService(event_loop=asyncio.get_running_loop())
+        threads = []
+        pc_class = webrtc_service.RTCPeerConnection
+        pc_class.side_effect = lambda **kwargs: threads.append(threading.current_thread().name) or pc_class.return_value
+        service.start_media_loop()
+        try:
+            result = await service.create_peer_connection("viewer")
+            answer = await service.handle_offer("viewer", "v=0\r\n")
+        finally:
+            service.stop_media_loop()
+
+        assert result["success"] is True
+        assert answer["success"] is True
+        assert threads == ["WebRTCMedia"]
+        assert service.get_loop_lag()["media_loop_running"] is False
+
+    @pytest.mark.asyncio
+    async def test_inline_without_media_loop(self):
+        """Test signaling still works on the caller's loop before activation"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        result = await service.create_peer_connection("viewer")
+
+        assert result["success"] is True
+        assert service._media_thread is None
+
+    @pytest.mark.asyncio
+    async def test_blocked_api_loop_does_not_delay_media_loop(self):
+        """Test a blocking API handler shows up as API lag, not media lag"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService(event_loop=asyncio.get_running_loop())
+        service.start_media_loop()
+        try:
+            for _ in range(3):
+                await asyncio.sleep(0.06)
+                time.sleep(0.2)  # e.g. a handler calling subprocess.run
+            await asyncio.sleep(0.1)
+            lag = service.get_loop_lag()
+        finally:
+            service.stop_media_loop()
+
+        assert lag["api"]["max_ms"] >= 150
+        assert lag["media"]["samples"] > 0
+        assert lag["media"]["max_ms"] < 100
+
+    def test_lag_probe_empty(self):
+        """Test an idle probe reports zeros"""
+        from app.services.webrtc_service import LoopLagProbe
+
+        assert LoopLagProbe().get_stats() == {"samples": 0, "avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+
+
 class TestWebRTCLog:
     """Test event logging"""
 
@@ -480,16 +989,10 @@ class TestH264PassthroughEncoder:
     def test_encoder_initialization(self):
         """Test H264PassthroughEncoder initialization"""
         from app.services.webrtc_service import H264PassthroughEncoder
-        import queue
 
-        h264_queue = queue.Queue()
-        encoder = H264PassthroughEncoder(h264_queue, framerate=30)
+        encoder = H264PassthroughEncoder()
 
-        assert encoder._h264_queue is h264_queue
-        assert encoder._framerate == 30
-        assert encoder._frame_count == 0
-        assert encoder.buffer_data == b""
-        assert encoder.buffer_pts is None
+        assert encoder.target_bitrate == 1500000
 
     def test_split_bitstream_single_nal(self):
         """Test splitting H264 bitstream with single NAL unit"""
@@ -563,58 +1066,318 @@ class TestH264PassthroughEncoder:
 
         assert len(packets) >= 1
 
-    def test_encode_with_empty_queue(self):
-        """Test encoding when queue is empty"""
+    def test_encode_is_noop(self):
+        """Test raw frames are never encoded"""
         from app.services.webrtc_service import H264PassthroughEncoder
-        import queue
-
-        h264_queue = queue.Queue()
-        encoder = H264PassthroughEncoder(h264_queue, framerate=30)
 
-        frame = MagicMock()
-        frame.pts = 1000
-        frame.time_base = MagicMock()
-
-        packets, timestamp = encoder.encode(frame)
+        packets, timestamp = H264PassthroughEncoder().encode(MagicMock())
 
         assert packets == []
-        assert timestamp == 1000
+        assert timestamp == 0
 
-    def test_encode_with_h264_data(self):
-        """Test encoding with H264 data in queue"""
+    def test_pack_uses_packet_timestamp(self):
+        """Test pack() packetizes an access unit with its own timestamp"""
         from app.services.webrtc_service import H264PassthroughEncoder
-        import queue
 
-        h264_queue = queue.Queue()
-        h264_data = b"\x00\x00\x01\x67\x42\x00\x1e"
-        h264_queue.put(h264_data)
+        av = pytest.importorskip("av")
+
+        packet = av.Packet(b"\x00\x00\x01\x67\x42\x00\x1e\x00\x00\x01\x65\x88")
+        packet.pts = 3000
+
+        payloads, timestamp = H264PassthroughEncoder().pack(packet)
 
-        encoder = H264PassthroughEncoder(h264_queue, framerate=30)
+        assert len(payloads) == 1  # SPS + IDR aggregated in one STAP-A
+        assert timestamp == 3000
 
-        frame = MagicMock()
-        frame.pts = 2000
-        frame.time_base = MagicMock()
 
-        packets, timestamp = encoder.encode(frame)
+class TestH264Bitstream:
+    """Test the single-pass NAL indexer"""
 
-        assert isinstance(packets, list)
-        assert timestamp > 0
+    AU = b"\x00\x00\x00\x01\x67\x42\x00\x1e\x00\x00\x01\x68\xce\x00\x00\x00\x01\x65\x88\x84"
 
-    def test_encode_increments_frame_count(self):
-        """Test that encode increments frame count"""
+    def test_index_offsets_and_types(self):
+        """Test NAL payload offsets, 4-byte start code zero trimmed"""
+        from app.services.h264_bitstream import index_nals
+
+        nals = index_nals(self.AU)
+
+        assert [nal_type for _, _, nal_type in nals] == [7, 8, 5]
+        assert [self.AU[start:end] for start, end, _ in nals] == [
+            b"\x67\x42\x00\x1e",
+            b"\x68\xce",
+            b"\x65\x88\x84",
+        ]
+
+    def test_index_without_start_code(self):
+        """Test data without a start code has no NAL units"""
+        from app.services.h264_bitstream import index_nals
+
+        assert index_nals(b"\x65\x88\x84") == []
+        assert index_nals(b"\x00\x00\x01") == []
+
+    def test_keyframe_detection(self):
+        """Test IDR/SPS/PPS mark an access unit as a keyframe"""
+        from app.services.h264_bitstream import index_nals, is_keyframe
+
+        assert is_keyframe(index_nals(self.AU)) is True
+        assert is_keyframe(index_nals(b"\x00\x00\x01\x41\x9a\x00\x00\x01\x06\x05")) is False
+
+    def test_push_stores_index(self):
+        """Test push_video_frame indexes once and the reader hands the index on"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        reader = service.create_video_track().reader
+        service.push_video_frame(self.AU)
+
+        assert reader.next_access_unit() == self.AU
+        assert [nal_type for _, _, nal_type in reader.last_nals] == [7, 8, 5]
+
+    def test_packetize_au_matches_split(self):
+        """Test packetizing with a precomputed index equals re-indexing"""
+        from app.services.h264_bitstream import index_nals
+        from app.services.webrtc_service import H264PassthroughEncoder
+
+        encoder = H264PassthroughEncoder()
+
+        assert encoder._packetize_au(self.AU, index_nals(self.AU)) == encoder._packetize_au(self.AU)
+
+    def test_stap_a_layout(self):
+        """Test small NALs are aggregated with 16-bit length prefixes"""
         from app.services.webrtc_service import H264PassthroughEncoder
-        import queue
 
-        h264_queue = queue.Queue()
-        encoder = H264PassthroughEncoder(h264_queue, framerate=30)
+        packets = H264PassthroughEncoder()._packetize_au(self.AU)
+
+        assert packets == [b"\x78\x00\x04\x67\x42\x00\x1e\x00\x02\x68\xce\x00\x03\x65\x88\x84"]
+
+
+class TestH264PassthroughBenchmark:
+    """Microbenchmark of the per-access-unit passthrough cost"""
+
+    @staticmethod
+    def _idr_1080p() -> bytes:
+        """SPS/PPS/SEI plus four IDR slices, ~240 KB like a 1080p x264 keyframe"""
+        import random
+
+        rng = random.Random(1080)
+
+        def payload(size):
+            # Emulation prevention guarantees no 00 00 0x inside a NAL
+            return bytes(rng.getrandbits(8) | 1 for _ in range(size))
+
+        start_code = b"\x00\x00\x00\x01"
+        au = start_code + b"\x67" + payload(24) + start_code + b"\x68" + payload(4)
+        au += start_code + b"\x06" + payload(600)
+        for _ in range(4):
+            au += start_code + b"\x65" + payload(60000)
+        return au
+
+    @pytest.mark.slow
+    def test_1080p_idr_index_and_packetize(self):
+        """Measure index + keyframe check + RTP packetization of a 1080p IDR"""
+        from app.services.h264_bitstream import index_nals, is_keyframe
+        from app.services.webrtc_service import PACKET_MAX, H264PassthroughEncoder
+
+        au = self._idr_1080p()
+        encoder = H264PassthroughEncoder()
+
+        latencies = []
+        for _ in range(50):
+            start = time.perf_counter()
+            nals = index_nals(au)
+            assert is_keyframe(nals)
+            packets = encoder._packetize_au(au, nals)
+            latencies.append((time.perf_counter() - start) * 1000)
 
-        frame = MagicMock()
-        frame.pts = 1000
+        assert all(len(packet) <= PACKET_MAX for packet in packets)
+        assert sum(len(packet) for packet in packets) > len(au) - 64
+        avg_latency = sum(latencies) / len(latencies)
+        print(f"\n1080p IDR ({len(au)} bytes, {len(packets)} packets): {avg_latency:.3f}ms per access unit")
+        assert avg_latency < 10, f"Passthrough packetization too slow: {avg_latency}ms"
 
-        initial_count = encoder._frame_count
-        encoder.encode(frame)
 
-        assert encoder._frame_count == initial_count + 1
+class TestH264PassthroughTrack:
+    """Test the event-driven per-peer video track"""
+
+    IDR = b"\x00\x00\x01\x65idr"
+    P = b"\x00\x00\x01\x41p"
+
+    @pytest.fixture
+    def track(self):
+        from app.services import webrtc_service
+
+        # The autouse fixture replaces MediaStreamTrack; use aiortc's real base class
+        if not webrtc_service.AIORTC_AVAILABLE or not hasattr(webrtc_service, "H264PassthroughTrack"):
+            pytest.skip("aiortc not installed")
+        ring = webrtc_service.H264Ring()
+        track = webrtc_service.H264PassthroughTrack(ring.reader())
+        yield ring, track
+        track.stop()
+
+    @pytest.mark.asyncio
+    async def test_recv_wakes_on_push(self, track):
+        """Test recv() returns as soon as an access unit is pushed"""
+        import asyncio
+
+        ring, track = track
+        pending = asyncio.ensure_future(track.recv())
+        await asyncio.sleep(0)
+        assert not pending.done()
+
+        ring.push(self.IDR, is_idr=True, pts_ns=1_000_000_000)
+        packet = await asyncio.wait_for(pending, timeout=1.0)
+
+        assert bytes(packet) == self.IDR
+        assert packet.pts == 0
+
+    @pytest.mark.asyncio
+    async def test_timestamp_follows_gstreamer_pts(self, track):
+        """Test the RTP timestamp is the PTS delta at 90 kHz"""
+        ring, track = track
+        ring.push(self.IDR, is_idr=True, pts_ns=1_000_000_000)
+        ring.push(self.P, is_idr=False, pts_ns=1_040_000_000)
+
+        first = await track.recv()
+        second = await track.recv()
+
+        assert first.pts == 0
+        assert second.pts == 3600  # 40 ms at 90 kHz
+
+    @pytest.mark.asyncio
+    async def test_stop_ends_recv(self, track):
+        """Test a stopped track stops yielding and detaches from the ring"""
+        from aiortc.mediastreams import MediaStreamError
+
+        ring, track = track
+        ring.push(self.IDR, is_idr=True)
+        await track.recv()
+        track.stop()
+
+        assert ring._listeners == []
+        with pytest.raises(MediaStreamError):
+            await track.recv()
+
+
+class TestH264Ring:
+    """Test the per-peer H264 broadcast ring"""
+
+    IDR = b"\x00\x00\x01\x65idr"
+    P = b"\x00\x00\x01\x41p"
+
+    def _push(self, ring, pattern):
+        for kind in pattern:
+            ring.push(self.IDR if kind == "I" else self.P, is_idr=kind == "I")
+
+    def test_every_peer_gets_every_access_unit(self):
+        """Test two readers each see the full stream"""
+        from app.services.webrtc_service import H264Ring
+
+        ring = H264Ring()
+        pilot = ring.reader()
+        spotter = ring.reader()
+        self._push(ring, "IPP")
+
+        assert [pilot.next_access_unit() for _ in range(3)] == [self.IDR, self.P, self.P]
+        assert [spotter.next_access_unit() for _ in range(3)] == [self.IDR, self.P, self.P]
+        assert pilot.next_access_unit() is None
+        assert pilot.get_stats()["frames_sent"] == 3
+
+    def test_new_reader_waits_for_idr(self):
+        """Test a reader joining mid-GOP skips P-frames until an IDR"""
+        from app.services.webrtc_service import H264Ring
+
+        ring = H264Ring()
+        self._push(ring, "IP")
+        reader = ring.reader()
+        self._push(ring, "PPI")
+
+        assert reader.next_access_unit() == self.IDR
+        assert reader.get_stats()["frames_dropped"] == 2
+
+    def test_lagging_reader_skips_to_latest_idr(self):
+        """Test a reader behind by more than max_lag jumps to the newest IDR"""
+        from app.services.webrtc_service import H264Ring
+
+        ring = H264Ring()
+        reader = ring.reader(max_lag=3)
+        self._push(ring, "IPPPPIPP")
+
+        assert reader.next_access_unit() == self.IDR
+        stats = reader.get_stats()
+        assert stats["idr_skips"] == 1
+        assert stats["frames_dropped"] == 5
+        assert stats["lag"] == 2
+
+    def test_lagging_reader_without_idr_requests_keyframe(self):
+        """Test a reader with no IDR ahead resyncs at the live edge and asks for one"""
+        from app.services.webrtc_service import H264Ring
+
+        ring = H264Ring()
+        on_keyframe = MagicMock()
+        reader = ring.reader(max_lag=2, on_keyframe_needed=on_keyframe)
+        self._push(ring, "I")
+        assert reader.next_access_unit() == self.IDR
+        self._push(ring, "PPPP")
+
+        assert reader.next_access_unit() is None
+        on_keyframe.assert_called_once()
+        assert reader.get_stats()["awaiting_idr"] is True
+
+    def test_stale_idr_not_replayed(self):
+        """Test an IDR that is itself past max_lag isn't sent; the reader resyncs at the live edge"""
+        from app.services.webrtc_service import H264Ring
+
+        ring = H264Ring()
+        on_keyframe = MagicMock()
+        reader = ring.reader(max_lag=3, on_keyframe_needed=on_keyframe)
+        self._push(ring, "I")
+        assert reader.next_access_unit() == self.IDR
+        self._push(ring, "PPIPPPPP")  # GOP longer than max_lag: the IDR is 6 behind head
+
+        assert reader.next_access_unit() is None
+        on_keyframe.assert_called_once()
+        stats = reader.get_stats()
+        assert stats["idr_skips"] == 0
+        assert stats["awaiting_idr"] is True
+
+        self._push(ring, "PI")
+        assert reader.next_access_unit() == self.IDR
+        on_keyframe.assert_called_once()
+
+    def test_resync_keyframes_rate_limited_across_peers(self):
+        """Test several peers resyncing at once cost the encoder one IDR"""
+        from app.services.webrtc_service import WebRTCService
+
+        service = WebRTCService()
+        service._gstreamer_service = MagicMock()
+        for _peer in ("pilot", "spotter", "gimbal"):
+            service._request_resync_keyframe()
+
+        service._gstreamer_service.force_keyframe.assert_called_once_with("webrtc_reader")
+        assert service.global_stats["resync_keyframes_suppressed"] == 2
+
+    def test_overwritten_cursor_recovers(self):
+        """Test a reader whose position was overwritten resumes from the ring's IDR"""
+        from app.services.webrtc_service import H264Ring
+
+        ring = H264Ring(size=4)
+        reader = ring.reader(max_lag=10)
+        self._push(ring, "IPPPPIP")
+
+        assert reader.next_access_unit() == self.IDR
+        assert reader.next_access_unit() == self.P
+
+    def test_status_reports_per_peer_video_stats(self):
+        """Test get_status exposes each peer's reader stats"""
+        from app.services.webrtc_service import WebRTCService, H264Ring
+
+        service = WebRTCService()
+        service.create_offer("pilot")
+        service.peers["pilot"].h264_reader = H264Ring().reader()
+
+        peer = service.get_status()["peers"][0]
+        assert peer["video"]["frames_dropped"] == 0
+        assert "lag" in peer["video"]
 
 
 class TestWebRTCAdditionalFeatures:
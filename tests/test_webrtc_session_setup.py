@@ -0,0 +1,127 @@
+"""
+WebRTC Session Setup Benchmark
+
+Offer-to-first-frame time over a real loopback aiortc connection, with
+and without a pre-warmed peer connection, for each ICE mode. The viewer
+is a second aiortc peer that decodes the passthrough H264 stream.
+"""
+
+import asyncio
+import fractions
+import time
+
+import pytest
+
+aiortc = pytest.importorskip("aiortc")
+av = pytest.importorskip("av")
+np = pytest.importorskip("numpy")
+
+
+class _H264Source:
+    """Stands in for GStreamer: libx264 access units pushed at 30 fps"""
+
+    def __init__(self, service):
+        self.service = service
+        self.keyframe = True
+        self.encoder = av.CodecContext.create("libx264", "w")
+        self.encoder.width, self.encoder.height, self.encoder.pix_fmt = 320, 240, "yuv420p"
+        self.encoder.time_base = fractions.Fraction(1, 30)
+        self.encoder.options = {"tune": "zerolatency", "preset": "ultrafast", "bframes": "0", "repeat-headers": "1"}
+
+    def force_keyframe(self, reason="api"):
+        self.keyframe = True
+        return True
+
+    async def run(self):
+        image = np.zeros((240, 320, 3), np.uint8)
+        index = 0
+        while True:
+            image[:] = index % 255
+            frame = av.VideoFrame.from_ndarray(image, format="bgr24").reformat(format="yuv420p")
+            frame.pts = index
+            if self.keyframe:
+                frame.pict_type = av.video.frame.PictureType.I
+                self.keyframe = False
+            for packet in self.encoder.encode(frame):
+                self.service.push_video_frame(bytes(packet), index * 33_333_333)
+            index += 1
+            await asyncio.sleep(1 / 30)
+
+
+async def _offer_to_first_frame(service) -> dict:
+    from aiortc import RTCConfiguration, RTCPeerConnection, RTCSessionDescription
+
+    session = await service.create_peer_connection()
+    viewer = RTCPeerConnection(RTCConfiguration(iceServers=[]))
+    viewer.addTransceiver("video", direction="recvonly")
+    first_frame = asyncio.get_running_loop().create_future()
+
+    @viewer.on("track")
+    def on_track(track):
+        async def _first():
+            await track.recv()
+            if not first_frame.done():
+                first_frame.set_result(time.perf_counter())
+
+        asyncio.ensure_future(_first())
+
+    await viewer.setLocalDescription(await viewer.createOffer())
+    offer_at = time.perf_counter()
+    answer = await service.handle_offer(session["peer_id"], viewer.localDescription.sdp)
+    answer_at = time.perf_counter()
+    await viewer.setRemoteDescription(RTCSessionDescription(answer["sdp"], "answer"))
+    first_frame_at = await asyncio.wait_for(first_frame, timeout=15)
+
+    service.disconnect_peer(session["peer_id"])
+    await viewer.close()
+    return {
+        "prewarmed": session["prewarmed"],
+        "offer_to_answer_ms": (answer_at - offer_at) * 1000,
+        "offer_to_first_frame_ms": (first_frame_at - offer_at) * 1000,
+    }
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_offer_to_first_frame_benchmark():
+    """Measure offer → answer → first decoded frame per ICE mode, cold and pre-warmed"""
+    from app.services.webrtc_service import WebRTCService
+
+    try:
+        av.codec.Codec("libx264", "w")
+    except Exception:
+        pytest.skip("PyAV built without libx264")
+
+    service = WebRTCService(event_loop=asyncio.get_running_loop())
+    source = _H264Source(service)
+    service._gstreamer_service = source
+    service.create_video_track()  # creates the shared ring
+    feeder = asyncio.ensure_future(source.run())
+
+    results = []
+    try:
+        for ice_mode in ("stun", "host"):
+            service.is_active = False
+            service.update_session_config({"ice_mode": ice_mode, "prewarm_pool_size": 0})
+            results.append((ice_mode, await _offer_to_first_frame(service)))
+
+            service.is_active = True
+            service.update_session_config({"prewarm_pool_size": 1})
+            for _ in range(50):
+                if service._prewarm_pool:
+                    break
+                await asyncio.sleep(0.1)
+            results.append((ice_mode, await _offer_to_first_frame(service)))
+    finally:
+        service.is_active = False
+        service._drain_prewarm_pool()
+        feeder.cancel()
+
+    print()
+    for ice_mode, result in results:
+        print(
+            f"ice={ice_mode:<4} {'pre-warmed' if result['prewarmed'] else 'cold':<10} "
+            f"offer→answer {result['offer_to_answer_ms']:7.1f}ms  "
+            f"offer→first frame {result['offer_to_first_frame_ms']:7.1f}ms"
+        )
+    assert all(result["prewarmed"] for _, result in results[1::2])
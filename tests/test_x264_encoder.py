@@ -231,7 +231,7 @@ class TestX264PipelineBuilding:
         assert result["success"] is True
         assert result["rtp_payload_type"] == 96
         assert result["rtp_payloader"] == "rtph264pay"
-        assert len(result["elements"]) == 8  # Updated to 8 elements
+        assert len(result["elements"]) == 9  # decoder + convert, scale, rate, caps, queues, encoder, parse
         assert result["rtp_payloader_properties"]["pt"] == 96
         assert result["rtp_payloader_properties"]["mtu"] == 1400
 